@@ -0,0 +1,77 @@
+#!/usr/bin/env python
+
+#############################################################################
+##
+# This file is part of Taurus
+##
+# http://taurus-scada.org
+##
+# Copyright 2011 CELLS / ALBA Synchrotron, Bellaterra, Spain
+##
+# Taurus is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+##
+# Taurus is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+##
+# You should have received a copy of the GNU Lesser General Public License
+# along with Taurus.  If not, see <http://www.gnu.org/licenses/>.
+##
+#############################################################################
+"""Benchmark of the decoding of the taurus.core.util.codecs.VideoImageCodec.
+
+Decodes synthetic frames of each supported image mode, checks that the
+result is identical to the one of the former (per component) implementation
+and reports the throughput, with and without a reusable output array.
+
+Usage::
+
+    python benchmarks/bench_codecs.py [width [height [nframes]]]
+"""
+
+from __future__ import print_function
+
+__docformat__ = 'restructuredtext'
+
+import sys
+import time
+import numpy
+from taurus.core.util.codecs import CodecFactory
+from taurus.core.util.test.test_codecs import (MODES, make_frame,
+                                               reference_decode)
+
+def bench(decode, frame, nframes):
+    '''returns the time per frame (in s)'''
+    t0 = time.time()
+    for i in xrange(nframes):
+        decode(frame)
+    return (time.time() - t0) / nframes
+
+
+def main(width=1280, height=1024, nframes=20):
+    codec = CodecFactory().getCodec('videoimage')
+    print('%-8s %10s %12s %12s %12s' % ('mode', 'MB/frame', 'old MB/s',
+                                         'new MB/s', 'reuse MB/s'))
+    for mode in sorted(MODES):
+        frame = make_frame(mode, width, height)
+        _, img = codec.decode(('videoimage', frame))
+        ref = reference_decode(frame)
+        if img.dtype != ref.dtype or not numpy.array_equal(img, ref):
+            raise AssertionError('%s output differs' % MODES[mode][0])
+        out = numpy.empty_like(img)
+        mb = len(frame) / 1e6
+        old = bench(reference_decode, frame, nframes)
+        new = bench(lambda f: codec.decode(('videoimage', f)), frame, nframes)
+        reuse = bench(lambda f: codec.decode(('videoimage', f), out=out),
+                      frame, nframes)
+        print('%-8s %10.2f %12.1f %12.1f %12.1f' % (MODES[mode][0], mb,
+                                                     mb / old, mb / new,
+                                                     mb / reuse))
+
+
+if __name__ == '__main__':
+    main(*[int(a) for a in sys.argv[1:]])
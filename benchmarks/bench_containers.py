@@ -0,0 +1,69 @@
+#!/usr/bin/env python
+
+#############################################################################
+##
+# This file is part of Taurus
+##
+# http://taurus-scada.org
+##
+# Copyright 2011 CELLS / ALBA Synchrotron, Bellaterra, Spain
+##
+# Taurus is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+##
+# Taurus is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+##
+# You should have received a copy of the GNU Lesser General Public License
+# along with Taurus.  If not, see <http://www.gnu.org/licenses/>.
+##
+#############################################################################
+
+"""Benchmark of the taurus.core.util.containers array buffers.
+
+Compares the cost of appending to a full :class:`ArrayBuffer` (which moves all
+its contents on each append) with that of a :class:`RingArrayBuffer`.
+
+Usage::
+
+    python benchmarks/bench_containers.py [maxSize [nappends]]
+"""
+
+from __future__ import print_function
+
+__docformat__ = 'restructuredtext'
+
+import sys
+import time
+import numpy
+from taurus.core.util.containers import ArrayBuffer, RingArrayBuffer
+
+
+def bench_append(klass, maxSize, nappends, ncols=None):
+    '''returns the time per append (in s) of appending to a full buffer'''
+    shape = (maxSize,) if ncols is None else (maxSize, ncols)
+    b = klass(numpy.zeros(shape), maxSize=maxSize)
+    b.extend(numpy.zeros(shape))  # fill it
+    x = 1. if ncols is None else numpy.ones(ncols)
+    t0 = time.time()
+    for i in xrange(nappends):
+        b.append(x)
+        b.contents()
+    return (time.time() - t0) / nappends
+
+
+def main(maxSize=100000, nappends=2000):
+    print('%-16s %10s %8s %14s' % ('class', 'maxSize', 'columns', 'us/append'))
+    for ncols in (None, 4):
+        for klass in (ArrayBuffer, RingArrayBuffer):
+            t = bench_append(klass, maxSize, nappends, ncols=ncols)
+            print('%-16s %10i %8i %14.3f' % (klass.__name__, maxSize,
+                                               ncols or 1, t * 1e6))
+
+
+if __name__ == '__main__':
+    main(*[int(a) for a in sys.argv[1:]])
@@ -0,0 +1,157 @@
+#!/usr/bin/env python
+
+#############################################################################
+##
+# This file is part of Taurus
+##
+# http://taurus-scada.org
+##
+# Copyright 2011 CELLS / ALBA Synchrotron, Bellaterra, Spain
+##
+# Taurus is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+##
+# Taurus is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+##
+# You should have received a copy of the GNU Lesser General Public License
+# along with Taurus.  If not, see <http://www.gnu.org/licenses/>.
+##
+#############################################################################
+"""Benchmark of the taurus.core.util.codecs.CodecPipeline.
+
+Encodes and decodes multi-megabyte payloads with some pipelines, checks that
+the result is identical to the one of the former (one codec after the other)
+implementation and reports the throughput and the peak memory of each
+implementation. Each measurement is run in a forked process, so that the
+peak memory (maximum resident set size) is not affected by the others.
+
+Usage::
+
+    python benchmarks/bench_pipelines.py [npoints [repeat]]
+"""
+
+from __future__ import print_function
+
+__docformat__ = 'restructuredtext'
+
+import os
+import sys
+import time
+import resource
+import cPickle
+import numpy
+from taurus.core.util.codecs import CodecFactory
+
+FORMATS = ('json', 'zip_json', 'bz2_json')
+
+
+def make_payloads(npoints):
+    '''returns a dict of payloads of about npoints numbers each'''
+    rs = numpy.random.RandomState(0)
+    return {
+        'floats': rs.normal(size=npoints).tolist(),
+        'ints': rs.randint(0, 1000, npoints).tolist(),
+        'nested': {'x': numpy.arange(npoints // 2).tolist(),
+                   'y': rs.normal(size=npoints // 2).tolist(),
+                   'meta': {'name': u'trend', 'units': u'mm'}},
+    }
+
+
+def reference_encode(codec, data):
+    '''the former implementation of CodecPipeline.encode'''
+    for c in reversed(codec):
+        data = c.encode(data)
+    return data
+
+
+def reference_decode(codec, data):
+    '''the former implementation of CodecPipeline.decode (with
+    ensure_ascii=True)'''
+    for c in codec:
+        data = c.decode(data)
+    return data[0], _transform_ascii(data[1])
+
+
+def _transform_ascii(data):
+    '''the former JSONCodec._transform_ascii'''
+    if isinstance(data, unicode):
+        return data.encode('utf-8')
+    elif isinstance(data, dict):
+        return dict([(_transform_ascii(k), _transform_ascii(v))
+                     for k, v in data.iteritems()])
+    elif isinstance(data, list):
+        return [_transform_ascii(item) for item in data]
+    return data
+
+
+def measure(func, repeat):
+    '''runs func in a forked process and returns the time per call (in s,
+    averaged over repeat calls) and the peak memory increase (in MB) of the
+    first call'''
+    r, w = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        os.close(r)
+        start = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        func()
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - start
+        t0 = time.time()
+        for i in xrange(repeat):
+            func()
+        dt = (time.time() - t0) / repeat
+        with os.fdopen(w, 'wb') as f:
+            cPickle.dump((dt, peak / 1024.), f, -1)
+        os._exit(0)
+    os.close(w)
+    with os.fdopen(r, 'rb') as f:
+        ret = cPickle.load(f)
+    os.waitpid(pid, 0)
+    return ret
+
+
+def compare(name, op, old, new, repeat):
+    '''checks that the old and the new functions return the same (in a
+    forked process, so that the memory of this one is not modified) and
+    measures both'''
+    pid = os.fork()
+    if pid == 0:
+        os._exit(0 if old() == new() else 1)
+    if os.waitpid(pid, 0)[1]:
+        raise AssertionError('%s: %s results differ' % (name, op))
+    return measure(old, repeat) + measure(new, repeat)
+
+
+def main(npoints=1000000, repeat=3):
+    cf = CodecFactory()
+    payloads = make_payloads(npoints)
+    print('%-8s %-9s %-6s %8s %10s %10s %10s %10s' % (
+        'payload', 'format', 'op', 'MB', 'old MB/s', 'new MB/s',
+        'old peak', 'new peak'))
+    for name in sorted(payloads):
+        payload = payloads[name]
+        mb = len(cf.getCodec('json').encode(('', payload))[1]) / 1e6
+        for fmt in FORMATS:
+            codec = cf.getCodec(fmt)
+            old_codec = [codec] if fmt == 'json' else codec  # (no pipeline)
+            enc = codec.encode(('', payload))
+            results = (
+                ('encode',
+                 lambda: reference_encode(old_codec, ('', payload)),
+                 lambda: codec.encode(('', payload))),
+                ('decode',
+                 lambda: reference_decode(old_codec, enc),
+                 lambda: codec.decode(enc, ensure_ascii=True)))
+            for op, old, new in results:
+                old_t, old_m, new_t, new_m = compare(
+                    '%s %s' % (name, fmt), op, old, new, repeat)
+                print('%-8s %-9s %-6s %8.1f %10.1f %10.1f %10.1f %10.1f' % (
+                    name, fmt, op, mb, mb / old_t, mb / new_t, old_m, new_m))
+
+
+if __name__ == '__main__':
+    main(*[int(a) for a in sys.argv[1:]])
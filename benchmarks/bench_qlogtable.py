@@ -0,0 +1,88 @@
+#!/usr/bin/env python
+
+#############################################################################
+##
+# This file is part of Taurus
+##
+# http://taurus-scada.org
+##
+# Copyright 2011 CELLS / ALBA Synchrotron, Bellaterra, Spain
+##
+# Taurus is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+##
+# Taurus is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+##
+# You should have received a copy of the GNU Lesser General Public License
+# along with Taurus.  If not, see <http://www.gnu.org/licenses/>.
+##
+#############################################################################
+"""Benchmark of the taurus.qt.qtgui.table.qlogtable.QLoggingTableModel.
+
+Pushes synthetic log records to a QLoggingTableModel (shown, through the
+filter proxy, in a QLoggingTable) and reports the GUI thread time spent in
+each flush of the pending records.
+
+Usage::
+
+    python benchmarks/bench_qlogtable.py [nrecords [batch]]
+"""
+
+from __future__ import print_function
+
+__docformat__ = 'restructuredtext'
+
+import sys
+import time
+import random
+import logging
+from taurus.external.qt import Qt
+from taurus.qt.qtgui.application import TaurusApplication
+from taurus.qt.qtgui.table.qlogtable import (QLoggingTableModel,
+                                             QLoggingFilterProxyModel,
+                                             QLoggingTable)
+
+
+def make_records(n, nloggers=50, seed=0):
+    '''returns n synthetic log records'''
+    rs = random.Random(seed)
+    levels = (logging.DEBUG, logging.INFO, logging.WARNING, logging.ERROR)
+    names = ['Object%02d' % i for i in range(nloggers)]
+    return [logging.LogRecord(rs.choice(names), rs.choice(levels), __file__,
+                              i, 'log message %07d', (i,), None)
+            for i in xrange(n)]
+
+
+def main(nrecords=1000000, batch=10000, capacity=500000):
+    app = TaurusApplication.instance() or TaurusApplication([])
+    model = QLoggingTableModel(capacity=capacity, freq=3600)
+    logging.getLogger().removeHandler(model)
+    proxy = QLoggingFilterProxyModel()
+    proxy.setSourceModel(model)
+    proxy.setFilterRegExp('^Object0')
+    view = QLoggingTable()
+    view.setModel(proxy)
+    view.setScrollLock(True)
+    view.show()
+    records = make_records(nrecords)
+    times = []
+    for i in xrange(0, nrecords, batch):
+        for record in records[i:i + batch]:
+            model.emit(record)
+        t0 = time.time()
+        model.updatePendingRecords()
+        app.processEvents()
+        times.append(time.time() - t0)
+    print('%i records in batches of %i (capacity %i): %i rows shown' % (
+        nrecords, batch, capacity, proxy.rowCount()))
+    print('GUI time per flush: mean %.1f ms, max %.1f ms' % (
+        1e3 * sum(times) / len(times), 1e3 * max(times)))
+
+
+if __name__ == '__main__':
+    main(*[int(a) for a in sys.argv[1:]])
@@ -0,0 +1,108 @@
+#!/usr/bin/env python
+
+#############################################################################
+##
+# This file is part of Taurus
+##
+# http://taurus-scada.org
+##
+# Copyright 2011 CELLS / ALBA Synchrotron, Bellaterra, Spain
+##
+# Taurus is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+##
+# Taurus is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+##
+# You should have received a copy of the GNU Lesser General Public License
+# along with Taurus.  If not, see <http://www.gnu.org/licenses/>.
+##
+#############################################################################
+"""Load test of the taurus.core.util.remotelogmonitor.LogRecordSocketReceiver.
+
+Several emitter processes send log records through loopback sockets, with a
+logging.handlers.SocketHandler (one pickle per record) and with a
+BatchedSocketHandler, and the sustained number of records per second
+received (and decoded) by the receiver is reported.
+
+Usage::
+
+    python benchmarks/bench_remotelogmonitor.py [nemitters [nrecords]]
+"""
+
+from __future__ import print_function
+
+__docformat__ = 'restructuredtext'
+
+import sys
+import time
+import logging
+import logging.handlers
+import threading
+import multiprocessing
+from taurus.core.util.remotelogmonitor import (LogRecordSocketReceiver,
+                                               LogRecordStreamHandler,
+                                               BatchedSocketHandler)
+
+
+class _CountingHandler(LogRecordStreamHandler):
+
+    def handleLogRecords(self, records):
+        self.server.data['count'][0] += len(records)
+
+    def handleLogRecord(self, record):
+        self.server.data['count'][0] += 1
+
+
+def emit(handler_class, port, i, nrecords):
+    '''sends nrecords log records (in an emitter process)'''
+    handler = handler_class('localhost', port)
+    logger = logging.getLogger('Bench%s%d' % (handler_class.__name__, i))
+    logger.propagate = False
+    logger.setLevel(logging.DEBUG)
+    logger.addHandler(handler)
+    for j in xrange(nrecords):
+        logger.info('log message %d of emitter %d', j, i)
+    handler.close()
+
+
+def bench(handler_class, nemitters, nrecords):
+    '''returns the number of records per second received'''
+    count = [0]
+    receiver = LogRecordSocketReceiver(host='localhost', port=0,
+                                       handler=_CountingHandler, count=count)
+    receiver.timeout = 0.05
+    thread = threading.Thread(target=receiver.serve_until_stopped)
+    thread.start()
+
+    emitters = [multiprocessing.Process(target=emit,
+                                        args=(handler_class, receiver.port,
+                                              i, nrecords))
+                for i in range(nemitters)]
+    t0 = time.time()
+    for t in emitters:
+        t.start()
+    total = nemitters * nrecords
+    while count[0] < total and time.time() - t0 < 300:
+        time.sleep(0.01)
+    dt = time.time() - t0
+    for t in emitters:
+        t.join()
+    receiver.stop()
+    thread.join()
+    return count[0] / dt
+
+
+def main(nemitters=4, nrecords=50000):
+    for klass in (logging.handlers.SocketHandler, BatchedSocketHandler):
+        print('%-20s %d emitters x %d records: %10.0f records/s' % (
+            klass.__name__, nemitters, nrecords,
+            bench(klass, nemitters, nrecords)))
+
+
+if __name__ == '__main__':
+    main(*[int(a) for a in sys.argv[1:]])
@@ -0,0 +1,121 @@
+#!/usr/bin/env python
+
+#############################################################################
+##
+# This file is part of Taurus
+##
+# http://taurus-scada.org
+##
+# Copyright 2011 CELLS / ALBA Synchrotron, Bellaterra, Spain
+##
+# Taurus is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+##
+# Taurus is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+##
+# You should have received a copy of the GNU Lesser General Public License
+# along with Taurus.  If not, see <http://www.gnu.org/licenses/>.
+##
+#############################################################################
+"""Benchmark of the item lookups of the TaurusGraphicsScene.
+
+Generates a scene with many named items (rectangles of random size at random
+positions) and reports the time needed by getItemByName (for device and
+attribute names, the first time and once cached) and by getItemByPosition.
+It also injects a burst of update events (from another thread) and reports
+the number of repaints done by the scene.
+
+Usage::
+
+    python benchmarks/bench_taurusgraphic.py [nitems]
+"""
+
+from __future__ import print_function
+
+__docformat__ = 'restructuredtext'
+
+import sys
+import time
+import random
+import threading
+from taurus.external.qt import Qt
+from taurus.qt.qtgui.application import TaurusApplication
+from taurus.qt.qtgui.graphic import TaurusGraphicsScene, TaurusRectStateItem
+
+
+def make_scene(nitems, size=4000., seed=0):
+    '''returns a scene with nitems named rectangles'''
+    rs = random.Random(seed)
+    scene = TaurusGraphicsScene(strt=False)
+    for i in xrange(nitems):
+        item = TaurusRectStateItem('sys/bench%i/%i/state' % (i % 1000,
+                                                              i // 1000))
+        item.setRect(rs.uniform(0, size), rs.uniform(0, size),
+                     rs.uniform(5, 80), rs.uniform(5, 40))
+        scene.addItem(item)
+    return scene
+
+
+def bench(func, args):
+    '''returns the time per call (in ms)'''
+    t0 = time.time()
+    for a in args:
+        func(*a)
+    return (time.time() - t0) / len(args) * 1e3
+
+
+def main(nitems=20000, nqueries=1000):
+    app = TaurusApplication.instance() or TaurusApplication([])
+    t0 = time.time()
+    scene = make_scene(nitems)
+    print('scene with %i items built in %.1f s' % (nitems, time.time() - t0))
+    rs = random.Random(1)
+    names = [('sys/bench%i/%i' % (rs.randrange(1000),
+                                  rs.randrange(nitems // 1000)),)
+             for i in xrange(nqueries)]
+    print('getItemByName (device, first): %8.4f ms' % bench(
+        scene.getItemByName, names))
+    print('getItemByName (device, cached): %8.4f ms' % bench(
+        scene.getItemByName, names))
+    attrs = [(n + '/state', True) for n, in names]
+    print('getItemByName (attribute, strict): %8.4f ms' % bench(
+        scene.getItemByName, attrs))
+    points = [(rs.uniform(0, 4000), rs.uniform(0, 4000))
+              for i in xrange(nqueries)]
+    print('getItemByPosition: %8.4f ms' % bench(scene.getItemByPosition,
+                                                 points))
+    bench_updates(app, scene)
+
+
+def bench_updates(app, scene, nevents=100000, duration=1.):
+    '''injects nevents item updates (during ~duration s, from another
+    thread) and prints the number of repaints'''
+    items = list(scene._itemIndex)
+    repaints = []
+    scene._repaint = lambda rect: repaints.append(rect)
+    scene.start()
+
+    def produce():
+        rs = random.Random(2)
+        for i in xrange(nevents):
+            scene.updateSceneItem(rs.choice(items))
+            if i % 1000 == 0:
+                time.sleep(duration * 1000 / nevents)
+
+    t = threading.Thread(target=produce)
+    t0 = time.time()
+    t.start()
+    while t.is_alive() or scene.getUpdateStats()['pending']:
+        app.processEvents()
+        time.sleep(.001)
+    print('%i events in %.1f s --> %i repaints %s' % (
+        nevents, time.time() - t0, len(repaints), scene.getUpdateStats()))
+
+
+if __name__ == '__main__':
+    main(*[int(a) for a in sys.argv[1:]])
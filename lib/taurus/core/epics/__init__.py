@@ -61,6 +61,15 @@ Similarly, you can combine epics attributes with attributes from other schemes::
     $> taurusform 'ca:my:example' 'tango:sys/tg_test/1/float_scalar'\
        'eval:{ca:my:example}*{tango:sys/tg_test/1/float_scalar}'
 
+Creating an epics attribute waits for its PV to connect. When many PVs are
+needed at once (e.g. for populating a form), use
+:meth:`EpicsFactory.getAttributes` (or its non-blocking version,
+:meth:`EpicsFactory.getAttributesAsync`), which connects all the PVs
+concurrently with a global timeout::
+
+    >>> f = taurus.Factory('ca')
+    >>> attrs = f.getAttributes(['ca:my:a', 'ca:my:b'], timeout=2)
+
 Currently, the taurus epics scheme just supports epics PVs, implementing them as
 taurus attributes (with configuration objects as well). Other model types
 such as the Authority, and Device classes are just convenience dummy objects in
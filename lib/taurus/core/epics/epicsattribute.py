@@ -81,7 +81,7 @@ class EpicsAttribute(TaurusAttribute):
     """
     # TODO: support non-numerical PVs
 
-    def __init__(self, name, parent, storeCallback=None):
+    def __init__(self, name, parent, storeCallback=None, wait=True):
         self.call__init__(TaurusAttribute, name, parent,
                           storeCallback=storeCallback)
 
@@ -93,10 +93,16 @@ class EpicsAttribute(TaurusAttribute):
         self._alarm = [None, None]
         self._warning = [None, None]
 
+        # the CA callbacks are handled in the dispatcher thread
+        self._dispatcher = self.factory().getEventDispatcher()
+
+        # the channel is created asynchronously. If wait is False, the
+        # listeners are notified when the connection is established
         self.__pv = epics.PV(self.getNormalName(), callback=self.onEpicsEvent,
                              form='ctrl',
                              connection_callback=self.onEpicsConnectionEvent)
-        self.__pv.wait_for_connection()
+        if wait:
+            self.__pv.wait_for_connection()
 
     def getPV(self):
         """Returns the underlying :obj:`epics.PV` object
@@ -105,21 +111,34 @@ class EpicsAttribute(TaurusAttribute):
 
     def onEpicsEvent(self, **kwargs):
         """callback for PV changes"""
-        # this is called from the ca thread.
-        # TODO: Consider doing the following on a different thread
+        # this is called from the ca thread. Decoding and notifying the
+        # listeners is delegated to the dispatcher thread. Pending changes of
+        # this PV are merged (the PV is decoded when the job runs, so the
+        # latest value is always used)
+        self._dispatcher.post((id(self), 'value'), self._processEpicsEvent)
+
+    def _processEpicsEvent(self):
         self._value = self.decode(self.__pv)
         self.fireEvent(TaurusEventType.Change, self._value)
 
     def onEpicsConnectionEvent(self, **kwargs):
         """callback for PV connection changes"""
-        if kwargs['conn']:
+        # this is called from the ca thread. See onEpicsEvent
+        self._dispatcher.post((id(self), 'conn'),
+                              self._processEpicsConnectionEvent,
+                              kwargs['conn'], kwargs['pvname'])
+
+    def _processEpicsConnectionEvent(self, conn, pvname):
+        if conn:
             self.debug('(re)connected to epics PV')
             if self._value is not None:
                 self._value.error = None
         else:
             self.warning('Connection to epics PV lost')
+            if self._value is None:
+                self._value = TaurusAttrValue()
             self._value.error = ChannelAccessException('PV "%s" not connected' %
-                                                       kwargs['pvname'])
+                                                       pvname)
         self.fireEvent(TaurusEventType.Change, self._value)
 
     # ~-~-~-~-~-~-~-~-~-~-~-~-~-~-~-~-~-~-~-~-~-~-~-~-~-~-~-~-~-~-~-~-~-~-~-~-~-
@@ -219,6 +238,9 @@ class EpicsAttribute(TaurusAttribute):
         if not cache:
             self.__pv.get(use_monitor=False)
             self._value = self.decode(self.__pv)
+        elif self._value is None:
+            # no event received yet (e.g. the PV is still connecting)
+            self._value = self.decode(self.__pv)
         return self._value
 
     def poll(self):
@@ -28,7 +28,10 @@ Epics module. See __init__.py for more detailed documentation
 __all__ = ['EpicsFactory']
 
 
+import time
 import weakref
+import threading
+from collections import OrderedDict
 
 from taurus.core.taurusexception import TaurusException
 from taurus.core.util.singleton import Singleton
@@ -48,6 +51,87 @@ except ImportError:
     raise
 
 
+class EpicsEventDispatcher(threading.Thread, Logger):
+    """
+    A daemon thread that runs the jobs posted from the CA callbacks (e.g.,
+    decoding a PV value and notifying the listeners of an attribute) so that
+    the CA thread is never blocked by slow listeners.
+
+    Jobs are posted with a key. If a job with the same key is still pending,
+    it is replaced by the new one (keeping its position in the queue), so
+    that a slow consumer only gets the latest state of each PV instead of an
+    ever-growing backlog.
+    """
+
+    def __init__(self, name='EpicsEventDispatcher', parent=None):
+        threading.Thread.__init__(self, name=name)
+        Logger.__init__(self, name, parent)
+        self.daemon = True
+        self._cond = threading.Condition()
+        self._pending = OrderedDict()
+        self._busy = False
+
+    def post(self, key, job, *args, **kwargs):
+        """Queues a job to be run in the dispatcher thread.
+
+        :param key: (object) hashable key identifying the job. A pending job
+                    with the same key is replaced by this one
+        :param job: (callable) the job
+        :param args: positional arguments for the job
+        :param kwargs: keyword arguments for the job
+        """
+        with self._cond:
+            self._pending[key] = (job, args, kwargs)
+            self._cond.notify()
+
+    def pendingCount(self):
+        """Returns the number of jobs waiting to be run"""
+        with self._cond:
+            return len(self._pending)
+
+    def waitIdle(self, timeout=None):
+        """Blocks until all the posted jobs have been run.
+
+        :param timeout: (float) maximum time (in s) to wait. None means wait
+                        forever
+
+        :return: (bool) True if the dispatcher is idle, False if the timeout
+                 expired
+        """
+        deadline = None if timeout is None else time.time() + timeout
+        with self._cond:
+            while self._pending or self._busy:
+                if deadline is None:
+                    self._cond.wait()
+                else:
+                    remaining = deadline - time.time()
+                    if remaining <= 0:
+                        return False
+                    self._cond.wait(remaining)
+        return True
+
+    def run(self):
+        try:
+            # jobs may need to access the PVs from this thread
+            epics.ca.use_initial_context()
+        except Exception:
+            self.debug('Cannot attach to the initial CA context',
+                       exc_info=1)
+        while True:
+            with self._cond:
+                self._busy = False
+                self._cond.notify_all()
+                while not self._pending:
+                    self._cond.wait()
+                _, (job, args, kwargs) = self._pending.popitem(last=False)
+                self._busy = True
+            try:
+                job(*args, **kwargs)
+            except Exception:
+                self.warning('Uncaught exception running "%s"', job,
+                             exc_info=1)
+
+
 class EpicsFactory(Singleton, TaurusFactory, Logger):
     """
     A Singleton class that provides Epics related objects.
@@ -57,6 +141,9 @@ class EpicsFactory(Singleton, TaurusFactory, Logger):
     DEFAULT_DEVICE = 'ca:'
     DEFAULT_AUTHORITY = 'ca://'
     caseSensitive = False
+    #: default maximum time (in s) that :meth:`getAttributes` waits for all
+    #: the PVs to connect
+    DEFAULT_CONNECTION_TIMEOUT = 5.0
     elementTypesMap = {TaurusElementType.Authority: EpicsAuthority,
                        TaurusElementType.Device: EpicsDevice,
                        TaurusElementType.Attribute: EpicsAttribute
@@ -73,6 +160,23 @@ class EpicsFactory(Singleton, TaurusFactory, Logger):
         self.call__init__(TaurusFactory)
         self.epics_attrs = weakref.WeakValueDictionary()
         self.epics_devs = weakref.WeakValueDictionary()
+        self._dispatcher = None
+        self._dispatcher_lock = threading.Lock()
+        # protects the get-or-create of the attributes (which may be done
+        # from several threads, see getAttributesAsync)
+        self._attrs_lock = threading.Lock()
+
+    def getEventDispatcher(self):
+        """Returns the dispatcher used by the epics attributes for handling
+        the CA callbacks out of the CA thread. It is started on first use.
+
+        :return: (EpicsEventDispatcher)
+        """
+        with self._dispatcher_lock:
+            if self._dispatcher is None:
+                self._dispatcher = EpicsEventDispatcher(parent=self)
+                self._dispatcher.start()
+            return self._dispatcher
 
     def getAuthority(self, name=None):
         """Obtain the Epics (ca) authority object.
@@ -131,13 +235,116 @@ class EpicsFactory(Singleton, TaurusFactory, Logger):
         if names is None:
             raise TaurusException(
                 "Invalid epics attribute name %s" % attr_name)
-        fullname = names[0]
-        a = self.epics_attrs.get(fullname, None)
-        if a is None:  # if the full name is not there, create one
-            a = EpicsAttribute(fullname, parent=None)  # note: no parent!
-            self.epics_attrs[fullname] = a
+        a, created = self._getOrCreateAttribute(names[0])
+        if created:
+            a.getPV().wait_for_connection()
         return a
 
+    def _getOrCreateAttribute(self, fullname):
+        """returns the attribute of the given full name, creating it (without
+        waiting for its PV to connect) if it does not exist
+
+        :param fullname: (str) the full name of the attribute
+
+        :return: (tuple<EpicsAttribute, bool>) the attribute and whether it
+                 was created
+        """
+        with self._attrs_lock:
+            a = self.epics_attrs.get(fullname, None)
+            if a is not None:
+                return a, False
+            # note: no parent!
+            a = EpicsAttribute(fullname, parent=None, wait=False)
+            self.epics_attrs[fullname] = a
+            return a, True
+
+    def getAttributes(self, attr_names, timeout=None):
+        """Obtain the attributes corresponding to the given names, connecting
+        their PVs concurrently. Unlike calling :meth:`getAttribute` for each
+        name (which waits for each PV in series), all the channels are
+        created first and then waited for with a global deadline, so the total
+        time is bounded by `timeout` regardless of the number of PVs or of
+        how many of them are disconnected.
+
+        PVs that did not connect before the deadline are still returned as
+        attributes: they will notify their listeners when (and if) the
+        connection is established.
+
+        :param attr_names: (seq<str>) attribute names
+        :param timeout: (float) maximum time (in s) to wait for all the PVs
+                        to connect. If None, :attr:`DEFAULT_CONNECTION_TIMEOUT`
+                        is used
+
+        :return: (list<EpicsAttribute>) attributes, in the same order as
+                 `attr_names`
+
+        @throws TaurusException if any of the given names is invalid.
+        """
+        if timeout is None:
+            timeout = self.DEFAULT_CONNECTION_TIMEOUT
+        validator = self.getAttributeNameValidator()
+        ret, created = [], []
+        for attr_name in attr_names:
+            names = validator.getNames(attr_name)
+            if names is None:
+                raise TaurusException(
+                    "Invalid epics attribute name %s" % attr_name)
+            a, new = self._getOrCreateAttribute(names[0])
+            if new:
+                created.append(a)
+            ret.append(a)
+
+        deadline = time.time() + timeout
+        for a in created:
+            pv = a.getPV()
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                break
+            pv.wait_for_connection(timeout=remaining)
+        nc = len([a for a in created if not a.getPV().connected])
+        if nc:
+            self.info('%d out of %d PVs not connected after %gs', nc,
+                      len(created), timeout)
+        return ret
+
+    def getAttributesAsync(self, attr_names, callback, timeout=None):
+        """Non-blocking version of :meth:`getAttributes`. The attributes are
+        obtained in a (daemon) worker thread and passed to `callback` once
+        all their PVs are connected (or the timeout expired).
+
+        The callback is always called, with two arguments: the list of
+        attributes (None if there was an error) and the exception raised
+        while getting them (None if there was no error)
+
+        .. note:: `callback` is called from the worker thread.
+
+        :param attr_names: (seq<str>) attribute names
+        :param callback: (callable) called as callback(attrs, error)
+        :param timeout: (float) see :meth:`getAttributes`
+
+        :return: (threading.Thread) the worker thread
+        """
+        attr_names = list(attr_names)
+
+        def run():
+            try:
+                attrs = self.getAttributes(attr_names, timeout=timeout)
+            except Exception as e:
+                self.debug('Cannot get attributes %s', attr_names, exc_info=1)
+                attrs, error = None, e
+            else:
+                error = None
+            try:
+                callback(attrs, error)
+            except Exception:
+                self.warning('Uncaught exception in callback "%s"', callback,
+                             exc_info=1)
+
+        worker = threading.Thread(target=run, name='EpicsGetAttributes')
+        worker.daemon = True
+        worker.start()
+        return worker
+
     def getAuthorityNameValidator(self):
         """Return EpicsAuthorityNameValidator"""
         import epicsvalidator
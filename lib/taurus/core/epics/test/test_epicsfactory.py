@@ -0,0 +1,187 @@
+#!/usr/bin/env python
+
+#############################################################################
+##
+# This file is part of Taurus
+##
+# http://taurus-scada.org
+##
+# Copyright 2011 CELLS / ALBA Synchrotron, Bellaterra, Spain
+##
+# Taurus is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+##
+# Taurus is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+##
+# You should have received a copy of the GNU Lesser General Public License
+# along with Taurus.  If not, see <http://www.gnu.org/licenses/>.
+##
+#############################################################################
+
+"""Test for epicsfactory..."""
+
+import os
+import time
+import threading
+import subprocess
+from taurus.external import unittest
+import taurus
+from taurus.test import getResourcePath
+from taurus.core.taurusbasetypes import TaurusEventType
+from taurus.core.taurusexception import TaurusException
+from taurus.core.epics.epicsfactory import EpicsEventDispatcher
+
+
+class EpicsEventDispatcherTestCase(unittest.TestCase):
+    """TestCase for the EpicsEventDispatcher"""
+
+    def setUp(self):
+        self.dispatcher = EpicsEventDispatcher(name='TestDispatcher')
+        self.dispatcher.start()
+
+    def test_pending_jobs_are_merged(self):
+        """jobs posted with the same key while pending are merged"""
+        gate = threading.Event()
+        done = []
+        self.dispatcher.post('block', gate.wait)
+        for i in range(1000):
+            self.dispatcher.post('a', done.append, ('a', i))
+            self.dispatcher.post('b', done.append, ('b', i))
+        self.assertEqual(self.dispatcher.pendingCount(), 2)
+        gate.set()
+        self.assertTrue(self.dispatcher.waitIdle(timeout=5))
+        # only the latest job of each key is run, in posting order
+        self.assertEqual(done, [('a', 999), ('b', 999)])
+
+    def test_post_does_not_block(self):
+        """posting does not wait for slow jobs"""
+        gate = threading.Event()
+        self.dispatcher.post('slow', gate.wait)
+        t0 = time.time()
+        for i in range(100):
+            self.dispatcher.post(i, time.sleep, 0.01)
+        self.assertLess(time.time() - t0, 0.5)
+        gate.set()
+        self.assertTrue(self.dispatcher.waitIdle(timeout=10))
+
+
+class EpicsFactoryTestCase(unittest.TestCase):
+    """TestCase for the bulk connection API of the EpicsFactory"""
+    _process = None
+
+    @classmethod
+    def setUpClass(cls):
+        """Run the epics_test softIoc"""
+        db_name = getResourcePath(
+            'taurus.core.epics.test.res', 'epics_test.db')
+        args = ['softIoc', '-m', 'INST=bulk', '-d', db_name]
+        dev_null = open(os.devnull, 'wb')
+        cls._process = subprocess.Popen(args, stdout=dev_null, stderr=dev_null)
+
+    @classmethod
+    def tearDownClass(cls):
+        """Terminate the epics_test softIoc process"""
+        if cls._process:
+            cls._process.terminate()
+        else:
+            taurus.warning('Process not started, cannot terminate it.')
+
+    def test_getAttributes(self):
+        """getAttributes honours a global deadline for disconnected PVs"""
+        f = taurus.Factory('ca')
+        names = ['ca:bulk:a', 'ca:bulk:b', 'ca:bulk:sum']
+        missing = ['ca:bulk:missing%d' % i for i in range(20)]
+        t0 = time.time()
+        attrs = f.getAttributes(names + missing, timeout=1.)
+        # with serial connection this would take ~20 x the PV timeout
+        self.assertLess(time.time() - t0, 3.)
+        self.assertEqual([a.getFullName() for a in attrs[:3]],
+                         [taurus.Attribute(n).getFullName() for n in names])
+        for a in attrs[:3]:
+            self.assertTrue(a.getPV().connected)
+            self.assertIsNone(a.read().error)
+        for a in attrs[3:]:
+            self.assertFalse(a.getPV().connected)
+            self.assertIsNotNone(a.read().error)
+
+    def test_getAttributesAsync(self):
+        """getAttributesAsync does not block the caller"""
+        f = taurus.Factory('ca')
+        got = []
+        done = threading.Event()
+
+        def cb(attrs, error):
+            got.append((attrs, error))
+            done.set()
+
+        f.getAttributesAsync(['ca:bulk:a', 'ca:bulk:nothere'], cb,
+                             timeout=1.)
+        self.assertTrue(done.wait(5))
+        attrs, error = got[0]
+        self.assertIsNone(error)
+        self.assertEqual(len(attrs), 2)
+        self.assertTrue(attrs[0].getPV().connected)
+
+    def test_getAttributesAsync_error(self):
+        """the callback of getAttributesAsync gets the errors"""
+        f = taurus.Factory('ca')
+        got = []
+        done = threading.Event()
+
+        def cb(attrs, error):
+            got.append((attrs, error))
+            done.set()
+
+        f.getAttributesAsync(['ca:bulk:a', 'ca://bulk:a'], cb)
+        self.assertTrue(done.wait(5))
+        attrs, error = got[0]
+        self.assertIsNone(attrs)
+        self.assertIsInstance(error, TaurusException)
+
+    def test_concurrent_getAttribute(self):
+        """concurrent requests of a new attribute get the same object"""
+        f = taurus.Factory('ca')
+        got = []
+        start = threading.Event()
+
+        def get():
+            start.wait()
+            got.append(f.getAttributes(['ca:bulk:concurrent'],
+                                       timeout=.1)[0])
+
+        threads = [threading.Thread(target=get) for _ in range(10)]
+        for th in threads:
+            th.start()
+        start.set()
+        for th in threads:
+            th.join()
+        self.assertEqual(len(got), 10)
+        for a in got:
+            self.assertIs(a, got[0])
+
+    def test_events_out_of_ca_thread(self):
+        """listeners are notified from the dispatcher thread"""
+        a = taurus.Factory('ca').getAttributes(['ca:bulk:b'])[0]
+        threads = []
+
+        def listener(src, evt_type, evt_value):
+            if evt_type == TaurusEventType.Change:
+                threads.append(threading.current_thread())
+
+        a.addListener(listener)
+        a.write(2.)
+        f = taurus.Factory('ca')
+        self.assertTrue(f.getEventDispatcher().waitIdle(timeout=5))
+        a.removeListener(listener)
+        self.assertTrue(threads)
+        for th in threads:
+            self.assertIsInstance(th, EpicsEventDispatcher)
+
+
+if __name__ == '__main__':
+    unittest.main()
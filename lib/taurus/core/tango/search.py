@@ -30,7 +30,13 @@ These methods have been borrowed from fandango modules.
 """
 
 import re
+import sys
+import time
+import threading
+
 import taurus
+from taurus.core.util.log import Logger
+from taurus.core.util.threadpool import ThreadPool
 
 ###############################################################################
 # Utils
@@ -65,6 +71,52 @@ def extend_regexp(s):
     return s
 
 
+def get_required_literal(regexp):
+    """returns the longest text which must be contained (lower-cased) by any
+    string matched by the given regular expression (e.g. for filtering the
+    candidates before matching them), or '' if it cannot be known
+
+    :param regexp: (str) the regular expression (e.g. from extend_regexp)
+
+    :return: (str)
+    """
+    regexp = str(regexp).lower()
+    if '|' in regexp or '(' in regexp:
+        return ''
+    runs, run, i = [], '', 0
+    while i < len(regexp):
+        c = regexp[i]
+        if c == '\\':
+            i += 1
+            if i < len(regexp) and not regexp[i].isalnum():
+                c = regexp[i]
+            else:
+                c = None  # (a class of chars, such as \d)
+        elif c == '[':
+            end = regexp.find(']', i + 2)
+            if end < 0:
+                return ''
+            c, i = None, end
+        elif c in '*?{':
+            # (the previous char is optional)
+            run = run[:-1]
+            if c == '{':
+                i = regexp.find('}', i)
+                if i < 0:
+                    return ''
+            c = None
+        elif c in '.^$+':
+            c = None
+        if c is None:
+            runs.append(run)
+            run = ''
+        else:
+            run += c
+        i += 1
+    runs.append(run)
+    return max(runs, key=len)
+
+
 def isString(s):
     typ = s.__class__.__name__.lower()
     return not hasattr(s, '__iter__') and 'str' in typ and 'list' not in typ
@@ -144,3 +196,437 @@ def get_alias_for_device(dev):
 def get_alias_dict(exp='*'):
     tango = taurus.Authority()
     return dict((k, tango.get_device_alias(k)) for k in tango.get_device_alias_list(exp))
+
+
+###############################################################################
+# Model discovery
+
+_patterns = {}
+
+
+def _compile(pattern):
+    '''returns the compiled (lower-cased) pattern, reusing it if it was
+    already compiled'''
+    regexp = _patterns.get(pattern)
+    if regexp is None:
+        regexp = _patterns[pattern] = re.compile(pattern.lower())
+    return regexp
+
+
+class ModelDiscovery(Logger):
+    '''Finds the attribute models matching a list of expressions (e.g. for a
+    TaurusGrid), reading the attribute lists of several devices in parallel
+    (with a :class:`taurus.core.util.threadpool.ThreadPool`).
+
+    The models are found in the same order as if the devices were queried
+    one after another, and the search stops as soon as *limit* models are
+    found. The models can be passed to a callback as they are found (e.g. to
+    show them progressively) and the search can be cancelled.
+
+    Example::
+
+        discovery = ModelDiscovery(['sys/tg_test/*/*_scalar'], limit=100)
+        discovery.start(callback=showModels, finished=searchDone)
+        ...
+        discovery.cancel()  # e.g. if the widget is closed
+        ...
+        models = discovery.wait()
+    '''
+
+    def __init__(self, expressions, limit=1000, workers=8, attrFilter=None,
+                 authority=None, getDevice=None):
+        '''
+        :param expressions: (seq<str>) device names or patterns, optionally
+                            followed by an attribute name or pattern (e.g.
+                            "sr/vc/.*" or "sr/vc/.*/p.*"). The State
+                            attribute is used if no attribute is given
+        :param limit: (int or None) maximum number of models (None for no
+                      limit)
+        :param workers: (int) number of devices queried in parallel
+        :param attrFilter: (callable or None) function which receives the
+                           info of an attribute (from attribute_list_query)
+                           and returns False if it must be discarded
+        :param authority: (object or None) the authority with the exported
+                          devices (None for the default one)
+        :param getDevice: (callable or None) function which returns a device
+                          from its name (None for the devices of the default
+                          factory)
+        '''
+        Logger.__init__(self, 'ModelDiscovery')
+        self._expressions = [str(e) for e in expressions]
+        self._limit = limit
+        self._workers = max(1, int(workers))
+        self._attrFilter = attrFilter
+        self._authority = authority
+        self._getDevice = getDevice
+        self._lock = threading.RLock()
+        self._done = threading.Event()
+        self._pool = None
+        self._callback = None
+        self._finished = None
+        self._cancelled = False
+        self._error = None
+        self._models = []
+        # the models of each device (or expression) which are not
+        # passed yet, by their position in the search
+        self._results = {}
+        # position of the next results to be passed (and number of results)
+        self._next = 0
+        self._total = None
+
+    def start(self, callback=None, finished=None):
+        '''starts the search (in background threads)
+
+        :param callback: (callable or None) function called with the list of
+                         the models found (in order) each time that some are
+                         found. It is called from the threads of the search
+        :param finished: (callable or None) function called (without
+                         arguments) when the search finishes, fails (see
+                         :meth:`getError`) or is cancelled. It is called from
+                         the threads of the search
+        '''
+        with self._lock:
+            if self._pool is not None:
+                raise RuntimeError('The search was already started')
+            self._callback = callback
+            self._finished = finished
+            self._pool = ThreadPool(name='ModelDiscovery', parent=self,
+                                    Psize=self._workers, Qsize=0)
+            self._pool.add(self._expand)
+
+    def run(self):
+        '''searches the models (and waits until they are found)
+
+        :return: (list<str>) the models
+        '''
+        self.start()
+        return self.wait()
+
+    def wait(self, timeout=None):
+        '''waits until the search finishes
+
+        :param timeout: (float or None) maximum time to wait (in seconds)
+
+        :return: (list<str>) the models found (so far)
+        '''
+        self._done.wait(timeout)
+        return self.getModels()
+
+    def cancel(self):
+        '''stops the search (the models found so far are kept)'''
+        with self._lock:
+            self._cancelled = True
+            self._finish()
+
+    def isCancelled(self):
+        return self._cancelled
+
+    def getError(self):
+        '''returns the error which made the search fail (e.g. if the
+        exported devices could not be read), if any
+
+        :return: (Exception or None)
+        '''
+        return self._error
+
+    def isFinished(self):
+        return self._done.is_set()
+
+    def getModels(self):
+        '''returns the models found (so far)
+
+        :return: (list<str>)
+        '''
+        with self._lock:
+            return list(self._models)
+
+    def _expand(self):
+        '''finds the devices matching the expressions, queueing the queries
+        of their attributes'''
+        try:
+            db = self._authority or taurus.Authority()
+            if 'SimulationAuthority' in str(type(db)):
+                for i, exp in enumerate(self._expressions):
+                    self._setResult(i, [exp])
+                self._setTotal(len(self._expressions))
+                return
+            all_devs = None
+            pos = 0
+            for exp in self._expressions:
+                if exp.count('/') == 3:
+                    device, attribute = exp.rsplit('/', 1)
+                else:
+                    device, attribute = exp, 'State'
+                if is_regexp(device):
+                    if all_devs is None:
+                        all_devs = db.get_device_exported('*')
+                    if '*' in device and '.*' not in device:
+                        device = device.replace('*', '.*')
+                    match = _compile(device).match
+                    devs = [d for d in all_devs if match(d.lower())]
+                else:
+                    devs = [device]
+                attrRegexp = None
+                if is_regexp(attribute):
+                    if '*' in attribute and '.*' not in attribute:
+                        attribute = attribute.replace('*', '.*')
+                    attrRegexp = _compile(attribute)
+                for dev in devs:
+                    if self._done.is_set():
+                        return
+                    if attrRegexp is None:
+                        self._setResult(pos, [dev + '/' + attribute])
+                    else:
+                        self._pool.add(self._query, None, pos, dev,
+                                       attrRegexp)
+                    pos += 1
+            self._setTotal(pos)
+        except:
+            self.warning('Unable to find the models of %s',
+                         self._expressions)
+            self.debug('Details:', exc_info=1)
+            self._error = sys.exc_info()[1]
+            self._finish()
+
+    def _query(self, pos, dev, attrRegexp):
+        '''finds the attributes of a device matching a pattern'''
+        if self._done.is_set():
+            return
+        models = []
+        try:
+            if self._getDevice is None:
+                manager = taurus.core.taurusmanager.TaurusManager()
+                device = manager.getFactory()().getDevice(dev)
+            else:
+                device = self._getDevice(dev)
+            attrFilter = self._attrFilter
+            for att in device.attribute_list_query():
+                if attrRegexp.match(att.name.lower()) and \
+                        (attrFilter is None or attrFilter(att)):
+                    models.append(dev + '/' + att.name)
+        except:
+            self.debug('Unable to get the attributes of %s', dev, exc_info=1)
+        self._setResult(pos, models)
+
+    def _setResult(self, pos, models):
+        with self._lock:
+            if self._done.is_set():
+                return
+            results = self._results
+            results[pos] = models
+            found = []
+            while self._next in results:
+                found.extend(results.pop(self._next))
+                self._next += 1
+            if self._limit is not None:
+                found = found[:self._limit - len(self._models)]
+            if found:
+                self._models.extend(found)
+                if self._callback is not None:
+                    self._callback(found)
+            if self._next == self._total or (self._limit is not None and
+                                             len(self._models) >= self._limit):
+                self._finish()
+
+    def _setTotal(self, total):
+        with self._lock:
+            self._total = total
+            if self._next == total:
+                self._finish()
+
+    def _finish(self):
+        with self._lock:
+            if self._done.is_set():
+                return
+            self._done.set()
+            if self._pool is not None:
+                # (the pending queries are discarded, see _query)
+                self._pool.accept = False
+                self._pool.size = 0
+            if self._finished is not None:
+                self._finished()
+
+
+###############################################################################
+# Attribute lists
+
+
+class AttributeListLoader(Logger):
+    '''Reads the attribute lists of devices (with attribute_list_query) in
+    background threads, e.g. for showing the attributes of the devices of a
+    tree.
+
+    The devices requested at once are queried in parallel, the requests of a
+    device which is already being queried are merged with the pending query
+    (so that each device is only queried once), and the attribute lists are
+    cached for *ttl* seconds.
+
+    Example::
+
+        loader = AttributeListLoader(ttl=60)
+        loader.request(['sys/tg_test/1', 'sys/database/2'], callback=show)
+        ...
+        attrs = loader.getAttributes('sys/tg_test/1')  # (blocking)
+    '''
+
+    def __init__(self, ttl=60, workers=4, timeout=None, getProxy=None):
+        '''
+        :param ttl: (float) time (in seconds) during which the attribute list
+                    of a device is taken from the cache
+        :param workers: (int) number of devices queried in parallel
+        :param timeout: (int or None) timeout of the queries (in ms). None
+                        for the default timeout of the device proxies
+        :param getProxy: (callable or None) function which returns the proxy
+                         of a device from its name (None for a
+                         PyTango.DeviceProxy)
+        '''
+        Logger.__init__(self, 'AttributeListLoader')
+        self._ttl = ttl
+        self._workers = max(1, int(workers))
+        self._timeout = timeout
+        self._getProxy = getProxy or self._getDeviceProxy
+        self._lock = threading.RLock()
+        self._pool = None
+        # dict<str, tuple<float, list>>: the attribute lists of the devices
+        # (by lower-cased name) and the time when they were read
+        self._cache = {}
+        # dict<str, list<callable>>: the callbacks of the pending queries
+        self._pending = {}
+        self._queries = 0
+
+    def _getDeviceProxy(self, device):
+        import PyTango
+        proxy = PyTango.DeviceProxy(device)
+        if self._timeout is not None:
+            proxy.set_timeout_millis(self._timeout)
+        return proxy
+
+    def getQueryCount(self):
+        '''returns the number of queries done (i.e. of attribute lists not
+        taken from the cache nor merged with a pending query)
+
+        :return: (int)
+        '''
+        return self._queries
+
+    def getCached(self, device):
+        '''returns the cached attribute list of a device (if it did not
+        expire)
+
+        :param device: (str) the device name
+
+        :return: (list or None) the attribute infos or None if not cached
+        '''
+        with self._lock:
+            entry = self._cache.get(device.lower())
+        if entry is None or time.time() - entry[0] >= self._ttl:
+            return None
+        return entry[1]
+
+    def isPending(self, device):
+        '''returns True if the device is being queried
+
+        :param device: (str) the device name
+
+        :return: (bool)
+        '''
+        with self._lock:
+            return device.lower() in self._pending
+
+    def invalidate(self, devices=None):
+        '''removes the cached attribute lists of the given devices (None for
+        all the devices)
+
+        :param devices: (seq<str> or None) the device names
+        '''
+        with self._lock:
+            if devices is None:
+                self._cache.clear()
+            else:
+                for device in devices:
+                    self._cache.pop(device.lower(), None)
+
+    def request(self, devices, callback=None):
+        '''requests the attribute lists of the given devices. The cached
+        lists are passed to the callback immediately, and the others are
+        passed when they are read (from the threads of the loader).
+
+        :param devices: (seq<str>) the device names
+        :param callback: (callable or None) function called with the device
+                         name, its attribute list (or None) and the exception
+                         raised when reading it (or None)
+
+        :return: (int) number of new queries (the devices which are neither
+                 cached nor already being queried)
+        '''
+        cached, new = [], []
+        with self._lock:
+            for device in devices:
+                attrs = self.getCached(device)
+                if attrs is not None:
+                    cached.append((device, attrs))
+                    continue
+                key = device.lower()
+                callbacks = self._pending.get(key)
+                if callbacks is None:
+                    callbacks = self._pending[key] = []
+                    new.append(device)
+                if callback is not None:
+                    callbacks.append(callback)
+            if new and self._pool is None:
+                self._pool = ThreadPool(name='AttributeListLoader',
+                                        parent=self, Psize=self._workers,
+                                        Qsize=0)
+            for device in new:
+                self._queries += 1
+                self._pool.add(self._query, None, device)
+        if callback is not None:
+            for device, attrs in cached:
+                callback(device, attrs, None)
+        return len(new)
+
+    def getAttributes(self, device, timeout=None):
+        '''returns the attribute list of a device, waiting for it if it is
+        not cached
+
+        :param device: (str) the device name
+        :param timeout: (float or None) maximum time to wait (in seconds)
+
+        :return: (list) the attribute infos
+
+        :raises: the exception raised when reading it (or RuntimeError if the
+                 timeout expired)
+        '''
+        done = threading.Event()
+        result = []
+
+        def callback(device, attrs, error):
+            result.extend((attrs, error))
+            done.set()
+
+        self.request([device], callback)
+        done.wait(timeout)
+        if not result:
+            raise RuntimeError('Timeout reading the attributes of %s' %
+                               device)
+        if result[1] is not None:
+            raise result[1]
+        return result[0]
+
+    def _query(self, device):
+        attrs = error = None
+        try:
+            attrs = list(self._getProxy(device).attribute_list_query())
+        except Exception, e:
+            self.debug('Unable to get the attributes of %s', device,
+                       exc_info=1)
+            error = e
+        with self._lock:
+            callbacks = self._pending.pop(device.lower(), [])
+            if error is None:
+                self._cache[device.lower()] = time.time(), attrs
+        for callback in callbacks:
+            try:
+                callback(device, attrs, error)
+            except:
+                self.warning('Error in callback of %s', device, exc_info=1)
@@ -673,6 +673,9 @@ class TangoAuthority(TaurusAuthority):
         self.dbObj = Database(*pars)
         self._dbProxy = None
         self._dbCache = None
+        # class of each device (None for unknown devices)
+        self._devClasses = CaselessDict()
+        self._hasMySqlSelect = None
 
         complete_name = "tango://%s:%s" % (host, port)
         self.call__init__(TaurusAuthority, complete_name, parent)
@@ -743,6 +746,83 @@ class TangoAuthority(TaurusAuthority):
 
     def refreshCache(self):
         self.cache().refresh()
+        self._devClasses.clear()
+
+    def getDeviceClass(self, devname, cache=True):
+        """
+        Reimplemented from :class:`TaurusAuthority` to read it from the
+        database (which, unlike the DeviceProxy.info() of the device, does not
+        require the device to be running) and to cache it.
+
+        :param devname: (str) the device name (or alias, or full name)
+        :param cache: (bool) if False, the class is read from the database
+                      even if it is cached
+
+        :return: (str or None) the device class (None if unknown)
+        """
+        return self.getDeviceClasses([devname], cache=cache)[devname]
+
+    def getDeviceClasses(self, devnames, cache=True):
+        """
+        Reimplemented from :class:`TaurusAuthority` to read, in one database
+        query, the classes which are not cached yet (see
+        :meth:`getDeviceClass`).
+
+        :param devnames: (seq<str>) the device names (or aliases, or full
+                         names)
+        :param cache: (bool) if False, the classes are read from the database
+                      even if they are cached
+
+        :return: (dict<str,str>) the class (or None) of each device name
+        """
+        slashnames = {}
+        for name in devnames:
+            slashnames[name] = self.__getSlashName(name)
+        classes = self._devClasses
+        missing = set([n for n in slashnames.values() if n is not None and
+                       not (cache and n in classes)])
+        if missing:
+            classes.update(self.__readDeviceClasses(sorted(missing)))
+        return dict([(name, None if n is None else classes.get(n))
+                     for name, n in slashnames.items()])
+
+    def __getSlashName(self, name):
+        # the domain/family/member name from the full name or alias
+        parts = name.rsplit('/', 3)
+        if len(parts) >= 3:
+            return '/'.join(parts[-3:])
+        try:
+            return self.getElementFullName(name)
+        except Exception:
+            return None
+
+    def __readDeviceClasses(self, slashnames):
+        classes = CaselessDict([(name, None) for name in slashnames])
+        if self._dbCache is not None:
+            for name in slashnames:
+                info = self._dbCache.getDevice(name)
+                if info is not None:
+                    classes[name] = info.klass().name()
+            return classes
+        if self._hasMySqlSelect is None:
+            self._hasMySqlSelect = hasattr(Device(self.dev_name()),
+                                           'DbMySqlSelect')
+        # (the names which cannot be quoted in a query are read one by one)
+        quotable = [n for n in slashnames if not ("'" in n or '\\' in n)]
+        if not self._hasMySqlSelect:
+            quotable = []
+        for i in xrange(0, len(quotable), 100):
+            query = ("SELECT name, class FROM device WHERE name IN (%s)" %
+                     ', '.join(["'%s'" % n for n in quotable[i:i + 100]]))
+            data = self.command_inout("DbMySqlSelect", query)[1]
+            for j in xrange(0, len(data), 2):
+                classes[data[j]] = data[j + 1]
+        for name in set(slashnames).difference(quotable):
+            try:
+                classes[name] = self.get_class_for_device(name)
+            except DevFailed:
+                pass
+        return classes
 
     def getDevice(self, name):
         """
@@ -0,0 +1,275 @@
+#!/usr/bin/env python
+
+#############################################################################
+##
+# This file is part of Taurus
+##
+# http://taurus-scada.org
+##
+# Copyright 2011 CELLS / ALBA Synchrotron, Bellaterra, Spain
+##
+# Taurus is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+##
+# Taurus is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+##
+# You should have received a copy of the GNU Lesser General Public License
+# along with Taurus.  If not, see <http://www.gnu.org/licenses/>.
+##
+#############################################################################
+
+"""Test for taurus.core.tango.search"""
+
+#__all__ = []
+
+__docformat__ = 'restructuredtext'
+
+import time
+import threading
+from taurus.external import unittest
+from taurus.test import insertTest
+from taurus.core.tango.search import (ModelDiscovery, AttributeListLoader,
+                                      extend_regexp, get_required_literal)
+
+
+class _FakeAuthority(object):
+    '''An authority with the given exported devices'''
+
+    def __init__(self, devices):
+        self.devices = devices
+
+    def get_device_exported(self, pattern):
+        return list(self.devices)
+
+
+class _AttrInfo(object):
+
+    def __init__(self, name):
+        self.name = name
+
+
+class _SlowDevices(object):
+    '''A factory of devices whose attribute lists take some time to be
+    read'''
+
+    def __init__(self, attrs, delay):
+        self.attrs = attrs
+        self.delay = delay
+        self.queried = []
+        self.lock = threading.Lock()
+
+    def getDevice(self, name):
+        return _SlowDevice(self, name)
+
+    def getFailingDevice(self, name):
+        if name.endswith('bad'):
+            raise RuntimeError('%s not available' % name)
+        return _SlowDevice(self, name)
+
+
+class _SlowDevice(object):
+
+    def __init__(self, factory, name):
+        self.factory = factory
+        self.name = name
+
+    def attribute_list_query(self):
+        factory = self.factory
+        delay = factory.delay
+        if callable(delay):
+            delay = delay(self.name)
+        time.sleep(delay)
+        with factory.lock:
+            factory.queried.append(self.name)
+        return [_AttrInfo(a) for a in factory.attrs]
+
+
+class ModelDiscoveryTestCase(unittest.TestCase):
+    '''Test for taurus.core.tango.search.ModelDiscovery'''
+
+    ndevices = 40
+
+    def setUp(self):
+        self.names = ['dom/fam/m%02d' % i for i in range(self.ndevices)]
+        self.authority = _FakeAuthority(['other/fam/m1'] + self.names)
+
+    def _discovery(self, expressions, devices, **kwargs):
+        return ModelDiscovery(expressions, authority=self.authority,
+                              getDevice=devices.getDevice, **kwargs)
+
+    def test_order(self):
+        '''the models are found in order (even if the devices answer in any
+        order)'''
+        devices = _SlowDevices(['a1', 'b1', 'a2', 'State'],
+                               lambda name: 0.001 * (hash(name) % 7))
+        expressions = ['dom/fam/*/a*', 'dom/fam/m01', 'dom/fam/m02/b1']
+        expected = ['%s/%s' % (name, a) for name in self.names
+                    for a in ('a1', 'a2')]
+        expected += ['dom/fam/m01/State', 'dom/fam/m02/b1']
+        found = []
+        discovery = self._discovery(expressions, devices, workers=8)
+        discovery.start(callback=found.extend)
+        models = discovery.wait(10)
+        self.assertTrue(discovery.isFinished())
+        self.assertEqual(models, expected)
+        self.assertEqual(found, expected)
+        self.assertEqual(sorted(devices.queried), self.names)
+
+    def test_limit(self):
+        '''the search stops when the limit is reached'''
+        devices = _SlowDevices(['a1', 'a2', 'a3'], 0.01)
+        discovery = self._discovery(['dom/fam/*/a*'], devices, limit=10,
+                                    workers=4)
+        models = discovery.run()
+        self.assertEqual(models, ['%s/a%d' % (name, i + 1)
+                                  for name in self.names[:4]
+                                  for i in range(3)][:10])
+        time.sleep(0.1)
+        # 4 devices were needed (the others were queried in parallel)
+        self.assertTrue(len(devices.queried) <= 4 + 2 * 4, devices.queried)
+
+    def test_speedup(self):
+        '''the devices are queried in parallel'''
+        devices = _SlowDevices(['a1'], 0.05)
+        serial = self.ndevices * devices.delay
+        t0 = time.time()
+        models = self._discovery(['dom/fam/*/a*'], devices,
+                                 workers=10).run()
+        elapsed = time.time() - t0
+        self.assertEqual(len(models), self.ndevices)
+        self.assertTrue(elapsed < serial / 3, (elapsed, serial))
+
+    def test_attrFilter(self):
+        '''the attributes can be filtered'''
+        devices = _SlowDevices(['a1', 'a2'], 0)
+        models = self._discovery(['dom/fam/m0[12]/a.*'], devices,
+                                 attrFilter=lambda att: att.name != 'a2'
+                                 ).run()
+        self.assertEqual(models, ['dom/fam/m01/a1', 'dom/fam/m02/a1'])
+
+    def test_cancel(self):
+        '''the search can be cancelled'''
+        devices = _SlowDevices(['a1'], 0.2)
+        finished = []
+        discovery = self._discovery(['dom/fam/*/a*'], devices, workers=2)
+        discovery.start(finished=lambda: finished.append(1))
+        time.sleep(0.05)
+        discovery.cancel()
+        self.assertTrue(discovery.isCancelled())
+        self.assertEqual(discovery.wait(1), [])
+        self.assertEqual(finished, [1])
+        time.sleep(0.5)
+        # only the queries in progress were done
+        self.assertTrue(len(devices.queried) <= 2, devices.queried)
+        self.assertEqual(discovery.getModels(), [])
+
+    def test_error(self):
+        '''a failing search finishes with an error (it is not cancelled)'''
+        self.authority.get_device_exported = None  # (not callable)
+        finished = []
+        discovery = self._discovery(['dom/fam/*/a*'], _SlowDevices([], 0))
+        discovery.start(finished=lambda: finished.append(1))
+        self.assertEqual(discovery.wait(1), [])
+        self.assertTrue(discovery.isFinished())
+        self.assertFalse(discovery.isCancelled())
+        self.assertTrue(isinstance(discovery.getError(), TypeError))
+        self.assertEqual(finished, [1])
+
+
+class AttributeListLoaderTestCase(unittest.TestCase):
+    '''Test for taurus.core.tango.search.AttributeListLoader'''
+
+    def setUp(self):
+        self.devices = _SlowDevices(['a1', 'a2'], 0.01)
+        self.loader = AttributeListLoader(ttl=60, workers=8,
+                                          getProxy=self.devices.getDevice)
+        self.names = ['dom/fam/m%03d' % i for i in range(300)]
+        self.results = {}
+        self.lock = threading.Lock()
+
+    def _callback(self, device, attrs, error):
+        with self.lock:
+            self.results.setdefault(device, []).append(
+                (attrs and [a.name for a in attrs], error))
+
+    def _wait(self, n, timeout=10):
+        t0 = time.time()
+        while sum(map(len, self.results.values())) < n and \
+                time.time() - t0 < timeout:
+            time.sleep(0.01)
+        self.assertEqual(sum(map(len, self.results.values())), n)
+
+    def test_merged(self):
+        '''the repeated requests of a device are merged'''
+        self.assertEqual(self.loader.request(self.names, self._callback),
+                         len(self.names))
+        # (requested again while loading)
+        self.assertEqual(self.loader.request(self.names[:100] * 2,
+                                             self._callback), 0)
+        self._wait(len(self.names) + 200)
+        self.assertEqual(sorted(self.devices.queried), self.names)
+        self.assertEqual(self.loader.getQueryCount(), len(self.names))
+        for name in self.names[:100]:
+            self.assertEqual(self.results[name], [(['a1', 'a2'], None)] * 3)
+
+    def test_cached(self):
+        '''the attribute lists are cached until they expire'''
+        self.loader.request(self.names[:10], self._callback)
+        self._wait(10)
+        self.assertEqual(self.loader.request(self.names[:10], self._callback),
+                         0)
+        self.assertEqual(len(self.devices.queried), 10)
+        self.assertEqual([a.name for a in
+                          self.loader.getAttributes(self.names[0])],
+                         ['a1', 'a2'])
+        self.loader.invalidate(self.names[:1])
+        self.loader.getAttributes(self.names[0])
+        self.assertEqual(len(self.devices.queried), 11)
+        self.loader._ttl = 0
+        self.assertEqual(self.loader.getCached(self.names[1]), None)
+        self.assertEqual(self.loader.request(self.names[:10]), 10)
+
+    def test_errors(self):
+        '''the errors are passed to the callbacks (and not cached)'''
+        self.loader = AttributeListLoader(
+            getProxy=self.devices.getFailingDevice)
+        self.loader.request(['dom/fam/bad', 'dom/fam/good'], self._callback)
+        self._wait(2)
+        attrs, error = self.results['dom/fam/bad'][0]
+        self.assertEqual(attrs, None)
+        self.assertTrue(isinstance(error, RuntimeError))
+        self.assertRaises(RuntimeError, self.loader.getAttributes,
+                          'dom/fam/bad')
+        self.assertEqual(self.loader.getQueryCount(), 3)
+
+
+@insertTest(helper_name='requiredLiteral', regexp='tg_te', expected='tg_te')
+@insertTest(helper_name='requiredLiteral', regexp='sys/tg_test/*',
+            expected='sys/tg_test/')
+@insertTest(helper_name='requiredLiteral', regexp='^x/a+b$', expected='x/a')
+@insertTest(helper_name='requiredLiteral', regexp='.*a?bc.*', expected='bc')
+@insertTest(helper_name='requiredLiteral', regexp='[ab]cd.*ef',
+            expected='cd')
+@insertTest(helper_name='requiredLiteral', regexp='^a{2,3}bc$',
+            expected='bc')
+@insertTest(helper_name='requiredLiteral', regexp='^ab\\dcd$', expected='ab')
+@insertTest(helper_name='requiredLiteral', regexp='^sys\\.foo$',
+            expected='sys.foo')
+@insertTest(helper_name='requiredLiteral', regexp='^(a|b)c$', expected='')
+class RequiredLiteralTestCase(unittest.TestCase):
+    '''Test for taurus.core.tango.search.get_required_literal'''
+
+    def requiredLiteral(self, regexp, expected):
+        '''the text required by a regexp is found'''
+        if not regexp.startswith(('^', '.', '[')):
+            regexp = extend_regexp(regexp)
+        self.assertEqual(get_required_literal(regexp), expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+#!/usr/bin/env python
+
+#############################################################################
+##
+# This file is part of Taurus
+##
+# http://taurus-scada.org
+##
+# Copyright 2011 CELLS / ALBA Synchrotron, Bellaterra, Spain
+##
+# Taurus is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+##
+# Taurus is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+##
+# You should have received a copy of the GNU Lesser General Public License
+# along with Taurus.  If not, see <http://www.gnu.org/licenses/>.
+##
+#############################################################################
+
+"""Test for taurus.core.tango.tangodatabase"""
+
+# __all__ = []
+
+__docformat__ = 'restructuredtext'
+
+import taurus
+from taurus.external import unittest
+from taurus.core.tango.test import TangoSchemeTestLauncher
+
+
+class TangoAuthorityTestCase(TangoSchemeTestLauncher, unittest.TestCase):
+    '''Test for taurus.core.tango.tangodatabase.TangoAuthority'''
+
+    def test_getDeviceClass(self):
+        '''the classes of the devices are read from the database'''
+        db = taurus.Authority()
+        dev = taurus.Device(self.DEV_NAME)
+        self.assertEqual(db.getDeviceClass(self.DEV_NAME), 'TangoSchemeTest')
+        self.assertEqual(db.getDeviceClass(self.DEV_NAME.upper()),
+                         'TangoSchemeTest')
+        self.assertEqual(dev.getDeviceClass(), 'TangoSchemeTest')
+        self.assertEqual(db.getDeviceClass('no/such/device'), None)
+
+    def test_getDeviceClasses(self):
+        '''the classes of many devices are read at once (and cached)'''
+        db = taurus.Authority()
+        names = [self.DEV_NAME, 'no/such/device']
+        self.assertEqual(db.getDeviceClasses(names),
+                         {self.DEV_NAME: 'TangoSchemeTest',
+                          'no/such/device': None})
+        # (the classes of devices not in the db are also cached)
+        self.assertEqual(db.getDeviceClasses(names, cache=True),
+                         db.getDeviceClasses(names, cache=False))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -34,7 +34,10 @@ import weakref
 from .taurushelper import Factory
 from .taurusmodel import TaurusModel
 from taurus.core.taurusbasetypes import TaurusElementType, DataType
-from taurus.external.pint import Quantity, UR
+from taurus.core.util.lazymodule import LazyModule
+
+# (pint is only imported when the values of the attributes are handled)
+pint = LazyModule('taurus.external.pint')
 
 
 class TaurusAttribute(TaurusModel):
@@ -304,7 +307,7 @@ class TaurusAttribute(TaurusModel):
             _descr = descr.replace("<", "&lt;").replace(">", "&gt;")
             obj.append(('description', _descr))
 
-        if isinstance(self.rvalue, Quantity):
+        if isinstance(self.rvalue, pint.Quantity):
             idDimensionless = self.rvalue.dimensionless
             range = self._range
             alarm = self._alarm
@@ -380,9 +383,9 @@ class TaurusAttribute(TaurusModel):
     def __assertsValidLimits(self, limits):
         assert len(limits) == 2, "The limits must be two values, low and high"
         low, high = limits
-        assert isinstance(self.rvalue, Quantity), "rvalue is not a Quantity"
-        assert isinstance(low, Quantity), "low is not a Quantity"
-        assert isinstance(high, Quantity), "igh is not a Quantity"
+        assert isinstance(self.rvalue, pint.Quantity), "rvalue is not a Quantity"
+        assert isinstance(low, pint.Quantity), "low is not a Quantity"
+        assert isinstance(high, pint.Quantity), "igh is not a Quantity"
         assert self.rvalue.dimensionality == low.dimensionality, \
             "low and rvalue have different dimensionality"
         assert self.rvalue.dimensionality == high.dimensionality, \
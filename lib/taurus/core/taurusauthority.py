@@ -97,6 +97,31 @@ class TaurusAuthority(TaurusModel):
         import taurusdevice
         return self.factory().getObject(taurusdevice.TaurusDevice, devname)
 
+    def getDeviceClass(self, devname, cache=True):
+        """Returns the class of the given device (e.g. for choosing the widgets
+        which represent it). This default implementation returns None (i.e.,
+        unknown). Reimplement it in the schemes which support device classes.
+
+        :param devname: (str) the device name
+        :param cache: (bool) if False, the class is not taken from a cache
+
+        :return: (str or None) the device class
+        """
+        return None
+
+    def getDeviceClasses(self, devnames, cache=True):
+        """Returns the classes of the given devices (see
+        :meth:`getDeviceClass`). Reimplement it if the classes of many devices
+        can be obtained at once.
+
+        :param devnames: (seq<str>) the device names
+        :param cache: (bool) if False, the classes are not taken from a cache
+
+        :return: (dict<str,str>) the class (or None) of each device name
+        """
+        return dict([(name, self.getDeviceClass(name, cache=cache))
+                     for name in devnames])
+
     @property
     def description(self):
         return self._description
@@ -114,6 +114,19 @@ class TaurusDevice(TaurusModel):
         obj.append(('device state', self.state.name))
         return obj
 
+    def getDeviceClass(self, cache=True):
+        """Returns the class of the device, as given by its authority (see
+        :meth:`TaurusAuthority.getDeviceClass`)
+
+        :param cache: (bool) if False, the class is not taken from a cache
+
+        :return: (str or None) the device class (None if unknown)
+        """
+        authority = self.getParentObj()
+        if authority is None:
+            return None
+        return authority.getDeviceClass(self.getFullName(), cache=cache)
+
     def getChildObj(self, child_name):
         if child_name is None or len(child_name) == 0:
             return None
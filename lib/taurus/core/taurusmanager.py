@@ -35,6 +35,7 @@ import atexit
 from .util.singleton import Singleton
 from .util.log import Logger, tep14_deprecation
 from .util.threadpool import ThreadPool
+from .util.registrycache import getFilesKey, loadRegistry, importObject
 
 from .taurusbasetypes import OperationMode, ManagerState, TaurusSerializationMode
 from .taurusauthority import TaurusAuthority
@@ -58,6 +59,8 @@ class TaurusManager(Singleton, Logger):
            True
     """
     PLUGIN_KEY = "__taurus_plugin__"
+    #: name of the (cached) registry of the scheme plugins of taurus.core
+    PLUGIN_REGISTRY = "taurus.core.plugins"
 
     DefaultSerializationMode = TaurusSerializationMode.Concurrent
     default_scheme = getattr(tauruscustomsettings, 'DEFAULT_SCHEME', "tango")
@@ -91,6 +94,8 @@ class TaurusManager(Singleton, Logger):
         else:
             self._thread_pool = None
         self._plugins = None
+        # plugins imported on demand (see _getPluginClass)
+        self._pluginClasses = {}
 
         self._initial_default_scheme = self.default_scheme
 
@@ -102,10 +107,11 @@ class TaurusManager(Singleton, Logger):
             return
         self.trace("cleanUp()")
 
-        if self._plugins is None:
+        if self._plugins is None and not self._pluginClasses:
             return
         self.trace("[TaurusManager] cleanUp")
         self._plugins = None
+        self._pluginClasses = {}
 
         self._thread_pool.join()
         self._thread_pool = None
@@ -169,17 +175,73 @@ class TaurusManager(Singleton, Logger):
 
         :return: (taurus.core.taurusfactory.TaurusFactory) the default taurus factory
         """
-        return self.getPlugins().get(self.default_scheme, None)
+        return self._getPluginClass(self.default_scheme)
 
     def getPlugins(self):
-        """Gives the information about the existing plugins
+        """Gives the information about the existing plugins. Note that it
+        imports all the plugins (use :meth:`getFactory` to get the plugin of
+        a given scheme, which only imports that plugin)
 
         :return: (dict<str, class taurus.core.taurusfactory.TaurusFactory>)the list of plugins
         """
         if self._plugins is None:
             self._plugins = self._build_plugins()
+            # keep the registry up to date with the full scan
+            self._getPluginRegistry(rebuild=True)
         return self._plugins
 
+    def _getPluginRegistry(self, rebuild=False):
+        """returns the (cached) registry of the scheme plugins of
+        taurus.core, which is only built (importing all the plugins) when the
+        files of taurus.core change. The plugins of the EXTRA_SCHEME_MODULES
+        are not included.
+
+        :param rebuild: (bool) if True, the registry is built even if cached
+
+        :return: (dict<str, (str, str)> or None) the module and class name of
+                 the factory of each scheme (or None if the REGISTRY_CACHE
+                 option of tauruscustomsettings is disabled)
+        """
+        if not getattr(tauruscustomsettings, 'REGISTRY_CACHE', True):
+            return None
+
+        def build():
+            plugins = self._build_plugins(self._get_plugin_classes(extra=False))
+            return dict([(scheme, (klass.__module__, klass.__name__))
+                         for scheme, klass in plugins.items()])
+
+        key = getFilesKey([self._this_path], extensions=('.py', ''),
+                          skip=('test',))
+        return loadRegistry(self.PLUGIN_REGISTRY, key, build,
+                            rebuild=rebuild)
+
+    def _getPluginClass(self, scheme):
+        """returns the factory class of the given scheme, importing only its
+        plugin if the scheme is in the plugin registry
+
+        :param scheme: (str) the scheme
+        :return: (class taurus.core.taurusfactory.TaurusFactory or None)
+        """
+        if self._plugins is not None:
+            return self._plugins.get(scheme)
+        klass = self._pluginClasses.get(scheme)
+        if klass is not None:
+            return klass
+        registry = self._getPluginRegistry() or {}
+        if scheme in registry:
+            try:
+                klass = importObject(*registry[scheme])
+                if not getattr(klass, 'schemes', None):
+                    klass.schemes = (scheme,)
+            except Exception:
+                self.debug('Failed to import plugin of %s' % scheme)
+                self.debug('Details:', exc_info=1)
+        if klass is None:
+            # unknown scheme (or outdated registry): inspect all the plugins
+            return self.getPlugins().get(scheme)
+        self._pluginClasses[scheme] = klass
+        return klass
+
     def getFactory(self, scheme=None):
         """Gives the factory class object supporting the given scheme
 
@@ -189,7 +251,7 @@ class TaurusManager(Singleton, Logger):
         """
         if scheme is None:
             return self.getDefaultFactory()
-        return self.getPlugins().get(scheme)
+        return self._getPluginClass(scheme)
 
     def getObject(self, cls, name):
         """Gives the object for the given class with the given name
@@ -270,7 +332,7 @@ class TaurusManager(Singleton, Logger):
         if scheme is None:
             return
         try:
-            return self.getPlugins()[scheme]()
+            return self._getPluginClass(scheme)()
         except:
             raise TaurusException('Invalid scheme "%s"' % scheme)
 
@@ -286,8 +348,9 @@ class TaurusManager(Singleton, Logger):
         raise DeprecationWarning(
             '_get_schema is deprecated. Use getScheme instead')
 
-    def _build_plugins(self):
-        plugin_classes = self._get_plugin_classes()
+    def _build_plugins(self, plugin_classes=None):
+        if plugin_classes is None:
+            plugin_classes = self._get_plugin_classes()
         plugins = {}
         for plugin_class in plugin_classes:
             schemes = list(plugin_class.schemes)
@@ -308,7 +371,7 @@ class TaurusManager(Singleton, Logger):
         '''
         return self._build_plugins()
 
-    def _get_plugin_classes(self):
+    def _get_plugin_classes(self, extra=True):
         upgrade_classes = []
 
         elems = os.listdir(self._this_path)
@@ -330,9 +393,10 @@ class TaurusManager(Singleton, Logger):
 
         full_module_names = ['taurus.core.%s' %
                              d.split(os.path.sep)[-1] for d in dirs]
-        from taurus import tauruscustomsettings
-        full_module_names.extend(
-            getattr(tauruscustomsettings, 'EXTRA_SCHEME_MODULES', []))
+        if extra:
+            from taurus import tauruscustomsettings
+            full_module_names.extend(
+                getattr(tauruscustomsettings, 'EXTRA_SCHEME_MODULES', []))
 
         for full_module_name in full_module_names:
             try:
@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+
+#############################################################################
+##
+# This file is part of Taurus
+##
+# http://taurus-scada.org
+##
+# Copyright 2011 CELLS / ALBA Synchrotron, Bellaterra, Spain
+##
+# Taurus is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+##
+# Taurus is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+##
+# You should have received a copy of the GNU Lesser General Public License
+# along with Taurus.  If not, see <http://www.gnu.org/licenses/>.
+##
+#############################################################################
+
+"""Test for the modules imported by taurus (at startup and to get an eval
+attribute)"""
+
+#__all__ = []
+
+__docformat__ = 'restructuredtext'
+
+import os
+import sys
+import json
+import subprocess
+from taurus.external import unittest
+from taurus.test import insertTest
+
+# prints the modules imported by the given statements (i.e. not imported by
+# the interpreter at startup)
+_SCRIPT = '''
+import sys, json
+before = set(m for m in sys.modules if sys.modules[m] is not None)
+%s
+print(json.dumps(sorted(m for m in sys.modules
+                        if sys.modules[m] is not None and m not in before)))
+'''
+
+#: prefixes of the names of the Qt (and Qt based plotting) modules
+_QT_MODULES = ('PyQt4', 'PyQt5', 'PySide', 'sip', 'PyQt4.Qwt5', 'Qwt5',
+               'guiqwt', 'guidata', 'taurus.qt', 'taurus.external.qt')
+
+
+@insertTest(helper_name='checkImports', statements='import taurus',
+            maxModules=150,
+            forbidden=('numpy', 'taurus.external.pint', 'lxml'))
+@insertTest(helper_name='checkImports',
+            statements="import taurus; taurus.Attribute('eval:1').read()",
+            maxModules=450)
+class ImportBudgetTestCase(unittest.TestCase):
+    '''Test that the core entry points of taurus do not import Qt and that
+    they import a limited number of modules'''
+
+    def _run(self, statements):
+        env = dict(os.environ)
+        import taurus
+        path = os.path.dirname(os.path.dirname(taurus.__file__))
+        env['PYTHONPATH'] = os.pathsep.join(
+            [path] + env.get('PYTHONPATH', '').split(os.pathsep))
+        p = subprocess.Popen([sys.executable, '-c', _SCRIPT % statements],
+                             env=env, stdout=subprocess.PIPE)
+        out = p.communicate()[0]
+        self.assertEqual(p.returncode, 0)
+        return json.loads(out.decode('utf-8').splitlines()[-1])
+
+    def checkImports(self, statements, maxModules, forbidden=()):
+        '''the statements import no Qt (or forbidden) module and at most
+        maxModules modules'''
+        imported = self._run(statements)
+        for prefix in _QT_MODULES + tuple(forbidden):
+            loaded = [m for m in imported
+                      if m == prefix or m.startswith(prefix + '.')]
+            self.assertEqual(loaded, [], '"%s" imports %s' %
+                             (statements, ', '.join(loaded)))
+        self.assertTrue(len(imported) <= maxModules,
+                        '"%s" imports %d modules (more than %d)' %
+                        (statements, len(imported), maxModules))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python
+
+#############################################################################
+##
+# This file is part of Taurus
+##
+# http://taurus-scada.org
+##
+# Copyright 2011 CELLS / ALBA Synchrotron, Bellaterra, Spain
+##
+# Taurus is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+##
+# Taurus is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+##
+# You should have received a copy of the GNU Lesser General Public License
+# along with Taurus.  If not, see <http://www.gnu.org/licenses/>.
+##
+#############################################################################
+
+"""Test for taurus.core.taurusmanager"""
+
+#__all__ = []
+
+__docformat__ = 'restructuredtext'
+
+import os
+import sys
+import json
+import shutil
+import tempfile
+import subprocess
+from taurus.external import unittest
+
+# prints the scheme packages imported to get an eval attribute, the registry
+# of the plugins and the plugins found by a full scan
+_SCRIPT = '''
+import os, sys, json, taurus
+taurus.Attribute('eval:1').read()
+manager = taurus.Manager()
+imported = [m for m in sys.modules if sys.modules[m] is not None and
+            m.startswith('taurus.core.') and m.count('.') == 2 and
+            os.path.exists(os.path.join(manager._this_path, m[12:],
+                                        manager.PLUGIN_KEY))]
+registry = manager._getPluginRegistry()
+plugins = manager._build_plugins(manager._get_plugin_classes(extra=False))
+scan = dict([(s, (k.__module__, k.__name__)) for s, k in plugins.items()])
+print(json.dumps([sorted(imported), registry, scan]))
+'''
+
+
+class TaurusManagerPluginRegistryTestCase(unittest.TestCase):
+    '''Test for the plugin registry of taurus.core.taurusmanager'''
+
+    def setUp(self):
+        self.home = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.home)
+
+    def _run(self):
+        env = dict(os.environ, HOME=self.home)
+        import taurus
+        path = os.path.dirname(os.path.dirname(taurus.__file__))
+        env['PYTHONPATH'] = os.pathsep.join(
+            [path] + env.get('PYTHONPATH', '').split(os.pathsep))
+        p = subprocess.Popen([sys.executable, '-c', _SCRIPT],
+                             env=env, stdout=subprocess.PIPE)
+        out = p.communicate()[0]
+        self.assertEqual(p.returncode, 0)
+        return json.loads(out.decode('utf-8').splitlines()[-1])
+
+    def test_startup(self):
+        '''only the used plugins are imported once the registry is cached'''
+        self._run()  # (builds the registry)
+        imported, registry, scan = self._run()
+        self.assertEqual(imported, ['taurus.core.evaluation'])
+        self.assertEqual(registry, scan)
+        self.assertTrue('eval' in registry)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -64,20 +64,71 @@ A Taurus related example::
 """
 
 __all__ = ["Codec", "NullCodec", "ZIPCodec", "BZ2Codec", "JSONCodec",
-           "FunctionCodec", "PlotCodec", "CodecPipeline", "CodecFactory"]
+           "FunctionCodec", "PlotCodec", "NDArrayCodec", "CodecPipeline",
+           "CodecFactory"]
 
 __docformat__ = "restructuredtext"
 
+import re
+import sys
 import copy
 
-# need by VideoImageCodec
+# need by VideoImageCodec and NDArrayCodec
 import struct
-import numpy
+from collections import OrderedDict
 
+from lazymodule import LazyModule
 from singleton import Singleton
 from log import Logger
 from containers import CaselessDict
 
+# (numpy is only imported when an image or an array is encoded/decoded)
+numpy = LazyModule('numpy')
+
+
+def _joinChunks(chunks):
+    '''joins an iterable of chunks. A single chunk is returned as it is (so it
+    is not copied and it may be any object)'''
+    chunks = list(chunks)
+    if len(chunks) == 1:
+        return chunks[0]
+    return ''.join(chunks)
+
+
+def _splitChunks(chunks, size):
+    '''yields read-only buffers (no copies) of at most size bytes of the
+    given chunks'''
+    for chunk in chunks:
+        for i in xrange(0, len(chunk), size):
+            yield buffer(chunk, i, size)
+
+
+def _compressChunks(compressor, chunks):
+    '''yields the result of feeding the chunks to an incremental
+    compressor'''
+    for chunk in chunks:
+        ret = compressor.compress(chunk)
+        if ret:
+            yield ret
+    ret = compressor.flush()
+    if ret:
+        yield ret
+
+
+def _decompressChunks(decompressor, chunks):
+    '''yields the result of feeding the chunks to an incremental
+    decompressor'''
+    for chunk in chunks:
+        ret = decompressor.decompress(chunk)
+        if ret:
+            yield ret
+    # (bz2 decompressors have nothing to flush)
+    flush = getattr(decompressor, 'flush', None)
+    if flush is not None:
+        ret = flush()
+        if ret:
+            yield ret
+
 
 class Codec(Logger):
     """The base class for all codecs"""
@@ -110,6 +161,42 @@ class Codec(Logger):
         :raises: NotImplementedError"""
         raise NotImplementedError("decode cannot be called on abstract Codec")
 
+    def iterencode(self, data, *args, **kwargs):
+        """encodes the given data into an iterable of strings (chunks) whose
+        concatenation is the result of :meth:`encode`. The default
+        implementation returns a single chunk. Subclasses may reimplement it to
+        avoid building the whole encoded string.
+
+        :param data: (sequence[str, obj]) a sequence of two elements where the first item is the encoding format of the second item object
+
+        :return: (sequence[str, iterable]) a sequence of two elements where the first item is the encoding format of the chunks given by the second item"""
+        format, data = self.encode(data, *args, **kwargs)
+        return format, (data,)
+
+    def encodeChunks(self, data, *args, **kwargs):
+        """like :meth:`iterencode` but the data to encode is given as an
+        iterable of chunks (see :meth:`iterencode`). It is used by
+        :class:`CodecPipeline` to chain codecs without building the
+        intermediate strings. The default implementation joins the chunks.
+
+        :param data: (sequence[str, iterable]) a sequence of two elements where the first item is the encoding format of the chunks given by the second item
+
+        :return: (sequence[str, iterable]) a sequence of two elements where the first item is the encoding format of the chunks given by the second item"""
+        return self.iterencode((data[0], _joinChunks(data[1])), *args,
+                               **kwargs)
+
+    def decodeChunks(self, data, *args, **kwargs):
+        """decodes data given as an iterable of chunks into an iterable of
+        chunks (see :meth:`encodeChunks`). The default implementation joins
+        the chunks and returns the result of :meth:`decode` as a single chunk.
+
+        :param data: (sequence[str, iterable]) a sequence of two elements where the first item is the encoding format of the chunks given by the second item
+
+        :return: (sequence[str, iterable]) a sequence of two elements where the first item is the encoding format of the chunks given by the second item"""
+        format, data = self.decode((data[0], _joinChunks(data[1])), *args,
+                                   **kwargs)
+        return format, (data,)
+
     def __str__(self):
         return '%s()' % self.__class__.__name__
 
@@ -141,6 +228,12 @@ class NullCodec(Codec):
         format = data[0].partition('_')[2]
         return format, data[1]
 
+    def encodeChunks(self, data, *args, **kwargs):
+        return self.encode(data, *args, **kwargs)
+
+    def decodeChunks(self, data, *args, **kwargs):
+        return self.decode(data, *args, **kwargs)
+
 
 class ZIPCodec(Codec):
     """A codec able to encode/decode to/from gzip format. It uses the :mod:`zlib` module
@@ -160,6 +253,9 @@ class ZIPCodec(Codec):
         >>> print decoded_data[20]
         'Hello world\\nHello wo'"""
 
+    #: maximum size of the pieces fed to the incremental decompressor
+    CHUNK_SIZE = 1 << 20
+
     def encode(self, data, *args, **kwargs):
         """encodes the given data to a gzip string. The given data **must** be a string
 
@@ -184,6 +280,28 @@ class ZIPCodec(Codec):
         format = data[0].partition('_')[2]
         return format, zlib.decompress(data[1])
 
+    def encodeChunks(self, data, *args, **kwargs):
+        """encodes the given chunks incrementally (see
+        :meth:`Codec.encodeChunks`)"""
+        import zlib
+        format = 'zip'
+        if len(data[0]):
+            format += '_%s' % data[0]
+        return format, _compressChunks(zlib.compressobj(), data[1])
+
+    def decodeChunks(self, data, *args, **kwargs):
+        """decodes the given chunks incrementally (see
+        :meth:`Codec.decodeChunks`)"""
+        import zlib
+        if not data[0].startswith('zip'):
+            return data
+        format = data[0].partition('_')[2]
+        chunks = list(data[1])
+        if len(chunks) == 1:
+            return format, (zlib.decompress(chunks[0]),)
+        return format, _decompressChunks(
+            zlib.decompressobj(), _splitChunks(chunks, self.CHUNK_SIZE))
+
 
 class BZ2Codec(Codec):
     """A codec able to encode/decode to/from BZ2 format. It uses the :mod:`bz2` module
@@ -203,6 +321,9 @@ class BZ2Codec(Codec):
         >>> print decoded_data[20]
         'Hello world\\nHello wo'"""
 
+    #: maximum size of the pieces fed to the incremental decompressor
+    CHUNK_SIZE = 1 << 20
+
     def encode(self, data, *args, **kwargs):
         """encodes the given data to a bz2 string. The given data **must** be a string
 
@@ -227,6 +348,28 @@ class BZ2Codec(Codec):
         format = data[0].partition('_')[2]
         return format, bz2.decompress(data[1])
 
+    def encodeChunks(self, data, *args, **kwargs):
+        """encodes the given chunks incrementally (see
+        :meth:`Codec.encodeChunks`)"""
+        import bz2
+        format = 'bz2'
+        if len(data[0]):
+            format += '_%s' % data[0]
+        return format, _compressChunks(bz2.BZ2Compressor(), data[1])
+
+    def decodeChunks(self, data, *args, **kwargs):
+        """decodes the given chunks incrementally (see
+        :meth:`Codec.decodeChunks`)"""
+        import bz2
+        if not data[0].startswith('bz2'):
+            return data
+        format = data[0].partition('_')[2]
+        chunks = list(data[1])
+        if len(chunks) == 1:
+            return format, (bz2.decompress(chunks[0]),)
+        return format, _decompressChunks(
+            bz2.BZ2Decompressor(), _splitChunks(chunks, self.CHUNK_SIZE))
+
 
 class PickleCodec(Codec):
     """A codec able to encode/decode to/from pickle format. It uses the
@@ -306,6 +449,9 @@ class JSONCodec(Codec):
         >>> print decoded_data
         {'hello': 'world', 'goodbye': 1000}"""
 
+    #: number of list items encoded at once by :meth:`iterencode`
+    CHUNK_ITEMS = 8192
+
     def encode(self, data, *args, **kwargs):
         """encodes the given data to a json string. The given data **must** be
         a python object that json is able to convert.
@@ -323,6 +469,59 @@ class JSONCodec(Codec):
         kwargs['separators'] = kwargs.get('separators', (',', ':'))
         return format, json.dumps(data[1], *args, **kwargs)
 
+    def iterencode(self, data, *args, **kwargs):
+        """encodes the given data to json chunks (see
+        :meth:`Codec.iterencode`). Long lists are encoded
+        :attr:`CHUNK_ITEMS` items at a time (with the C encoder of the
+        :mod:`json` module), so the whole json string is never built. The
+        concatenation of the chunks is identical to the result of
+        :meth:`encode`.
+
+        :param data: (sequence[str, obj]) a sequence of two elements where the
+                     first item is the encoding format of the second item object
+
+        :return: (sequence[str, iterable]) a sequence of two elements where
+                 the first item is the encoding format of the chunks given by
+                 the second item"""
+        import json
+        if args or kwargs.get('indent') is not None or \
+                kwargs.get('sort_keys'):
+            return Codec.iterencode(self, data, *args, **kwargs)
+        format = 'json'
+        if len(data[0]):
+            format += '_%s' % data[0]
+        kwargs['separators'] = kwargs.get('separators', (',', ':'))
+        separators = kwargs['separators'] or (', ', ': ')
+
+        def dumps(obj):
+            return json.dumps(obj, **kwargs)
+        return format, self.__iterencode(data[1], dumps, *separators)
+
+    def __iterencode(self, obj, dumps, item_separator, key_separator):
+        n = self.CHUNK_ITEMS
+        if isinstance(obj, (list, tuple)) and len(obj) > n:
+            yield '['
+            for i in xrange(0, len(obj), n):
+                if i:
+                    yield item_separator
+                yield dumps(obj[i:i + n])[1:-1]
+            yield ']'
+        elif isinstance(obj, dict) and 0 < len(obj) <= n and \
+                all(isinstance(k, basestring) for k in obj):
+            # (only dicts whose keys need no conversion)
+            yield '{'
+            for i, (k, v) in enumerate(obj.iteritems()):
+                if i:
+                    yield item_separator
+                yield dumps(k)
+                yield key_separator
+                for chunk in self.__iterencode(v, dumps, item_separator,
+                                               key_separator):
+                    yield chunk
+            yield '}'
+        else:
+            yield dumps(obj)
+
     def decode(self, data, *args, **kwargs):
         """decodes the given data from a json string.
 
@@ -341,31 +540,31 @@ class JSONCodec(Codec):
         if isinstance(data[1], buffer):
             data = data[0], str(data[1])
 
-        data = json.loads(data[1])
-        if ensure_ascii:
-            data = self._transform_ascii(data)
-        return format, data
-
-    def _transform_ascii(self, data):
-        if isinstance(data, unicode):
-            return data.encode('utf-8')
-        elif isinstance(data, dict):
-            return self._transform_dict(data)
-        elif isinstance(data, list):
-            return self._transform_list(data)
-        elif isinstance(data, tuple):
-            return tuple(self._transform_list(data))
-        else:
-            return data
-
-    def _transform_list(self, lst):
-        return [self._transform_ascii(item) for item in lst]
-
-    def _transform_dict(self, dct):
-        newdict = {}
-        for k, v in dct.iteritems():
-            newdict[self._transform_ascii(k)] = self._transform_ascii(v)
-        return newdict
+        if not ensure_ascii:
+            return format, json.loads(data[1])
+        # the objects are converted by the parser as soon as they are built
+        # (innermost first) so the tree is not walked again afterwards
+        data = json.loads(data[1], object_pairs_hook=self._ascii_pairs)
+        return format, self._ascii(data)
+
+    def _ascii(self, item):
+        '''returns item with its unicode strings (also those in lists)
+        encoded to utf-8. Dicts are expected to be already converted'''
+        t = type(item)
+        if t is unicode:
+            return item.encode('utf-8')
+        elif t is list:
+            return self._ascii_list(item)
+        return item
+
+    def _ascii_list(self, lst):
+        ascii_list = self._ascii_list
+        return [i.encode('utf-8') if type(i) is unicode else
+                ascii_list(i) if type(i) is list else i for i in lst]
+
+    def _ascii_pairs(self, pairs):
+        ascii = self._ascii
+        return dict([(k.encode('utf-8'), ascii(v)) for k, v in pairs])
 
 
 class BSONCodec(Codec):
@@ -522,7 +721,16 @@ class VideoImageCodec(Codec):
     def decode(self, data, *args, **kwargs):
         """decodes the given data from a LImA's video_image.
 
+        The image is not copied for the grayscale modes: the returned array
+        is a read-only view of the given data. The colour modes are decoded
+        into RGB images (of shape (height, width, 3)).
+
         :param data: (sequence[str, obj]) a sequence of two elements where the first item is the encoding format of the second item object
+        :param out: (numpy.ndarray) an array (of the shape and dtype of the
+                    decoded image) in which the image is decoded. Passing the
+                    same array when decoding a stream of images avoids
+                    allocating a new one for each image (optional keyword
+                    argument)
 
         :return: (sequence[str, obj]) a sequence of two elements where the first item is the encoding format of the second item object"""
 
@@ -535,114 +743,89 @@ class VideoImageCodec(Codec):
             _, _, fmt = data[0].partition('_')
         else:
             return data
-        header = self.__unpackHeader(
-            data[1][:struct.calcsize(self.VIDEO_HEADER_FORMAT)])
-
-        imgBuffer = data[1][struct.calcsize(self.VIDEO_HEADER_FORMAT):]
-        dtype = self.__getDtypeId(header['imageMode'])
-        if header['imageMode'] == 7:
-            # RGBA 4 bytes per pixel
-            rgba = numpy.fromstring(imgBuffer, dtype)
-            bbuf = rgba[0::4]
-            gbuf = rgba[1::4]
-            rbuf = rgba[2::4]
-            #abuf = rgba[3::4]
-            r = rbuf.reshape(header['height'], header['width'])
-            g = gbuf.reshape(header['height'], header['width'])
-            b = bbuf.reshape(header['height'], header['width'])
-            #a = abuf.reshape(header['height'],header['width'])
-            img2D = numpy.dstack((r, g, b))
-
-        elif header['imageMode'] == 17:
-            # YUV444 3 bytes per pixel
-            yuv = numpy.fromstring(imgBuffer, dtype)
-            y = yuv[0::3]
-            u = yuv[1::3]
-            v = yuv[2::3]
-
-            rbuff, gbuff, bbuff = self.__yuv2rgb(y, u, v)
-
-            # Shape buffers to image size
-            r = rbuff.reshape(header['height'], header['width'])
-            g = gbuff.reshape(header['height'], header['width'])
-            b = bbuff.reshape(header['height'], header['width'])
-
-            # Build the RGB image
-            img2D = numpy.dstack((r, g, b))
-
-        elif header['imageMode'] == 16:
-            # YUV422 4 bytes per 2 pixels
-            yuv = numpy.fromstring(imgBuffer, dtype)
-            u = yuv[0::4]
-            y1 = yuv[1::4]
-            v = yuv[2::4]
-            y2 = yuv[3::4]
-
-            r1, g1, b1 = self.__yuv2rgb(y1, u, v)
-            r2, g2, b2 = self.__yuv2rgb(y2, u, v)
-
-            # Create RGB buffers
-            rbuff = numpy.dstack((r1, r2)).reshape(
-                header['height'] * header['width'])
-            gbuff = numpy.dstack((g1, g2)).reshape(
-                header['height'] * header['width'])
-            bbuff = numpy.dstack((b1, b2)).reshape(
-                header['height'] * header['width'])
-
-            # Shape buffers to image size
-            r = rbuff.reshape(header['height'], header['width'])
-            g = gbuff.reshape(header['height'], header['width'])
-            b = bbuff.reshape(header['height'], header['width'])
-
-            # Build the RGB image
-            img2D = numpy.dstack((r, g, b))
-
-        elif header['imageMode'] == 15:
-            # YUV411 6 bytes per 4 pixels
-            yuv = numpy.fromstring(imgBuffer, dtype)
-            u = yuv[0::6]
-            y1 = yuv[1::6]
-            y2 = yuv[2::6]
-            v = yuv[3::6]
-            y3 = yuv[4::6]
-            y4 = yuv[5::6]
-
-            r1, g1, b1 = self.__yuv2rgb(y1, u, v)
-            r2, g2, b2 = self.__yuv2rgb(y2, u, v)
-            r3, g3, b3 = self.__yuv2rgb(y3, u, v)
-            r4, g4, b4 = self.__yuv2rgb(y4, u, v)
-
-            # Create RGB buffers
-            rbuff = numpy.dstack((r1, r2, r3, r4)).reshape(
-                header['height'] * header['width'])
-            gbuff = numpy.dstack((g1, g2, g3, g4)).reshape(
-                header['height'] * header['width'])
-            bbuff = numpy.dstack((b1, b2, b3, b4)).reshape(
-                header['height'] * header['width'])
-
-            # Shape buffers to image size
-            r = rbuff.reshape(header['height'], header['width'])
-            g = gbuff.reshape(header['height'], header['width'])
-            b = bbuff.reshape(header['height'], header['width'])
-
-            img2D = numpy.dstack((r, g, b))
-
-        else:
-            img1D = numpy.fromstring(imgBuffer, dtype)
-            img2D = img1D.reshape(header['height'], header['width'])
-
-        return fmt, img2D
-
-    def __yuv2rgb(self, y, u, v):
-        '''YUV444 to RGB888 conversion'''
-        Cr = v - 128.0
-        Cb = u - 128.0
-
-        R = y + 1.402 * Cr
-        G = y - 0.344 * Cb - 0.714 * Cr
-        B = y + 1.772 * Cb
-
-        return (numpy.clip(R, 0, 255), numpy.clip(G, 0, 255), numpy.clip(B, 0, 255))
+        out = kwargs.get('out')
+        hsize = struct.calcsize(self.VIDEO_HEADER_FORMAT)
+        header = self.__unpackHeader(data[1][:hsize])
+        height, width = header['height'], header['width']
+        mode = header['imageMode']
+        # a view of the image data (no copy)
+        img1D = numpy.frombuffer(data[1], self.__getDtypeId(mode),
+                                 offset=hsize)
+
+        if mode == 7:
+            # RGBA 4 bytes per pixel (stored as BGRA)
+            bgra = img1D.reshape(height, width, 4)
+            if out is None:
+                out = numpy.empty((height, width, 3), dtype=numpy.uint8)
+            else:
+                self.__checkOutput(out, (height, width, 3), numpy.uint8)
+            for i in xrange(3):  # (faster than copying a reversed view)
+                out[:, :, i] = bgra[:, :, 2 - i]
+            return fmt, out
+
+        elif mode in self.__YUV_LAYOUTS:
+            # YUV, stored in groups of bytes with the Y of some pixels and
+            # the U and V shared by them
+            if out is None:
+                out = numpy.empty((height, width, 3))
+            else:
+                self.__checkOutput(out, (height, width, 3), numpy.float64)
+            self.__yuv2rgb(img1D, self.__YUV_LAYOUTS[mode], out)
+            return fmt, out
+
+        img2D = img1D.reshape(height, width)
+        if out is None:
+            return fmt, img2D
+        self.__checkOutput(out, (height, width), img2D.dtype)
+        out[...] = img2D
+        return fmt, out
+
+    def __checkOutput(self, out, shape, dtype):
+        if out.shape != shape or out.dtype != dtype or \
+                not out.flags.c_contiguous:
+            raise ValueError(('Output array must be a contiguous array of ' +
+                              'shape %s and dtype %s') %
+                             (shape, numpy.dtype(dtype)))
+
+    #: (stride, y offsets, u offset, v offset) of each YUV image mode
+    __YUV_LAYOUTS = {15: (6, (1, 2, 4, 5), 0, 3),  # YUV411
+                     16: (4, (1, 3), 0, 2),  # YUV422
+                     17: (3, (0,), 1, 2),  # YUV444
+                     }
+
+    # lookup tables for the U and V contributions to R, G and B (created
+    # the first time they are needed)
+    __LUTS = None
+
+    @classmethod
+    def __getLUTs(cls):
+        if cls.__LUTS is None:
+            crcb = numpy.arange(256) - 128.0
+            cls.__LUTS = (1.402 * crcb, 0.344 * crcb, 0.714 * crcb,
+                          1.772 * crcb)
+        return cls.__LUTS
+
+    def __yuv2rgb(self, yuv, layout, out):
+        '''YUV to RGB888 conversion (into the out array) of a buffer of
+        groups of bytes with the given layout'''
+        stride, yoffsets, uoffset, voffset = layout
+        u = yuv[uoffset::stride]
+        v = yuv[voffset::stride]
+        lut_rv, lut_gu, lut_gv, lut_bu = self.__getLUTs()
+        rv = lut_rv[v]
+        gu = lut_gu[u]
+        gv = lut_gv[v]
+        bu = lut_bu[u]
+        pixels = out.reshape(-1, 3)
+        npixels = len(yoffsets)
+        for i, yoffset in enumerate(yoffsets):
+            y = yuv[yoffset::stride]
+            rgb = pixels[i::npixels]
+            numpy.add(y, rv, out=rgb[:, 0])
+            numpy.subtract(y, gu, out=rgb[:, 1])
+            numpy.subtract(rgb[:, 1], gv, out=rgb[:, 1])
+            numpy.add(y, bu, out=rgb[:, 2])
+        numpy.clip(out, 0, 255, out=out)
 
     def __unpackHeader(self, header):
         h = struct.unpack(self.VIDEO_HEADER_FORMAT, header)
@@ -739,15 +922,261 @@ class VideoImageCodec(Codec):
                 #'BAYER BG8'  : Core.BAYER_BG8,
                 #'BAYER BG16' : Core.BAYER_BG16,
                 #'I420'       : Core.I420,
-                #'YUV411'     : Core.YUV411,
+                15: 'uint8',  # Core.YUV411,
                 16: 'uint8',  # Core.YUV422,
-                #'YUV444'     : Core.YUV444
+                17: 'uint8',  # Core.YUV444
                 }[mode]
 
 
+class NDArrayCodec(Codec):
+    """A codec able to encode/decode numpy arrays (or a sequence of named
+    numpy arrays) to/from a binary format. Unlike :class:`PickleCodec`, it
+    is safe to use with data from untrusted sources, and decoding
+    uncompressed arrays does not copy them (the decoded arrays are read-only
+    views of the given data).
+
+    The encoded data is made of a header (see :attr:`HEADER_FORMAT`) with the
+    number of arrays, followed by each array: a fixed descriptor (see
+    :attr:`ARRAY_FORMAT`) with its dtype (including the byte order), its
+    number of dimensions, its compression, the length of its name and its
+    size in bytes, then its shape (uint64 each), its name (utf-8), and its
+    data (C order, zlib or bz2 compressed if requested). The descriptors and
+    the data start at multiples of 8 bytes. All integers are little-endian.
+
+    Example::
+
+        >>> from taurus.core.util.codecs import CodecFactory
+        >>> import numpy
+
+        >>> cf = CodecFactory()
+        >>> codec = cf.getCodec('ndarray')
+        >>> format, encoded_data = codec.encode(("", numpy.eye(3)))
+        >>> format, decoded_data = codec.decode((format, encoded_data))
+        >>> print decoded_data
+        [[ 1.  0.  0.]
+         [ 0.  1.  0.]
+         [ 0.  0.  1.]]
+        >>> # named arrays (the array data is compressed with zlib)
+        >>> data = [('x', numpy.arange(1000)), ('y', numpy.zeros(1000))]
+        >>> format, encoded_data = codec.encode(("", data), compression='zip')
+        >>> format, decoded_data = codec.decode((format, encoded_data))
+        >>> print decoded_data.keys()
+        ['x', 'y']
+    """
+
+    #: magic, version, flags (bit 0: named arrays) and number of arrays
+    HEADER_FORMAT = '<4sHHI4x'
+    #: dtype, number of dimensions, compression, name length and size
+    ARRAY_FORMAT = '<8sBBHQ'
+
+    MAGIC = 'NDAR'
+    VERSION = 1
+    NAMED = 0x1
+
+    #: ids of the supported compressions
+    COMPRESSIONS = {None: 0, 'zip': 1, 'bz2': 2}
+    #: array kinds that can be encoded (bool, numbers and strings)
+    KINDS = 'biufcSU'
+
+    # (only simple dtypes are given to numpy.dtype, which would evaluate
+    # other strings)
+    __DTYPE = re.compile('^[<>|][%s][0-9]{1,6}$' % KINDS)
+    __HEADER = struct.Struct(HEADER_FORMAT)
+    __ARRAY = struct.Struct(ARRAY_FORMAT)
+    __SHAPE = '<u8'
+    # (size of the pieces of bz2 data fed to the decompressor: smaller than
+    # any compressed bz2 block, so that at most one block is decompressed
+    # by each call)
+    __BZ2_CHUNK = 8
+    # (maximum decompressed/compressed size ratios of zlib, which is ~1032,
+    # and bz2, which is ~1.4e6 for long runs of zeros)
+    __MAX_RATIOS = {1: 1032, 2: 1500000}
+
+    def encode(self, data, *args, **kwargs):
+        """encodes the given numpy array(s). The given data **must** be a
+        numpy array or a sequence of (name, numpy array) pairs (or a dict).
+
+        :param data: (sequence[str, obj]) a sequence of two elements where the first item is the encoding format of the second item object
+        :param compression: (str or None) compression of the array data:
+                            'zip', 'bz2' or None (the default) for no
+                            compression (optional keyword argument)
+
+        :return: (sequence[str, obj]) a sequence of two elements where the first item is the encoding format of the second item object"""
+        format = 'ndarray'
+        if len(data[0]):
+            format += '_%s' % data[0]
+        compression = kwargs.get('compression')
+        if compression not in self.COMPRESSIONS:
+            raise ValueError('Unsupported compression %s' % compression)
+        arrays = data[1]
+        flags = 0
+        if isinstance(arrays, numpy.ndarray):
+            arrays = [('', arrays)]
+        else:
+            if isinstance(arrays, dict):
+                arrays = arrays.items()
+            flags |= self.NAMED
+        chunks = [self.__HEADER.pack(self.MAGIC, self.VERSION, flags,
+                                     len(arrays))]
+        for name, array in arrays:
+            chunks.extend(self.__encodeArray(name, array, compression))
+        return format, ''.join(chunks)
+
+    def __encodeArray(self, name, array, compression):
+        array = numpy.asarray(array)
+        if not array.flags.c_contiguous:
+            array = numpy.ascontiguousarray(array)
+        dtype = array.dtype.str
+        if array.dtype.kind not in self.KINDS or len(dtype) > 8:
+            raise TypeError('Unsupported array dtype %s' % array.dtype)
+        if isinstance(name, unicode):
+            name = name.encode('utf-8')
+        payload = array.tostring()
+        if compression == 'zip':
+            import zlib
+            payload = zlib.compress(payload)
+        elif compression == 'bz2':
+            import bz2
+            payload = bz2.compress(payload)
+        head = self.__ARRAY.pack(dtype, array.ndim,
+                                 self.COMPRESSIONS[compression], len(name),
+                                 len(payload))
+        head += numpy.array(array.shape, self.__SHAPE).tostring() + name
+        return (head, self.__padding(len(head)), payload,
+                self.__padding(len(payload)))
+
+    def __padding(self, size):
+        return '\0' * (-size % 8)
+
+    def decode(self, data, *args, **kwargs):
+        """decodes the given numpy array(s). Uncompressed arrays are not
+        copied.
+
+        :param data: (sequence[str, obj]) a sequence of two elements where the first item is the encoding format of the second item object
+
+        :return: (sequence[str, obj]) a sequence of two elements where the
+                 first item is the encoding format of the second item object
+                 (a numpy array or, if named arrays were encoded, an
+                 OrderedDict<str, numpy.ndarray>)
+
+        :raises: ValueError if the data is not valid"""
+        if not data[0].startswith('ndarray'):
+            return data
+        format = data[0].partition('_')[2]
+        buf = data[1]
+        try:
+            magic, version, flags, count = self.__HEADER.unpack_from(buf)
+        except struct.error:
+            raise ValueError('Invalid ndarray data (truncated header)')
+        if magic != self.MAGIC or version != self.VERSION:
+            raise ValueError('Invalid ndarray data (wrong magic or version)')
+        offset = self.__HEADER.size
+        arrays = []
+        for i in xrange(count):
+            name, array, offset = self.__decodeArray(buf, offset)
+            arrays.append((name, array))
+        if offset != len(buf):
+            raise ValueError('Invalid ndarray data (trailing data)')
+        if flags & self.NAMED:
+            return format, OrderedDict(arrays)
+        if count != 1:
+            raise ValueError('Invalid ndarray data (unnamed array count)')
+        return format, arrays[0][1]
+
+    def __decodeArray(self, buf, offset):
+        """returns the name, the array and the offset of the next array"""
+        size = len(buf)
+        try:
+            dtype, ndim, compression, namelen, nbytes = \
+                self.__ARRAY.unpack_from(buf, offset)
+        except struct.error as e:
+            raise ValueError('Invalid ndarray data (%s)' % e)
+        dtype = dtype.rstrip('\0')
+        if not self.__DTYPE.match(dtype):
+            raise ValueError('Invalid ndarray data (dtype %r)' % dtype)
+        try:
+            dtype = numpy.dtype(dtype)
+        except TypeError:
+            raise ValueError('Invalid ndarray data (dtype %r)' % dtype)
+        if dtype.itemsize == 0:
+            raise ValueError('Invalid ndarray data (dtype %r)' % dtype.str)
+        offset += self.__ARRAY.size
+        end = offset + 8 * ndim + namelen
+        if end > size:
+            raise ValueError('Invalid ndarray data (truncated descriptor)')
+        shape = tuple(int(n) for n in numpy.frombuffer(
+            buf, self.__SHAPE, count=ndim, offset=offset))
+        name = str(buf[offset + 8 * ndim:end])
+        offset = end + (-end % 8)
+        end = offset + nbytes
+        if end > size:
+            raise ValueError('Invalid ndarray data (truncated array)')
+        expected = dtype.itemsize
+        for n in shape:
+            expected *= n
+        if compression == 0:
+            payload, start = buf, offset
+        elif compression in (1, 2):
+            if expected >= sys.maxsize or \
+                    expected > self.__MAX_RATIOS[compression] * nbytes:
+                # (too large, or implausibly small compressed data)
+                raise ValueError('Invalid ndarray data (size of the array)')
+            payload = self.__decompress(buffer(buf, offset, nbytes),
+                                        compression, expected)
+            start, nbytes = 0, len(payload)
+        else:
+            raise ValueError('Invalid ndarray data (compression %i)' %
+                             compression)
+        if nbytes != expected:
+            raise ValueError('Invalid ndarray data (size of the array)')
+        count = 0
+        if expected:
+            count = expected // dtype.itemsize
+        array = numpy.frombuffer(payload, dtype, count=count, offset=start)
+        return name, array.reshape(shape), end + (-end % 8)
+
+    def __decompress(self, data, compression, maxSize):
+        """returns the decompressed data. It is rejected as soon as it
+        exceeds maxSize bytes, so that a small (malicious) payload cannot
+        make the decoder allocate an arbitrary amount of memory"""
+        import zlib
+        import bz2
+        tooLarge = ValueError('Invalid ndarray data (size of the array)')
+        try:
+            if compression == 1:
+                decompressor = zlib.decompressobj()
+                payload = decompressor.decompress(data, maxSize + 1)
+                if decompressor.unconsumed_tail:
+                    raise tooLarge
+            else:
+                # (the bz2 decompressor has no output limit: it is fed with
+                # tiny pieces, so the output may exceed maxSize by at most
+                # one bz2 block, i.e. ~46 MB)
+                decompressor = bz2.BZ2Decompressor()
+                pieces, size = [], 0
+                for i in xrange(0, len(data), self.__BZ2_CHUNK):
+                    piece = decompressor.decompress(
+                        data[i:i + self.__BZ2_CHUNK])
+                    size += len(piece)
+                    if size > maxSize:
+                        raise tooLarge
+                    pieces.append(piece)
+                payload = ''.join(pieces)
+        except (zlib.error, IOError, EOFError) as e:
+            raise ValueError('Invalid ndarray data (%s)' % e)
+        if len(payload) > maxSize:
+            raise tooLarge
+        return payload
+
+
 class CodecPipeline(Codec, list):
     """The codec class used when encoding/decoding data with multiple encoders
 
+    The codecs exchange the data as iterables of chunks (see
+    :meth:`Codec.encodeChunks`), so that, e.g., the chunks of a json string
+    are fed to the compressor as they are produced instead of building the
+    whole json string first.
+
     Example usage::
 
         >>> from taurus.core.util.codecs import CodecPipeline
@@ -786,9 +1215,11 @@ class CodecPipeline(Codec, list):
         :param data: (sequence[str, obj]) a sequence of two elements where the first item is the encoding format of the second item object
 
         :return: (sequence[str, obj]) a sequence of two elements where the first item is the encoding format of the second item object"""
+        format, chunks = data[0], (data[1],)
         for codec in reversed(self):
-            data = codec.encode(data, *args, **kwargs)
-        return data
+            format, chunks = codec.encodeChunks((format, chunks), *args,
+                                                **kwargs)
+        return format, _joinChunks(chunks)
 
     def decode(self, data, *args, **kwargs):
         """decodes the given data.
@@ -796,9 +1227,11 @@ class CodecPipeline(Codec, list):
         :param data: (sequence[str, obj]) a sequence of two elements where the first item is the encoding format of the second item object
 
         :return: (sequence[str, obj]) a sequence of two elements where the first item is the encoding format of the second item object"""
+        format, chunks = data[0], (data[1],)
         for codec in self:
-            data = codec.decode(data, *args, **kwargs)
-        return data
+            format, chunks = codec.decodeChunks((format, chunks), *args,
+                                                **kwargs)
+        return format, _joinChunks(chunks)
 
 
 class CodecFactory(Singleton, Logger):
@@ -849,6 +1282,7 @@ class CodecFactory(Singleton, Logger):
         'zip': ZIPCodec,
         'pickle': PickleCodec,
         'plot': PlotCodec,
+        'ndarray': NDArrayCodec,
         'VIDEO_IMAGE': VideoImageCodec,  # deprecated
         'videoimage': VideoImageCodec,
         'null': NullCodec,
@@ -868,10 +1302,19 @@ class CodecFactory(Singleton, Logger):
 
         # dict<str, Codec>
         # where:
-        #  - key is the codec format
+        #  - key is the codec format (pipelines are also kept, by their whole
+        #    format string)
         #  - value is the codec object that supports the format
         self._codecs = CaselessDict()
 
+    def _dropCodecs(self, format):
+        '''removes the cached codec of the given codec id and the cached
+        pipelines that use it'''
+        format = '_%s_' % format.lower()
+        for f in self._codecs.keys():
+            if format in '_%s_' % f.lower():
+                del self._codecs[f]
+
     def registerCodec(self, format, klass):
         """Registers a new codec. If a codec already exists for the given format
         it is removed.
@@ -880,9 +1323,8 @@ class CodecFactory(Singleton, Logger):
         :param klass: (Codec class) the class that handles the format"""
         self._codec_klasses[format] = klass
 
-        # del old codec if exists
-        if self._codecs.has_key(format):
-            del self._codecs[format]
+        # del old codec (and the pipelines using it) if exists
+        self._dropCodecs(format)
 
     def unregisterCodec(self, format):
         """Unregisters the given format. If the format does not exist an exception
@@ -894,8 +1336,7 @@ class CodecFactory(Singleton, Logger):
         if self._codec_klasses.has_key(format):
             del self._codec_klasses[format]
 
-        if self._codecs.has_key(format):
-            del self._codecs[format]
+        self._dropCodecs(format)
 
     def getCodec(self, format):
         """Returns the codec object for the given format or None if no suitable
@@ -31,14 +31,17 @@ python distribution.
 __all__ = ["CaselessList", "CaselessDict", "CaselessWeakValueDict", "LoopList",
            "CircBuf", "LIFO", "TimedQueue", "self_locked", "ThreadDict",
            "defaultdict", "defaultdict_fromkey", "CaselessDefaultDict",
-           "DefaultThreadDict", "getDictAsTree", "ArrayBuffer", ]
+           "DefaultThreadDict", "getDictAsTree", "ArrayBuffer",
+           "RingArrayBuffer", "DirtySet", "MatchIndex", ]
 
 __docformat__ = "restructuredtext"
 
 import copy
 import time
+import bisect
 import weakref
 import operator
+import threading
 
 
 class CaselessList(list):
@@ -1311,6 +1314,521 @@ class ArrayBuffer(object):
         return self.maxSize() - self.contentsSize()
 
 
+class RingArrayBuffer(object):
+    '''A data buffer with the same API as :class:`ArrayBuffer` but whose
+    :meth:`append` and :meth:`extend` run in amortized O(1) time (per element)
+    also once the maximum size has been reached.
+
+    :class:`ArrayBuffer` keeps its contents at the beginning of the internal
+    buffer, so once it is full, each append moves the whole contents one
+    position to the left. In contrast, :class:`RingArrayBuffer` keeps its
+    contents in a sliding window over an internal buffer of up to twice the
+    maximum size: discarding old elements just moves the start of the window,
+    and only when the window reaches the end of the internal buffer, the
+    contents are copied to the beginning of a newly allocated one (i.e., at
+    most once every `maxSize` appends).
+
+    The window is always contiguous, so :meth:`contents` returns a (read-only)
+    view of it without copying. Since the internal buffer is never compacted
+    in place, the views returned by :meth:`contents` are snapshots: they are
+    not modified by subsequent appends or extends.
+
+    The price is that up to 2*maxSize elements are allocated (plus those of
+    the internal buffers still referenced by snapshots).'''
+
+    def __init__(self, buffer, maxSize=0):
+        '''Creator.
+
+        :param buffer: (numpy.array) a numpy.array suitable to be used as the
+                       internal buffer.
+
+        :param maxSize: (int) Maximum size of the contents. The internal
+                        buffer will be allowed to grow up to twice this value.
+                        If maxSize=0 (default), the maximum size will be that of
+                        the given buffer
+        '''
+        self.__buffer = buffer
+        self.__start = 0
+        self.__end = 0
+        self.__maxSize = max(maxSize, buffer.shape[0])
+
+    def __view(self):
+        return self.__buffer[self.__start:self.__end]
+
+    def __getitem__(self, i):
+        return self.__view().__getitem__(i)
+
+    def __getslice__(self, i, j):
+        return self.__view().__getslice__(i, j)
+
+    def __len__(self):
+        return self.__end - self.__start
+
+    def __repr__(self):
+        return "RingArrayBuffer with contents = %s" % self.__view().__repr__()
+
+    def __str__(self):
+        return self.__view().__str__()
+
+    def __nonzero__(self):
+        return self.__view().__nonzero__()
+
+    def __setitem__(self, i, x):
+        self.__view().__setitem__(i, x)
+
+    def __setslice__(self, i, j, a):
+        if i >= len(self) or j > len(self):
+            raise IndexError()
+        self.__view().__setslice__(i, j, a)
+
+    def __realloc(self, newlen, keep, offset=0):
+        '''moves the last `keep` elements of the contents to position `offset`
+        of a newly allocated internal buffer of length `newlen`'''
+        import numpy
+        shape = list(self.__buffer.shape)
+        shape[0] = newlen
+        new = numpy.empty(shape, dtype=self.__buffer.dtype)
+        new[offset:offset + keep] = self.__buffer[self.__end - keep:self.__end]
+        self.__buffer = new
+        self.__start = offset
+        self.__end = offset + keep
+
+    def __makeRoom(self, needed):
+        '''makes sure that `needed` elements can be written after the end of
+        the contents, discarding the oldest ones if the maximum size would be
+        exceeded'''
+        if self.__end + needed <= self.__buffer.shape[0]:
+            return
+        keep = max(0, min(len(self), self.__maxSize - needed))
+        # grow geometrically (up to 2*maxSize) so that reallocations are rare
+        newlen = max(2 * (keep + needed), self.__buffer.shape[0])
+        newlen = max(min(newlen, 2 * self.__maxSize), keep + needed)
+        self.__realloc(newlen, keep)
+
+    def resizeBuffer(self, newlen):
+        '''resizes the internal buffer. If it is shorter than the current
+        contents, the last elements of the contents are discarded'''
+        keep = min(len(self), newlen)
+        self.__end = self.__start + keep
+        self.__realloc(newlen, keep)
+
+    def append(self, x):
+        ''' similar to the append method in a list, except that once the maximum
+        size is reached, elements get discarded on the begginning to keep
+        the size within the limit
+
+        :param x: (scalar) element to be appended
+
+        .. seealso:: :meth:`extend`
+        '''
+        self.__makeRoom(1)
+        self.__buffer[self.__end] = x
+        self.__end += 1
+        if self.__end - self.__start > self.__maxSize:
+            self.__start += 1
+
+    def extend(self, a):
+        ''' similar to the extend method of a list, except that once the maximum
+        size is reached, elements get discarded on the begginning to keep
+        the size within the limit
+
+        :param a: (numpy.array) array of elements to append
+
+        .. seealso:: :meth:`append`, :meth:`extendLeft`
+        '''
+        a = a[-self.__maxSize:]
+        len_a = a.shape[0]
+        self.__makeRoom(len_a)
+        self.__buffer[self.__end:self.__end + len_a] = a
+        self.__end += len_a
+        self.__start = max(self.__start, self.__end - self.__maxSize)
+
+    def extendLeft(self, a):
+        ''' Prepends data to the current contents. Note that, contrary to the
+        extent method, no data will be discarded if the maximum size limit is
+        reached. Instead, an exception will be raised.
+
+        :param a: (numpy.array) array of elements to append
+
+        .. seealso:: :meth:`extend`'''
+        len_a = a.shape[0]
+        newlen = len(self) + len_a
+        if newlen > self.__maxSize:
+            raise ValueError(
+                'Maximum buffer size cannot be exceeded when calling extendLeft ')
+        if len_a > self.__start:
+            bsize = self.__buffer.shape[0]
+            self.__realloc(max(bsize, min(2 * newlen, 2 * self.__maxSize)),
+                           len(self), offset=len_a)
+        self.__buffer[self.__start - len_a:self.__start] = a
+        self.__start -= len_a
+
+    def moveLeft(self, n):
+        '''discards n elements from the begginning. Contrary to
+        :meth:`ArrayBuffer.moveLeft`, no elements are actually moved.
+
+        **Note:** if n is larger or equal than the contents size, the
+        whole buffer is wiped
+
+        :param n: (int)'''
+        self.__start = min(self.__start + n, self.__end)
+
+    def contents(self):
+        '''returns a read-only view of the contents. The view is not modified
+        by subsequent calls to :meth:`append` or :meth:`extend`.
+
+        It is equivalent to b[:] (except that b[:] is writable)
+
+        :return: (numpy.array) array of contents
+
+        .. seealso:: :meth:`toArray`
+        '''
+        v = self.__view()
+        v.flags.writeable = False
+        return v
+
+    def toArray(self):
+        '''returns a copy of the array of the contents. It is equivalent to
+        ``b.contents.copy()``
+
+        :return: (numpy.array) copy of array of contents
+
+        .. seealso:: :meth:`contents`
+        '''
+        return self.__view().copy()
+
+    def contentsSize(self):
+        '''Equivalent to len(b)
+
+        :return: (int) length of the current contents of the buffer (not
+                 the maximum size of the buffer)
+
+        .. seealso:: :meth:`maxSize`
+        '''
+        return len(self)
+
+    def bufferSize(self):
+        '''Returns the current size of the internal buffer
+
+        :return: (int) current length of the internal buffer
+
+        .. seealso:: :meth:`contentsSize`, :meth:`maxSize`
+        '''
+        return self.__buffer.shape[0]
+
+    def maxSize(self):
+        '''Returns the maximum size of the contents, beyond which the
+        buffer starts discarding elements when appending
+
+        :return: (int) maximum length of the contents
+
+        .. seealso:: :meth:`contentsSize`, :meth:`append`, :meth:`extend`, :meth:`isFull`
+        '''
+        return self.__maxSize
+
+    def setMaxSize(self, maxSize):
+        '''Sets the maximum size of the contents, beyond which the
+        buffer starts discarding elements when appending
+
+        :param maxSize: (int) maximum length of the contents
+
+        .. seealso:: :meth:`contentsSize`, :meth:`append`, :meth:`extend`, :meth:`isFull`
+        '''
+        if maxSize < len(self):
+            raise ValueError(
+                'Cannot set a maximum size below the current contents size (%i)' % len(self))
+        self.__maxSize = maxSize
+
+    def isFull(self):
+        '''Whether the contents reached the maximum size
+
+        :return: (bool) True if the contents fill the maximum size. False otherwise.
+
+        .. seealso:: :meth:`maxSize`
+        '''
+        return len(self) >= self.__maxSize
+
+    def remainingSize(self):
+        '''returns the remaining free space (e.g., 0 if it is full)
+
+        :return: (int) number of elements that can be added before starting to
+                 discard
+
+        .. seealso:: :meth:`contentsSize`, :meth:`maxSize`,
+        '''
+        return self.maxSize() - self.contentsSize()
+
+
+class DirtySet(object):
+    '''A thread-safe set of objects with pending updates, which merges the
+    repeated updates of an object. Producers (e.g. event threads) :meth:`add`
+    objects and a consumer periodically :meth:`take` s all of them at once.
+
+    Each pending object has some flags (e.g. the kind of update that it
+    needs). When an object is added again before being taken, the update is
+    merged (and counted as such) and its flags are OR'ed.
+
+    Example::
+
+        dirty = DirtySet()
+        if dirty.add(item):
+            scheduleFlush()  # the first pending update
+        ...
+        for item, flags in dirty.take().iteritems():
+            item.update()
+    '''
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._added = 0
+        self._merged = 0
+        self._taken = 0
+
+    def __len__(self):
+        return len(self._pending)
+
+    def __contains__(self, obj):
+        return obj in self._pending
+
+    def add(self, obj, flags=0):
+        '''marks an object as having a pending update
+
+        :param obj: (object) a hashable object
+        :param flags: (int) flags of the update (OR'ed with those of a
+                      pending update of the same object)
+
+        :return: (bool) True if there were no pending updates (i.e., if the
+                 consumer may need to be notified)
+        '''
+        with self._lock:
+            self._added += 1
+            pending = self._pending
+            previous = pending.get(obj)
+            if previous is None:
+                pending[obj] = flags
+                return len(pending) == 1
+            self._merged += 1
+            pending[obj] = previous | flags
+            return False
+
+    def take(self):
+        '''returns the pending updates and empties the set
+
+        :return: (dict<object, int>) the flags of each object
+        '''
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._taken += len(pending)
+            return pending
+
+    def discard(self, objs, flags=0):
+        '''discards the pending updates of the given objects which have
+        exactly the given flags (e.g. those added again while processing
+        them, if processing them already covers those updates)
+
+        :param objs: (sequence<object>) the objects
+        :param flags: (int) flags of the updates that are discarded
+        '''
+        with self._lock:
+            pending = self._pending
+            for obj in objs:
+                if pending.get(obj, ~flags) == flags:
+                    del pending[obj]
+                    self._added -= 1
+
+    def getStats(self):
+        '''returns some counters of the updates
+
+        :return: (dict) with the number of currently pending objects
+                 ("pending"), of updates added ("added"), of updates merged
+                 with a pending one ("merged") and of objects taken
+                 ("taken")
+        '''
+        with self._lock:
+            return dict(pending=len(self._pending), added=self._added,
+                        merged=self._merged, taken=self._taken)
+
+
+class MatchIndex(object):
+    '''An index of groups of objects (e.g. the devices of each domain and
+    family of a device tree) for finding which of their objects match a text
+    filter (e.g. the text typed in a filter box).
+
+    The texts of each object (e.g. its name and alias) are obtained (and
+    lower-cased) once, when its group is set, and the texts of all the
+    objects of a group are joined, so that a filter is searched in a group
+    at once. The results are memoized per filter and, since the objects
+    which contain a text also contain any part of it, a filter which
+    contains a previous one (e.g. while typing) is only searched in the
+    groups and objects which matched the previous one.
+
+    Example::
+
+        index = MatchIndex(lambda dev: (dev.name(), dev.alias()))
+        index.setGroup('sys', devices)
+        index.getMatches('sys', 'tg_te')    # --> name or alias with "tg_te"
+        index.hasMatches('sys', 'tg_test')  # --> only checks the above
+    '''
+
+    #: maximum number of filters whose results are memoized
+    MAX_FILTERS = 16
+
+    def __init__(self, texts):
+        '''
+        :param texts: (callable) function which returns the texts of an
+                      object (None texts are ignored)
+        '''
+        self._texts = texts
+        # dict<key, tuple<list, str, list<int>>>: the objects of each group
+        # (with their texts and their joined lower-cased texts), the text of
+        # the group and the position of each object in it
+        self._groups = {}
+        # dict<tuple<filter, bool>, dict<key, bool or list>>: the results
+        # of each group for the last filters
+        self._results = {}
+        self._filters = []
+
+    def __len__(self):
+        return len(self._groups)
+
+    def __contains__(self, key):
+        return key in self._groups
+
+    def setGroup(self, key, objs):
+        '''sets the objects of a group
+
+        :param key: (object) the (hashable) key of the group
+        :param objs: (sequence<object>) the objects
+        '''
+        entries, texts, starts = [], [], []
+        pos = 0
+        for obj in objs:
+            objTexts = tuple(t for t in self._texts(obj) if t is not None)
+            text = '\n'.join(objTexts).lower()
+            entries.append((obj, objTexts, text))
+            texts.append(text)
+            starts.append(pos)
+            pos += len(text) + 1
+        self._groups[key] = entries, '\0'.join(texts), starts
+        for results in self._results.values():
+            results.pop(key, None)
+
+    def getGroup(self, key):
+        '''returns the objects of a group
+
+        :param key: (object) the key of the group
+
+        :return: (list<object>)
+
+        :raises: KeyError if the group has not been set
+        '''
+        return [entry[0] for entry in self._groups[key][0]]
+
+    def clear(self):
+        '''removes all the groups (e.g. when the objects have changed)'''
+        self._groups.clear()
+        self._results.clear()
+        self._filters = []
+
+    def getMatches(self, key, pattern, match=None):
+        '''returns the objects of a group which match a filter
+
+        :param key: (object) the key of the group
+        :param pattern: (str or object) the filter: the objects match if any
+                        of their texts contains it (ignoring the case). If
+                        *match* is given, it just identifies the filter (for
+                        memoizing its results)
+        :param match: (callable or None) function which receives the texts
+                      of an object and returns True if it matches the filter
+                      (e.g. for regular expressions)
+
+        :return: (list<object>)
+
+        :raises: KeyError if the group has not been set
+        '''
+        if match is not None:
+            results = self._getResults((pattern, False))
+            ret = results.get(key)
+            if ret is None:
+                ret = results[key] = [entry for entry in self._groups[key][0]
+                                      if match(entry[1])]
+        else:
+            pattern = pattern.lower()
+            results = self._getResults((pattern, True))
+            ret = results.get(key)
+            if ret is None or ret is True:
+                ret = self._candidates(key, pattern)
+                if ret is None:
+                    ret = self._search(key, pattern)
+                else:
+                    ret = [entry for entry in ret if pattern in entry[2]]
+                results[key] = ret
+            elif ret is False:
+                ret = []
+        return [entry[0] for entry in ret]
+
+    def hasMatches(self, key, pattern, match=None):
+        '''returns True if any object of a group matches a filter (see
+        :meth:`getMatches`)
+
+        :return: (bool)
+        '''
+        if match is not None:
+            return len(self.getMatches(key, pattern, match)) > 0
+        pattern = pattern.lower()
+        results = self._getResults((pattern, True))
+        ret = results.get(key)
+        if ret is None:
+            ret = self._candidates(key, pattern)
+            if ret is None:
+                ret = pattern in self._groups[key][1]
+            else:
+                ret = [entry for entry in ret if pattern in entry[2]]
+            results[key] = ret
+        return bool(ret)
+
+    def _getResults(self, filter):
+        results = self._results.get(filter)
+        if results is None:
+            results = self._results[filter] = {}
+            self._filters.append(filter)
+            if len(self._filters) > self.MAX_FILTERS:
+                del self._results[self._filters.pop(0)]
+        return results
+
+    def _candidates(self, key, pattern):
+        '''returns the entries of a group which may contain the given
+        (lower-cased) pattern, from the results of the filters contained in
+        it, or None if they are not known'''
+        ret, length = None, -1
+        for (other, substring), results in self._results.items():
+            if not substring or len(other) >= len(pattern) or \
+                    other not in pattern:
+                continue
+            found = results.get(key)
+            if found is False:
+                return []
+            if type(found) is list and len(other) > length:
+                ret, length = found, len(other)
+        return ret
+
+    def _search(self, key, pattern):
+        '''returns the entries of a group which contain the given
+        (lower-cased) pattern'''
+        entries, text, starts = self._groups[key]
+        ret = []
+        find = text.find
+        pos = find(pattern)
+        while pos != -1:
+            i = bisect.bisect_right(starts, pos) - 1
+            ret.append(entries[i])
+            if i + 1 == len(starts):
+                break
+            pos = find(pattern, starts[i + 1])
+        return ret
+
+
 def chunks(l, n):
     '''Generator which yields successive n-sized chunks from l'''
     for i in xrange(0, len(l), n):
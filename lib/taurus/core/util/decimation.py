@@ -0,0 +1,280 @@
+#!/usr/bin/env python
+
+#############################################################################
+##
+# This file is part of Taurus
+##
+# http://taurus-scada.org
+##
+# Copyright 2011 CELLS / ALBA Synchrotron, Bellaterra, Spain
+##
+# Taurus is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+##
+# Taurus is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+##
+# You should have received a copy of the GNU Lesser General Public License
+# along with Taurus.  If not, see <http://www.gnu.org/licenses/>.
+##
+#############################################################################
+
+"""
+This module provides tools for reducing the number of points of a data set
+that is going to be displayed (e.g. a curve in a plot) without altering the way
+it is rendered.
+"""
+
+__all__ = ["MinMaxDecimator"]
+
+__docformat__ = "restructuredtext"
+
+import sys
+import math
+import numpy
+
+from containers import RingArrayBuffer
+
+# columns of the bin summaries: the first, minimum, maximum and last points
+# (x,y) of each bin
+_FX, _FY, _NX, _NY, _MX, _MY, _LX, _LY = range(8)
+
+
+def _isNonDecreasing(x):
+    return bool(numpy.all(x[1:] >= x[:-1]))
+
+
+def _segmentArg(y, starts, ends, reducer):
+    '''returns the index of the first element of each segment of y that equals
+    the reduction of the segment (or the start of the segment if all its
+    elements are NaN)'''
+    red = reducer.reduceat(y, starts)
+    seg = numpy.repeat(numpy.arange(len(starts)), ends - starts)
+    candidates = numpy.flatnonzero(y == red[seg])
+    segs, first = numpy.unique(seg[candidates], return_index=True)
+    ret = starts.copy()
+    ret[segs] = candidates[first]
+    return ret
+
+
+def _summarize(x, y, bins):
+    '''returns the bin summaries (one row per bin) of the given data and the
+    indices of their bins. x must be non-decreasing'''
+    starts = numpy.flatnonzero(bins[1:] != bins[:-1]) + 1
+    starts = numpy.concatenate(([0], starts))
+    ends = numpy.append(starts[1:], len(x))
+    imin = _segmentArg(y, starts, ends, numpy.fmin)
+    imax = _segmentArg(y, starts, ends, numpy.fmax)
+    last = ends - 1
+    stats = numpy.column_stack((x[starts], y[starts], x[imin], y[imin],
+                                x[imax], y[imax], x[last], y[last]))
+    return bins[starts], stats
+
+
+class _BinCache(object):
+    '''Summaries of a non-decreasing data set, for bins of a given width'''
+
+    def __init__(self, width):
+        self.width = width
+        self.lastx = None
+        self.bins = RingArrayBuffer(numpy.zeros(64, dtype='int64'),
+                                    maxSize=sys.maxint)
+        self.stats = RingArrayBuffer(numpy.zeros((64, 8)), maxSize=sys.maxint)
+
+    def binsOf(self, x):
+        return numpy.floor(x / self.width).astype('int64')
+
+    def extend(self, x, y):
+        '''adds the summaries of new data (which must come after the data
+        already summarized)'''
+        if not len(x):
+            return
+        bins, stats = _summarize(x, y, self.binsOf(x))
+        if len(self.bins) and bins[0] == self.bins[-1]:
+            # the first new bin continues the last summarized one
+            last, new = self.stats[-1:][0], stats[0]
+            if new[_NY] < last[_NY] or numpy.isnan(last[_NY]):
+                last[_NX:_NY + 1] = new[_NX:_NY + 1]
+            if new[_MY] > last[_MY] or numpy.isnan(last[_MY]):
+                last[_MX:_MY + 1] = new[_MX:_MY + 1]
+            last[_LX:] = new[_LX:]
+            bins, stats = bins[1:], stats[1:]
+        self.bins.extend(bins)
+        self.stats.extend(stats)
+        self.lastx = x[-1]
+
+    def update(self, x, y):
+        '''updates the summaries with the data appended since the last update
+        and discards those of data no longer present. Returns False if the
+        data is not an update of the summarized data (and therefore the cache
+        must be rebuilt)'''
+        if not len(x) or not len(self.bins):
+            return False
+        if x[0] < self.stats[0, _FX] or x[0] > self.lastx or x[-1] < self.lastx:
+            return False
+        start = numpy.searchsorted(x, self.lastx, 'right')
+        if start < len(x):
+            if not _isNonDecreasing(x[start:]):
+                return False
+            self.extend(x[start:], y[start:])
+        self._discardBefore(x, y)
+        return True
+
+    def _discardBefore(self, x, y):
+        x0 = x[0]
+        if self.stats[0, _FX] >= x0:
+            return
+        b0 = self.binsOf(x0)
+        self.bins.moveLeft(numpy.searchsorted(self.bins.contents(), b0))
+        self.stats.moveLeft(len(self.stats) - len(self.bins))
+        if len(self.bins) and self.bins[0] == b0:
+            # the first bin is partially discarded: summarize it again
+            k = numpy.searchsorted(x, (b0 + 1) * self.width) + 1
+            k = numpy.count_nonzero(self.binsOf(x[:k]) == b0)
+            self.stats[0] = _summarize(x[:k], y[:k], self.binsOf(x[:k]))[1][0]
+
+    @staticmethod
+    def _outline(stats):
+        '''returns (x,y) of up to 4 points (first, min, max, last) outlining
+        the given bin summaries'''
+        if not len(stats):
+            return numpy.zeros((0, 2))
+        rows = [(stats[0, _FX], stats[0, _FY]),
+                (stats[-1, _LX], stats[-1, _LY])]
+        try:
+            i, j = numpy.nanargmin(stats[:, _NY]), numpy.nanargmax(stats[:, _MY])
+            rows += [(stats[i, _NX], stats[i, _NY]),
+                     (stats[j, _MX], stats[j, _MY])]
+        except ValueError:  # all NaN
+            pass
+        pts = numpy.array(rows)
+        return pts[numpy.argsort(pts[:, 0], kind='mergesort')]
+
+    def render(self, xmin, xmax):
+        '''returns the (x,y) arrays of the decimated data for the given range.
+        Bins within the range (plus one at each side) are represented by their
+        first, min, max and last points. The rest of the data is outlined by
+        its first, min, max and last points, so that the bounding rectangle of
+        the decimated data is that of the whole data'''
+        bins = self.bins.contents()
+        stats = self.stats.contents()
+        lo = numpy.searchsorted(bins, math.floor(xmin / self.width) - 1, 'left')
+        hi = numpy.searchsorted(bins, math.floor(xmax / self.width) + 1,
+                                'right')
+        vis = stats[lo:hi]
+        minfirst = vis[:, _NX] <= vis[:, _MX]
+        pts = numpy.empty((len(vis), 4, 2))
+        pts[:, 0] = vis[:, _FX:_FY + 1]
+        pts[:, 1] = numpy.where(minfirst[:, None], vis[:, _NX:_NY + 1],
+                                vis[:, _MX:_MY + 1])
+        pts[:, 2] = numpy.where(minfirst[:, None], vis[:, _MX:_MY + 1],
+                                vis[:, _NX:_NY + 1])
+        pts[:, 3] = vis[:, _LX:_LY + 1]
+        pts = numpy.concatenate((self._outline(stats[:lo]),
+                                 pts.reshape((-1, 2)),
+                                 self._outline(stats[hi:])))
+        # remove consecutive duplicates (e.g. from bins with a single point)
+        keep = numpy.ones(len(pts), dtype=bool)
+        keep[1:] = numpy.any(pts[1:] != pts[:-1], axis=1)
+        pts = pts[keep]
+        return pts[:, 0], pts[:, 1]
+
+
+class MinMaxDecimator(object):
+    '''Reduces the number of points of a curve to be rendered in a plot to a
+    few points per pixel column, without altering its rendering.
+
+    The abscissas are divided in bins of (at most) the width of a pixel
+    column, and each bin is replaced by its first, minimum, maximum and last
+    points (this is known as M4 aggregation). Since these are actual points of
+    the data, and a line drawn through them in a bin covers the same
+    pixels as the line through all the points of the bin, the result looks
+    the same as the original (up to the resolution of the bins, which are at
+    most one pixel column wide). The data outside of the displayed range is
+    reduced to just 4 points, which keep the bounding rectangle of the data
+    (e.g., for autoscaling) unchanged.
+
+    The bin width is rounded down to a power of 2, and the summaries of the
+    bins are cached for the last few bin widths (i.e., zoom levels), so that
+    panning, scrolling or returning to a previous zoom level does not require
+    processing the whole data again.
+
+    If `incremental` is True, the data passed on successive calls to
+    :meth:`decimate` is assumed to be updated only by appending points at the
+    end and discarding points from the beginning (as in a trend history), and
+    only the new points are processed (otherwise, data is processed completely
+    on each call).
+
+    Only data with non-decreasing abscissas is decimated. Other data (and data
+    with less than :attr:`THRESHOLD` points per pixel column) is returned
+    unchanged.
+    '''
+
+    #: minimum number of points per pixel column for decimating
+    THRESHOLD = 8
+
+    def __init__(self, incremental=False, maxCachedScales=3):
+        '''
+        :param incremental: (bool) whether the data is only updated by
+                            appending (and discarding old) points
+        :param maxCachedScales: (int) number of bin widths for which the bin
+                                summaries are kept (only if incremental)
+        '''
+        self.incremental = incremental
+        self.maxCachedScales = maxCachedScales
+        self.rebuildCount = 0
+        self._caches = {}
+        self._cacheOrder = []
+
+    def reset(self):
+        '''discards all the cached bin summaries'''
+        self._caches = {}
+        self._cacheOrder = []
+
+    def decimate(self, x, y, xmin, xmax, ncols):
+        '''returns the decimated data for displaying the range [xmin, xmax] in
+        `ncols` pixel columns
+
+        :param x: (numpy.ndarray) abscissas (1D)
+        :param y: (numpy.ndarray) ordinates (1D, same length as x)
+        :param xmin: (float) minimum of the displayed range of x
+        :param xmax: (float) maximum of the displayed range of x
+        :param ncols: (int) number of pixel columns used for the range
+
+        :return: (tuple<numpy.ndarray,numpy.ndarray>) decimated x and y. Note
+                 that they may be the given x and y (if no decimation is
+                 needed)
+        '''
+        x, y = numpy.asarray(x), numpy.asarray(y)
+        if (x.ndim != 1 or y.shape != x.shape
+                or len(x) <= self.THRESHOLD * ncols or ncols <= 0
+                or not numpy.isfinite([xmin, xmax]).all() or xmax <= xmin):
+            return x, y
+        width = 2. ** math.floor(math.log(float(xmax - xmin) / ncols, 2))
+        cache = self._getCache(width, x, numpy.asarray(y, dtype='d'))
+        if cache is None:
+            return x, y
+        return cache.render(xmin, xmax)
+
+    def _getCache(self, width, x, y):
+        cache = self._caches.pop(width, None)
+        if width in self._cacheOrder:
+            self._cacheOrder.remove(width)
+        if cache is not None and not cache.update(x, y):
+            cache = None
+        if cache is None:
+            if not _isNonDecreasing(x):
+                return None
+            cache = _BinCache(width)
+            cache.extend(x, y)
+            self.rebuildCount += 1
+        if self.incremental:
+            self._caches[width] = cache
+            self._cacheOrder.append(width)
+            while len(self._cacheOrder) > self.maxCachedScales:
+                self._caches.pop(self._cacheOrder.pop(0))
+        return cache
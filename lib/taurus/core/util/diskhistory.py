@@ -0,0 +1,323 @@
+#!/usr/bin/env python
+
+#############################################################################
+##
+# This file is part of Taurus
+##
+# http://taurus-scada.org
+##
+# Copyright 2011 CELLS / ALBA Synchrotron, Bellaterra, Spain
+##
+# Taurus is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+##
+# Taurus is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+##
+# You should have received a copy of the GNU Lesser General Public License
+# along with Taurus.  If not, see <http://www.gnu.org/licenses/>.
+##
+#############################################################################
+
+"""
+This module provides a history buffer that keeps most of its data on disk
+(e.g. for trends that are too long to be kept in memory)
+"""
+
+__all__ = ["DiskHistoryBuffer"]
+
+__docformat__ = "restructuredtext"
+
+import os
+import atexit
+import shutil
+import weakref
+import tempfile
+import threading
+import numpy
+from collections import OrderedDict
+
+#: maximum number of chunk files that are kept open (memory-mapped) at once
+#: by all the DiskHistoryBuffer instances
+MAX_OPEN_MAPS = 32
+
+# memory maps of the most recently read chunk files (the most recent last)
+_maps = OrderedDict()
+_mapsLock = threading.Lock()
+
+
+def _getMap(fname):
+    '''returns a read-only memory map of the given .npy file, keeping it open
+    (among the MAX_OPEN_MAPS most recently used ones) for the next reads'''
+    with _mapsLock:
+        data = _maps.pop(fname, None)
+        if data is None:
+            data = numpy.load(fname, mmap_mode='r')
+        _maps[fname] = data
+        while len(_maps) > MAX_OPEN_MAPS:
+            # (the map is closed once no array refers to it)
+            _maps.popitem(last=False)
+        return data
+
+
+def _dropMaps(directory):
+    '''forgets the memory maps of the files of the given directory'''
+    with _mapsLock:
+        for fname in [f for f in _maps if os.path.dirname(f) == directory]:
+            del _maps[fname]
+
+
+# directory of each buffer not closed yet -> weak reference to the buffer
+# (whose callback removes the directory when the buffer is destroyed)
+_liveDirs = {}
+
+
+def _removeDirectory(directory):
+    '''removes the directory of a buffer (and forgets its memory maps)'''
+    _liveDirs.pop(directory, None)
+    _dropMaps(directory)
+    shutil.rmtree(directory, ignore_errors=True)
+
+
+@atexit.register
+def _removeLiveDirectories():
+    '''removes the directories of the buffers not closed before exiting'''
+    for directory in list(_liveDirs):
+        _removeDirectory(directory)
+
+
+def _decimateBlocks(data, block):
+    '''returns a summary of data (a 2D array whose first column contains the x
+    values) in which each block of rows is replaced by 4 rows: the first row
+    of the block, the minimum and the maximum of each y column (both placed at
+    the x of the middle of the block) and the last row of the block'''
+    nblocks = len(data) // block
+    ret = numpy.empty((nblocks, 4, data.shape[1]), dtype=data.dtype)
+    ret[:, 0, :] = data[::block]
+    ret[:, 3, :] = data[block - 1::block]
+    ret[:, 1, 0] = ret[:, 2, 0] = data[block // 2::block, 0]
+    for col in xrange(1, data.shape[1]):
+        y = data[:, col].reshape(nblocks, block)
+        ret[:, 1, col] = numpy.fmin.reduce(y, axis=1)
+        ret[:, 2, col] = numpy.fmax.reduce(y, axis=1)
+    return ret.reshape(nblocks * 4, data.shape[1])
+
+
+class DiskHistoryBuffer(object):
+    '''An append-only history of (x, y) points which keeps only its most
+    recent points (the "hot tail") in memory.
+
+    Whenever the hot tail is full, it is written to disk as a chunk (in its
+    own directory, created under a given one) together with decimated
+    versions of it, and it is emptied. Only the coarsest decimated version is
+    kept in memory. The others are read through memory maps, of which only
+    the :data:`MAX_OPEN_MAPS` most recently used (by all the buffers) are
+    kept open, so long histories need neither memory nor many open files.
+    When reading a range that would contain more
+    points than requested, the coarsest of the decimated versions that
+    provides enough points is used (the decimated versions keep the first, the
+    minimum, the maximum and the last value of each block of points, so the
+    data looks the same when plotted at a resolution lower than the number of
+    blocks).
+
+    The x values are expected to be non-decreasing (e.g. timestamps or event
+    numbers).
+
+    Example::
+
+        h = DiskHistoryBuffer('/tmp/trends', ncols=2)
+        h.append(time.time(), (1.5, 2.5))
+        x, y = h.read(xmin=time.time() - 86400, maxPoints=4000)
+        h.close()  # deletes the files from disk (also done on destruction)
+    '''
+
+    #: sizes (in points) of the blocks summarized in each decimation level
+    DECIMATION_BLOCKS = (16, 1024)
+
+    def __init__(self, directory=None, ncols=1, chunkSize=16384,
+                 prefix='history'):
+        '''
+        :param directory: (str) directory in which the files are stored (a
+                          private subdirectory is created in it). If None, the
+                          system temporary directory is used
+        :param ncols: (int) number of y values of each point
+        :param chunkSize: (int) number of points of the hot tail. It must be
+                          a multiple of the largest decimation block
+        :param prefix: (str) prefix for the name of the private subdirectory
+        '''
+        if chunkSize <= 0 or chunkSize % max(self.DECIMATION_BLOCKS):
+            raise ValueError('chunkSize must be a multiple of %i' %
+                             max(self.DECIMATION_BLOCKS))
+        if directory is None:
+            directory = tempfile.gettempdir()
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        self._dir = tempfile.mkdtemp(prefix='%s_' % prefix, dir=directory)
+        # the files are removed when the buffer is closed, destroyed or (at
+        # the latest) when the process exits
+        _liveDirs[self._dir] = weakref.ref(
+            self, lambda ref, d=self._dir: _removeDirectory(d))
+        self._ncols = ncols
+        self._chunkSize = chunkSize
+        self._tail = numpy.empty((chunkSize, 1 + ncols), dtype='d')
+        self._tailLen = 0
+        # number of points of each level (raw data, decimated data...)
+        self._levelSizes = [chunkSize] + [chunkSize // block * 4 for block
+                                          in self.DECIMATION_BLOCKS]
+        # list of (first x, last x, [raw data, decimated data...]) tuples.
+        # The data of each level is the name of its file, except for the
+        # coarsest one (an array)
+        self._chunks = []
+
+    def __len__(self):
+        return len(self._chunks) * self._chunkSize + self._tailLen
+
+    def getDirectory(self):
+        '''returns the directory in which the chunks are stored
+
+        :return: (str)
+        '''
+        return self._dir
+
+    def getChunkCount(self):
+        '''returns the number of chunks that have been written to disk
+
+        :return: (int)
+        '''
+        return len(self._chunks)
+
+    def lastX(self):
+        '''returns the x of the last point in the buffer
+
+        :return: (float or None) None if the buffer is empty
+        '''
+        if self._tailLen:
+            return self._tail[self._tailLen - 1, 0]
+        if self._chunks:
+            return self._chunks[-1][1]
+        return None
+
+    def xRange(self):
+        '''returns the x of the first and the last point in the buffer
+
+        :return: (tuple<float,float> or None) None if the buffer is empty
+        '''
+        if self._chunks:
+            return self._chunks[0][0], self.lastX()
+        if self._tailLen:
+            return self._tail[0, 0], self.lastX()
+        return None
+
+    def append(self, x, y):
+        '''appends a point
+
+        :param x: (float) the x value
+        :param y: (float or sequence<float>) the y value(s). It must contain
+                  as many elements as the ncols passed to the constructor
+        '''
+        row = self._tail[self._tailLen]
+        row[0] = x
+        row[1:] = y
+        self._tailLen += 1
+        if self._tailLen == self._chunkSize:
+            self._flush()
+
+    def extend(self, x, y):
+        '''appends several points
+
+        :param x: (sequence<float>) the x values
+        :param y: (sequence) the y values (a 2D array-like of shape
+                  (len(x), ncols), or a 1D one if ncols is 1)
+        '''
+        x = numpy.asarray(x, dtype='d')
+        y = numpy.asarray(y, dtype='d').reshape(len(x), self._ncols)
+        i = 0
+        while i < len(x):
+            n = min(len(x) - i, self._chunkSize - self._tailLen)
+            tail = self._tail[self._tailLen:self._tailLen + n]
+            tail[:, 0] = x[i:i + n]
+            tail[:, 1:] = y[i:i + n]
+            self._tailLen += n
+            i += n
+            if self._tailLen == self._chunkSize:
+                self._flush()
+
+    def _flush(self):
+        '''writes the (full) hot tail to disk and empties it'''
+        data = numpy.asfortranarray(self._tail)  # x stored contiguously
+        index = len(self._chunks)
+        levels = [self._save(data, index, 1)]
+        for block in self.DECIMATION_BLOCKS[:-1]:
+            decimated = numpy.asfortranarray(_decimateBlocks(data, block))
+            levels.append(self._save(decimated, index, block))
+        levels.append(_decimateBlocks(data, self.DECIMATION_BLOCKS[-1]))
+        self._chunks.append((data[0, 0], data[-1, 0], levels))
+        self._tailLen = 0
+
+    def _save(self, data, index, block):
+        '''saves data to a file and returns its name'''
+        fname = os.path.join(self._dir, '%06i_%i.npy' % (index, block))
+        numpy.save(fname, data)
+        return fname
+
+    def _trim(self, data, xmin, xmax):
+        '''returns the rows of data between xmin and xmax (plus one more row
+        at each side, if available, so that lines reach the limits)'''
+        x = data[:, 0]
+        lo, hi = 0, len(x)
+        if xmin is not None:
+            lo = max(0, x.searchsorted(xmin, side='left') - 1)
+        if xmax is not None:
+            hi = min(len(x), x.searchsorted(xmax, side='right') + 1)
+        return data[lo:hi]
+
+    def read(self, xmin=None, xmax=None, maxPoints=None):
+        '''returns the points in the given x range.
+
+        :param xmin: (float or None) lower limit of the x range (None for no
+                     limit)
+        :param xmax: (float or None) upper limit of the x range (None for no
+                     limit)
+        :param maxPoints: (int or None) if given, decimated data is returned
+                          for the chunks on disk if there would be more than
+                          maxPoints points in the range. Note that this is
+                          not a strict limit (the returned number of points
+                          may still be larger if the history is very long)
+
+        :return: (tuple<numpy.ndarray, numpy.ndarray>) the x values (1D) and
+                 the y values (2D, with ncols columns). Both are copies.
+        '''
+        chunks = [levels for x0, x1, levels in self._chunks
+                  if (xmin is None or x1 >= xmin) and
+                  (xmax is None or x0 <= xmax)]
+        level = 0
+        if maxPoints is not None and chunks:
+            nlevels = len(self._levelSizes)
+            while level < nlevels - 1 and len(chunks) * \
+                    self._levelSizes[level] + self._tailLen > maxPoints:
+                level += 1
+        pieces = []
+        for levels in chunks:
+            data = levels[level]
+            if isinstance(data, basestring):
+                # (copied, so that the map can be closed when evicted)
+                data = numpy.array(self._trim(_getMap(data), xmin, xmax))
+            else:
+                data = self._trim(data, xmin, xmax)
+            pieces.append(data)
+        pieces.append(self._trim(self._tail[:self._tailLen], xmin, xmax))
+        data = numpy.concatenate(pieces)
+        return data[:, 0].copy(), data[:, 1:]
+
+    def close(self):
+        '''removes the files of the history from disk and empties it. The
+        buffer should not be used after calling this. It is called
+        automatically when the buffer is destroyed and (for the buffers still
+        open) when the process exits'''
+        self._chunks = []
+        self._tailLen = 0
+        _removeDirectory(self._dir)
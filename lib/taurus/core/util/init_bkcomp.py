@@ -63,9 +63,13 @@ from .user import *
 
 import eventfilters
 
+# (lxml.etree is only imported when it is used)
 try:
-    from lxml import etree
-except:
+    import imp
+    imp.find_module('lxml')
+    from .lazymodule import LazyModule
+    etree = LazyModule('lxml.etree')
+except ImportError:
     etree = None
 
 
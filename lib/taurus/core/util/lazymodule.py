@@ -0,0 +1,93 @@
+#!/usr/bin/env python
+
+#############################################################################
+##
+# This file is part of Taurus
+##
+# http://taurus-scada.org
+##
+# Copyright 2011 CELLS / ALBA Synchrotron, Bellaterra, Spain
+##
+# Taurus is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+##
+# Taurus is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+##
+# You should have received a copy of the GNU Lesser General Public License
+# along with Taurus.  If not, see <http://www.gnu.org/licenses/>.
+##
+#############################################################################
+
+"""
+This module provides :class:`LazyModule`, a proxy of a module which is only
+imported when one of its attributes is accessed for the first time. It allows
+the taurus core modules to refer at module level to heavy dependencies (e.g.
+numpy or pint) which are only needed by some of their functions, so that
+``import taurus`` stays light.
+
+Example::
+
+    numpy = LazyModule('numpy')  # numpy is not imported yet
+    numpy.arange(3)              # --> numpy is imported now
+"""
+
+__all__ = ["LazyModule"]
+
+__docformat__ = "restructuredtext"
+
+import sys
+import types
+
+
+class LazyModule(types.ModuleType):
+    """A proxy of the module of the given name. The module is imported the
+    first time that one of its attributes is accessed (if it is already
+    imported, the proxy just refers to it).
+
+    Note that the proxy is not the module itself (i.e. it is not placed in
+    :data:`sys.modules`): it just forwards the access to the attributes
+    """
+
+    def __init__(self, name):
+        """
+        :param name: (str) the full name of the module (e.g. 'lxml.etree')
+        """
+        types.ModuleType.__init__(self, name)
+        self.__module = None
+
+    def __getattr__(self, name):
+        # (only called for the attributes which are not in the proxy)
+        return getattr(self.getModule(), name)
+
+    def __dir__(self):
+        return dir(self.getModule())
+
+    def __repr__(self):
+        if self.__module is None:
+            return "<lazy module '%s' (not loaded)>" % self.__name__
+        return "<lazy module '%s'>" % self.__name__
+
+    def getModule(self):
+        """returns the proxied module, importing it if needed
+
+        :return: (module) the module
+        """
+        module = self.__module
+        if module is None:
+            __import__(self.__name__)
+            module = self.__module = sys.modules[self.__name__]
+        return module
+
+    def isLoaded(self):
+        """returns whether the proxied module is already imported (either
+        by the proxy or by any other code)
+
+        :return: (bool)
+        """
+        return self.__module is not None or \
+            sys.modules.get(self.__name__) is not None
@@ -27,8 +27,8 @@
 :mod:`logging` system."""
 
 __all__ = ["LogIt", "TraceIt", "DebugIt", "InfoIt", "WarnIt", "ErrorIt",
-           "CriticalIt", "MemoryLogHandler", "LogExceptHook", "Logger",
-           "LogFilter",
+           "CriticalIt", "MemoryLogHandler", "LogRecordBuffer",
+           "LogExceptHook", "Logger", "LogFilter",
            "_log", "trace", "debug", "info", "warning", "error", "fatal",
            "critical", "deprecated", "deprecation_decorator",
            "tep14_deprecation"]
@@ -383,6 +383,161 @@ class MemoryLogHandler(list, logging.handlers.BufferingHandler):
         logging.handlers.BufferingHandler.close(self)
 
 
+class LogRecordBuffer(object):
+    """A fixed-capacity ring buffer of log records, with O(1) appends,
+    removals (of the oldest records) and access by position (0 being the
+    oldest record).
+
+    It keeps an index of the number of records of each level and of each
+    logger name, so that e.g. filters by logger name only need to be
+    evaluated once per name instead of once per record.
+
+    Example::
+
+        buff = LogRecordBuffer(capacity=1000)
+        buff.extend(records)
+        buff[0]                  # --> the oldest record
+        buff.getLoggerNames()    # --> the names of the loggers of the records
+        buff.getLevelCount(logging.ERROR)  # --> number of error records
+    """
+
+    def __init__(self, capacity=500000):
+        """
+        :param capacity: (int) maximum number of records
+        """
+        if capacity < 1:
+            raise ValueError('capacity must be positive')
+        self._capacity = capacity
+        self._records = [None] * capacity
+        self._start = 0
+        self._len = 0
+        # (dict<int,int>): number of records of each level
+        self._levelCounts = {}
+        # (dict<str,int>): number of records of each logger name
+        self._nameCounts = {}
+
+    def __len__(self):
+        return self._len
+
+    def __getitem__(self, row):
+        if row < 0:
+            row += self._len
+        if not 0 <= row < self._len:
+            raise IndexError('LogRecordBuffer index out of range')
+        return self._records[(self._start + row) % self._capacity]
+
+    def __iter__(self):
+        records, capacity = self._records, self._capacity
+        for i in xrange(self._start, self._start + self._len):
+            yield records[i % capacity]
+
+    def getCapacity(self):
+        """returns the maximum number of records
+
+        :return: (int)
+        """
+        return self._capacity
+
+    def extend(self, records):
+        """appends the given records. If the capacity is exceeded, the
+        oldest records are discarded
+
+        :param records: (seq<logging.LogRecord>) the records
+
+        :return: (int) the number of (oldest) records discarded
+        """
+        capacity = self._capacity
+        records = list(records)
+        discarded = max(0, self._len + len(records) - capacity)
+        if len(records) >= capacity:
+            self.clear()
+            records = records[-capacity:]
+        elif discarded:
+            self.removeFirst(discarded)
+        buff = self._records
+        levelCounts, nameCounts = self._levelCounts, self._nameCounts
+        end = self._start + self._len
+        for i, record in enumerate(records, end):
+            buff[i % capacity] = record
+            level, name = record.levelno, record.name
+            levelCounts[level] = levelCounts.get(level, 0) + 1
+            nameCounts[name] = nameCounts.get(name, 0) + 1
+        self._len += len(records)
+        return discarded
+
+    def removeFirst(self, n):
+        """removes the n oldest records
+
+        :param n: (int) number of records to remove
+        """
+        n = min(n, self._len)
+        buff, capacity = self._records, self._capacity
+        levelCounts, nameCounts = self._levelCounts, self._nameCounts
+        for i in xrange(self._start, self._start + n):
+            i %= capacity
+            record = buff[i]
+            buff[i] = None
+            level, name = record.levelno, record.name
+            levelCounts[level] -= 1
+            if not levelCounts[level]:
+                del levelCounts[level]
+            nameCounts[name] -= 1
+            if not nameCounts[name]:
+                del nameCounts[name]
+        self._start = (self._start + n) % capacity
+        self._len -= n
+
+    def clear(self):
+        """removes all the records"""
+        self._records = [None] * self._capacity
+        self._start = self._len = 0
+        self._levelCounts.clear()
+        self._nameCounts.clear()
+
+    def sort(self, key, reverse=False):
+        """sorts the records (the new records are still appended at the end)
+
+        :param key: (callable) function which returns the sort key of a record
+        :param reverse: (bool) True for descending order
+        """
+        records = sorted(self, key=key, reverse=reverse)
+        records.extend([None] * (self._capacity - len(records)))
+        self._records = records
+        self._start = 0
+
+    def getLevelCount(self, level):
+        """returns the number of records of the given level
+
+        :param level: (int) the level
+
+        :return: (int)
+        """
+        return self._levelCounts.get(level, 0)
+
+    def getLevels(self):
+        """returns the levels of the records
+
+        :return: (list<int>) sorted levels
+        """
+        return sorted(self._levelCounts)
+
+    def getLoggerCount(self, name):
+        """returns the number of records of the given logger
+
+        :param name: (str) the logger name
+
+        :return: (int)
+        """
+        return self._nameCounts.get(name, 0)
+
+    def getLoggerNames(self):
+        """returns the names of the loggers of the records
+
+        :return: (list<str>)
+        """
+        return self._nameCounts.keys()
+
+
 class LogExceptHook(BaseExceptHook):
     """A callable class that acts as an excepthook that logs the exception in
     the python logging system.
@@ -0,0 +1,198 @@
+#!/usr/bin/env python
+
+#############################################################################
+##
+# This file is part of Taurus
+##
+# http://taurus-scada.org
+##
+# Copyright 2011 CELLS / ALBA Synchrotron, Bellaterra, Spain
+##
+# Taurus is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+##
+# Taurus is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+##
+# You should have received a copy of the GNU Lesser General Public License
+# along with Taurus.  If not, see <http://www.gnu.org/licenses/>.
+##
+#############################################################################
+
+"""
+This module provides a cache of registries (e.g. of the taurus scheme plugins
+or of the taurus widgets) which are expensive to build because they require
+importing many modules. Each registry is stored (as JSON) in the .taurus dir
+of the user home together with a key (e.g. the modification times of the
+files of a package), and it is only built again when its key changes.
+
+Example::
+
+    key = getFilesKey([os.path.dirname(mypackage.__file__)])
+    registry = loadRegistry('mypackage', key, buildMyRegistry)
+    klass = importObject(*registry['MyName'])
+"""
+
+__all__ = ["getFilesKey", "loadRegistry", "clearRegistries", "importObject"]
+
+__docformat__ = "restructuredtext"
+
+import os
+import sys
+import json
+import threading
+
+#: version of the format of the registry files
+REGISTRY_VERSION = 1
+
+_lock = threading.RLock()
+# registries already loaded (dict<(str, str), (key, registry)>)
+_loaded = {}
+
+
+def _registry_dir():
+    # use '.taurus' dir in the user "home" dir
+    return os.path.join(os.path.expanduser('~'), '.taurus', 'registry')
+
+
+def getFilesKey(paths, extensions=('.py',), skip=()):
+    """returns a key which changes whenever a file (with one of the given
+    extensions) is added, removed or modified in the given dirs (or in their
+    subdirs). No module is imported.
+
+    :param paths: (seq<str>) the dirs
+    :param extensions: (seq<str>) the extensions of the files to consider
+    :param skip: (seq<str>) names of the subdirs to ignore
+
+    :return: (list) the key (JSON serializable)
+    """
+    key = [REGISTRY_VERSION, sys.version]
+    for path in paths:
+        path = os.path.abspath(path)
+        for dirpath, dirnames, filenames in os.walk(path):
+            dirnames[:] = sorted([d for d in dirnames if
+                                  not d.startswith('.') and d not in skip])
+            for filename in sorted(filenames):
+                if os.path.splitext(filename)[1] not in extensions:
+                    continue
+                filename = os.path.join(dirpath, filename)
+                try:
+                    st = os.stat(filename)
+                except OSError:
+                    continue
+                key.append([filename, st.st_size, st.st_mtime])
+    return key
+
+
+def loadRegistry(name, key, build, cachedir=None, rebuild=False):
+    """returns a registry, building it (with the given callable) only if it
+    is not cached with the same key (in memory or in the cache dir) or if
+    rebuild is True
+
+    :param name: (str) the name of the registry
+    :param key: (object) the (JSON serializable) key of the registry (see
+                :func:`getFilesKey`)
+    :param build: (callable) function which returns the registry (a JSON
+                  serializable object, e.g. a dict<str, str>)
+    :param cachedir: (str or None) the dir of the cache files (None for
+                     ~/.taurus/registry). If False, the disk cache is not
+                     used
+    :param rebuild: (bool) if True, the registry is built (and cached) even
+                    if it is already cached (e.g. when it is known to be
+                    outdated)
+
+    :return: (object) the registry
+    """
+    # (normalize the key as if it had been read from the file)
+    key = json.loads(json.dumps(key))
+    with _lock:
+        cached = None if rebuild else _loaded.get((name, cachedir))
+        if cached is not None and cached[0] == key:
+            return cached[1]
+        filename = None
+        if cachedir is not False:
+            filename = os.path.join(cachedir or _registry_dir(),
+                                    name + '.json')
+            if not rebuild:
+                cached = _read_registry(filename)
+        if cached is None or cached[0] != key:
+            cached = key, build()
+            if filename is not None:
+                _write_registry(filename, cached)
+        _loaded[(name, cachedir)] = cached
+        return cached[1]
+
+
+def _read_registry(filename):
+    try:
+        f = open(filename, 'rb')
+        try:
+            key, registry = json.loads(f.read().decode('utf-8'))
+        finally:
+            f.close()
+        return key, registry
+    except Exception:
+        return None
+
+
+def _write_registry(filename, cached):
+    try:
+        dirname = os.path.dirname(filename)
+        if not os.path.exists(dirname):
+            os.makedirs(dirname)
+        # write it atomically (other processes may be reading it)
+        tmpfile = '%s.%i.tmp' % (filename, os.getpid())
+        f = open(tmpfile, 'wb')
+        try:
+            f.write(json.dumps(cached).encode('utf-8'))
+        finally:
+            f.close()
+        if os.name == 'nt' and os.path.exists(filename):
+            os.remove(filename)
+        os.rename(tmpfile, filename)
+    except Exception:
+        from taurus.core.util.log import Logger
+        log = Logger('RegistryCache')
+        log.info("Unable to write the registry file %s" % filename)
+        log.debug("Details:", exc_info=1)
+
+
+def clearRegistries(cachedir=None):
+    """Clears the cached registries, so that they are built again when
+    loaded
+
+    :param cachedir: (str or None) the dir of the cache files (None for
+                     ~/.taurus/registry). If False, only the registries
+                     loaded in memory are cleared
+    """
+    with _lock:
+        _loaded.clear()
+        if cachedir is False:
+            return
+        cachedir = cachedir or _registry_dir()
+        if os.path.isdir(cachedir):
+            for name in os.listdir(cachedir):
+                if name.endswith('.json'):
+                    os.remove(os.path.join(cachedir, name))
+
+
+def importObject(module_name, name):
+    """imports the given module and returns the given object of it
+
+    :param module_name: (str) the full name of the module
+    :param name: (str) the name of the object in the module
+
+    :return: (object) the object
+
+    :raises: ImportError if the module cannot be imported or if it does not
+             contain the object
+    """
+    m = __import__(module_name, fromlist=[name], level=0)
+    try:
+        return getattr(m, name)
+    except AttributeError:
+        raise ImportError('%s has no %s' % (module_name, name))
@@ -23,61 +23,238 @@
 ##
 #############################################################################
 
-"""Useful module for remote logging"""
+"""Useful module for remote logging.
+
+:class:`LogRecordSocketReceiver` receives the log records sent by remote
+processes, either with a :class:`logging.handlers.SocketHandler` (one
+pickled record per frame) or with a :class:`BatchedSocketHandler` (many
+JSON encoded records per frame, which is much faster). The received data
+never creates arbitrary objects (the pickles are decoded without allowing
+any class or function), so that a hostile peer cannot execute code."""
 
 from __future__ import print_function
 from __future__ import with_statement
 
-__all__ = ["LogRecordStreamHandler", "LogRecordSocketReceiver", "log"]
+__all__ = ["LogRecordStreamHandler", "LogRecordSocketReceiver",
+           "BatchedSocketHandler", "log"]
 
+import io
 import time
+import json
+import errno
+import select
 import socket
 import pickle
 import logging
 import logging.handlers
 import struct
-import weakref
+import threading
 
 try:
     import socketserver
 except:
     import SocketServer as socketserver
 
+try:
+    import cPickle
+
+    def _loads(data):
+        """unpickles the given data without allowing any global (i.e. it
+        can only contain builtin values such as dicts, strings or numbers)
+        """
+        unpickler = cPickle.Unpickler(io.BytesIO(data))
+        unpickler.find_global = None
+        return unpickler.load()
+except ImportError:
+    class _Unpickler(pickle.Unpickler):
+
+        def find_class(self, module, name):
+            raise pickle.UnpicklingError('Global %s.%s is not supported' %
+                                         (module, name))
+
+    def _loads(data):
+        """unpickles the given data without allowing any global (i.e. it
+        can only contain builtin values such as dicts, strings or numbers)
+        """
+        return _Unpickler(io.BytesIO(data)).load()
+
+
+#: first bytes sent through the connections of a BatchedSocketHandler
+BATCH_MAGIC = b'TLRB'
+#: maximum size of a frame (i.e. of a pickled record or of a batch)
+MAX_FRAME_SIZE = 1 << 26
+
+_HEADER = struct.Struct('>L')
+#: record attributes which must be numbers (or None)
+_NUMERIC_ATTRS = ('levelno', 'created', 'msecs', 'relativeCreated', 'lineno',
+                  'process', 'thread')
+_NUMBERS = (int, long, float) if str is bytes else (int, float)
+_STRINGS = (str, unicode) if str is bytes else (str,)
+
+# attributes of the records which cannot be received (e.g. their methods)
+_RECORD_CLASS_ATTRS = frozenset(dir(logging.LogRecord))
+# attributes of an empty record
+_RECORD_ATTRS = logging.makeLogRecord({}).__dict__
+
+
+def _sanitize(obj):
+    """returns the attributes of a log record from the given (received)
+    dict, or None if it is not valid"""
+    if type(obj) is not dict:
+        return None
+    attrs = dict(obj)
+    if not _RECORD_CLASS_ATTRS.isdisjoint(attrs):
+        # (do not replace the methods of the records)
+        for k in _RECORD_CLASS_ATTRS.intersection(attrs):
+            del attrs[k]
+    for k in _NUMERIC_ATTRS:
+        v = attrs.get(k)
+        if v is not None and type(v) not in _NUMBERS:
+            return None
+    # (the messages are already formatted by the senders)
+    attrs['args'] = None
+    attrs['exc_info'] = None
+    return attrs
+
+
+def _sanitize_run(names, rows):
+    """returns the attributes of the log records of a received run (i.e.
+    the names of the attributes and a list of the values of each record),
+    skipping the invalid records"""
+    if type(names) is not list or type(rows) is not list:
+        raise ValueError('Invalid run of records')
+    n = len(names)
+    # (do not replace the methods of the records)
+    forbidden = [k for k in set(names)
+                 if type(k) not in _STRINGS or k in _RECORD_CLASS_ATTRS]
+    numeric = [i for i, k in enumerate(names) if k in _NUMERIC_ATTRS]
+    ret = []
+    for values in rows:
+        if type(values) is not list or len(values) != n:
+            continue
+        for i in numeric:
+            v = values[i]
+            if v is not None and type(v) not in _NUMBERS:
+                break
+        else:
+            attrs = dict(zip(names, values))
+            for k in forbidden:
+                del attrs[k]
+            # (the messages are already formatted by the senders)
+            attrs['args'] = None
+            attrs['exc_info'] = None
+            ret.append(attrs)
+    return ret
+
+
+class LogRecordStreamHandler(object):
+    """Decodes the log records received through a connection of a
+    :class:`LogRecordSocketReceiver` and handles them.
+
+    The stream is a sequence of frames, each being a 4 byte (big-endian)
+    length followed by a pickled record (as sent by a
+    :class:`logging.handlers.SocketHandler`) or, if the stream starts with
+    :data:`BATCH_MAGIC`, by a JSON encoded batch of records (as sent by a
+    :class:`BatchedSocketHandler`). A batch is a list of runs of records
+    with the same attributes, each run being a list with the names of the
+    attributes and a list of the values of the attributes of each record,
+    e.g.::
+
+        [[["name", "levelno", "msg"], [["a", 20, "hi"], ["b", 30, "bye"]]]]
+    """
 
-class LogRecordStreamHandler(socketserver.StreamRequestHandler):
-
-    def handle(self):
-        try:
-            return self._handle()
-        except:
-            pass
-
-    def _handle(self):
-        self._stop = stop = 0
-        self.hostName = self.server.hostName
-        self.server.registerHandler(self)
-        while not stop:
-            chunk = self.connection.recv(4)
-            if len(chunk) < 4:
+    def __init__(self, request, client_address, server):
+        self.request = self.connection = request
+        self.client_address = client_address
+        self.server = server
+        self.hostName = server.hostName
+        self._stop = 0
+        self._batched = None
+        # received data not decoded yet (and its size)
+        self._chunks = []
+        self._size = 0
+        # size needed to decode the next frame
+        self._needed = 4
+
+    def dataReceived(self, data):
+        """decodes the given data (received through the connection) and
+        handles the records of the complete frames
+
+        :param data: (bytes) the received data
+
+        :raises: ValueError if the data is not valid
+        """
+        self._chunks.append(data)
+        self._size += len(data)
+        if self._size < self._needed:
+            return
+        data = b''.join(self._chunks)
+        pos = 0
+        if self._batched is None:
+            self._batched = data[:4] == BATCH_MAGIC
+            if self._batched:
+                pos = 4
+        records = []
+        end = len(data)
+        while True:
+            if end - pos < 4:
+                self._needed = 4
                 break
-            slen = struct.unpack('>L', chunk)[0]
-            chunk = self.connection.recv(slen)
-            while len(chunk) < slen:
-                chunk = chunk + self.connection.recv(slen - len(chunk))
-            obj = self.unPickle(chunk)
-            record = self.makeLogRecord(obj)
-            self.handleLogRecord(record)
-            stop = self._stop
+            size = _HEADER.unpack_from(data, pos)[0]
+            if size > MAX_FRAME_SIZE:
+                raise ValueError('Frame too large (%d bytes)' % size)
+            if end - pos - 4 < size:
+                self._needed = 4 + size
+                break
+            frame = data[pos + 4:pos + 4 + size]
+            pos += 4 + size
+            records.extend(self.decodeFrame(frame))
+        data = data[pos:]
+        self._chunks = [data]
+        self._size = len(data)
+        if records:
+            self.handleLogRecords(records)
+
+    def decodeFrame(self, frame):
+        """returns the log records encoded in the given frame
+
+        :param frame: (bytes) the frame contents (without its length)
+
+        :return: (list<logging.LogRecord>) the records
+        """
+        if self._batched:
+            runs = json.loads(frame.decode('utf-8'))
+            if type(runs) is not list:
+                raise ValueError('Invalid batch of records')
+            objs = []
+            for names, rows in runs:
+                objs.extend(_sanitize_run(names, rows))
+        else:
+            obj = _sanitize(self.unPickle(frame))
+            objs = [] if obj is None else [obj]
+        return [self.makeLogRecord(obj) for obj in objs]
 
     def unPickle(self, data):
-        return pickle.loads(data)
+        return _loads(data)
 
     def makeLogRecord(self, obj):
-        record = logging.makeLogRecord(obj)
+        # (like logging.makeLogRecord, but faster)
+        record = logging.LogRecord.__new__(logging.LogRecord)
+        record.__dict__.update(_RECORD_ATTRS)
+        record.__dict__.update(obj)
         if not hasattr(record, 'hostName'):
             record.hostName = self.hostName
         return record
 
+    def handleLogRecords(self, records):
+        """handles the records decoded from the received data. By default,
+        it calls :meth:`handleLogRecord` for each of them.
+
+        :param records: (list<logging.LogRecord>) the records
+        """
+        for record in records:
+            self.handleLogRecord(record)
+
     def handleLogRecord(self, record):
         logger = self.server.data.get("logger")
         if logger is None:
@@ -90,61 +267,219 @@ class LogRecordStreamHandler(socketserver.StreamRequestHandler):
         self._stop = 1
 
 
-class LogRecordSocketReceiver(socketserver.ThreadingTCPServer):
+class LogRecordSocketReceiver(socketserver.TCPServer):
     """
-    Simple TCP socket-based logging receiver suitable for testing.
+    TCP socket-based logging receiver. All the connections are served by
+    the thread that calls :meth:`serve_until_stopped`, which waits for
+    data on all of them at once (with select).
     """
 
     allow_reuse_address = 1
-    daemon_threads = True
+    #: maximum size of each read from a connection
+    READ_SIZE = 1 << 16
 
     def __init__(self, host='localhost',
                  port=logging.handlers.DEFAULT_TCP_LOGGING_PORT,
                  handler=LogRecordStreamHandler, **kwargs):
-        socketserver.ThreadingTCPServer.__init__(self, (host, port), handler)
+        socketserver.TCPServer.__init__(self, (host, port), handler)
         self.hostName = socket.gethostbyaddr(host)[0]
-        self.port = port
+        # (the actual port, in case 0 was given)
+        self.port = self.server_address[1]
         self._stop = 0
         self._stopped = 0
         self.timeout = 1
         self.data = kwargs
-        self.__handlers = []
+        # dict<socket, LogRecordStreamHandler>
+        self.__handlers = {}
 
     def registerHandler(self, handler):
         if handler is not None:
-            self.__handlers.append(weakref.ref(handler))
+            self.__handlers[handler.connection] = handler
 
     def unregisterHandler(self, handler):
-        try:
-            self.__handlers.remove(handler)
-        except ValueError:
-            pass
+        self.__handlers.pop(handler.connection, None)
 
     def serve_until_stopped(self):
-        import select
         stop = 0
         while not stop:
-            rd, wr, ex = select.select([self.socket.fileno()],
-                                       [], [],
-                                       self.timeout)
-            if rd:
-                self.handle_request()
+            sockets = [self.socket]
+            sockets.extend(self.__handlers)
+            try:
+                rd, wr, ex = select.select(sockets, [], [], self.timeout)
+            except select.error as e:
+                if e.args[0] != errno.EINTR:
+                    raise
+                rd = []
+            for sock in rd:
+                if sock is self.socket:
+                    self._accept()
+                else:
+                    self._read(sock)
             stop = self._stop
         self._stopped = 1
 
+    def _accept(self):
+        try:
+            request, client_address = self.get_request()
+        except socket.error:
+            return
+        if not self.verify_request(request, client_address):
+            self.shutdown_request(request)
+            return
+        request.setblocking(0)
+        self.registerHandler(self.RequestHandlerClass(request, client_address,
+                                                      self))
+
+    def _read(self, sock):
+        handler = self.__handlers.get(sock)
+        if handler is None:
+            return
+        try:
+            data = sock.recv(self.READ_SIZE)
+        except socket.error as e:
+            if e.args[0] in (errno.EAGAIN, errno.EWOULDBLOCK, errno.EINTR):
+                return
+            data = b''
+        if data:
+            try:
+                handler.dataReceived(data)
+                return
+            except Exception:
+                # invalid data (or failed handling): drop the connection
+                pass
+        self._close(handler)
+
+    def _close(self, handler):
+        self.unregisterHandler(handler)
+        self.shutdown_request(handler.connection)
+
     def stop(self):
         self._stop = True
         while not self._stopped:
             time.sleep(0.1)
-        for handler in self.__handlers:
-            h = handler()
-            if h is not None:
-                h.stop()
-                h.finish()
-                self.close_request(h.connection)
+        for handler in list(self.__handlers.values()):
+            handler.stop()
+            self._close(handler)
         self.socket.close()
 
 
+class BatchedSocketHandler(logging.handlers.SocketHandler):
+    """A :class:`logging.handlers.SocketHandler` which sends the records to
+    a :class:`LogRecordSocketReceiver` in batches of JSON encoded records.
+
+    The records are buffered and sent when there are *capacity* of them,
+    when a record of *flushLevel* (or higher) is emitted or *interval*
+    seconds after the first record of the batch was emitted.
+
+    Example::
+
+        handler = BatchedSocketHandler('localhost', 9020)
+        logging.getLogger().addHandler(handler)
+    """
+
+    def __init__(self, host, port, capacity=1000, interval=0.25,
+                 flushLevel=logging.ERROR):
+        logging.handlers.SocketHandler.__init__(self, host, port)
+        self.capacity = capacity
+        self.interval = interval
+        self.flushLevel = flushLevel
+        self.buffer = []
+        self._timer = None
+
+    def makeSocket(self, timeout=1):
+        sock = logging.handlers.SocketHandler.makeSocket(self, timeout)
+        sock.sendall(BATCH_MAGIC)
+        return sock
+
+    def makeRecordDict(self, record):
+        """returns the attributes of the record to send (with the message
+        already formatted and, if any, the exception text)
+
+        :param record: (logging.LogRecord) the record
+
+        :return: (dict)
+        """
+        if record.exc_info and not record.exc_text:
+            # just to get the traceback text into record.exc_text
+            self.format(record)
+        d = dict(record.__dict__)
+        d['msg'] = record.getMessage()
+        d['args'] = None
+        d['exc_info'] = None
+        return d
+
+    def encodeRecord(self, record):
+        """returns the names of the attributes of the record to send and
+        their JSON encoded values
+
+        :param record: (logging.LogRecord) the record
+
+        :return: (tuple<tuple<str>,bytes>)
+        """
+        d = self.makeRecordDict(record)
+        data = json.dumps(d.values(), default=str, separators=(',', ':'))
+        if not isinstance(data, bytes):
+            data = data.encode('utf-8')
+        return tuple(d), data
+
+    def makeFrame(self, encoded):
+        """returns the frame of a batch of records, grouping the consecutive
+        records with the same attributes in runs (see
+        :class:`LogRecordStreamHandler`)
+
+        :param encoded: (list<tuple<tuple<str>,bytes>>) the encoded records
+
+        :return: (bytes)
+        """
+        runs = []
+        names = None
+        for recordNames, data in encoded:
+            if recordNames != names:
+                names = recordNames
+                values = []
+                runs.append((names, values))
+            values.append(data)
+        data = []
+        for names, values in runs:
+            names = json.dumps(list(names), separators=(',', ':'))
+            if not isinstance(names, bytes):
+                names = names.encode('utf-8')
+            data.append(b'[' + names + b',[' + b','.join(values) + b']]')
+        data = b'[' + b','.join(data) + b']'
+        return _HEADER.pack(len(data)) + data
+
+    def emit(self, record):
+        try:
+            self.buffer.append(self.encodeRecord(record))
+        except Exception:
+            self.handleError(record)
+            return
+        if len(self.buffer) >= self.capacity or \
+                record.levelno >= self.flushLevel:
+            self.flush()
+        elif self._timer is None:
+            self._timer = threading.Timer(self.interval, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def flush(self):
+        self.acquire()
+        try:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            encoded, self.buffer = self.buffer, []
+            if encoded:
+                # (SocketHandler.send drops the data if it cannot connect)
+                self.send(self.makeFrame(encoded))
+        finally:
+            self.release()
+
+    def close(self):
+        self.flush()
+        logging.handlers.SocketHandler.close(self)
+
+
 class LogNameFilter(logging.Filter):
 
     def __init__(self, name=None):
@@ -0,0 +1,217 @@
+#!/usr/bin/env python
+
+#############################################################################
+##
+# This file is part of Taurus
+##
+# http://taurus-scada.org
+##
+# Copyright 2011 CELLS / ALBA Synchrotron, Bellaterra, Spain
+##
+# Taurus is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+##
+# Taurus is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+##
+# You should have received a copy of the GNU Lesser General Public License
+# along with Taurus.  If not, see <http://www.gnu.org/licenses/>.
+##
+#############################################################################
+
+"""
+This module provides a spatial index of rectangles (e.g. for finding the
+items of a large synoptic under the mouse without checking all of them)
+"""
+
+__all__ = ["GridIndex"]
+
+__docformat__ = "restructuredtext"
+
+import math
+
+
+class GridIndex(object):
+    '''An index of objects by their (axis aligned) bounding rectangles, based
+    on a uniform grid: each object is registered in the cells of the grid
+    that its rectangle overlaps, so that finding the objects at a given point
+    only requires checking the objects of one cell.
+
+    Objects whose rectangle would overlap more than :attr:`MAX_CELLS` cells
+    (e.g. backgrounds) and those with invalid rectangles are kept apart and
+    always checked.
+
+    Example::
+
+        index = GridIndex(cellSize=50)
+        index.insert('a', (0, 0, 10, 10))
+        index.insert('b', (5, 5, 100, 20))
+        index.query(7, 7)  # --> set(['a', 'b'])
+        index.update('a', (20, 20, 30, 30))  # e.g. after moving it
+        index.remove('b')
+    '''
+
+    #: maximum number of cells in which an object is registered
+    MAX_CELLS = 256
+
+    def __init__(self, cellSize=64.):
+        '''
+        :param cellSize: (float) width (and height) of the cells. It should
+                         be similar to the size of the typical object
+        '''
+        if not cellSize > 0:
+            raise ValueError('cellSize must be positive')
+        self._cellSize = float(cellSize)
+        # dict<tuple<int,int>, set<obj>>
+        self._cells = {}
+        # dict<obj, tuple<rect, cell range or None>>
+        self._objects = {}
+        # objects not registered in cells
+        self._large = set()
+
+    def __len__(self):
+        return len(self._objects)
+
+    def __contains__(self, obj):
+        return obj in self._objects
+
+    def __iter__(self):
+        return iter(self._objects)
+
+    def getCellSize(self):
+        '''returns the width (and height) of the cells
+
+        :return: (float)
+        '''
+        return self._cellSize
+
+    def getRect(self, obj):
+        '''returns the rectangle with which an object was registered
+
+        :param obj: (object) a registered object
+
+        :return: (tuple<float,float,float,float>) xmin, ymin, xmax, ymax
+
+        :raises: KeyError if the object is not registered
+        '''
+        return self._objects[obj][0]
+
+    def _cellRange(self, rect):
+        '''returns the range of cells (imin, jmin, imax, jmax) that a
+        rectangle overlaps, or None if it should not be put in cells'''
+        x0, y0, x1, y1 = rect
+        s = self._cellSize
+        try:
+            i0, j0 = int(math.floor(x0 / s)), int(math.floor(y0 / s))
+            i1, j1 = int(math.floor(x1 / s)), int(math.floor(y1 / s))
+        except (ValueError, OverflowError):  # NaN or infinite
+            return None
+        if i1 < i0 or j1 < j0 or \
+                (i1 - i0 + 1) * (j1 - j0 + 1) > self.MAX_CELLS:
+            return None
+        return i0, j0, i1, j1
+
+    def insert(self, obj, rect):
+        '''registers an object (or updates it, if already registered)
+
+        :param obj: (object) a hashable object
+        :param rect: (sequence<float>) its rectangle: xmin, ymin, xmax, ymax
+        '''
+        if obj in self._objects:
+            self.remove(obj)
+        rect = tuple(rect)
+        cells = self._cellRange(rect)
+        self._objects[obj] = rect, cells
+        if cells is None:
+            self._large.add(obj)
+            return
+        i0, j0, i1, j1 = cells
+        allcells = self._cells
+        for i in xrange(i0, i1 + 1):
+            for j in xrange(j0, j1 + 1):
+                cell = allcells.get((i, j))
+                if cell is None:
+                    cell = allcells[(i, j)] = set()
+                cell.add(obj)
+
+    #: alias of :meth:`insert`, for objects that have been moved or resized
+    update = insert
+
+    def remove(self, obj):
+        '''unregisters an object. Nothing is done if it is not registered
+
+        :param obj: (object) the object
+        '''
+        rect, cells = self._objects.pop(obj, (None, None))
+        if rect is None:
+            return
+        if cells is None:
+            self._large.discard(obj)
+            return
+        i0, j0, i1, j1 = cells
+        allcells = self._cells
+        for i in xrange(i0, i1 + 1):
+            for j in xrange(j0, j1 + 1):
+                cell = allcells[(i, j)]
+                cell.discard(obj)
+                if not cell:
+                    del allcells[(i, j)]
+
+    def clear(self):
+        '''unregisters all the objects'''
+        self._cells.clear()
+        self._objects.clear()
+        self._large.clear()
+
+    def query(self, x, y):
+        '''returns the objects whose rectangle contains a point (borders
+        included)
+
+        :param x: (float) x coordinate of the point
+        :param y: (float) y coordinate of the point
+
+        :return: (set<object>)
+        '''
+        s = self._cellSize
+        try:
+            key = int(math.floor(x / s)), int(math.floor(y / s))
+        except (ValueError, OverflowError):
+            return set()
+        candidates = self._cells.get(key, ())
+        ret = set()
+        objects = self._objects
+        for group in (candidates, self._large):
+            for obj in group:
+                x0, y0, x1, y1 = objects[obj][0]
+                if x0 <= x <= x1 and y0 <= y <= y1:
+                    ret.add(obj)
+        return ret
+
+    def intersect(self, rect):
+        '''returns the objects whose rectangle overlaps a given one
+
+        :param rect: (sequence<float>) xmin, ymin, xmax, ymax
+
+        :return: (set<object>)
+        '''
+        X0, Y0, X1, Y1 = rect
+        cells = self._cellRange(rect)
+        if cells is None:
+            candidates = self._objects
+        else:
+            candidates = set(self._large)
+            i0, j0, i1, j1 = cells
+            for i in xrange(i0, i1 + 1):
+                for j in xrange(j0, j1 + 1):
+                    candidates.update(self._cells.get((i, j), ()))
+        ret = set()
+        objects = self._objects
+        for obj in candidates:
+            x0, y0, x1, y1 = objects[obj][0]
+            if x0 <= X1 and X0 <= x1 and y0 <= Y1 and Y0 <= y1:
+                ret.add(obj)
+        return ret
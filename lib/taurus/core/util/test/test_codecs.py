@@ -29,12 +29,100 @@
 
 __docformat__ = 'restructuredtext'
 
+import os
+import sys
 import copy
+import base64
+import struct
+import subprocess
 from taurus.external import unittest
 from taurus.test import insertTest
-from taurus.core.util.codecs import CodecFactory
+from taurus.core.util.codecs import (CodecFactory, VideoImageCodec,
+                                     NDArrayCodec)
 import numpy
 
+#: image mode -> (name, bytes per pixel)
+MODES = {0: ('Y8', 1), 1: ('Y16', 2), 2: ('Y32', 4), 3: ('Y64', 8),
+         7: ('RGB32', 4), 15: ('YUV411', 1.5), 16: ('YUV422', 2),
+         17: ('YUV444', 3)}
+
+#: bz2 compressed 2 GB of zeros
+BZ2_BOMB = base64.b64decode(
+    'QlpoOTFBWSZTWQ4J4t8BX45AAMAAAAggADCATUZCoCWpCoCXMUFZJlNZDgni3wFfjkAAwAAA'
+    'CCAAMIBNRkKgJakKgJcxQVkmU1kOCeLfAV+OQADAAAAIIAAwgE1GQqAlqQqAlzFBWSZTWQ4J'
+    '4t8BX45AAMAAAAggADCATUZCoCWpCoCXMUFZJlNZDgni3wFfjkAAwAAACCAAMIBNRkKgJakK'
+    'gJcxQVkmU1kOCeLfAV+OQADAAAAIIAAwgE1GQqAlqQqAlzFBWSZTWQ4J4t8BX45AAMAAAAgg'
+    'ADCATUZCoCWpCoCXMUFZJlNZDgni3wFfjkAAwAAACCAAMIBNRkKgJakKgJcxQVkmU1kOCeLf'
+    'AV+OQADAAAAIIAAwgE1GQqAlqQqAlzFBWSZTWQ4J4t8BX45AAMAAAAggADCATUZCoCWpCoCX'
+    'MUFZJlNZDgni3wFfjkAAwAAACCAAMIBNRkKgJakKgJcxQVkmU1kOCeLfAV+OQADAAAAIIAAw'
+    'gE1GQqAlqQqAlzFBWSZTWQ4J4t8BX45AAMAAAAggADCATUZCoCWpCoCXMUFZJlNZDgni3wFf'
+    'jkAAwAAACCAAMIBNRkKgJakKgJcxQVkmU1kOCeLfAV+OQADAAAAIIAAwgE1GQqAlqQqAlzFB'
+    'WSZTWQ4J4t8BX45AAMAAAAggADCATUZCoCWpCoCXMUFZJlNZDgni3wFfjkAAwAAACCAAMIBN'
+    'RkKgJakKgJcxQVkmU1kOCeLfAV+OQADAAAAIIAAwgE1GQqAlqQqAlzFBWSZTWQ4J4t8BX45A'
+    'AMAAAAggADCATUZCoCWpCoCXMUFZJlNZDgni3wFfjkAAwAAACCAAMIBNRkKgJakKgJcxQVkm'
+    'U1kOCeLfAV+OQADAAAAIIAAwgE1GQqAlqQqAlzFBWSZTWQ4J4t8BX45AAMAAAAggADCATUZC'
+    'oCWpCoCXMUFZJlNZDgni3wFfjkAAwAAACCAAMIBNRkKgJakKgJcxQVkmU1kOCeLfAV+OQADA'
+    'AAAIIAAwgE1GQqAlqQqAlzFBWSZTWQ4J4t8BX45AAMAAAAggADCATUZCoCWpCoCXMUFZJlNZ'
+    'Dgni3wFfjkAAwAAACCAAMIBNRkKgJakKgJcxQVkmU1kOCeLfAV+OQADAAAAIIAAwgE1GQqAl'
+    'qQqAlzFBWSZTWQ4J4t8BX45AAMAAAAggADCATUZCoCWpCoCXMUFZJlNZDgni3wFfjkAAwAAA'
+    'CCAAMIBNRkKgJakKgJcxQVkmU1kOCeLfAV+OQADAAAAIIAAwgE1GQqAlqQqAlzFBWSZTWQ4J'
+    '4t8BX45AAMAAAAggADCATUZCoCWpCoCXMUFZJlNZDgni3wFfjkAAwAAACCAAMIBNRkKgJakK'
+    'gJcxQVkmU1kOCeLfAV+OQADAAAAIIAAwgE1GQqAlqQqAlzFBWSZTWQ4J4t8BX45AAMAAAAgg'
+    'ADCATUZCoCWpCoCXMUFZJlNZDgni3wFfjkAAwAAACCAAMIBNRkKgJakKgJcxQVkmU1kOCeLf'
+    'AV+OQADAAAAIIAAwgE1GQqAlqQqAlzFBWSZTWQ4J4t8BX45AAMAAAAggADCATUZCoCWpCoCX'
+    'MUFZJlNZDgni3wFfjkAAwAAACCAAMIBNRkKgJakKgJcxQVkmU1kOCeLfAV+OQADAAAAIIAAw'
+    'gE1GQqAlqQqAlzFBWSZTWQ4J4t8BX45AAMAAAAggADCATUZCoCWpCoCXMUFZJlNZDgni3wFf'
+    'jkAAwAAACCAAMIBNRkKgJakKgJcxQVkmU1kOCeLfAV+OQADAAAAIIAAwgE1GQqAlqQqAlzFB'
+    'WSZTWQ4J4t8BX45AAMAAAAggADCATUZCoCWpCoCXMUFZJlNZDgni3wFfjkAAwAAACCAAMIBN'
+    'RkKgJakKgJcxQVkmU1kOCeLfAV+OQADAAAAIIAAwgE1GQqAlqQqAlzFBWSZTWQ4J4t8BX45A'
+    'AMAAAAggADCATUZCoCWpCoCXMUFZJlNZgLDoDAEUpUCAwAAABAAIIAAwzAUppkiRIbFIkSHi'
+    '7kinChIbc2UzQA==')
+
+
+def make_frame(mode, width, height):
+    '''returns a LImA video_image of the given mode with random data'''
+    name, bpp = MODES[mode]
+    nbytes = int(width * height * bpp)
+    header = struct.pack(VideoImageCodec.VIDEO_HEADER_FORMAT, 0x5644454f, 1,
+                         mode, 0, width, height, 0, 32, 0, 0)
+    rs = numpy.random.RandomState(mode)
+    return header + rs.randint(0, 256, nbytes).astype('uint8').tostring()
+
+
+def _yuv2rgb(y, u, v):
+    Cr = v - 128.0
+    Cb = u - 128.0
+    R = y + 1.402 * Cr
+    G = y - 0.344 * Cb - 0.714 * Cr
+    B = y + 1.772 * Cb
+    return (numpy.clip(R, 0, 255), numpy.clip(G, 0, 255),
+            numpy.clip(B, 0, 255))
+
+
+def reference_decode(frame):
+    '''the former implementation of VideoImageCodec.decode'''
+    _, _, mode, _, width, height = struct.unpack(
+        VideoImageCodec.VIDEO_HEADER_FORMAT, frame[:32])[:6]
+    dtype = {0: 'uint8', 1: 'uint16', 2: 'uint32', 3: 'uint64'}.get(mode,
+                                                                    'uint8')
+    buf = numpy.fromstring(frame[32:], dtype)
+    if mode == 7:
+        r, g, b = buf[2::4], buf[1::4], buf[0::4]
+    elif mode == 17:
+        r, g, b = _yuv2rgb(buf[0::3], buf[1::3], buf[2::3])
+    elif mode in (15, 16):
+        if mode == 16:
+            u, v, ys = buf[0::4], buf[2::4], (buf[1::4], buf[3::4])
+        else:
+            u, v = buf[0::6], buf[3::6]
+            ys = (buf[1::6], buf[2::6], buf[4::6], buf[5::6])
+        rgbs = [_yuv2rgb(y, u, v) for y in ys]
+        r, g, b = [numpy.dstack([c[i] for c in rgbs]).reshape(-1)
+                   for i in range(3)]
+    else:
+        return buf.reshape(height, width)
+    return numpy.dstack([c.reshape(height, width) for c in (r, g, b)])
+
 
 @insertTest(helper_name='encDec', cname='json', data=[1, 2, 3])
 @insertTest(helper_name='encDec', cname='zip', data='foobar')
@@ -89,5 +177,297 @@ class CodecTest(unittest.TestCase):
             self.assertTrue(equal, msg)
         return fmt, dec
 
+
+@insertTest(helper_name='checkDecode', mode=0)
+@insertTest(helper_name='checkDecode', mode=1)
+@insertTest(helper_name='checkDecode', mode=7)
+@insertTest(helper_name='checkDecode', mode=15)
+@insertTest(helper_name='checkDecode', mode=16)
+@insertTest(helper_name='checkDecode', mode=17)
+class VideoImageCodecTest(unittest.TestCase):
+    '''TestCase for the decoding of the VideoImageCodec'''
+
+    def checkDecode(self, mode=None):
+        '''check that the decoded image is identical to the one of the
+        former implementation, also when decoding into an output array'''
+        frame = make_frame(mode, 8, 6)
+        codec = CodecFactory().getCodec('videoimage')
+        fmt, img = codec.decode(('videoimage_json', frame))
+        self.assertEqual(fmt, 'json')
+        ref = reference_decode(frame)
+        self.assertEqual(img.dtype, ref.dtype)
+        self.assertTrue(numpy.array_equal(img, ref))
+        out = numpy.zeros_like(ref)
+        for i in xrange(2):  # reuse it
+            _, img = codec.decode(('videoimage', frame), out=out)
+            self.assertTrue(img is out)
+            self.assertTrue(numpy.array_equal(out, ref))
+
+    def testYUV444Gray(self):
+        '''check that YUV pixels without colour are decoded as gray'''
+        frame = make_frame(17, 4, 2)
+        yuv = numpy.array([[y, 128, 128] for y in range(0, 256, 32)],
+                          dtype='uint8')
+        frame = frame[:32] + yuv.tostring()
+        _, img = CodecFactory().getCodec('videoimage').decode(
+            ('videoimage', frame))
+        expected = numpy.repeat(numpy.arange(0, 256, 32), 3).reshape(2, 4, 3)
+        self.assertTrue(numpy.array_equal(img, expected))
+
+    def testWrongOutput(self):
+        '''check that output arrays of a wrong shape or type are rejected'''
+        codec = CodecFactory().getCodec('videoimage')
+        frame = make_frame(16, 8, 6)
+        for out in (numpy.zeros((6, 8, 3), 'uint8'), numpy.zeros((8, 6, 3)),
+                    numpy.zeros((6, 8, 3, 2))[..., 0]):
+            self.assertRaises(ValueError, codec.decode, ('videoimage', frame),
+                              out=out)
+
+
+_NESTED = {'a': range(50), u'b': {'c': [1.5] * 30, 'd': u'\xe9'},
+           'e': [{'f': [u'g', [u'h']]}], 'i': {}, 'j': None}
+
+
+@insertTest(helper_name='checkPipeline', fmt='json', data=range(100))
+@insertTest(helper_name='checkPipeline', fmt='zip_json', data=range(100))
+@insertTest(helper_name='checkPipeline', fmt='bz2_json', data=_NESTED)
+@insertTest(helper_name='checkPipeline', fmt='zip_json', data=_NESTED)
+@insertTest(helper_name='checkPipeline', fmt='zip_bz2_json', data=_NESTED)
+@insertTest(helper_name='checkPipeline', fmt='null_zip_json',
+            data=tuple(range(33)))
+@insertTest(helper_name='checkPipeline', fmt='bz2_json', data=[])
+@insertTest(helper_name='checkPipeline', fmt='zip_pickle', data=_NESTED)
+class CodecPipelineTest(unittest.TestCase):
+    '''TestCase for the (chunked) encoding/decoding of the CodecPipeline'''
+
+    def setUp(self):
+        # encode the lists in many chunks
+        from taurus.core.util.codecs import JSONCodec
+        self._chunkItems = JSONCodec.CHUNK_ITEMS
+        JSONCodec.CHUNK_ITEMS = 7
+
+    def tearDown(self):
+        from taurus.core.util.codecs import JSONCodec
+        JSONCodec.CHUNK_ITEMS = self._chunkItems
+
+    def checkPipeline(self, fmt=None, data=None):
+        '''check that the result is identical to applying the codecs one
+        after the other and that it can be decoded'''
+        cf = CodecFactory()
+        expected = ('', data)
+        for cname in reversed(fmt.split('_')):
+            expected = cf.getCodec(cname).encode(expected)
+        enc = cf.getCodec(fmt).encode(('', data))
+        self.assertEqual(enc, expected)
+        decoded = data
+        if 'json' in fmt:
+            import json
+            decoded = json.loads(json.dumps(data))
+        self.assertEqual(cf.getCodec(fmt).decode(enc), ('', decoded))
+        # decode from a buffer (as DEV_ENCODED values are received)
+        self.assertEqual(cf.getCodec(fmt).decode((enc[0], buffer(enc[1]))),
+                         ('', decoded))
+
+    def testEnsureAscii(self):
+        '''check that json strings are decoded as utf-8 str if requested'''
+        cf = CodecFactory()
+        enc = cf.getCodec('zip_json').encode(('', _NESTED))
+        _, dec = cf.getCodec('zip_json').decode(enc, ensure_ascii=True)
+        self.assertEqual(dec, {'a': range(50),
+                               'b': {'c': [1.5] * 30, 'd': '\xc3\xa9'},
+                               'e': [{'f': ['g', ['h']]}], 'i': {},
+                               'j': None})
+        self.assertEqual(type(dec.keys()[0]), str)
+        self.assertEqual(type(dec['e'][0]['f'][1][0]), str)
+        for value, expected in ((u'x', 'x'), ([u'x', [u'y']], ['x', ['y']]),
+                                (1, 1)):
+            enc = cf.getCodec('json').encode(('', value))
+            _, dec = cf.getCodec('json').decode(enc, ensure_ascii=True)
+            self.assertEqual(dec, expected)
+            self.assertEqual(repr(dec), repr(expected))
+
+    def testRegisterCodec(self):
+        '''check that the cached pipelines are updated when a codec is
+        (un)registered'''
+        from taurus.core.util.codecs import ZIPCodec
+        cf = CodecFactory()
+        pipeline = cf.getCodec('zip_json')
+        self.assertTrue(cf.getCodec('zip_json') is pipeline)
+
+        class Foo2Codec(ZIPCodec):
+            pass
+        self.assertFalse(isinstance(cf.getCodec('foo2_json')[0], Foo2Codec))
+        cf.registerCodec('foo2', Foo2Codec)
+        try:
+            self.assertTrue(cf.getCodec('zip_json') is pipeline)
+            self.assertTrue(isinstance(cf.getCodec('foo2_json')[0],
+                                       Foo2Codec))
+        finally:
+            cf.unregisterCodec('foo2')
+        self.assertFalse(isinstance(cf.getCodec('foo2_json')[0], Foo2Codec))
+
+
+@insertTest(helper_name='encDec', cname='ndarray',
+            data=numpy.arange(12, dtype='>i2').reshape(3, 4))
+@insertTest(helper_name='encDec', cname='zip_ndarray',
+            data=numpy.array(['a', 'bc']))
+@insertTest(helper_name='fuzz', compression=None)
+@insertTest(helper_name='fuzz', compression='zip')
+@insertTest(helper_name='fuzz', compression='bz2')
+class NDArrayCodecTest(CodecTest):
+    '''TestCase for the NDArrayCodec'''
+
+    DTYPES = ('?', 'u1', 'i1', '<u2', '>i2', '<u4', '>i4', '<i8', '>u8',
+              '<f2', '<f4', '>f4', '<f8', '>f8', '<c8', '>c16', 'S5', '<U3')
+
+    def randomArray(self, rs, dtype):
+        '''returns an array with a random shape (0 to 4 dimensions)'''
+        shape = tuple(rs.randint(0, 5, rs.randint(0, 5)))
+        dtype = numpy.dtype(dtype)
+        size = int(numpy.prod(shape))
+        if dtype.kind == 'S':  # (printable characters)
+            data = rs.randint(32, 127, (size, dtype.itemsize)).astype('u1')
+        elif dtype.kind == 'U':
+            data = rs.randint(32, 127, (size, dtype.itemsize // 4))
+            data = data.astype(dtype.str[0] + 'u4')
+        else:
+            data = rs.randint(0, 256 if dtype.kind != 'b' else 2,
+                              size * dtype.itemsize).astype('u1')
+        array = data.view(dtype).reshape(shape)
+        if array.ndim > 1 and rs.randint(2):
+            array = array.T  # (not contiguous)
+        return array
+
+    def assertArrayEqual(self, a, b):
+        self.assertEqual(a.dtype.str, b.dtype.str)
+        self.assertEqual(a.shape, b.shape)
+        self.assertEqual(a.tostring(), numpy.ascontiguousarray(b).tostring())
+
+    def fuzz(self, compression=None):
+        '''check that random arrays (and sequences of named arrays) are
+        encoded/decoded properly and that corrupted data is either decoded
+        or rejected with a ValueError'''
+        rs = numpy.random.RandomState(len(str(compression)))
+        codec = CodecFactory().getCodec('ndarray')
+        for i in xrange(200):
+            dtypes = [self.DTYPES[j] for j in
+                      rs.randint(0, len(self.DTYPES), rs.randint(0, 4))]
+            arrays = [('a%i' % j, self.randomArray(rs, dtype))
+                      for j, dtype in enumerate(dtypes)]
+            if len(arrays) == 1 and rs.randint(2):
+                data = arrays[0][1]
+            else:
+                data = arrays
+            fmt, enc = codec.encode(('', data), compression=compression)
+            self.assertEqual(fmt, 'ndarray')
+            _, dec = codec.decode((fmt, buffer(enc)))
+            if data is arrays:
+                self.assertEqual(dec.keys(), [n for n, a in arrays])
+                for name, array in arrays:
+                    self.assertArrayEqual(dec[name], array)
+            else:
+                self.assertArrayEqual(dec, data)
+            # corrupt it
+            corrupted = numpy.frombuffer(enc, 'u1').copy()
+            if rs.randint(2):
+                corrupted = corrupted[:rs.randint(0, len(corrupted))]
+            elif len(corrupted):
+                idx = rs.randint(0, len(corrupted), rs.randint(1, 4))
+                corrupted[idx] = rs.randint(0, 256, len(idx))
+            try:
+                codec.decode((fmt, corrupted.tostring()))
+            except ValueError:
+                pass
+
+    def testNoCopy(self):
+        '''check that uncompressed arrays are not copied'''
+        codec = CodecFactory().getCodec('ndarray')
+        data = [('x', numpy.arange(10.)), ('y', numpy.ones((2, 3), 'u2'))]
+        fmt, enc = codec.encode(('', data))
+        enc = numpy.frombuffer(enc, 'u1')
+        _, dec = codec.decode((fmt, enc))
+        for array in dec.values():
+            self.assertTrue(numpy.may_share_memory(array, enc))
+            self.assertFalse(array.flags.writeable)
+
+    def testFactory(self):
+        '''check that the codec is selected from the format'''
+        cf = CodecFactory()
+        for compression in (None, 'zip', 'bz2'):
+            fmt, enc = cf.getCodec('ndarray').encode(
+                ('', {'x': numpy.arange(3)}), compression=compression)
+            dec = cf.decode((fmt, enc))
+            self.assertEqual(dec.keys(), ['x'])
+            self.assertArrayEqual(dec['x'], numpy.arange(3))
+
+    def testUnsupported(self):
+        '''check that unsupported arrays and data are rejected'''
+        codec = CodecFactory().getCodec('ndarray')
+        for array in (numpy.array([None]), numpy.zeros(2, 'i4,f8')):
+            self.assertRaises(TypeError, codec.encode, ('', array))
+        self.assertRaises(ValueError, codec.encode, ('', numpy.arange(3)),
+                          compression='gzip')
+        for data in ('', 'NDAR', 'pickle' * 10):
+            self.assertRaises(ValueError, codec.decode, ('ndarray', data))
+        # dtypes that numpy would parse (e.g. comma separated ones)
+        _, enc = codec.encode(('', numpy.zeros(2, '<f8')))
+        for dtype in ('<f8,1', '|S0', '|O8'):
+            data = enc.replace('<f8'.ljust(8, '\0'), dtype.ljust(8, '\0'))
+            self.assertRaises(ValueError, codec.decode, ('ndarray', data))
+
+    def testCompressionBomb(self):
+        '''check that compressed data larger than the array is rejected'''
+        codec = CodecFactory().getCodec('ndarray')
+        shape = struct.Struct('<Q')
+        offset = struct.calcsize(NDArrayCodec.HEADER_FORMAT) + \
+            struct.calcsize(NDArrayCodec.ARRAY_FORMAT)
+        for compression in ('zip', 'bz2'):
+            # 16 MB of zeros announced as an array of 10 elements
+            _, enc = codec.encode(('', numpy.zeros(1 << 21)),
+                                  compression=compression)
+            enc = enc[:offset] + shape.pack(10) + enc[offset + shape.size:]
+            self.assertRaises(ValueError, codec.decode, ('ndarray', enc))
+            # 80 bytes of zeros announced as 2**40 elements
+            _, enc = codec.encode(('', numpy.zeros(10)),
+                                  compression=compression)
+            enc = enc[:offset] + shape.pack(1 << 40) + \
+                enc[offset + shape.size:]
+            self.assertRaises(ValueError, codec.decode, ('ndarray', enc))
+
+    @unittest.skipUnless(sys.platform.startswith('linux'),
+                         'ru_maxrss is only known to be in kB in linux')
+    def testCompressionBombMemory(self):
+        '''check that the memory used to reject a bz2 bomb is bounded'''
+        head = struct.pack(NDArrayCodec.HEADER_FORMAT, NDArrayCodec.MAGIC,
+                           NDArrayCodec.VERSION, 0, 1)
+        head += struct.pack(NDArrayCodec.ARRAY_FORMAT, '|u1', 1, 2, 0,
+                            len(BZ2_BOMB))
+        head += struct.pack('<Q', 10)
+        head += '\0' * (-len(head) % 8)
+        data = head + BZ2_BOMB + '\0' * (-len(BZ2_BOMB) % 8)
+        script = '\n'.join([
+            'import sys, base64, resource',
+            'from taurus.core.util.codecs import NDArrayCodec',
+            'data = base64.b64decode(sys.argv[1])',
+            'rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss',
+            'try:',
+            '    NDArrayCodec().decode(("ndarray", data))',
+            'except ValueError:',
+            '    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss',
+            '    print(rss)'])
+        import taurus
+        env = dict(os.environ)
+        path = os.path.dirname(os.path.dirname(taurus.__file__))
+        env['PYTHONPATH'] = os.pathsep.join(
+            [path] + env.get('PYTHONPATH', '').split(os.pathsep))
+        p = subprocess.Popen([sys.executable, '-c', script,
+                              base64.b64encode(data)],
+                             env=env, stdout=subprocess.PIPE)
+        out = p.communicate()[0]
+        self.assertEqual(p.returncode, 0)
+        # (the decompressed data may exceed the array by one bz2 block)
+        self.assertLess(int(out.decode('utf-8').splitlines()[-1]), 100000)
+
+
 if __name__ == '__main__':
     pass
@@ -0,0 +1,253 @@
+#!/usr/bin/env python
+
+#############################################################################
+##
+# This file is part of Taurus
+##
+# http://taurus-scada.org
+##
+# Copyright 2011 CELLS / ALBA Synchrotron, Bellaterra, Spain
+##
+# Taurus is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+##
+# Taurus is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+##
+# You should have received a copy of the GNU Lesser General Public License
+# along with Taurus.  If not, see <http://www.gnu.org/licenses/>.
+##
+#############################################################################
+
+"""Test for taurus.core.util.containers"""
+
+#__all__ = []
+
+__docformat__ = 'restructuredtext'
+
+import numpy
+from taurus.external import unittest
+from taurus.test import insertTest
+import threading
+from taurus.core.util.containers import (ArrayBuffer, RingArrayBuffer,
+                                      DirtySet, MatchIndex)
+
+
+@insertTest(helper_name='compareOps', shape=(), maxSize=5, n=23)
+@insertTest(helper_name='compareOps', shape=(), maxSize=128, n=1000)
+@insertTest(helper_name='compareOps', shape=(3,), maxSize=7, n=50)
+@insertTest(helper_name='compareOps', shape=(), maxSize=10, n=100, chunk=3)
+@insertTest(helper_name='compareOps', shape=(2,), maxSize=10, n=100, chunk=25)
+class RingArrayBufferTestCase(unittest.TestCase):
+    '''TestCase for the taurus.core.util.containers.RingArrayBuffer class'''
+
+    def compareOps(self, shape=(), maxSize=10, n=100, chunk=None):
+        '''check that the contents are those of an ArrayBuffer after each
+        append (or extend, if chunk is given)'''
+        ab = ArrayBuffer(numpy.zeros((2,) + shape), maxSize=maxSize)
+        rb = RingArrayBuffer(numpy.zeros((2,) + shape), maxSize=maxSize)
+        data = numpy.arange(n * max(1, numpy.prod(shape)), dtype='d')
+        data = data.reshape((n,) + shape)
+        if chunk is None:
+            for x in data:
+                ab.append(x)
+                rb.append(x)
+                self._assertSameContents(ab, rb)
+        else:
+            for i in xrange(0, n, chunk):
+                ab.extend(data[i:i + chunk])
+                rb.extend(data[i:i + chunk])
+                self._assertSameContents(ab, rb)
+        self.assertTrue(rb.isFull())
+        self.assertEqual(rb.remainingSize(), 0)
+        self.assertLessEqual(rb.bufferSize(), 2 * maxSize)
+
+    def _assertSameContents(self, ab, rb):
+        self.assertEqual(len(ab), len(rb))
+        self.assertTrue(numpy.all(ab.contents() == rb.contents()),
+                        '%r != %r' % (ab, rb))
+        if len(ab):
+            self.assertTrue(numpy.all(ab[-1] == rb[-1]))
+
+    def test_snapshot(self):
+        '''contents() returns read-only views that are not modified later'''
+        rb = RingArrayBuffer(numpy.zeros(4), maxSize=4)
+        snapshots = []
+        for i in xrange(20):
+            rb.append(i)
+            snapshots.append((rb.contents(), rb.toArray()))
+        for view, copy in snapshots:
+            self.assertFalse(view.flags.writeable)
+            self.assertTrue(numpy.all(view == copy))
+
+    def test_extendLeft(self):
+        '''extendLeft prepends and refuses to exceed the max size'''
+        rb = RingArrayBuffer(numpy.zeros(2), maxSize=6)
+        rb.extend(numpy.array([3., 4.]))
+        rb.extendLeft(numpy.array([1., 2.]))
+        self.assertEqual(rb.toArray().tolist(), [1., 2., 3., 4.])
+        rb.extendLeft(numpy.array([0.]))
+        self.assertEqual(rb.toArray().tolist(), [0., 1., 2., 3., 4.])
+        self.assertRaises(ValueError, rb.extendLeft, numpy.zeros(2))
+
+    def test_moveLeft(self):
+        '''moveLeft discards elements from the beginning'''
+        rb = RingArrayBuffer(numpy.zeros(4), maxSize=4)
+        rb.extend(numpy.arange(4.))
+        rb.moveLeft(3)
+        self.assertEqual(rb.toArray().tolist(), [3.])
+        rb.moveLeft(3)
+        self.assertEqual(len(rb), 0)
+
+    def test_setMaxSize(self):
+        '''setMaxSize cannot be set below the current contents size'''
+        rb = RingArrayBuffer(numpy.zeros(4), maxSize=4)
+        rb.extend(numpy.arange(3.))
+        self.assertRaises(ValueError, rb.setMaxSize, 2)
+        rb.setMaxSize(8)
+        rb.extend(numpy.arange(10.))
+        self.assertEqual(rb.toArray().tolist(), range(2, 10))
+
+
+class DirtySetTestCase(unittest.TestCase):
+    '''Test for taurus.core.util.containers.DirtySet'''
+
+    def test_merge(self):
+        '''repeated updates of an object are merged and their flags OR'ed'''
+        ds = DirtySet()
+        self.assertTrue(ds.add('a', 1))
+        self.assertFalse(ds.add('b'))
+        self.assertFalse(ds.add('a', 2))
+        self.assertEqual(len(ds), 2)
+        self.assertEqual(ds.take(), {'a': 3, 'b': 0})
+        self.assertEqual(len(ds), 0)
+        self.assertTrue(ds.add('b'))
+        self.assertEqual(ds.getStats(), dict(pending=1, added=4, merged=1,
+                                             taken=2))
+
+    def test_discard(self):
+        '''discard only drops the updates with the given flags'''
+        ds = DirtySet()
+        ds.add('a', 0)
+        ds.add('b', 1)
+        ds.discard(['a', 'b', 'c'], 0)
+        self.assertEqual(ds.take(), {'b': 1})
+
+    def test_events(self):
+        '''100k events of 1000 objects from several threads are flushed in
+        a few batches, with one update per dirty object and batch'''
+        ds = DirtySet()
+        nobjs, nevents, nthreads = 1000, 100000, 4
+        notifications = []
+        flushes = []
+
+        def produce(seed):
+            rs = numpy.random.RandomState(seed)
+            for i, obj in enumerate(rs.randint(0, nobjs, nevents // nthreads)):
+                if ds.add(obj, 1):
+                    notifications.append(obj)
+                if i % 10000 == 0:
+                    flushes.append(ds.take())  # the consumer, e.g. per frame
+
+        threads = [threading.Thread(target=produce, args=(i,))
+                   for i in range(nthreads)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        flushes.append(ds.take())
+        repaints = sum(len(f) for f in flushes)
+        self.assertTrue(repaints <= len(flushes) * nobjs)
+        self.assertTrue(repaints < nevents // 4)
+        stats = ds.getStats()
+        self.assertEqual(stats['added'], nevents)
+        self.assertEqual(stats['taken'], repaints)
+        self.assertEqual(stats['merged'], nevents - repaints)
+        self.assertEqual(stats['pending'], 0)
+        self.assertTrue(len(notifications) <= len(flushes))
+
+
+
+class _Device(object):
+
+    def __init__(self, name, alias=None):
+        self._name, self._alias = name, alias
+
+    def name(self):
+        return self._name
+
+    def alias(self):
+        return self._alias
+
+
+class MatchIndexTestCase(unittest.TestCase):
+    '''Test for taurus.core.util.containers.MatchIndex'''
+
+    def setUp(self):
+        # 50000 devices in 10 domains
+        self.devices = {}
+        for d in range(10):
+            self.devices[d] = [
+                _Device('dom%d/fam%d/member%d' % (d, i % 100, i),
+                        alias='Alias_%d_%d' % (d, i) if i % 3 else None)
+                for i in range(5000)]
+        self.index = MatchIndex(lambda dev: (dev.name(), dev.alias()))
+        for d, devices in self.devices.items():
+            self.index.setGroup(d, devices)
+
+    def _expected(self, d, pattern):
+        pattern = pattern.lower()
+        return [dev for dev in self.devices[d]
+                if pattern in dev.name().lower() or
+                pattern in (dev.alias() or '').lower()]
+
+    def test_keystrokes(self):
+        '''the matches are found as the filter is typed'''
+        index = self.index
+        self.assertEqual(len(index), 10)
+        text = 'ALIAS_3_12'
+        for i in range(1, len(text) + 1):
+            pattern = text[:i]
+            for d in range(10):
+                matches = index.getMatches(d, pattern)
+                self.assertEqual(matches, self._expected(d, pattern))
+                self.assertEqual(index.hasMatches(d, pattern), bool(matches))
+        # the last keystroke only searched the matches of the previous one
+        self.assertEqual(len(index._candidates(3, 'alias_3_123')),
+                         len(self._expected(3, 'alias_3_12')))
+        # and deleting characters does not need to search again
+        self.assertEqual(index.getMatches(3, 'ALIAS_3_1'),
+                         self._expected(3, 'ALIAS_3_1'))
+        # the groups which did not match are not searched again
+        self.assertFalse(index.hasMatches(3, 'nothing'))
+        self.assertEqual(index._candidates(3, 'nothing here'), [])
+        self.assertFalse(index.hasMatches(3, 'nothing here'))
+
+    def test_match(self):
+        '''filters other than substrings are given as a function'''
+        name = 'dom0/fam7/member7'
+
+        def match(texts):
+            return texts[0] == name
+        self.assertEqual(self.index.getMatches(0, name, match),
+                         [self.devices[0][7]])
+        self.assertFalse(self.index.hasMatches(1, name, match))
+
+    def test_setGroup(self):
+        '''changing a group discards its matches'''
+        index = self.index
+        self.assertEqual(len(index.getMatches(0, 'member1')), 1111)
+        index.setGroup(0, self.devices[0][:10])
+        self.assertEqual(index.getGroup(0), self.devices[0][:10])
+        self.assertEqual(len(index.getMatches(0, 'member1')), 1)
+        index.clear()
+        self.assertFalse(0 in index)
+        self.assertRaises(KeyError, index.getMatches, 0, 'member1')
+
+
+if __name__ == '__main__':
+    unittest.main()
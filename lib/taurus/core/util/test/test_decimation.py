@@ -0,0 +1,144 @@
+#!/usr/bin/env python
+
+#############################################################################
+##
+# This file is part of Taurus
+##
+# http://taurus-scada.org
+##
+# Copyright 2011 CELLS / ALBA Synchrotron, Bellaterra, Spain
+##
+# Taurus is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+##
+# Taurus is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+##
+# You should have received a copy of the GNU Lesser General Public License
+# along with Taurus.  If not, see <http://www.gnu.org/licenses/>.
+##
+#############################################################################
+
+"""Test for taurus.core.util.decimation"""
+
+#__all__ = []
+
+__docformat__ = 'restructuredtext'
+
+import numpy
+from taurus.external import unittest
+from taurus.test import insertTest
+from taurus.core.util.decimation import MinMaxDecimator
+
+
+def _randomWalk(n, seed=0):
+    rs = numpy.random.RandomState(seed)
+    return numpy.arange(n, dtype='d'), rs.standard_normal(n).cumsum()
+
+
+@insertTest(helper_name='checkRendering', n=100000, ncols=1000,
+            xmin=0, xmax=100000)
+@insertTest(helper_name='checkRendering', n=100000, ncols=1000,
+            xmin=20000, xmax=30000)
+@insertTest(helper_name='checkRendering', n=100000, ncols=500,
+            xmin=-500, xmax=1234.5)
+@insertTest(helper_name='checkRendering', n=200000, ncols=1500,
+            xmin=99999.5, xmax=250000)
+@insertTest(helper_name='checkRendering', n=50000, ncols=300,
+            xmin=10000, xmax=20000, nans=True)
+class MinMaxDecimatorTestCase(unittest.TestCase):
+    '''TestCase for the taurus.core.util.decimation.MinMaxDecimator class'''
+
+    def checkRendering(self, n=None, ncols=None, xmin=None, xmax=None,
+                       nans=False):
+        '''check that the decimated data is a small subset of the data that
+        keeps the extremes of each pixel column and the bounding rect'''
+        x, y = _randomWalk(n)
+        if nans:
+            y[::7] = numpy.nan
+        dx, dy = MinMaxDecimator().decimate(x, y, xmin, xmax, ncols)
+        # the number of points is bounded by the number of columns
+        self.assertLessEqual(len(dx), 4 * (2 * ncols + 3) + 8)
+        # all points are points of the data (x are the indices)
+        idx = dx.astype(int)
+        self.assertTrue(numpy.all(idx == dx))
+        same = (dy == y[idx]) | (numpy.isnan(dy) & numpy.isnan(y[idx]))
+        self.assertTrue(numpy.all(same))
+        # the points are sorted
+        self.assertTrue(numpy.all(numpy.diff(dx) >= 0))
+        # the bounding rect is kept
+        self.assertEqual((dx[0], dx[-1]), (x[0], x[-1]))
+        self.assertEqual((numpy.nanmin(dy), numpy.nanmax(dy)),
+                         (numpy.nanmin(y), numpy.nanmax(y)))
+        # the extremes of each bin (of up to 1 pixel column) are kept
+        w = 2 ** numpy.floor(numpy.log2(float(xmax - xmin) / ncols))
+        self.assertLessEqual(w, float(xmax - xmin) / ncols)
+        col, dcol = numpy.floor(x / w), numpy.floor(dx / w)
+        visible = (x >= xmin) & (x <= xmax)
+        for c in numpy.unique(col[visible]):
+            ys, dys = y[col == c], dy[dcol == c]
+            if numpy.isnan(ys).all():
+                continue
+            self.assertEqual(numpy.nanmin(ys), numpy.nanmin(dys))
+            self.assertEqual(numpy.nanmax(ys), numpy.nanmax(dys))
+
+    def test_small_data_unchanged(self):
+        '''data with few points per pixel column is not decimated'''
+        x, y = _randomWalk(1000)
+        dx, dy = MinMaxDecimator().decimate(x, y, 0, 1000, 500)
+        self.assertIs(dx, x)
+        self.assertIs(dy, y)
+
+    def test_unsorted_data_unchanged(self):
+        '''data with decreasing abscissas is not decimated'''
+        x, y = _randomWalk(100000)
+        x = x[::-1]
+        dx, dy = MinMaxDecimator().decimate(x, y, 0, 100000, 500)
+        self.assertIs(dx, x)
+        self.assertIs(dy, y)
+
+    def test_incremental(self):
+        '''incremental updates give the same result as full decimation'''
+        x, y = _randomWalk(300000)
+        maxSize = 100000
+        inc = MinMaxDecimator(incremental=True)
+        end = 50000
+        while end < len(x):
+            xs, ys = x[max(0, end - maxSize):end], y[max(0, end - maxSize):end]
+            # scroll the displayed range with the data
+            xmin, xmax = xs[-1] - 30000.5, xs[-1] + 1000
+            got = inc.decimate(xs, ys, xmin, xmax, 800)
+            exp = MinMaxDecimator().decimate(xs, ys, xmin, xmax, 800)
+            self.assertTrue(numpy.array_equal(got[0], exp[0]))
+            self.assertTrue(numpy.array_equal(got[1], exp[1]))
+            end += 777
+        # the summaries were computed only once
+        self.assertEqual(inc.rebuildCount, 1)
+
+    def test_incremental_zoom_cache(self):
+        '''returning to a previous zoom level reuses its summaries'''
+        x, y = _randomWalk(100000)
+        inc = MinMaxDecimator(incremental=True)
+        inc.decimate(x, y, 0, 100000, 1000)
+        inc.decimate(x, y, 0, 1000, 1000)
+        inc.decimate(x, y, 0, 100000, 1000)
+        inc.decimate(x, y, 50000, 150000, 1000)
+        self.assertEqual(inc.rebuildCount, 2)
+
+    def test_incremental_prepend(self):
+        '''prepending data (e.g. from an archive) forces a rebuild'''
+        x, y = _randomWalk(100000)
+        inc = MinMaxDecimator(incremental=True)
+        inc.decimate(x[50000:], y[50000:], 0, 100000, 1000)
+        got = inc.decimate(x, y, 0, 100000, 1000)
+        exp = MinMaxDecimator().decimate(x, y, 0, 100000, 1000)
+        self.assertTrue(numpy.array_equal(got[1], exp[1]))
+        self.assertEqual(inc.rebuildCount, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,184 @@
+#!/usr/bin/env python
+
+#############################################################################
+##
+# This file is part of Taurus
+##
+# http://taurus-scada.org
+##
+# Copyright 2011 CELLS / ALBA Synchrotron, Bellaterra, Spain
+##
+# Taurus is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+##
+# Taurus is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+##
+# You should have received a copy of the GNU Lesser General Public License
+# along with Taurus.  If not, see <http://www.gnu.org/licenses/>.
+##
+#############################################################################
+"""Test for taurus.core.util.diskhistory"""
+
+#__all__ = []
+
+__docformat__ = 'restructuredtext'
+
+import os
+import sys
+import shutil
+import subprocess
+import tempfile
+import numpy
+from taurus.external import unittest
+from taurus.test import insertTest
+from taurus.core.util.diskhistory import DiskHistoryBuffer
+
+
+@insertTest(helper_name='checkRead', n=100, xmin=None, xmax=None)
+@insertTest(helper_name='checkRead', n=5000, xmin=None, xmax=None)
+@insertTest(helper_name='checkRead', n=5000, xmin=1000.5, xmax=3100)
+@insertTest(helper_name='checkRead', n=5000, xmin=-10, xmax=2048)
+@insertTest(helper_name='checkRead', n=5000, xmin=4500, xmax=None)
+@insertTest(helper_name='checkDecimatedRead', n=20480, maxPoints=3000)
+@insertTest(helper_name='checkDecimatedRead', n=20480, maxPoints=300)
+@insertTest(helper_name='checkDecimatedRead', n=20480, maxPoints=300,
+            xmin=5000, xmax=15000)
+class DiskHistoryBufferTestCase(unittest.TestCase):
+    '''TestCase for the taurus.core.util.diskhistory.DiskHistoryBuffer
+    class'''
+
+    CHUNKSIZE = 2048
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.h = DiskHistoryBuffer(self.dir, ncols=2, chunkSize=self.CHUNKSIZE)
+
+    def tearDown(self):
+        self.h.close()
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+    def _fill(self, n):
+        rs = numpy.random.RandomState(0)
+        x = numpy.arange(n, dtype='d')
+        y = rs.standard_normal((n, 2)).cumsum(axis=0)
+        self.h.extend(x[:n // 3], y[:n // 3])
+        for i in xrange(n // 3, n):
+            self.h.append(x[i], y[i])
+        return x, y
+
+    def checkRead(self, n=None, xmin=None, xmax=None):
+        '''check that non-decimated reads return the points of the range'''
+        x, y = self._fill(n)
+        self.assertEqual(len(self.h), n)
+        self.assertEqual(self.h.getChunkCount(), n // self.CHUNKSIZE)
+        self.assertEqual(self.h.xRange(), (x[0], x[-1]))
+        rx, ry = self.h.read(xmin, xmax)
+        mask = numpy.ones(n, dtype=bool)
+        if xmin is not None:
+            mask &= x >= xmin
+        if xmax is not None:
+            mask &= x <= xmax
+        # the points in the range are returned (plus at most one at each side)
+        inrange = (rx >= x[mask][0]) & (rx <= x[mask][-1])
+        self.assertTrue(numpy.array_equal(rx[inrange], x[mask]))
+        self.assertTrue(numpy.array_equal(ry[inrange], y[mask]))
+        self.assertTrue(len(rx) - len(x[mask]) <= 2 * (n // self.CHUNKSIZE + 1))
+
+    def checkDecimatedRead(self, n=None, maxPoints=None, xmin=None,
+                           xmax=None):
+        '''check that decimated reads are smaller and keep the extremes'''
+        x, y = self._fill(n)
+        rx, ry = self.h.read(xmin, xmax, maxPoints=maxPoints)
+        fx, fy = self.h.read(xmin, xmax)
+        self.assertTrue(len(rx) < len(fx))
+        self.assertTrue(numpy.all(numpy.diff(rx) >= 0))
+        # decimated blocks may extend beyond the range, but never less
+        self.assertTrue(rx[0] <= fx[0] and rx[-1] >= fx[-1])
+        self.assertTrue(numpy.all(ry.min(axis=0) <= fy.min(axis=0)))
+        self.assertTrue(numpy.all(ry.max(axis=0) >= fy.max(axis=0)))
+        if xmin is None and xmax is None:
+            self.assertTrue(numpy.array_equal(ry.min(axis=0), fy.min(axis=0)))
+            self.assertTrue(numpy.array_equal(ry.max(axis=0), fy.max(axis=0)))
+            self.assertEqual((rx[0], rx[-1]), (fx[0], fx[-1]))
+
+    def testHotTailOnly(self):
+        '''check that the points are kept in memory until a chunk is full'''
+        self._fill(self.CHUNKSIZE - 1)
+        self.assertEqual(self.h.getChunkCount(), 0)
+        self.assertEqual(os.listdir(self.h.getDirectory()), [])
+        self.h.append(self.CHUNKSIZE, (0, 0))
+        self.assertEqual(self.h.getChunkCount(), 1)
+        self.assertEqual(self.h.lastX(), self.CHUNKSIZE)
+
+    def testOpenMaps(self):
+        '''check that only a few chunk files are kept open'''
+        from taurus.core.util import diskhistory
+        self._fill(50 * self.CHUNKSIZE)
+        for x0, x1, levels in self.h._chunks:
+            # only the coarsest level is in memory
+            self.assertTrue(all(isinstance(f, str) for f in levels[:-1]))
+            self.assertFalse(isinstance(levels[-1], numpy.memmap))
+        self.assertEqual(len(diskhistory._maps), 0)
+        fds = '/proc/self/fd'
+        nfds = len(os.listdir(fds)) if os.path.isdir(fds) else None
+        for maxPoints in (None, 50 * self.CHUNKSIZE // 4, 1000):
+            self.h.read(maxPoints=maxPoints)
+            self.assertTrue(len(diskhistory._maps) <=
+                            diskhistory.MAX_OPEN_MAPS)
+            if nfds is not None:
+                self.assertTrue(len(os.listdir(fds)) <=
+                                nfds + diskhistory.MAX_OPEN_MAPS)
+        # the maps of a closed buffer are closed
+        self.h.close()
+        self.assertEqual(len(diskhistory._maps), 0)
+
+    def testClose(self):
+        '''check that close removes the files'''
+        self._fill(3 * self.CHUNKSIZE)
+        d = self.h.getDirectory()
+        self.assertTrue(os.path.isdir(d))
+        self.h.close()
+        self.assertFalse(os.path.exists(d))
+        self.assertEqual(len(self.h), 0)
+
+    def testDestroyed(self):
+        '''check that the files are removed when the buffer is destroyed'''
+        self._fill(3 * self.CHUNKSIZE)
+        d = self.h.getDirectory()
+        self.h = DiskHistoryBuffer(self.dir)  # (the old one is destroyed)
+        self.assertFalse(os.path.exists(d))
+
+    def testExit(self):
+        '''check that the files of open buffers are removed at exit'''
+        script = ('import sys; '
+                  'from taurus.core.util.diskhistory import '
+                  'DiskHistoryBuffer; '
+                  'h = DiskHistoryBuffer(sys.argv[1], chunkSize=1024); '
+                  'h.extend(range(2048), range(2048)); '
+                  'print(h.getDirectory())')
+        import taurus
+        env = dict(os.environ)
+        path = os.path.dirname(os.path.dirname(taurus.__file__))
+        env['PYTHONPATH'] = os.pathsep.join(
+            [path] + env.get('PYTHONPATH', '').split(os.pathsep))
+        p = subprocess.Popen([sys.executable, '-c', script, self.dir],
+                             env=env, stdout=subprocess.PIPE)
+        out = p.communicate()[0]
+        self.assertEqual(p.returncode, 0)
+        d = out.decode('utf-8').splitlines()[-1]
+        self.assertTrue(d.startswith(self.dir))
+        self.assertFalse(os.path.exists(d))
+
+    def testChunkSize(self):
+        '''check that invalid chunk sizes are rejected'''
+        self.assertRaises(ValueError, DiskHistoryBuffer, self.dir,
+                          chunkSize=1000)
+
+
+if __name__ == '__main__':
+    unittest.main()
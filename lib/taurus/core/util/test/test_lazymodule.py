@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+
+#############################################################################
+##
+# This file is part of Taurus
+##
+# http://taurus-scada.org
+##
+# Copyright 2011 CELLS / ALBA Synchrotron, Bellaterra, Spain
+##
+# Taurus is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+##
+# Taurus is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+##
+# You should have received a copy of the GNU Lesser General Public License
+# along with Taurus.  If not, see <http://www.gnu.org/licenses/>.
+##
+#############################################################################
+
+"""Test for taurus.core.util.lazymodule"""
+
+#__all__ = []
+
+__docformat__ = 'restructuredtext'
+
+import sys
+from taurus.external import unittest
+from taurus.core.util.lazymodule import LazyModule
+
+
+class LazyModuleTestCase(unittest.TestCase):
+    '''Test for taurus.core.util.lazymodule.LazyModule'''
+
+    # (a module which is not imported by taurus nor by unittest)
+    NAME = 'colorsys'
+
+    def setUp(self):
+        self._saved = sys.modules.pop(self.NAME, None)
+
+    def tearDown(self):
+        sys.modules.pop(self.NAME, None)
+        if self._saved is not None:
+            sys.modules[self.NAME] = self._saved
+
+    def test_lazyImport(self):
+        '''the module is imported when an attribute is accessed'''
+        proxy = LazyModule(self.NAME)
+        self.assertFalse(proxy.isLoaded())
+        self.assertFalse(self.NAME in sys.modules)
+        self.assertEqual(proxy.__name__, self.NAME)
+        self.assertEqual(proxy.rgb_to_hsv(1, 0, 0), (0.0, 1.0, 1))
+        self.assertTrue(proxy.isLoaded())
+        self.assertTrue(proxy.getModule() is sys.modules[self.NAME])
+        self.assertTrue('hsv_to_rgb' in dir(proxy))
+
+    def test_missingModule(self):
+        '''an ImportError is raised when a missing module is used'''
+        proxy = LazyModule('taurus_missing_module')
+        self.assertFalse(proxy.isLoaded())
+        self.assertRaises(ImportError, getattr, proxy, 'anything')
+
+    def test_missingAttribute(self):
+        '''an AttributeError is raised for missing attributes'''
+        proxy = LazyModule(self.NAME)
+        self.assertRaises(AttributeError, getattr, proxy, 'missing_attr')
+
+
+if __name__ == '__main__':
+    unittest.main()
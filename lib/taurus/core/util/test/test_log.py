@@ -0,0 +1,113 @@
+#!/usr/bin/env python
+
+#############################################################################
+##
+# This file is part of Taurus
+##
+# http://taurus-scada.org
+##
+# Copyright 2011 CELLS / ALBA Synchrotron, Bellaterra, Spain
+##
+# Taurus is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+##
+# Taurus is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+##
+# You should have received a copy of the GNU Lesser General Public License
+# along with Taurus.  If not, see <http://www.gnu.org/licenses/>.
+##
+#############################################################################
+
+"""Test for taurus.core.util.log"""
+
+#__all__ = []
+
+__docformat__ = 'restructuredtext'
+
+import logging
+import random
+from taurus.external import unittest
+from taurus.test import insertTest
+from taurus.core.util.log import LogRecordBuffer
+
+
+def _makeRecords(n, seed=0):
+    rs = random.Random(seed)
+    levels = logging.DEBUG, logging.INFO, logging.WARNING, logging.ERROR
+    return [logging.LogRecord('logger%i' % rs.randrange(5), rs.choice(levels),
+                              __file__, 0, 'message %i' % i, None, None)
+            for i in xrange(n)]
+
+
+@insertTest(helper_name='compareList', capacity=10, chunks=(3, 4, 5, 1, 20))
+@insertTest(helper_name='compareList', capacity=1, chunks=(1, 2, 3))
+@insertTest(helper_name='compareList', capacity=100, chunks=(30, 30, 30))
+@insertTest(helper_name='compareList', capacity=64, chunks=(7,) * 50)
+class LogRecordBufferTestCase(unittest.TestCase):
+    '''Test for taurus.core.util.log.LogRecordBuffer'''
+
+    def compareList(self, capacity, chunks):
+        '''the buffer behaves as a list trimmed to its capacity, and its
+        indices match its contents'''
+        records = _makeRecords(sum(chunks))
+        buff = LogRecordBuffer(capacity)
+        ref = []
+        i = 0
+        for n in chunks:
+            chunk = records[i:i + n]
+            i += n
+            ref.extend(chunk)
+            discarded = max(0, len(ref) - capacity)
+            ref = ref[discarded:]
+            self.assertEqual(buff.extend(chunk), discarded)
+            self.assertEqual(len(buff), len(ref))
+            self.assertEqual(list(buff), ref)
+            self.assertEqual([buff[r] for r in range(len(ref))], ref)
+            self.assertTrue(buff[-1] is ref[-1])
+            self.assertEqual(sorted(buff.getLoggerNames()),
+                             sorted(set(r.name for r in ref)))
+            self.assertEqual(buff.getLevels(),
+                             sorted(set(r.levelno for r in ref)))
+            for level in buff.getLevels():
+                self.assertEqual(buff.getLevelCount(level),
+                                 sum(r.levelno == level for r in ref))
+            for name in buff.getLoggerNames():
+                self.assertEqual(buff.getLoggerCount(name),
+                                 sum(r.name == name for r in ref))
+
+    def test_removeFirst(self):
+        '''removeFirst discards the oldest records'''
+        records = _makeRecords(10)
+        buff = LogRecordBuffer(8)
+        buff.extend(records[:6])
+        buff.removeFirst(4)
+        self.assertEqual(list(buff), records[4:6])
+        buff.extend(records[6:])
+        self.assertEqual(list(buff), records[4:])
+        buff.removeFirst(100)
+        self.assertEqual(len(buff), 0)
+        self.assertEqual(buff.getLoggerNames(), [])
+        self.assertRaises(IndexError, buff.__getitem__, 0)
+
+    def test_sort(self):
+        '''sort reorders the records, and new ones are appended at the end'''
+        records = _makeRecords(12)
+        buff = LogRecordBuffer(10)
+        buff.extend(records[:7])
+        buff.removeFirst(3)
+        buff.extend(records[7:10])
+        key = lambda r: (r.levelno, r.msg)
+        buff.sort(key, reverse=True)
+        self.assertEqual(list(buff), sorted(records[3:10], key=key,
+                                            reverse=True))
+        buff.extend(records[10:])
+        self.assertEqual(list(buff)[-2:], records[10:])
+
+
+if __name__ == '__main__':
+    unittest.main()
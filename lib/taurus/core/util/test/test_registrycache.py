@@ -0,0 +1,112 @@
+#!/usr/bin/env python
+
+#############################################################################
+##
+# This file is part of Taurus
+##
+# http://taurus-scada.org
+##
+# Copyright 2011 CELLS / ALBA Synchrotron, Bellaterra, Spain
+##
+# Taurus is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+##
+# Taurus is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+##
+# You should have received a copy of the GNU Lesser General Public License
+# along with Taurus.  If not, see <http://www.gnu.org/licenses/>.
+##
+#############################################################################
+
+"""Test for taurus.core.util.registrycache"""
+
+#__all__ = []
+
+__docformat__ = 'restructuredtext'
+
+import os
+import shutil
+import tempfile
+from taurus.external import unittest
+from taurus.core.util.registrycache import (getFilesKey, loadRegistry,
+                                            clearRegistries, importObject)
+
+
+class RegistryCacheTestCase(unittest.TestCase):
+    '''Test for taurus.core.util.registrycache'''
+
+    def setUp(self):
+        self.pkgdir = tempfile.mkdtemp()
+        self.cachedir = tempfile.mkdtemp()
+        self._write('a.py', 'A = 1\n')
+        self.builds = []
+
+    def tearDown(self):
+        clearRegistries(self.cachedir)
+        shutil.rmtree(self.pkgdir)
+        shutil.rmtree(self.cachedir)
+
+    def _write(self, name, text):
+        filename = os.path.join(self.pkgdir, name)
+        f = open(filename, 'w')
+        try:
+            f.write(text)
+        finally:
+            f.close()
+
+    def _build(self):
+        self.builds.append(1)
+        return {'A': ['mymodule', len(self.builds)]}
+
+    def _load(self, **kwargs):
+        return loadRegistry('test', getFilesKey([self.pkgdir]), self._build,
+                            cachedir=self.cachedir, **kwargs)
+
+    def test_cached(self):
+        '''the registry is only built once (even in a new process)'''
+        self.assertEqual(self._load(), {'A': ['mymodule', 1]})
+        self.assertEqual(self._load(), {'A': ['mymodule', 1]})
+        clearRegistries(cachedir=False)  # (as in a new process)
+        self.assertEqual(self._load(), {'A': ['mymodule', 1]})
+        self.assertEqual(len(self.builds), 1)
+
+    def test_rebuild(self):
+        '''the registry is rebuilt when the files change'''
+        self._load()
+        self._write('a.py', 'A = 12\n')
+        self.assertEqual(self._load(), {'A': ['mymodule', 2]})
+        self._write('b.py', 'B = 2\n')
+        self.assertEqual(self._load(), {'A': ['mymodule', 3]})
+        self._write('b.txt', 'ignored')
+        self.assertEqual(self._load(), {'A': ['mymodule', 3]})
+        self.assertEqual(self._load(rebuild=True), {'A': ['mymodule', 4]})
+
+    def test_clear(self):
+        '''cleared registries are built again'''
+        self._load()
+        clearRegistries(self.cachedir)
+        self.assertEqual(os.listdir(self.cachedir), [])
+        self.assertEqual(self._load(), {'A': ['mymodule', 2]})
+
+    def test_noDiskCache(self):
+        '''the registry is only cached in memory if cachedir is False'''
+        key = getFilesKey([self.pkgdir])
+        loadRegistry('test', key, self._build, cachedir=False)
+        loadRegistry('test', key, self._build, cachedir=False)
+        self.assertEqual(len(self.builds), 1)
+        self.assertEqual(os.listdir(self.cachedir), [])
+
+    def test_importObject(self):
+        '''the objects are imported from their modules'''
+        self.assertTrue(importObject('os.path', 'join') is os.path.join)
+        self.assertRaises(ImportError, importObject, 'os.path', 'nojoin')
+        self.assertRaises(ImportError, importObject, 'nosuchmodule', 'A')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,224 @@
+#!/usr/bin/env python
+
+#############################################################################
+##
+# This file is part of Taurus
+##
+# http://taurus-scada.org
+##
+# Copyright 2011 CELLS / ALBA Synchrotron, Bellaterra, Spain
+##
+# Taurus is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+##
+# Taurus is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+##
+# You should have received a copy of the GNU Lesser General Public License
+# along with Taurus.  If not, see <http://www.gnu.org/licenses/>.
+##
+#############################################################################
+
+"""Test for taurus.core.util.remotelogmonitor"""
+
+#__all__ = []
+
+__docformat__ = 'restructuredtext'
+
+import json
+import time
+import socket
+import struct
+import pickle
+import logging
+import logging.handlers
+import threading
+from taurus.external import unittest
+from taurus.test import insertTest
+from taurus.core.util.remotelogmonitor import (LogRecordSocketReceiver,
+                                               LogRecordStreamHandler,
+                                               BatchedSocketHandler,
+                                               BATCH_MAGIC)
+
+_executed = []
+
+
+def _mark(*args):
+    _executed.append(args)
+
+
+class _Hostile(object):
+
+    def __reduce__(self):
+        return _mark, ('executed',)
+
+
+class _CollectingHandler(LogRecordStreamHandler):
+
+    def handleLogRecords(self, records):
+        self.server.data['records'].extend(records)
+
+
+def _frame(data):
+    return struct.pack('>L', len(data)) + data
+
+
+@insertTest(helper_name='sendBatches', nemitters=1, nrecords=10, capacity=3)
+@insertTest(helper_name='sendBatches', nemitters=4, nrecords=2000,
+            capacity=100)
+class LogRecordSocketReceiverTestCase(unittest.TestCase):
+    '''Test for taurus.core.util.remotelogmonitor.LogRecordSocketReceiver'''
+
+    def setUp(self):
+        self.records = []
+        self.receiver = LogRecordSocketReceiver(host='localhost', port=0,
+                                                handler=_CollectingHandler,
+                                                records=self.records)
+        self.receiver.timeout = 0.05
+        self.thread = threading.Thread(
+            target=self.receiver.serve_until_stopped)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def tearDown(self):
+        self.receiver.stop()
+        self.thread.join()
+
+    def _waitRecords(self, n, timeout=10):
+        t0 = time.time()
+        while len(self.records) < n and time.time() - t0 < timeout:
+            time.sleep(0.01)
+        time.sleep(0.05)  # (to detect extra records)
+        self.assertEqual(len(self.records), n)
+
+    def _makeLogger(self, name, handler):
+        logger = logging.getLogger(name)
+        logger.propagate = False
+        logger.setLevel(logging.DEBUG)
+        logger.handlers = [handler]
+        return logger
+
+    def _connect(self):
+        return socket.create_connection(('localhost', self.receiver.port))
+
+    def sendBatches(self, nemitters, nrecords, capacity):
+        '''the records of several BatchedSocketHandlers are received'''
+        def emit(i):
+            handler = BatchedSocketHandler('localhost', self.receiver.port,
+                                           capacity=capacity)
+            logger = self._makeLogger('RemoteTest%d' % i, handler)
+            for j in xrange(nrecords):
+                logger.info('message %d of %s', j, logger.name)
+            handler.close()
+
+        emitters = [threading.Thread(target=emit, args=(i,))
+                    for i in range(nemitters)]
+        for t in emitters:
+            t.start()
+        for t in emitters:
+            t.join()
+        self._waitRecords(nemitters * nrecords)
+        for i in range(nemitters):
+            name = 'RemoteTest%d' % i
+            msgs = [r.getMessage() for r in self.records if r.name == name]
+            self.assertEqual(msgs, ['message %d of %s' % (j, name)
+                                    for j in xrange(nrecords)])
+        record = self.records[0]
+        self.assertEqual(record.levelno, logging.INFO)
+        self.assertEqual(record.hostName, self.receiver.hostName)
+
+    def test_runs(self):
+        '''records with different attributes are received in order'''
+        handler = BatchedSocketHandler('localhost', self.receiver.port,
+                                       capacity=5)
+        logger = self._makeLogger('RemoteTestRuns', handler)
+        logger.info('a')
+        logger.info('b', extra={'tag': 1})
+        logger.info('c', extra={'tag': 2})
+        logger.info('d')
+        logger.info('e')
+        handler.close()
+        self._waitRecords(5)
+        self.assertEqual([r.getMessage() for r in self.records],
+                         ['a', 'b', 'c', 'd', 'e'])
+        self.assertEqual([getattr(r, 'tag', None) for r in self.records],
+                         [None, 1, 2, None, None])
+
+    def test_interval(self):
+        '''a partial batch is sent after the interval'''
+        handler = BatchedSocketHandler('localhost', self.receiver.port,
+                                       capacity=100, interval=0.1)
+        logger = self._makeLogger('RemoteTestInterval', handler)
+        logger.debug('first')
+        logger.debug('second')
+        self._waitRecords(2)
+        logger.error('error')  # (sent immediately)
+        self._waitRecords(3)
+        handler.close()
+
+    def test_exception(self):
+        '''the traceback of an exception is sent as text'''
+        handler = BatchedSocketHandler('localhost', self.receiver.port)
+        logger = self._makeLogger('RemoteTestException', handler)
+        try:
+            1 / 0
+        except ZeroDivisionError:
+            logger.exception('failed')
+        self._waitRecords(1)
+        handler.close()
+        self.assertTrue('ZeroDivisionError' in self.records[0].exc_text)
+        self.assertEqual(self.records[0].exc_info, None)
+
+    def test_socketHandler(self):
+        '''the (pickled) records of a SocketHandler are received'''
+        handler = logging.handlers.SocketHandler('localhost',
+                                                 self.receiver.port)
+        logger = self._makeLogger('RemoteTestPickle', handler)
+        for j in xrange(5):
+            logger.warning('message %d', j)
+        handler.close()
+        self._waitRecords(5)
+        self.assertEqual([r.getMessage() for r in self.records],
+                         ['message %d' % j for j in xrange(5)])
+
+    def test_hostilePickle(self):
+        '''pickles with globals are refused (and their connection closed)'''
+        sock = self._connect()
+        sock.sendall(_frame(pickle.dumps({'msg': _Hostile()}, 1)))
+        sock.settimeout(5)
+        self.assertEqual(sock.recv(1), b'')
+        sock.close()
+        self.assertEqual(_executed, [])
+        # the receiver still works
+        sock = self._connect()
+        sock.sendall(_frame(pickle.dumps({'msg': 'ok', 'levelno': 20}, 1)))
+        sock.close()
+        self._waitRecords(1)
+        self.assertEqual(self.records[0].getMessage(), 'ok')
+
+    def test_invalidRecords(self):
+        '''invalid records are dropped and methods are not replaced'''
+        runs = [[['msg', 'levelno'], [['bad', 'x'], ['ok', 20], ['short']]],
+                [['msg', 'getMessage', 'args'], [['ok2', 1, {'a': 1}], 3]]]
+        sock = self._connect()
+        sock.sendall(BATCH_MAGIC + _frame(json.dumps(runs)))
+        sock.close()
+        self._waitRecords(2)
+        self.assertEqual([r.getMessage() for r in self.records],
+                         ['ok', 'ok2'])
+
+    def test_largeFrame(self):
+        '''the connections sending too large frames are closed'''
+        sock = self._connect()
+        sock.sendall(BATCH_MAGIC + b'\xff\xff\xff\xff')
+        sock.settimeout(5)
+        self.assertEqual(sock.recv(1), b'')
+        sock.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,118 @@
+#!/usr/bin/env python
+
+#############################################################################
+##
+# This file is part of Taurus
+##
+# http://taurus-scada.org
+##
+# Copyright 2011 CELLS / ALBA Synchrotron, Bellaterra, Spain
+##
+# Taurus is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+##
+# Taurus is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+##
+# You should have received a copy of the GNU Lesser General Public License
+# along with Taurus.  If not, see <http://www.gnu.org/licenses/>.
+##
+#############################################################################
+
+"""Test for taurus.core.util.spatialindex"""
+
+#__all__ = []
+
+__docformat__ = 'restructuredtext'
+
+import random
+from taurus.external import unittest
+from taurus.test import insertTest
+from taurus.core.util.spatialindex import GridIndex
+
+
+def _randomRects(rs, n, size=1000., maxw=50.):
+    rects = {}
+    for i in xrange(n):
+        x, y = rs.uniform(-size, size), rs.uniform(-size, size)
+        rects[i] = (x, y, x + rs.uniform(0, maxw), y + rs.uniform(0, maxw))
+    return rects
+
+
+@insertTest(helper_name='checkQuery', cellSize=64, maxw=50)
+@insertTest(helper_name='checkQuery', cellSize=5, maxw=200)
+@insertTest(helper_name='checkQuery', cellSize=1000, maxw=10)
+class GridIndexTestCase(unittest.TestCase):
+    '''TestCase for the GridIndex'''
+
+    def checkQuery(self, cellSize=None, maxw=None):
+        '''check that the queries return the same as checking all the
+        rectangles, also after updating and removing some of them'''
+        rs = random.Random(cellSize)
+        rects = _randomRects(rs, 500, maxw=maxw)
+        index = GridIndex(cellSize)
+        for k, r in rects.iteritems():
+            index.insert(k, r)
+        for i in xrange(3):
+            self.assertEqual(len(index), len(rects))
+            for j in xrange(200):
+                x, y = rs.uniform(-1000, 1000), rs.uniform(-1000, 1000)
+                expected = set(k for k, (x0, y0, x1, y1) in rects.iteritems()
+                               if x0 <= x <= x1 and y0 <= y <= y1)
+                self.assertEqual(index.query(x, y), expected)
+                q = (x, y, x + rs.uniform(0, 300), y + rs.uniform(0, 300))
+                expected = set(k for k, r in rects.iteritems()
+                               if r[0] <= q[2] and q[0] <= r[2] and
+                               r[1] <= q[3] and q[1] <= r[3])
+                self.assertEqual(index.intersect(q), expected)
+            # move some and remove others
+            moved = _randomRects(rs, 100, maxw=maxw)
+            for k in rs.sample(sorted(rects), 100):
+                rects[k] = moved.popitem()[1]
+                index.update(k, rects[k])
+            for k in rs.sample(sorted(rects), 50):
+                del rects[k]
+                index.remove(k)
+
+    def testBorders(self):
+        '''check that the borders of the rectangles are included'''
+        index = GridIndex(10)
+        index.insert('a', (0, 0, 10, 10))
+        for x, y in ((0, 0), (10, 10), (0, 10), (5, 10)):
+            self.assertEqual(index.query(x, y), set(['a']))
+        self.assertEqual(index.query(10.001, 5), set())
+        self.assertEqual(index.getRect('a'), (0, 0, 10, 10))
+
+    def testLargeAndInvalid(self):
+        '''check that large, infinite and invalid rectangles are handled'''
+        index = GridIndex(1)
+        nan, inf = float('nan'), float('inf')
+        index.insert('large', (-1e6, -1e6, 1e6, 1e6))
+        index.insert('inf', (-inf, 0, inf, 1))
+        index.insert('nan', (nan, nan, nan, nan))
+        index.insert('small', (0, 0, 1, 1))
+        self.assertEqual(len(index._cells), 4)  # (only the small one)
+        self.assertEqual(index.query(0.5, 0.5),
+                         set(['large', 'inf', 'small']))
+        self.assertEqual(index.query(5e5, 5e5), set(['large']))
+        self.assertEqual(index.query(nan, 0), set())
+        self.assertEqual(index.intersect((-inf, -inf, inf, inf)),
+                         set(['large', 'inf', 'small']))
+        for k in ('large', 'inf', 'nan', 'small', 'unknown'):
+            index.remove(k)
+        self.assertEqual(len(index), 0)
+        self.assertEqual(index._cells, {})
+        self.assertEqual(index._large, set())
+
+    def testWrongCellSize(self):
+        '''check that the cell size must be positive'''
+        self.assertRaises(ValueError, GridIndex, 0)
+        self.assertRaises(ValueError, GridIndex, -1)
+
+
+if __name__ == '__main__':
+    pass
@@ -40,6 +40,7 @@ __docformat__ = 'restructuredtext'
 
 from taurus.external.qt import Qt
 from taurus.core.taurusbasetypes import TaurusElementType, TaurusDevState
+from taurus.core.util.containers import MatchIndex
 import taurus.qt.qtcore.mimetypes
 
 from taurus.core.tango.tangodatabase import TangoInfo, TangoDatabase
@@ -84,7 +85,43 @@ class TaurusTreeDbBaseItem(TaurusBaseTreeItem):
 
 
 class TaurusTreeDevicePartItem(TaurusTreeDbBaseItem):
-    """A node designed to represent a 'part' (or totality) of a device name"""
+    """A node designed to represent a 'part' (or totality) of a device name.
+
+    Its childs can be given as a dict (see :meth:`setPendingChilds`), so that
+    they are only created when the view needs them"""
+
+    def __init__(self, model, data, parent=None):
+        TaurusTreeDbBaseItem.__init__(self, model, data, parent=parent)
+        self._pendingChilds = None
+
+    def setPendingChilds(self, childs):
+        """Sets the data of the childs to be created when needed (see
+        :meth:`fetchChilds`)
+
+        :param childs: (dict) the data of each child, by its name
+        """
+        self._pendingChilds = childs
+
+    def canFetchMore(self):
+        return bool(self._pendingChilds)
+
+    def fetchChilds(self):
+        childs, self._pendingChilds = self._pendingChilds, None
+        if not childs:
+            return []
+        return [self.createChild(name, data) for name, data in childs.items()]
+
+    def createChild(self, name, data):
+        """Creates a child node from its pending data (see
+        :meth:`setPendingChilds`)
+
+        :param name: (str) the name of the child
+        :param data: (object) the data of the child
+
+        :return: (TaurusTreeBaseItem) the child node
+        """
+        raise NotImplementedError("createChild must be implemented "
+                                  "in %s" % self.__class__.__name__)
 
     def data(self, index):
         column = index.column()
@@ -106,6 +143,11 @@ class TaurusTreeDeviceDomainItem(TaurusTreeDevicePartItem):
 
     DisplayFunc = str
 
+    def createChild(self, family, members):
+        item = TaurusTreeDeviceFamilyItem(self._model, family.upper(), self)
+        item.setPendingChilds(members)
+        return item
+
     def role(self):
         return ElemType.Domain
 
@@ -115,6 +157,9 @@ class TaurusTreeDeviceFamilyItem(TaurusTreeDevicePartItem):
 
     DisplayFunc = str
 
+    def createChild(self, member, dev):
+        return TaurusTreeDeviceItem(self._model, dev, parent=self)
+
     def role(self):
         return ElemType.Family
 
@@ -527,7 +572,10 @@ class TaurusDbDeviceModel(TaurusDbBaseModel):
 
            - <domain>
            - <family>
-           - <member>"""
+           - <member>
+
+       The family and member nodes are only created when their parent node
+       is expanded (see :meth:`TaurusBaseModel.fetchMore`)"""
     ColumnRoles = (ElemType.Device, ElemType.Domain, ElemType.Family, ElemType.Member,
                    ElemType.Attribute), ElemType.DeviceAlias, ElemType.Server, ElemType.DeviceClass, ElemType.Exported, ElemType.Host
 
@@ -542,16 +590,7 @@ class TaurusDbDeviceModel(TaurusDbBaseModel):
             families = data[domain]
             domainItem = TaurusTreeDeviceDomainItem(
                 self, domain.upper(), rootItem)
-            for family in families.keys():
-                members = families[family]
-                familyItem = TaurusTreeDeviceFamilyItem(
-                    self, family.upper(), domainItem)
-                for member in members.keys():
-                    dev = members[member]
-                    memberItem = TaurusTreeDeviceItem(
-                        self, dev, parent=familyItem)
-                    familyItem.appendChild(memberItem)
-                domainItem.appendChild(familyItem)
+            domainItem.setPendingChilds(families)
             rootItem.appendChild(domainItem)
 
 
@@ -666,12 +705,38 @@ class TaurusDbBaseProxyModel(TaurusBaseProxyModel):
     pass
 
 
+def _deviceTexts(device):
+    return device.name(), device.alias()
+
+
 class TaurusDbDeviceProxyModel(TaurusDbBaseProxyModel):
     """A Qt filter & sort model for model for the taurus models:
            - TaurusDbBaseModel
            - TaurusDbDeviceModel
            - TaurusDbSimpleDeviceModel
-           - TaurusDbPlainDeviceModel"""
+           - TaurusDbPlainDeviceModel
+
+    The devices of the domains and families are indexed (see
+    :class:`taurus.core.util.containers.MatchIndex`), so that a domain or
+    family node is filtered without checking all its devices again (e.g.
+    for each character typed in a filter box)"""
+
+    #: characters with a special meaning in a QRegExp pattern
+    RegExpSpecialChars = frozenset('\\^$.|?*+()[]{}')
+
+    def __init__(self, parent=None):
+        TaurusDbBaseProxyModel.__init__(self, parent)
+        self._deviceIndex = MatchIndex(_deviceTexts)
+
+    def setSourceModel(self, model):
+        old = self.sourceModel()
+        if old is not None:
+            old.modelAboutToBeReset.disconnect(self._deviceIndex.clear)
+        TaurusDbBaseProxyModel.setSourceModel(self, model)
+        self._deviceIndex.clear()
+        if model is not None:
+            # (the devices are new after a refresh)
+            model.modelAboutToBeReset.connect(self._deviceIndex.clear)
 
     def filterAcceptsRow(self, sourceRow, sourceParent):
         sourceModel = self.sourceModel()
@@ -682,21 +747,17 @@ class TaurusDbDeviceProxyModel(TaurusDbBaseProxyModel):
         # if domain node, check if it will potentially have any children
         if isinstance(treeItem, TaurusTreeDeviceDomainItem):
             domain = treeItem.display()
-            devices = sourceModel.getDomainDevices(domain)
-            for device in devices:
-                if self.deviceMatches(device, regexp):
-                    return True
-            return False
+            return self._hasMatchingDevices((domain,), regexp,
+                                            sourceModel.getDomainDevices,
+                                            domain)
 
         # if family node, check if it will potentially have any children
         if isinstance(treeItem, TaurusTreeDeviceFamilyItem):
             domain = treeItem.parent().display()
             family = treeItem.display()
-            devices = sourceModel.getFamilyDevices(domain, family)
-            for device in devices:
-                if self.deviceMatches(device, regexp):
-                    return True
-            return False
+            return self._hasMatchingDevices((domain, family), regexp,
+                                            sourceModel.getFamilyDevices,
+                                            domain, family)
 
         if isinstance(treeItem, TaurusTreeDeviceItem) or \
            isinstance(treeItem, TaurusTreeSimpleDeviceItem) or \
@@ -705,6 +766,33 @@ class TaurusDbDeviceProxyModel(TaurusDbBaseProxyModel):
             return self.deviceMatches(device, regexp)
         return True
 
+    def _hasMatchingDevices(self, key, regexp, getDevices, *args):
+        index = self._deviceIndex
+        if key not in index:
+            index.setGroup(key, getDevices(*args) or ())
+        pattern = regexp.pattern()
+        try:
+            # (like the device names, so that they are not decoded)
+            pattern = str(pattern)
+        except UnicodeError:
+            pass
+        syntax = regexp.patternSyntax()
+        if regexp.caseSensitivity() == Qt.Qt.CaseInsensitive and (
+                syntax == Qt.QRegExp.FixedString or
+                syntax in (Qt.QRegExp.RegExp, Qt.QRegExp.RegExp2,
+                           Qt.QRegExp.Wildcard) and
+                self.RegExpSpecialChars.isdisjoint(pattern)):
+            # a plain text: the index searches it
+            return index.hasMatches(key, pattern)
+
+        def match(texts):
+            for text in texts:
+                if regexp.indexIn(text) != -1:
+                    return True
+            return False
+        return index.hasMatches(key, (pattern, int(syntax),
+                                      int(regexp.caseSensitivity())), match)
+
     def deviceMatches(self, device, regexp):
         name = device.name()
 
@@ -46,6 +46,8 @@ class TaurusBaseTreeItem(object):
         self._itemData = data
         self._parentItem = parent
         self._childItems = []
+        # row of this node in its parent (set by the parent's appendChild)
+        self._row = None
         self._depth = self._calcDepth()
 
     def itemData(self):
@@ -67,8 +69,17 @@ class TaurusBaseTreeItem(object):
 
         :param child: (TaurusTreeBaseItem) child to be added
         """
+        child._row = len(self._childItems)
         self._childItems.append(child)
 
+    def updateRows(self):
+        """Updates the cached rows of the child nodes. It must be called
+        if the list of childs is changed other than with
+        :meth:`appendChild` (otherwise :meth:`row` has to recalculate
+        them)"""
+        for row, child in enumerate(self._childItems):
+            child._row = row
+
     def child(self, row):
         """Returns the child in the given row
 
@@ -83,7 +94,26 @@ class TaurusBaseTreeItem(object):
         return len(self._childItems)
 
     def hasChildren(self):
-        return len(self._childItems) > 0
+        return len(self._childItems) > 0 or self.canFetchMore()
+
+    def canFetchMore(self):
+        """Returns whether this node has childs which have not been created
+        yet (see :meth:`fetchChilds`). Default implementation returns False
+
+        :return: (bool) True if there are childs to be created
+        """
+        return False
+
+    def fetchChilds(self):
+        """Creates the childs of this node which have not been created yet,
+        so that they are only created when they are going to be displayed.
+        The model appends them to this node (see
+        :meth:`TaurusBaseModel.fetchMore`). Default implementation returns
+        an empty list
+
+        :return: (seq<TaurusTreeBaseItem>) the new child nodes
+        """
+        return []
 
     def data(self, index):
         """Returns the data of this node for the given index
@@ -117,9 +147,15 @@ class TaurusBaseTreeItem(object):
 
         :return: (int) row number for this node
         """
-        if self._parentItem is None:
+        parent = self._parentItem
+        if parent is None:
             return 0
-        return self._parentItem._childItems.index(self)
+        row, siblings = self._row, parent._childItems
+        if row is None or row >= len(siblings) or siblings[row] is not self:
+            # the childs were changed without updating their rows
+            row = siblings.index(self)
+            parent.updateRows()
+        return row
 
     def _calcDepth(self):
         d = 0
@@ -375,6 +411,34 @@ class TaurusBaseModel(Qt.QAbstractItemModel, Logger):
             return False
         return parentItem.hasChildren()
 
+    def canFetchMore(self, parent):
+        if not parent.isValid():
+            parentItem = self._rootItem
+        else:
+            parentItem = parent.internalPointer()
+        if parentItem is None:
+            return False
+        return parentItem.canFetchMore()
+
+    def fetchMore(self, parent):
+        """Appends the childs of the given index which have not been created
+        yet (see :meth:`TaurusBaseTreeItem.fetchChilds`). The views call it
+        when they need to display them (e.g. when the index is expanded)"""
+        if not self.canFetchMore(parent):
+            return
+        if not parent.isValid():
+            parentItem = self._rootItem
+        else:
+            parentItem = parent.internalPointer()
+        childs = parentItem.fetchChilds()
+        if not childs:
+            return
+        first = parentItem.childCount()
+        self.beginInsertRows(parent, first, first + len(childs) - 1)
+        for child in childs:
+            parentItem.appendChild(child)
+        self.endInsertRows()
+
 
 class TaurusBaseProxyModel(Qt.QSortFilterProxyModel):
     """A taurus base Qt filter & sort model"""
@@ -0,0 +1,209 @@
+#!/usr/bin/env python
+
+#############################################################################
+##
+# This file is part of Taurus
+##
+# http://taurus-scada.org
+##
+# Copyright 2011 CELLS / ALBA Synchrotron, Bellaterra, Spain
+##
+# Taurus is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+##
+# Taurus is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+##
+# You should have received a copy of the GNU Lesser General Public License
+# along with Taurus.  If not, see <http://www.gnu.org/licenses/>.
+##
+#############################################################################
+
+"""Unit tests for the taurus Qt tree models"""
+
+import time
+from taurus.external import unittest
+from taurus.external.qt import Qt
+from taurus.core.tango.tangodatabase import (TangoDevInfo, TangoServInfo,
+                                             TangoDevClassInfo, TangoDevTree)
+from taurus.qt.qtcore.model import (TaurusBaseTreeItem, TaurusDbDeviceModel,
+                                    TaurusDbDeviceProxyModel,
+                                    TaurusTreeDeviceFamilyItem,
+                                    TaurusTreeDeviceItem)
+
+
+class _Container(object):
+    '''A (weak referenceable) container of device infos (i.e. a fake
+    database cache)'''
+
+    def __init__(self, names, aliases=None):
+        '''
+        :param names: (seq<str>) the device names
+        :param aliases: (dict<str,str>) the aliases of some devices
+        '''
+        aliases = aliases or {}
+        self.server = TangoServInfo(self, name='Srv/1', full_name='Srv/1')
+        self.klass = TangoDevClassInfo(self, name='Cls', full_name='Cls')
+        self.devices = [TangoDevInfo(self, name=name, full_name=name,
+                                     alias=aliases.get(name),
+                                     server=self.server, klass=self.klass)
+                        for name in names]
+
+    def deviceTree(self):
+        return TangoDevTree(self.devices)
+
+
+class _CountingList(list):
+    '''A list which counts the calls to its index method'''
+
+    calls = 0
+
+    def index(self, *args):
+        self.calls += 1
+        return list.index(self, *args)
+
+
+class TaurusBaseTreeItemTestCase(unittest.TestCase):
+    '''Test for taurus.qt.qtcore.model.TaurusBaseTreeItem'''
+
+    def test_row(self):
+        '''the rows are not searched in the list of childs'''
+        root = TaurusBaseTreeItem(None, 'root')
+        items = [TaurusBaseTreeItem(None, i, root) for i in range(5)]
+        for item in items:
+            root.appendChild(item)
+        root._childItems = _CountingList(root._childItems)
+        self.assertEqual([item.row() for item in items], range(5))
+        self.assertEqual(root._childItems.calls, 0)
+        # the childs are changed directly (the rows are updated once)
+        root._childItems.remove(items[0])
+        self.assertEqual([item.row() for item in items[1:]], range(4))
+        self.assertEqual(root._childItems.calls, 1)
+
+
+class TaurusDbDeviceModelTestCase(unittest.TestCase):
+    '''Test for taurus.qt.qtcore.model.TaurusDbDeviceModel with a synthetic
+    data source of 100000 devices (all in the same domain)'''
+
+    nfamilies = 100000
+
+    def setUp(self):
+        self.container = _Container(['dom/f%06d/m' % i
+                                     for i in xrange(self.nfamilies)])
+        self.model = TaurusDbDeviceModel(data=self.container.deviceTree())
+        self.inserted = []
+        self.model.rowsInserted.connect(self._rowsInserted)
+
+    def _rowsInserted(self, parent, first, last):
+        self.inserted.append((first, last))
+
+    def test_fetchMore(self):
+        '''the childs are created when fetched'''
+        model = self.model
+        root = Qt.QModelIndex()
+        self.assertEqual(model.rowCount(root), 1)
+        domain = model.index(0, 0, root)
+        self.assertEqual(model.rowCount(domain), 0)
+        self.assertTrue(model.hasChildren(domain))
+        self.assertTrue(model.canFetchMore(domain))
+        model.fetchMore(domain)
+        self.assertFalse(model.canFetchMore(domain))
+        self.assertEqual(model.rowCount(domain), self.nfamilies)
+        self.assertEqual(self.inserted, [(0, self.nfamilies - 1)])
+        family = model.index(0, 0, domain)
+        self.assertTrue(isinstance(family.internalPointer(),
+                                   TaurusTreeDeviceFamilyItem))
+        self.assertEqual(model.rowCount(family), 0)
+        model.fetchMore(family)
+        self.assertEqual(model.rowCount(family), 1)
+        member = model.index(0, 0, family)
+        self.assertTrue(isinstance(member.internalPointer(),
+                                   TaurusTreeDeviceItem))
+
+    def test_scroll(self):
+        '''scrolling does not depend on the number of siblings'''
+        model = self.model
+        domain = model.index(0, 0, Qt.QModelIndex())
+        model.fetchMore(domain)
+        domainItem = domain.internalPointer()
+        domainItem._childItems = _CountingList(domainItem._childItems)
+        first = self.nfamilies // 2
+        for row in xrange(first, first + 50):
+            family = model.index(row, 0, domain)
+            model.fetchMore(family)
+            member = model.index(0, 0, family)
+            self.assertEqual(model.parent(member), family)
+            self.assertEqual(model.parent(family), domain)
+        self.assertEqual(domainItem._childItems.calls, 0)
+        # only the members of the displayed families were created
+        fetched = [i for i, f in enumerate(domainItem._childItems)
+                   if not f.canFetchMore()]
+        self.assertEqual(fetched, range(first, first + 50))
+
+
+
+class TaurusDbDeviceProxyModelTestCase(unittest.TestCase):
+    '''Test for taurus.qt.qtcore.model.TaurusDbDeviceProxyModel with a
+    synthetic data source of 50000 devices (10 domains with 100 families of
+    50 members)'''
+
+    def setUp(self):
+        names = ['dom%d/fam%d/member%d' % (d, f, m) for d in range(10)
+                 for f in range(100) for m in range(50)]
+        aliases = dict((name, 'alias_%d' % i)
+                       for i, name in enumerate(names) if i % 7 == 0)
+        self.container = _Container(names, aliases)
+        self.model = TaurusDbDeviceModel(data=self.container.deviceTree())
+        self.proxy = TaurusDbDeviceProxyModel()
+        self.proxy.setSourceModel(self.model)
+
+    def _matchingDomains(self, text):
+        text = text.lower()
+        return sorted(set(dev.domain() for dev in self.container.devices
+                          if text in dev.name().lower() or
+                          text in (dev.alias() or '').lower()))
+
+    def _filter(self, text):
+        '''filters with the given text and returns the shown domains and
+        the time that it took'''
+        proxy = self.proxy
+        root = Qt.QModelIndex()
+        t0 = time.time()
+        proxy.setFilterRegExp(text)
+        domains = [str(proxy.data(proxy.index(row, 0, root)))
+                   for row in range(proxy.rowCount(root))]
+        return sorted(domains), time.time() - t0
+
+    def test_keystrokes(self):
+        '''the domains are filtered as the text is typed'''
+        latencies = []
+        for text in ('ALIAS_4', 'dom3/fam42/member7'):
+            for i in range(1, len(text) + 1):
+                domains, latency = self._filter(text[:i])
+                self.assertEqual(domains, self._matchingDomains(text[:i]))
+                latencies.append(latency)
+        # typing (after the first character, which builds the index) is
+        # not slower than filtering the 50000 devices without an index
+        t0 = time.time()
+        self._matchingDomains('dom3/fam42/member7')
+        scan = time.time() - t0
+        self.assertTrue(max(latencies[1:]) < 5 * scan, (latencies, scan))
+
+    def test_refresh(self):
+        '''the index is rebuilt when the model is refreshed'''
+        self.assertEqual(self._filter('newdomain')[0], [])
+        self.container.devices.append(
+            TangoDevInfo(self.container, name='newdomain/a/b',
+                         full_name='newdomain/a/b',
+                         server=self.container.server,
+                         klass=self.container.klass))
+        self.model.setDataSource(self.container.deviceTree())
+        self.assertEqual(self._filter('newdomain')[0], ['NEWDOMAIN'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -109,6 +109,13 @@ class TaurusBaseComponent(TaurusListener, BaseConfigurableClass):
         self._bufferedEventsTimer = None
         self.setEventBufferPeriod(self._eventBufferPeriod)
 
+        # composite listener mode (see setCompositeListener): the composite
+        # listener set, the one actually used by the current attachment (if
+        # any) and the children to which the events are forwarded
+        self._compositeListener = None
+        self._attachedTo = None
+        self._childListeners = []
+
         if parent is not None and hasattr(parent, "_exception_listener"):
             self._exception_listener = parent._exception_listener
         else:
@@ -314,10 +321,97 @@ class TaurusBaseComponent(TaurusListener, BaseConfigurableClass):
             # If this gets fixed, we should remove this line.
             return
 
+        # forward the event to the children sharing the subscription
+        for child in list(self._childListeners):
+            if child.getModelObj() is evt_src:
+                child.compositeEventReceived(*evt)
+
         evt = filterEvent(*evt, filters=self._eventFilters)
         if evt is not None:
             self.handleEvent(*evt)
 
+    def compositeEventReceived(self, evt_src, evt_type, evt_value):
+        """Receives (in the Qt thread) an event forwarded by the composite
+        listener of this component (see :meth:`setCompositeListener`). The
+        event goes through the same filters as those received with
+        :meth:`eventReceived` (but it is not buffered).
+
+        :param evt_src: (object) object that triggered the event
+        :param evt_type: (taurus.core.taurusbasetypes.TaurusEventType) type of event
+        :param evt_value: (object) event value
+        """
+        evt = filterEvent(evt_src, evt_type, evt_value,
+                          filters=self._preFilters)
+        if evt is not None:
+            self.filterEvent(*evt)
+
+    def setCompositeListener(self, listener):
+        """Sets a component (e.g. the :class:`TaurusValue` containing this one)
+        which listens to the model of this component on its behalf. While the
+        composite listener is attached to the same attribute, this component
+        does not subscribe to it: the composite listener forwards each event to
+        all its children in a single call done in the Qt thread. Components
+        with other models (e.g. devices) always subscribe to them.
+
+        :param listener: (TaurusBaseComponent or None) the composite listener,
+                         or None for subscribing to the model directly
+        """
+        if listener is self._compositeListener:
+            return
+        attached = self.isAttached()
+        if attached:
+            self._detach()
+        self._compositeListener = listener
+        if attached:
+            self._attach()
+
+    def getCompositeListener(self):
+        """Returns the composite listener of this component (see
+        :meth:`setCompositeListener`)
+
+        :return: (TaurusBaseComponent or None)
+        """
+        return self._compositeListener
+
+    def addChildListener(self, child):
+        """Forwards the events of the model of this component to the given one
+        (see :meth:`setCompositeListener`). As the models do with their new
+        listeners, the current value of the model is sent to the child.
+
+        :param child: (TaurusBaseComponent) a component with the same model
+                      object
+        """
+        if child in self._childListeners:
+            return
+        self._childListeners.append(child)
+        self.getTaurusManager().addJob(self._fireChildRegisterEvents, None,
+                                       child)
+
+    def removeChildListener(self, child):
+        """Stops forwarding the events of the model to the given component
+
+        :param child: (TaurusBaseComponent) a component added with
+                      :meth:`addChildListener`
+        """
+        try:
+            self._childListeners.remove(child)
+        except ValueError:
+            pass
+
+    def _fireChildRegisterEvents(self, child):
+        modelObj = child.getModelObj()
+        if modelObj is None or child not in self._childListeners:
+            return
+        # (sent by the model, as it does with its new listeners, so that the
+        # events go through the pre-filters of the child)
+        try:
+            v = modelObj.read()
+        except Exception, e:
+            modelObj.fireEvent(TaurusEventType.Error, e, child)
+            return
+        modelObj.fireEvent(TaurusEventType.Config, v, child)
+        modelObj.fireEvent(TaurusEventType.Change, v, child)
+
     def handleEvent(self, evt_src, evt_type, evt_value):
         """Event handling. Default implementation does nothing.
         Reimplement as necessary
@@ -773,7 +867,16 @@ class TaurusBaseComponent(TaurusListener, BaseConfigurableClass):
             try:
                 self.modelObj = taurus.Manager().getObject(cls, self.modelName)
                 if self.modelObj is not None:
-                    self.modelObj.addListener(self)
+                    composite = self._compositeListener
+                    # (only attributes are shared: other models, e.g.
+                    # devices, send their own events to new listeners)
+                    if composite is not None and \
+                            isinstance(self.modelObj, TaurusAttribute) and \
+                            composite.getModelObj() is self.modelObj:
+                        composite.addChildListener(self)
+                        self._attachedTo = composite
+                    else:
+                        self.modelObj.addListener(self)
                     self._attached = True
                     self.changeLogName(self.log_name + "." + self.modelName)
             except Exception:
@@ -792,7 +895,10 @@ class TaurusBaseComponent(TaurusListener, BaseConfigurableClass):
 
         if self.isAttached():
             m = self.getModelObj()
-            if not m is None:
+            if self._attachedTo is not None:
+                self._attachedTo.removeChildListener(self)
+                self._attachedTo = None
+            elif not m is None:
                 m.removeListener(self)
 
             pos = self.log_name.find('.')
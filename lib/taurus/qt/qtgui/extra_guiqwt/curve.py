@@ -33,7 +33,7 @@ import taurus
 from guiqwt.curve import CurveItem
 from taurus.qt.qtgui.extra_guiqwt.styles import TaurusCurveParam, TaurusTrendParam
 
-from taurus.core.util.containers import ArrayBuffer
+from taurus.core.util.containers import RingArrayBuffer
 import numpy
 
 
@@ -192,10 +192,10 @@ class TaurusTrendItem(CurveItem, TaurusBaseComponent):
 
         # initialization\
         if self.__xBuffer is None:
-            self.__xBuffer = ArrayBuffer(numpy.zeros(min(
+            self.__xBuffer = RingArrayBuffer(numpy.zeros(min(
                 128, self.taurusparam.maxBufferSize), dtype='d'), maxSize=self.taurusparam.maxBufferSize)
         if self.__yBuffer is None:
-            self.__yBuffer = ArrayBuffer(numpy.zeros(min(
+            self.__yBuffer = RingArrayBuffer(numpy.zeros(min(
                 128, self.taurusparam.maxBufferSize), dtype='d'), maxSize=self.taurusparam.maxBufferSize)
 
         # update x values
@@ -34,7 +34,7 @@ from taurus.external.pint import Quantity
 from taurus.external.qt import Qt
 from taurus.qt.qtgui.base import TaurusBaseComponent
 import taurus.core
-from taurus.core.util.containers import ArrayBuffer
+from taurus.core.util.containers import RingArrayBuffer
 
 from guiqwt.image import ImageItem, RGBImageItem, XYImageItem
 from guiqwt.image import INTERP_NEAREST, INTERP_LINEAR
@@ -289,10 +289,10 @@ class TaurusTrend2DItem(XYImageItem, TaurusBaseComponent):
         if self._yValues is None:
             self._yValues = numpy.arange(ySize, dtype='d')
         if self._xBuffer is None:
-            self._xBuffer = ArrayBuffer(numpy.zeros(
+            self._xBuffer = RingArrayBuffer(numpy.zeros(
                 min(128, self.maxBufferSize), dtype='d'), maxSize=self.maxBufferSize)
         if self._zBuffer is None:
-            self._zBuffer = ArrayBuffer(numpy.zeros(
+            self._zBuffer = RingArrayBuffer(numpy.zeros(
                 (min(128, self.maxBufferSize), ySize), dtype='d'), maxSize=self.maxBufferSize)
             return
 
@@ -468,10 +468,10 @@ class TaurusTrend2DScanItem(TaurusTrend2DItem):
         if self._yValues is None:
             self._yValues = numpy.arange(chval.size, dtype='d')
         if self._xBuffer is None:
-            self._xBuffer = ArrayBuffer(numpy.zeros(
+            self._xBuffer = RingArrayBuffer(numpy.zeros(
                 min(16, self.maxBufferSize), dtype='d'), maxSize=self.maxBufferSize)
         if self._zBuffer is None:
-            self._zBuffer = ArrayBuffer(numpy.zeros(
+            self._zBuffer = RingArrayBuffer(numpy.zeros(
                 (min(16, self.maxBufferSize), chval.size), dtype='d'), maxSize=self.maxBufferSize)
 
         # update x
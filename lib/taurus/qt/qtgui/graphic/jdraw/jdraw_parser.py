@@ -27,11 +27,15 @@
 
 from __future__ import absolute_import
 
-__all__ = ["new_parser", "parse"]
+__all__ = ["new_parser", "parse", "preparse", "clear_cache"]
 
 import os
 import re
 import imp
+import pickle
+import hashlib
+import threading
+from collections import OrderedDict
 
 from ply import lex
 from ply import yacc
@@ -343,22 +347,231 @@ def new_parser(optimize=None, debug=0, outputdir=None):
     return l, p
 
 
-def parse(filename=None, factory=None):
+#-------------------------------------------------------------------------
+# Cache of parsed files
+#-------------------------------------------------------------------------
+
+#: version of the cached data (to be increased when the grammar changes)
+CACHE_VERSION = 1
+#: maximum number of parsed files kept in memory
+MEMORY_CACHE_SIZE = 16
+
+# OrderedDict<str, tuple>: (key, pickled elements) by file name (LRU order)
+_memory_cache = OrderedDict()
+_cache_lock = threading.RLock()
+
+
+class _Element(object):
+    """An element (or, if its type is None, the scene) created while parsing
+    a jdraw file, as recorded by :class:`_Recorder`"""
+
+    __slots__ = ('type', 'params')
+
+    def __init__(self, type, params):
+        self.type = type
+        self.params = params
 
-    if filename is None or factory is None:
-        return
 
-    _, p = new_parser()
+class _Recorder(object):
+    """A factory which, instead of creating the items, records the elements
+    requested by the parser (in the order of the requests)"""
 
-    p.factory = factory
+    def __init__(self):
+        self.elements = []
+
+    def getSceneObj(self, items):
+        element = _Element(None, items)
+        self.elements.append(element)
+        return element
+
+    def getObj(self, name, params):
+        element = _Element(name, params)
+        self.elements.append(element)
+        return element
+
+
+def _parse(text):
+    """parses the contents of a jdraw file
+
+    :return: (list<_Element>) the elements (the scene, if any, is the last)
+    """
+    l, p = new_parser()
+    l.log = p.log = Logger('JDraw Parser')
+    recorder = _Recorder()
+    p.factory = recorder
     p.modelStack = []
     p.modelStack2 = []
+    if p.parse(text, lexer=l) is None:
+        return []
+    return recorder.elements
+
+
+def _build(elements, factory):
+    """creates the items of the given elements with the given factory
+
+    :return: the scene (or None if it was not created)
+    """
+    log = Logger('JDraw Parser')
+    objs = {}
+
+    def resolve(value):
+        # replaces (in place) the lists of elements by the created items
+        if isinstance(value, dict):
+            for k, v in value.items():
+                value[k] = resolve(v)
+        elif isinstance(value, list) and value and \
+                isinstance(value[0], _Element):
+            items = [objs[id(e)] for e in value]
+            # (as the parser does, only the first item may be None)
+            return items[:1] + [i for i in items[1:] if i is not None]
+        return value
+
+    res = None
+    for element in elements:
+        if element.type is None:
+            res = factory.getSceneObj(resolve(element.params))
+            if res is None:
+                log.info("Unable to create Scene")
+            continue
+        obj = factory.getObj(element.type, resolve(element.params))
+        if obj is None:
+            log.info("Unable to create obj '%s'" % element.type)
+        objs[id(element)] = obj
+    return res
+
+
+def _cache_dir():
+    # use '.taurus' dir in the user "home" dir
+    return os.path.join(os.path.expanduser('~'), '.taurus', 'jdraw_cache')
+
+
+def _load(filename, cachedir=None):
+    """returns the elements of a jdraw file, parsing it only if it is not
+    cached (in memory or in the cache dir) or if it has changed. The cached
+    elements are identified by the path, size, modification time and sha1 of
+    the file.
+
+    :param filename: (str) the (real) path of the file
+    :param cachedir: (str or None) the dir of the cache files (None for
+                     ~/.taurus/jdraw_cache). If False, the disk cache is not
+                     used
+
+    :return: (list<_Element>) a new copy of the elements
+    """
+    with _cache_lock:
+        st = os.stat(filename)
+        f = open(filename, 'rb')
+        try:
+            text = f.read()
+        finally:
+            f.close()
+        key = (CACHE_VERSION, filename, st.st_size, st.st_mtime,
+               hashlib.sha1(text).hexdigest())
+        cached = _memory_cache.pop(filename, None)
+        if cached is None or cached[0] != key:
+            cached = cachefile = None
+            if cachedir is not False:
+                cachefile = os.path.join(
+                    cachedir or _cache_dir(),
+                    hashlib.sha1(filename).hexdigest() + '.pickle')
+                cached = _read_cache(cachefile, key)
+            if cached is None:
+                cached = key, pickle.dumps(_parse(text),
+                                           pickle.HIGHEST_PROTOCOL)
+                if cachefile is not None:
+                    _write_cache(cachefile, cached)
+        # (re)insert it as the most recently used
+        _memory_cache[filename] = cached
+        while len(_memory_cache) > MEMORY_CACHE_SIZE:
+            _memory_cache.popitem(last=False)
+        return pickle.loads(cached[1])
+
+
+def _read_cache(cachefile, key):
+    try:
+        f = open(cachefile, 'rb')
+        try:
+            cached = pickle.load(f)
+        finally:
+            f.close()
+        if cached[0] == key:
+            return cached
+    except Exception:
+        pass
+    return None
+
+
+def _write_cache(cachefile, cached):
+    try:
+        dirname = os.path.dirname(cachefile)
+        if not os.path.exists(dirname):
+            os.makedirs(dirname)
+        # write it atomically (other processes may be reading it)
+        tmpfile = '%s.%i.tmp' % (cachefile, os.getpid())
+        f = open(tmpfile, 'wb')
+        try:
+            pickle.dump(cached, f, pickle.HIGHEST_PROTOCOL)
+        finally:
+            f.close()
+        if os.name == 'nt' and os.path.exists(cachefile):
+            os.remove(cachefile)
+        os.rename(tmpfile, cachefile)
+    except Exception:
+        log = Logger('JDraw Parser')
+        log.info("Unable to write the jdraw cache file %s" % cachefile)
+        log.debug("Details:", exc_info=1)
+
+
+def clear_cache(cachedir=None):
+    """Clears the cache of parsed jdraw files
+
+    :param cachedir: (str or None) the dir of the cache files (None for
+                     ~/.taurus/jdraw_cache). If False, only the memory cache
+                     is cleared
+    """
+    with _cache_lock:
+        _memory_cache.clear()
+        if cachedir is False:
+            return
+        cachedir = cachedir or _cache_dir()
+        if os.path.isdir(cachedir):
+            for name in os.listdir(cachedir):
+                if name.endswith('.pickle'):
+                    os.remove(os.path.join(cachedir, name))
+
+
+def parse(filename=None, factory=None, cache=None, cachedir=None):
+    """Parses a jdraw file, creating its items with the given factory.
+
+    :param filename: (str) the jdraw file
+    :param factory: (TaurusBaseGraphicsFactory) the factory of the items
+    :param cache: (bool or None) if False, the file is parsed even if it is
+                  cached. If None (the default), the JDRAW_CACHE option of
+                  tauruscustomsettings is used
+    :param cachedir: (str or None) the dir of the cache files (None for
+                     ~/.taurus/jdraw_cache)
+
+    :return: the scene created by the factory (or None)
+    """
+    if filename is None or factory is None:
+        return
+
+    if cache is None:
+        from taurus import tauruscustomsettings
+        cache = getattr(tauruscustomsettings, 'JDRAW_CACHE', 1)
 
     res = None
     try:
         filename = os.path.realpath(filename)
-        f = open(filename)
-        res = yacc.parse(f.read())
+        if cache:
+            elements = _load(filename, cachedir)
+        else:
+            f = open(filename)
+            try:
+                elements = _parse(f.read())
+            finally:
+                f.close()
+        res = _build(elements, factory)
     except:
         log = Logger('JDraw Parser')
         log.warning("Failed to parse %s" % filename)
@@ -366,5 +579,37 @@ def parse(filename=None, factory=None):
     return res
 
 
+def preparse(filenames, cachedir=None):
+    """Parses (in a background thread) the given jdraw files which are not
+    cached yet, so that a later :func:`parse` of them is faster (e.g. for
+    the synoptics of a GUI configuration). Nothing is done if the JDRAW_CACHE
+    option of tauruscustomsettings is disabled
+
+    :param filenames: (seq<str>) the jdraw files
+    :param cachedir: (str or None) the dir of the cache files (None for
+                     ~/.taurus/jdraw_cache)
+
+    :return: (threading.Thread or None) the (daemon) thread which parses
+             them
+    """
+    from taurus import tauruscustomsettings
+    if not getattr(tauruscustomsettings, 'JDRAW_CACHE', 1):
+        return None
+
+    def run():
+        log = Logger('JDraw Parser')
+        for filename in filenames:
+            try:
+                _load(os.path.realpath(filename), cachedir)
+            except:
+                log.debug("Failed to preparse %s" % filename, exc_info=1)
+
+    filenames = list(filenames)
+    thread = threading.Thread(target=run, name='JDrawPreparser')
+    thread.daemon = True
+    thread.start()
+    return thread
+
+
 if __name__ == "__main__":
     new_parser()
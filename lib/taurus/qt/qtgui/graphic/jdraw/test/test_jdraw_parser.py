@@ -0,0 +1,115 @@
+#!/usr/bin/env python
+
+#############################################################################
+##
+# This file is part of Taurus
+##
+# http://taurus-scada.org
+##
+# Copyright 2011 CELLS / ALBA Synchrotron, Bellaterra, Spain
+##
+# Taurus is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+##
+# Taurus is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+##
+# You should have received a copy of the GNU Lesser General Public License
+# along with Taurus.  If not, see <http://www.gnu.org/licenses/>.
+##
+#############################################################################
+
+"""Unit tests for the jdraw parser (and its cache)"""
+
+__docformat__ = 'restructuredtext'
+
+import os
+import shutil
+import tempfile
+from taurus.external import unittest
+from taurus.test import insertTest
+from taurus.qt.qtgui.graphic.jdraw import jdraw_parser
+
+RES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'res')
+
+
+class _TreeFactory(object):
+    '''A factory which creates a tree of (number, name, params) tuples,
+    where number is the order in which each item was requested'''
+
+    def __init__(self):
+        self.count = 0
+
+    def getSceneObj(self, items):
+        return ('scene', items)
+
+    def getObj(self, name, params):
+        self.count += 1
+        return (self.count, name, params)
+
+
+@insertTest(helper_name='parseTwice', fname='SimpleScalarViewer.jdw')
+@insertTest(helper_name='parseTwice', fname='styles.jdw')
+class JDrawParserCacheTestCase(unittest.TestCase):
+    '''TestCase for the cache of parsed jdraw files'''
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.parses = 0
+        self._parse = jdraw_parser._parse
+        jdraw_parser.clear_cache(False)
+
+        def _parse(text):
+            self.parses += 1
+            return self._parse(text)
+        jdraw_parser._parse = _parse
+
+    def tearDown(self):
+        jdraw_parser._parse = self._parse
+        jdraw_parser.clear_cache(False)
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+    def parseTwice(self, fname):
+        '''the second parse of a file (from the memory or the disk cache)
+        skips the parser and gives the same items'''
+        fname = os.path.join(RES_DIR, fname)
+        expected = jdraw_parser.parse(fname, _TreeFactory(), cache=False)
+        self.assertNotEqual(expected, None)
+        self.assertEqual(self.parses, 1)
+        first = jdraw_parser.parse(fname, _TreeFactory(), cachedir=self.dir)
+        self.assertEqual(self.parses, 2)
+        second = jdraw_parser.parse(fname, _TreeFactory(), cachedir=self.dir)
+        jdraw_parser.clear_cache(False)
+        third = jdraw_parser.parse(fname, _TreeFactory(), cachedir=self.dir)
+        self.assertEqual(self.parses, 2)
+        self.assertEqual(first, expected)
+        self.assertEqual(second, expected)
+        self.assertEqual(third, expected)
+
+    def test_changed(self):
+        '''a file is parsed again if it changes'''
+        fname = os.path.join(self.dir, 'copy.jdw')
+        shutil.copy(os.path.join(RES_DIR, 'styles.jdw'), fname)
+        first = jdraw_parser.parse(fname, _TreeFactory(), cachedir=self.dir)
+        with open(fname, 'a') as f:
+            f.write('\n')
+        second = jdraw_parser.parse(fname, _TreeFactory(), cachedir=self.dir)
+        self.assertEqual(self.parses, 2)
+        self.assertEqual(first, second)
+
+    def test_preparse(self):
+        '''preparse fills the cache in a background thread'''
+        fname = os.path.join(RES_DIR, 'styles.jdw')
+        jdraw_parser.preparse([fname], cachedir=self.dir).join()
+        self.assertEqual(self.parses, 1)
+        jdraw_parser.clear_cache(False)
+        jdraw_parser.parse(fname, _TreeFactory(), cachedir=self.dir)
+        self.assertEqual(self.parses, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -32,16 +32,16 @@ __docformat__ = 'restructuredtext'
 
 import re
 import os
+import time
+import bisect
 import subprocess
 import traceback
 import operator
-import types
-
-import Queue
 
 from taurus import Manager
 from taurus.core import AttrQuality, DataType
-from taurus.core.util.containers import CaselessDefaultDict
+from taurus.core.util.containers import CaselessDefaultDict, DirtySet
+from taurus.core.util.spatialindex import GridIndex
 from taurus.core.util.log import Logger
 from taurus.core.taurusdevice import TaurusDevice
 from taurus.core.taurusattribute import TaurusAttribute
@@ -76,65 +76,6 @@ def parseTangoUri(name):
         return None
 
 
-class QEmitter(Qt.QObject):
-    updateView = Qt.pyqtSignal('QGraphicsView')
-
-
-class TaurusGraphicsUpdateThread(Qt.QThread):
-
-    def __init__(self, parent=None, period=3):
-        """Parent most not be None and must be a TaurusGraphicsScene!"""
-        if not isinstance(parent, TaurusGraphicsScene):
-            raise RuntimeError("Illegal parent for TaurusGraphicsUpdateThread")
-        Qt.QThread.__init__(self, parent)
-        self.period = period
-        self.log = Logger('TaurusGraphicsUpdateThread')
-
-    def _updateView(self, v):
-        # The first one is the prefered one because it improves performance
-        # since updates don't come very often in comparison to with the refresh
-        # rate of the monitor (~70Hz)
-        if v.viewportUpdateMode() == Qt.QGraphicsView.NoViewportUpdate:
-            # We call the update to the viewport instead of the view
-            # itself because apparently there is a bug in QT 4.3 that
-            # prevents a proper update when the view is inside a QTab
-            v.viewport().update()
-        else:
-            # @todo This is probably a bug (item_rects is not defined). But it is defined in .run(), see "todo" below...
-            v.updateScene(item_rects)
-            # v.invalidateScene(item.boundingRect())
-        return
-
-    def run(self):
-        self.log.debug("run... - TaurusGraphicsUpdateThread")
-        emitter = QEmitter()
-        emitter.moveToThread(Qt.QApplication.instance().thread())
-        emitter.setParent(Qt.QApplication.instance())
-        emitter.updateView.connect(self._updateView)
-
-        p = self.parent()
-        while True:
-            item = p.getQueue().get(True)
-            if type(item) in types.StringTypes:
-                if item == "exit":
-                    break
-                else:
-                    continue
-            if not operator.isSequenceType(item):
-                item = (item,)
-            # @todo: Unless the call to boundingRect() has a side effect, this line is useless..  probably related to todo in _updateView()
-            item_rects = [i.boundingRect() for i in item]
-
-            for v in p.views():
-                # p.debug("emit('updateView')")
-                # emitter.updateView.emit(v)
-                self.emitter.updateView.emit(v)
-            # This sleep is needed to reduce CPU usage of the application!
-            self.sleep(self.period)
-            # End of while
-        # End of Thread
-
-
 class TaurusGraphicsScene(Qt.QGraphicsScene):
     '''
     This class encapsulates TaurusJDrawSynopticsView and TaurusGraphicsScene signals/slots
@@ -157,19 +98,43 @@ class TaurusGraphicsScene(Qt.QGraphicsScene):
     '''
     ANY_ATTRIBUTE_SELECTS_DEVICE = True
     TRACE_ALL = False
+    #: size of the cells of the index used by getItemByPosition
+    INDEX_CELL_SIZE = 64
+    #: number of getItemByName queries whose results are cached
+    MAX_NAME_QUERIES = 1000
+    #: minimum period (in ms) between repaints of the updated items
+    FRAME_PERIOD = 40
+
+    # flags of the pending updates of items
+    _RESTYLE = 0x1
+
+    # characters that make a name be handled as a regular expression
+    _REGEXP_CHARS = re.compile(r'[.^$*+?{}\[\]\\|()]')
+    _ALNUM = '(?:[a-zA-Z0-9-_\*]|(?:\.\*))(?:[a-zA-Z0-9-_\*]|(?:\.\*))*'
+    _ALNUM_RE = re.compile(_ALNUM + '$')
 
     refreshTree2 = Qt.pyqtSignal()
     graphicItemSelected = Qt.pyqtSignal('QString')
     graphicSceneClicked = Qt.pyqtSignal('QPoint')
+    _updatesPending = Qt.pyqtSignal()
 
     def __init__(self, parent=None, strt=True):
         name = self.__class__.__name__
         # self.call__init__(Logger, name, parent) #Inheriting from Logger
         # caused exceptions in CONNECT
         Qt.QGraphicsScene.__init__(self, parent)
-        self.updateQueue = None
-        self.updateThread = None
+        # items with pending updates (added from any thread)
+        self._dirtyItems = DirtySet()
+        self._flushTimer = None
+        self._lastFlush = 0
+        self._flushes = 0
         self._itemnames = CaselessDefaultDict(lambda k: set())
+        # sorted list of the keys of _itemnames (built when needed)
+        self._sortedNames = None
+        # dict<tuple<str,bool>, list<str>>: item names matched by each query
+        self._nameQueries = {}
+        # named items, indexed by their bounding rectangle
+        self._itemIndex = GridIndex(self.INDEX_CELL_SIZE)
         self._selection = []
         self._selectedItems = []
         self._selectionStyle = SynopticSelectionStyle.OUTLINE
@@ -297,21 +262,70 @@ class TaurusGraphicsScene(Qt.QGraphicsScene):
     def addItem(self, item):
         # self.debug('addItem(%s)'%item)
         def expand(i):
-            name = str(getattr(i, '_name', '')).lower()
-            if name:
-                self._itemnames[name].add(i)
-                #self.debug('addItem(%s): %s'%(name,i))
+            self._indexItem(i)
             if isinstance(i, Qt.QGraphicsItemGroup):
                 for j in i.childItems():
                     expand(j)
         expand(item)
         Qt.QGraphicsScene.addItem(self, item)
 
+    def removeItem(self, item):
+        def expand(i):
+            self._unindexItem(i)
+            if isinstance(i, Qt.QGraphicsItemGroup):
+                for j in i.childItems():
+                    expand(j)
+        expand(item)
+        Qt.QGraphicsScene.removeItem(self, item)
+
+    def updateItemIndex(self, item):
+        """
+        Updates the bounding rectangle of an item (and of its children, for
+        groups) in the index used by :meth:`getItemByPosition`. It must be
+        called after changing the shape of an item which is already in the
+        scene (e.g. with setRect). Moving it with setPos does not require it.
+
+        :param item: (QGraphicsItem) the item
+        """
+        if item in self._itemIndex:
+            self._itemIndex.update(item, self._getItemRect(item))
+        if isinstance(item, Qt.QGraphicsItemGroup):
+            for j in item.childItems():
+                self.updateItemIndex(j)
+
+    def _getItemRect(self, item):
+        # (in item coordinates, as the positions are checked with contains)
+        r = item.boundingRect()
+        return r.left(), r.top(), r.right(), r.bottom()
+
+    def _indexItem(self, item):
+        name = str(getattr(item, '_name', '')).lower()
+        if not name:
+            return
+        if name not in self._itemnames:
+            self._itemNamesChanged()
+        self._itemnames[name].add(item)
+        #self.debug('addItem(%s): %s'%(name,item))
+        if isinstance(item, Qt.QGraphicsItem):
+            self._itemIndex.insert(item, self._getItemRect(item))
+
+    def _unindexItem(self, item):
+        self._itemIndex.remove(item)
+        name = str(getattr(item, '_name', '')).lower()
+        items = self._itemnames.get(name) if name else None
+        if items is not None:
+            items.discard(item)
+            if not items:
+                del self._itemnames[name]
+                self._itemNamesChanged()
+
+    def _itemNamesChanged(self):
+        self._sortedNames = None
+        self._nameQueries.clear()
+
     def addWidget(self, item, flags=None):
         self.debug('addWidget(%s)' % item)
-        name = str(getattr(item, '_name', '')).lower()
-        if name:
-            self._itemnames[name].add(item)
+        self._indexItem(item)
         if flags is None:
             Qt.QGraphicsScene.addWidget(self, item)
         else:
@@ -327,31 +341,65 @@ class TaurusGraphicsScene(Qt.QGraphicsScene):
         """
         strict = (
             not self.ANY_ATTRIBUTE_SELECTS_DEVICE) if strict is None else strict
-        alnum = '(?:[a-zA-Z0-9-_\*]|(?:\.\*))(?:[a-zA-Z0-9-_\*]|(?:\.\*))*'
+        query = str(item_name), strict
+        names = self._nameQueries.get(query)
+        if names is None:
+            if len(self._nameQueries) >= self.MAX_NAME_QUERIES:
+                self._nameQueries.clear()
+            names = self._nameQueries[query] = self._matchItemNames(*query)
+        result = []
+        for k in names:
+            result.extend(self._itemnames[k])
+        return result
+
+    def _matchItemNames(self, item_name, strict):
+        """returns the item names matching a given name (see
+        :meth:`getItemByName`)"""
         target = str(item_name).strip().split()[0].lower().replace(
             '/state', '')  # If it has spaces only the first word is used
         # Device names should match also its attributes or only state?
         if not strict and TangoAttributeNameValidator().getUriGroups(target):
             target = target.rsplit('/', 1)[0]
-        if TangoDeviceNameValidator().getUriGroups(target):
+        isDevice = bool(TangoDeviceNameValidator().getUriGroups(target))
+        if self._REGEXP_CHARS.search(target) is None:
+            # no need to check all the names
+            names = [target]
+            if isDevice and strict:
+                names.append(target + '/state')
+            elif isDevice:
+                names.extend(k for k in self._getItemNamesStartingWith(
+                    target + '/') if self._ALNUM_RE.match(k, len(target) + 1))
+            return [k for k in names if k in self._itemnames]
+        if isDevice:
             if strict:
                 target += '(/state)?'
             else:
-                target += '(/' + alnum + ')?'
+                target += '(/' + self._ALNUM + ')?'
         if not target.endswith('$'):
             target += '$'
-        result = []
-        for k in self._itemnames.keys():
-            if re.match(target.lower(), k.lower()):
-                #self.debug('getItemByName(%s): _itemnames[%s]: %s'%(target,k,self._itemnames[k]))
-                result.extend(self._itemnames[k])
-        return result
+        regexp = re.compile(target.lower())
+        return [k for k in self._itemnames.keys() if regexp.match(k.lower())]
+
+    def _getItemNamesStartingWith(self, prefix):
+        if self._sortedNames is None:
+            self._sortedNames = sorted(self._itemnames.keys())
+        names = self._sortedNames
+        i = bisect.bisect_left(names, prefix)
+        ret = []
+        while i < len(names) and names[i].startswith(prefix):
+            ret.append(names[i])
+            i += 1
+        return ret
 
     def getItemByPosition(self, x, y):
         """ This method will try first with named objects; if failed then with itemAt """
         pos = Qt.QPointF(x, y)
         itemsAtPos = []
-        for z, o in sorted((i.zValue(), i) for v in self._itemnames.values() for i in v if i.contains(pos) or i.isUnderMouse()):
+        # named items whose rectangle contains the position, plus those
+        # under the mouse (which are at the position in scene coordinates)
+        candidates = self._itemIndex.query(x, y)
+        candidates.update(i for i in self.items(pos) if i in self._itemIndex)
+        for z, o in sorted((i.zValue(), i) for i in candidates if i.contains(pos) or i.isUnderMouse()):
             if not hasattr(o, 'getExtensions'):
                 self.debug(
                     'getItemByPosition(%d,%d): adding Qt primitive %s' % (x, y, o))
@@ -797,20 +845,102 @@ class TaurusGraphicsScene(Qt.QGraphicsScene):
         return result
 
     def start(self):
-        if self.updateThread:
+        """Starts repainting the items updated with :meth:`updateSceneItem`
+        (at most once every :attr:`FRAME_PERIOD` ms)"""
+        if self._flushTimer is not None:
             return
-        self.updateQueue = Queue.Queue()
-        self.updateThread = TaurusGraphicsUpdateThread(self)
-        self.updateThread.start()  # Qt.QThread.HighPriority)
+        self._flushTimer = Qt.QTimer(self)
+        self._flushTimer.setSingleShot(True)
+        self._flushTimer.timeout.connect(self.flushUpdates)
+        self._updatesPending.connect(self._scheduleFlush,
+                                     Qt.Qt.QueuedConnection)
+        self._scheduleFlush()
+
+    def updateSceneItem(self, item, restyle=False):
+        """
+        Requests the repaint of an item. It can be called from any thread:
+        the repaints are done in the GUI thread, merging all the updates of
+        the items received since the previous repaint (see
+        :meth:`flushUpdates`).
+
+        :param item: (QGraphicsItem) the item
+        :param restyle: (bool) if True, the updateStyle method of the item
+                        is also called (in the GUI thread) before repainting
+                        it
+        """
+        if self._dirtyItems.add(item, self._RESTYLE if restyle else 0):
+            self._updatesPending.emit()
 
-    def getQueue(self):
-        return self.updateQueue
+    def updateSceneItems(self, items, restyle=False):
+        for item in items:
+            self.updateSceneItem(item, restyle=restyle)
 
-    def updateSceneItem(self, item):
-        self.updateQueue.put(item)
+    def _scheduleFlush(self):
+        timer = self._flushTimer
+        if timer is None or timer.isActive() or not len(self._dirtyItems):
+            return
+        elapsed = 1000 * (time.time() - self._lastFlush)
+        timer.start(max(0, int(self.FRAME_PERIOD - elapsed)))
 
-    def updateSceneItems(self, items):
-        self.updateQueue.put(items)
+    def flushUpdates(self):
+        """
+        Applies the pending updates of the items (see
+        :meth:`updateSceneItem`) and repaints, at once, the union of their
+        areas. It is called periodically (see :meth:`start`), but it can be
+        called to apply them immediately. It must be called from the GUI
+        thread.
+        """
+        self._lastFlush = time.time()
+        pending = self._dirtyItems.take()
+        if not pending:
+            return
+        self._flushes += 1
+        rect = Qt.QRectF()
+        restyled = []
+        for item, flags in pending.iteritems():
+            if item.scene() is not self:
+                continue
+            rect = rect.united(item.sceneBoundingRect())
+            if flags & self._RESTYLE:
+                try:
+                    item.updateStyle()
+                except:
+                    self.warning('updateStyle(%s) failed: %s' % (
+                        getattr(item, '_name', item), traceback.format_exc()))
+                # (its shape or visibility may have changed)
+                rect = rect.united(item.sceneBoundingRect())
+                restyled.append(item)
+        # the repaints requested by updateStyle are already done
+        self._dirtyItems.discard(restyled)
+        if not rect.isNull():
+            self._repaint(rect)
+
+    def _repaint(self, rect):
+        sceneUpdate = False
+        for v in self.views():
+            if v.viewportUpdateMode() == Qt.QGraphicsView.NoViewportUpdate:
+                # We call the update to the viewport instead of the view
+                # itself because apparently there is a bug in QT 4.3 that
+                # prevents a proper update when the view is inside a QTab
+                area = v.mapFromScene(rect).boundingRect()
+                v.viewport().update(area.adjusted(-2, -2, 2, 2))
+            else:
+                sceneUpdate = True
+        if sceneUpdate:
+            Qt.QGraphicsScene.update(self, rect)
+
+    def getUpdateStats(self):
+        """
+        Returns some counters of the updates of the items: the number of
+        items with pending updates ("pending"), of updates requested
+        ("added"), of updates merged with a pending one ("merged"), of
+        items updated ("taken") and of repaints done ("flushes").
+
+        :return: (dict<str, int>)
+        """
+        stats = self._dirtyItems.getStats()
+        stats['flushes'] = self._flushes
+        return stats
 
     def updateScene(self):
         self.update()
@@ -1048,8 +1178,14 @@ class TaurusGraphicsItem(TaurusBaseComponent):
 
     # def fireEvent(self, type):
     def fireEvent(self, evt_src=None, evt_type=None, evt_value=None):
-        """fires a value changed event to all listeners"""
-        self.updateStyle()
+        """fires a value changed event to all listeners. In a
+        TaurusGraphicsScene the style is updated (in the GUI thread) when the
+        scene repaints the item"""
+        scene = self.scene()
+        if isinstance(scene, TaurusGraphicsScene):
+            scene.updateSceneItem(self, restyle=True)
+        else:
+            self.updateStyle()
 
     def updateStyle(self):
         """ Method called when the component detects an event that triggers a change
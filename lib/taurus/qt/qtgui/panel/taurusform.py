@@ -29,6 +29,7 @@ __all__ = ["TaurusAttrForm", "TaurusCommandsForm", "TaurusForm"]
 
 __docformat__ = 'restructuredtext'
 
+import threading
 from datetime import datetime
 
 from taurus.external.qt import Qt
@@ -44,6 +45,35 @@ from taurus.qt.qtgui.button import QButtonBox, TaurusCommandButton
 from taurusmodelchooser import TaurusModelChooser
 
 
+def _prefetchModels(models, attributes=True):
+    '''Creates the taurus objects of the given models and gets (at once for
+    the devices of each authority) the classes of their devices, so that the
+    widgets for them can be chosen without blocking.
+
+    :param models: (seq<str>) the model names
+    :param attributes: (bool) if False, the attribute objects are not created
+                       (only the devices)
+    '''
+    devices = {}
+    for model in models:
+        if attributes:
+            try:
+                taurus.Attribute(model)
+                continue
+            except:
+                pass
+        try:
+            dev = taurus.Device(model)
+        except:
+            continue
+        devices.setdefault(dev.getParentObj(), []).append(dev.getFullName())
+    for authority, names in devices.items():
+        try:
+            authority.getDeviceClasses(names)
+        except:
+            pass
+
+
 class ParameterCB(Qt.QComboBox):
     '''A custom combobox'''
 
@@ -81,9 +111,19 @@ class TaurusForm(TaurusWidget):
 
     By default, the form provides global Apply and Cancel buttons.
 
+    Forms with many items can be virtualized (see :meth:`setVirtualized`):
+    then only the rows which fit in the visible area are instantiated (and
+    subscribed to their models). Scrolling reuses those items for the
+    models of the newly visible rows.
+
     You can also see some code that exemplifies the use of TaurusForm in :ref:`Taurus
     coding examples <examples>` '''
 
+    #: height (in pixels) assumed for each row in virtualized mode
+    VirtualRowHeight = 24
+
+    _modelsPrefetched = Qt.pyqtSignal(int, object)
+
     def __init__(self, parent=None,
                  formWidget=None,
                  buttons=None,
@@ -97,6 +137,22 @@ class TaurusForm(TaurusWidget):
         self._customWidgetMap = {}
         self._model = []
         self._children = []
+        # virtualized mode: (index, model) of the rows, number of visible
+        # rows, the (klass, args, kwargs) of the item of each row, a cache
+        # of them by model and the (value, operations) being edited in the
+        # rows scrolled out of view, by model
+        self._virtualized = False
+        self._virtualModels = []
+        self._visibleRows = 0
+        self._itemSpecs = []
+        self._formWidgets = {}
+        self._pendingValues = {}
+        # background loading: whether the objects of each model were created
+        # (True) or only its device (False) and the id of the current loading
+        self._prefetched = {}
+        self._prefetchId = 0
+        self._loading = False
+        self._modelsPrefetched.connect(self._onModelsPrefetched)
         self.setFormWidget(formWidget)
 
         self.setLayout(Qt.QVBoxLayout())
@@ -107,7 +163,15 @@ class TaurusForm(TaurusWidget):
         self.scrollArea = TaurusScrollArea(self)
         self.scrollArea.setWidget(frame)
         self.scrollArea.setWidgetResizable(True)
-        self.layout().addWidget(self.scrollArea)
+        self.scrollArea.viewport().installEventFilter(self)
+        # (in virtualized mode, its value is the index of the first row)
+        self.vScrollBar = Qt.QScrollBar(Qt.Qt.Vertical, self)
+        self.vScrollBar.setVisible(False)
+        self.vScrollBar.valueChanged.connect(self._updateVirtualRows)
+        scrollLayout = Qt.QHBoxLayout()
+        scrollLayout.addWidget(self.scrollArea)
+        scrollLayout.addWidget(self.vScrollBar)
+        self.layout().addLayout(scrollLayout)
         self.__modelChooserDlg = None
 
         self.buttonBox = QButtonBox(buttons=buttons, parent=self)
@@ -142,11 +206,14 @@ class TaurusForm(TaurusWidget):
                                     TAURUS_ATTR_MIME_TYPE, TAURUS_MODEL_MIME_TYPE, 'text/plain'])
 
         self.resetCompact()
+        self.resetBackgroundLoading()
 
         # properties
         self.registerConfigProperty(
             self.isWithButtons, self.setWithButtons, 'withButtons')
         self.registerConfigProperty(self.isCompact, self.setCompact, 'compact')
+        self.registerConfigProperty(
+            self.isVirtualized, self.setVirtualized, 'virtualized')
 
     def __getitem__(self, key):
         '''provides a list-like interface: items of the form can be accessed using slice notation'''
@@ -185,7 +252,10 @@ class TaurusForm(TaurusWidget):
     def parentModelChanged(self, parentmodel_name):
         self.info("Parent model changed to '%s'" % parentmodel_name)
         parentmodel_name = str(parentmodel_name)
-        if self.getUseParentModel():
+        if self.getUseParentModel() and self.isVirtualized():
+            self.destroyChildren()
+            self.fillWithChildren()
+        elif self.getUseParentModel():
             # reset the model of childs
             for obj, model in zip(self.getItems(), self.getModel()):
                 obj.setModel('%s/%s' % (parentmodel_name, str(model)))
@@ -309,7 +379,8 @@ class TaurusForm(TaurusWidget):
                     'Cannot handle model "%s". Using default widget.' % (model))
                 return self._defaultFormWidget, (), {}
             try:
-                key = obj.getDeviceProxy().info().dev_class  # TODO: Tango-centric
+                # (cached by the authority, see _prefetchModels)
+                key = obj.getDeviceClass()
             except:
                 return self._defaultFormWidget, (), {}
             #value = self._formWidgetsMap.get(key, self._defaultFormWidget)
@@ -364,7 +435,8 @@ class TaurusForm(TaurusWidget):
 
     def setCompact(self, compact):
         self._compact = compact
-        for item in self.getItems():
+        # (the items created later, if loading, get it when created)
+        for item in self._children:
             item.setCompact(compact)
         self.compactModeAction.setChecked(compact)
 
@@ -375,6 +447,115 @@ class TaurusForm(TaurusWidget):
         from taurus import tauruscustomsettings
         self.setCompact(getattr(tauruscustomsettings, 'T_FORM_COMPACT', {}))
 
+    def setBackgroundLoading(self, background):
+        '''Sets whether the taurus objects of the models of the form (and the
+        classes of their devices) are obtained in a background thread when the
+        model is set. Meanwhile, the form shows a placeholder, and its items
+        are created when they can be created without blocking (see
+        :meth:`isLoadingModels`). It is enabled by default (see
+        T_FORM_BACKGROUND_LOADING in :mod:`taurus.tauruscustomsettings`).
+
+        Note that accessing the items of the form (e.g. with :meth:`getItems`
+        or by index) while the models are being loaded finishes the loading
+        in the calling thread, so that the items can be used just after
+        setting the model.
+
+        :param background: (bool)
+        '''
+        self._backgroundLoading = bool(background)
+
+    def isBackgroundLoading(self):
+        return self._backgroundLoading
+
+    def resetBackgroundLoading(self):
+        from taurus import tauruscustomsettings
+        self.setBackgroundLoading(getattr(tauruscustomsettings,
+                                          'T_FORM_BACKGROUND_LOADING', True))
+
+    def isLoadingModels(self):
+        '''Returns True while the models are being loaded in background (see
+        :meth:`setBackgroundLoading`)
+
+        :return: (bool)
+        '''
+        return self._loading
+
+    def _finishLoading(self):
+        '''finishes (without waiting for the background thread) the loading
+        of the models in progress, if any'''
+        if self._loading:
+            self.fillWithChildren(background=False)
+
+    def _prefetchInBackground(self, models, attributes):
+        prefetchId = self._prefetchId
+
+        def run():
+            try:
+                _prefetchModels(models, attributes=attributes)
+            finally:
+                try:
+                    self._modelsPrefetched.emit(prefetchId, models)
+                except RuntimeError:
+                    pass  # (the form was deleted)
+
+        thread = threading.Thread(target=run, name='TaurusFormLoader')
+        thread.daemon = True
+        thread.start()
+
+    def _onModelsPrefetched(self, prefetchId, models):
+        for model in models:
+            self._prefetched[model] = self._prefetched.get(model) or \
+                not self.isVirtualized()
+        # (the model may have changed while loading)
+        if prefetchId == self._prefetchId:
+            self.fillWithChildren()
+
+    def setVirtualized(self, virtualized):
+        '''Sets whether the form is virtualized. A virtualized form only
+        creates the items of the rows which fit in its visible area (and
+        only those items subscribe to their models). The rows are scrolled
+        with a separate scroll bar, reusing the same items for the models of
+        the visible rows.
+
+        Note that, in virtualized mode, :meth:`getItems` only returns the
+        items of the visible rows and that the settings of the items are not
+        stored in the configuration of the form. The values being edited in
+        the rows scrolled out of view are kept (they are shown again when
+        the rows are scrolled back into view, and included in the pending
+        operations of the form).
+
+        :param virtualized: (bool)
+        '''
+        virtualized = bool(virtualized)
+        if virtualized == self._virtualized:
+            return
+        self.destroyChildren()
+        self._virtualized = virtualized
+        if virtualized:
+            policy = Qt.Qt.ScrollBarAlwaysOff
+        else:
+            policy = Qt.Qt.ScrollBarAsNeeded
+            self.vScrollBar.setVisible(False)
+        self.scrollArea.setVerticalScrollBarPolicy(policy)
+        self.fillWithChildren()
+
+    def isVirtualized(self):
+        return self._virtualized
+
+    def resetVirtualized(self):
+        self.setVirtualized(False)
+
+    def eventFilter(self, obj, event):
+        '''reimplemented to scroll the rows with the mouse wheel and to
+        update them when the visible area is resized (in virtualized mode)'''
+        if self._virtualized and obj is self.scrollArea.viewport():
+            if event.type() == Qt.QEvent.Wheel:
+                Qt.QApplication.sendEvent(self.vScrollBar, event)
+                return True
+            elif event.type() == Qt.QEvent.Resize:
+                self._updateVirtualRows()
+        return TaurusWidget.eventFilter(self, obj, event)
+
     def dropEvent(self, event):
         '''reimplemented to support dropping of modelnames in forms'''
         mtype = self.handleMimeData(event.mimeData(), self.addModels)
@@ -398,7 +579,7 @@ class TaurusForm(TaurusWidget):
         self.showButtonsAction.setEnabled(modifiable)
         self.changeLabelsAction.setEnabled(modifiable)
         self.compactModeAction.setEnabled(modifiable)
-        for item in self.getItems():
+        for item in self._children:
             try:
                 item.setModifiableByUser(modifiable)
             except:
@@ -412,17 +593,31 @@ class TaurusForm(TaurusWidget):
 
     def destroyChildren(self):
         for child in self._children:
-            self.unregisterConfigurableItem(child)
+            self.unregisterConfigurableItem(child, raiseOnError=False)
             # child.destroy()
             child.setModel(None)
             child.deleteLater()
         self._children = []
-
-    def fillWithChildren(self):
+        self._virtualModels = []
+        self._visibleRows = 0
+        self._itemSpecs = []
+        self._formWidgets = {}
+        self._pendingValues = {}
+
+    def fillWithChildren(self, background=None):
+        '''creates the items of the form for its current models
+
+        :param background: (bool or None) whether the models may be loaded
+                           in background (by default, as set with
+                           :meth:`setBackgroundLoading`)
+        '''
+        if background is None:
+            background = self.isBackgroundLoading()
         frame = TaurusWidget()
         frame.setLayout(Qt.QGridLayout())
-        frame.layout().addItem(Qt.QSpacerItem(
-            0, 0, Qt.QSizePolicy.Minimum, Qt.QSizePolicy.MinimumExpanding))
+        if not self.isVirtualized():
+            frame.layout().addItem(Qt.QSpacerItem(
+                0, 0, Qt.QSizePolicy.Minimum, Qt.QSizePolicy.MinimumExpanding))
 
         parent_name = None
         if self.getUseParentModel():
@@ -430,12 +625,45 @@ class TaurusForm(TaurusWidget):
             if parent_model:
                 parent_name = parent_model.getFullName()
 
+        models = []
         for i, model in enumerate(self.getModel()):
             if not model:
                 continue
             if parent_name:
                 # @todo: Change this (it assumes tango model naming!)
                 model = "%s/%s" % (parent_name, model)
+            models.append((i, model))
+
+        # (in virtualized mode, only the visible attributes are created)
+        self._prefetchId += 1
+        virtualized = self.isVirtualized()
+        pending = [m for i, m in models if not self._prefetched.get(m) and
+                   not (virtualized and m in self._prefetched)]
+        self._loading = bool(pending) and background
+        if self._loading:
+            frame.layout().addWidget(Qt.QLabel('Loading %d models...' %
+                                               len(pending)))
+            self.scrollArea.setWidget(frame)
+            self._prefetchInBackground(pending, not virtualized)
+            return
+        elif pending:
+            # get the classes of the devices at once
+            _prefetchModels(pending, attributes=False)
+            for model in pending:
+                self._prefetched.setdefault(model, False)
+
+        if virtualized:
+            # the items are created by _updateVirtualRows (only for the
+            # visible rows), aligned to the top instead of using spacers
+            frame.layout().setAlignment(Qt.Qt.AlignTop)
+            self._virtualModels = models
+            self.scrollArea.setWidget(frame)
+            self._updateVirtualRows()
+            self.scrollArea.setMinimumWidth(
+                frame.layout().sizeHint().width() + 20)
+            return
+
+        for i, model in models:
             klass, args, kwargs = self.getFormWidget(model=model)
             widget = klass(frame, *args, **kwargs)
             # @todo UGLY... See if this can be done in other ways... (this causes trouble with widget that need more vertical space , like PoolMotorTV)
@@ -464,10 +692,131 @@ class TaurusForm(TaurusWidget):
 #        self.scrollArea.setWidgetResizable(True)
         self.scrollArea.setMinimumWidth(frame.layout().sizeHint().width() + 20)
 
+    def _updateVirtualRows(self):
+        '''(virtualized mode) sets the models of the visible rows to the
+        items of the form. Items are only created for rows which were never
+        visible (or whose model needs another kind of item). The items left
+        over when the visible area shrinks are kept, hidden and without
+        model, to be reused when it grows again'''
+        if not self._virtualized:
+            return
+        frame = self.scrollArea.widget()
+        models = self._virtualModels
+        height = self.scrollArea.viewport().height()
+        nrows = min(len(models), max(1, height // self.VirtualRowHeight))
+        scrollBar = self.vScrollBar
+        scrollBar.blockSignals(True)
+        scrollBar.setRange(0, len(models) - nrows)
+        scrollBar.setPageStep(max(1, nrows))
+        scrollBar.blockSignals(False)
+        scrollBar.setVisible(len(models) > nrows)
+        first = scrollBar.value()
+        self._visibleRows = nrows
+
+        items, specs = self._children, self._itemSpecs
+        for item in items[nrows:]:
+            if item is not None and item.getModel():
+                self._savePendingValue(item)
+                item.setModel(None)
+                item.setVisible(False)
+        for row in xrange(nrows):
+            i, model = models[first + row]
+            spec = self._formWidgets.get(model)
+            if spec is None:
+                spec = self._formWidgets[model] = self.getFormWidget(model)
+            if row == len(items):
+                items.append(None)
+                specs.append(None)
+            item = items[row]
+            if item is not None and item.getModel() != model:
+                self._savePendingValue(item)
+            if specs[row] != spec:
+                if item is not None:
+                    self._destroyItem(item)
+                klass, args, kwargs = spec
+                item = klass(None, *args, **kwargs)
+                item.setMinimumHeight(20)
+                item.setPreferredRow(row)
+                item.setParent(frame)
+                try:
+                    item.setCompact(self.isCompact())
+                    item.setModifiableByUser(self.isModifiableByUser())
+                except:
+                    pass
+                items[row], specs[row] = item, spec
+            if item.getModel() != model:
+                try:
+                    item.setModel(model)
+                    self._restorePendingValue(item)
+                except:
+                    self.warning(
+                        'an error occurred while setting the model of the child "%s"' % model)
+                    self.traceback(level=taurus.Debug)
+            item.setObjectName("__item%i" % i)
+            item.setVisible(True)
+
+    def _savePendingValue(self, item):
+        '''(virtualized mode) keeps the value being edited in the given item
+        (if any) before its model is changed, so that it is restored when
+        the row of the model is shown again (and applied by :meth:`apply`)'''
+        try:
+            if not item.hasPendingOperations():
+                return
+            writeWidget = item.writeWidget(followCompact=True)
+            self._pendingValues[item.getModel()] = (
+                writeWidget.getValue(), writeWidget.getPendingOperations())
+        except:
+            self.traceback(level=taurus.Debug)
+
+    def _restorePendingValue(self, item):
+        '''(virtualized mode) restores the value that was being edited for
+        the model of the given item (see :meth:`_savePendingValue`)'''
+        pending = self._pendingValues.pop(item.getModel(), None)
+        if pending is None:
+            return
+        writeWidget = item.writeWidget(followCompact=True)
+        writeWidget.setValue(pending[0])
+        writeWidget.updatePendingOperations()
+
+    def getPendingOperations(self):
+        '''reimplemented from :class:`TaurusWidget` to include (in virtualized
+        mode) the operations of the values being edited in the rows
+        scrolled out of view'''
+        ops = TaurusWidget.getPendingOperations(self)
+        for value, pendingOps in self._pendingValues.values():
+            ops.extend(pendingOps)
+        return ops
+
+    def hasPendingOperations(self):
+        '''reimplemented from :class:`TaurusWidget` (see
+        :meth:`getPendingOperations`)'''
+        return bool(self._pendingValues) or \
+            TaurusWidget.hasPendingOperations(self)
+
+    def resetPendingOperations(self):
+        '''reimplemented from :class:`TaurusWidget` to also discard (in
+        virtualized mode) the values being edited in the rows scrolled out
+        of view'''
+        self._pendingValues = {}
+        TaurusWidget.resetPendingOperations(self)
+
+    def _destroyItem(self, item):
+        '''removes (in virtualized mode) an item and its subwidgets from the
+        form'''
+        item.setModel(None)
+        for w in (item.labelWidget(), item.readWidget(), item.writeWidget(),
+                  item.unitsWidget(), item.customWidget(), item.extraWidget()):
+            if w is not None:
+                w.hide()
+                w.setParent(None)
+                w.deleteLater()
+        item.deleteLater()
+
     def getItemByModel(self, model, index=0):
         '''returns the child item with given model. If there is more than one item
         with the same model, the index parameter can be used to distinguish among them
         Please note that his index is only relative to same-model items!'''
+        self._finishLoading()
         for child in self._children:
             if child.getModel().lower() == model.lower():
                 if index <= 0:
@@ -480,7 +829,13 @@ class TaurusForm(TaurusWidget):
         return self.getItems()[index]
 
     def getItems(self):
-        '''returns a list of the objects that have been created as childs of the form'''
+        '''returns a list of the objects that have been created as childs of the form.
+        In virtualized mode, only those of the visible rows are returned.
+        If the models are being loaded in background, the loading is finished
+        first (see :meth:`setBackgroundLoading`)'''
+        self._finishLoading()
+        if self._virtualized:
+            return self._children[:self._visibleRows]
         return self._children
 
 #    def _manageButtonBox(self):
@@ -506,7 +861,9 @@ class TaurusForm(TaurusWidget):
 
     @Qt.pyqtSlot()
     def apply(self):
-        self.safeApplyOperations()
+        if self.safeApplyOperations():
+            # (the values of the rows out of view have been written)
+            self._pendingValues = {}
 
     @Qt.pyqtSlot()
     def reset(self):
@@ -542,6 +899,13 @@ class TaurusForm(TaurusWidget):
 
     compact = Qt.pyqtProperty("bool", isCompact, setCompact, resetCompact)
 
+    virtualized = Qt.pyqtProperty("bool", isVirtualized, setVirtualized,
+                                  resetVirtualized)
+
+    backgroundLoading = Qt.pyqtProperty("bool", isBackgroundLoading,
+                                        setBackgroundLoading,
+                                        resetBackgroundLoading)
+
 
 class TaurusCommandsForm(TaurusWidget):
     '''A form that shows commands available for a Device Server'''
@@ -42,7 +42,7 @@ from taurus.core import DataType, DataFormat
 from taurus.core.taurusbasetypes import TaurusElementType
 from taurus.qt.qtcore.mimetypes import TAURUS_ATTR_MIME_TYPE, TAURUS_DEV_MIME_TYPE, TAURUS_MODEL_MIME_TYPE
 from taurus.qt.qtcore.configuration import BaseConfigurableClass
-from taurus.qt.qtgui.base import TaurusBaseWidget
+from taurus.qt.qtgui.base import TaurusBaseComponent, TaurusBaseWidget
 from taurus.qt.qtgui.container import TaurusFrame
 from taurus.qt.qtgui.display import TaurusLabel
 from taurus.qt.qtgui.display import TaurusLed
@@ -303,6 +303,7 @@ class TaurusValue(Qt.QWidget, TaurusBaseWidget):
         breaks some conventions on the way it manages layouts of its parent model.
     '''
     _compact = False
+    _sharedSubscription = True
 
     def __init__(self, parent=None, designMode=False, customWidgetMap=None):
         name = self.__class__.__name__
@@ -598,7 +599,8 @@ class TaurusValue(Qt.QWidget, TaurusBaseWidget):
         if modelclass and modelclass.getTaurusElementType() != TaurusElementType.Device:
             return None
         try:
-            key = self.getModelObj().getDeviceProxy().info().dev_class  # TODO: Tango-centric
+            # (cached by the authority, see TaurusAuthority.getDeviceClass)
+            key = self.getModelObj().getDeviceClass()
         except:
             return None
         return self.getCustomWidgetMap().get(key, None)
@@ -687,6 +689,9 @@ class TaurusValue(Qt.QWidget, TaurusBaseWidget):
             result = None
         else:
             result = newClass()
+            if self._sharedSubscription and \
+                    isinstance(result, TaurusBaseComponent):
+                result.setCompositeListener(self)
         return result
 
     def labelWidgetClassFactory(self, classID):
@@ -1067,6 +1072,30 @@ class TaurusValue(Qt.QWidget, TaurusBaseWidget):
     def isCompact(self):
         return self._compact
 
+    def setSharedSubscription(self, shared):
+        '''Sets whether the subwidgets share the subscription of this
+        TaurusValue to the model. If True (default), the subwidgets with the
+        same model as this TaurusValue do not subscribe to it: this TaurusValue
+        receives each event once and forwards it to them (see
+        :meth:`TaurusBaseComponent.setCompositeListener`).
+
+        :param shared: (bool)
+        '''
+        shared = bool(shared)
+        if shared == self._sharedSubscription:
+            return
+        self._sharedSubscription = shared
+        for w in (self._labelWidget, self._readWidget, self._writeWidget,
+                  self._unitsWidget, self._customWidget, self._extraWidget):
+            if isinstance(w, TaurusBaseComponent):
+                w.setCompositeListener(self if shared else None)
+
+    def getSharedSubscription(self):
+        return self._sharedSubscription
+
+    def resetSharedSubscription(self):
+        self.setSharedSubscription(True)
+
     def isReadOnly(self):
         if not self.getAllowWrite():
             return True
@@ -1250,6 +1279,9 @@ class TaurusValue(Qt.QWidget, TaurusBaseWidget):
         "QString", getLabelConfig, setLabelConfig, resetLabelConfig)
     allowWrite = Qt.pyqtProperty(
         "bool", getAllowWrite, setAllowWrite, resetAllowWrite)
+    sharedSubscription = Qt.pyqtProperty(
+        "bool", getSharedSubscription, setSharedSubscription,
+        resetSharedSubscription)
     modifiableByUser = Qt.pyqtProperty("bool", TaurusBaseWidget.isModifiableByUser,
                                        TaurusBaseWidget.setModifiableByUser, TaurusBaseWidget.resetModifiableByUser)
 
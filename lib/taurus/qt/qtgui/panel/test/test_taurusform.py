@@ -24,8 +24,12 @@
 
 """Unit tests for Taurus Forms"""
 
+import time
+import threading
+import taurus
 from taurus.external import unittest
-from taurus.qt.qtgui.test import GenericWidgetTestCase
+from taurus.core.evaluation.evalauthority import EvaluationAuthority
+from taurus.qt.qtgui.test import BaseWidgetTestCase, GenericWidgetTestCase
 from taurus.qt.qtgui.panel import TaurusForm, TaurusAttrForm
 
 
@@ -65,6 +69,157 @@ class TaurusAttrFormTest(GenericWidgetTestCase, unittest.TestCase):
     modelnames = ['sys/tg_test/1', None]
 
 
+class TaurusFormVirtualizedTest(BaseWidgetTestCase, unittest.TestCase):
+
+    '''
+    Tests for the virtualized mode of TaurusForm (with many attributes)
+    '''
+    _klass = TaurusForm
+    height = 300
+
+    def setUp(self):
+        BaseWidgetTestCase.setUp(self)
+        self.models = ['eval:%d' % i for i in xrange(5000)]
+        self._widget.setVirtualized(True)
+        self._widget.resize(400, self.height)
+        self._widget.show()
+        self._widget.setModel(self.models)
+        self._app.processEvents()
+
+    def tearDown(self):
+        self._widget.setModel([])
+        self._widget.close()
+        self._app.processEvents()
+
+    def _listened(self):
+        return [m for m in self.models if taurus.Attribute(m).hasListeners()]
+
+    def test_visibleRows(self):
+        '''only the items of the visible rows are created and subscribed'''
+        items = self._widget.getItems()
+        nrows = len(items)
+        self.assertTrue(0 < nrows <= self.height // TaurusForm.VirtualRowHeight)
+        self.assertEqual([item.getModel() for item in items],
+                         self.models[:nrows])
+        self.assertEqual(self._listened(), self.models[:nrows])
+        klass = self._widget.getFormWidget()[0]
+        self.assertEqual(len(self._widget.findChildren(klass)), nrows)
+
+    def test_scroll(self):
+        '''the items are reused for the rows scrolled into view'''
+        items = list(self._widget.getItems())
+        nrows = len(items)
+        self._widget.vScrollBar.setValue(2500)
+        self._app.processEvents()
+        self.assertEqual(self._widget.getItems(), items)
+        self.assertEqual([item.getModel() for item in items],
+                         self.models[2500:2500 + nrows])
+        self.assertEqual(self._listened(), self.models[2500:2500 + nrows])
+
+    def test_resize(self):
+        '''the items of the rows hidden by a resize are unsubscribed'''
+        nrows = len(self._widget.getItems())
+        self._widget.resize(400, self.height // 2)
+        self._app.processEvents()
+        items = self._widget.getItems()
+        self.assertTrue(0 < len(items) < nrows)
+        self.assertEqual(self._listened(), self.models[:len(items)])
+
+    def test_pendingValues(self):
+        '''the values being edited are kept when scrolled out of view'''
+        attr = taurus.Attribute(self.models[0])
+        attr.writable = True
+        try:
+            self._widget.setModel(self.models)
+            self._app.processEvents()
+            item = self._widget[0]
+            item.writeWidget(followCompact=True).setValue(42)
+            self.assertTrue(item.hasPendingOperations())
+            self._widget.vScrollBar.setValue(2500)
+            self._app.processEvents()
+            self.assertFalse(item.hasPendingOperations())
+            self.assertTrue(self._widget.hasPendingOperations())
+            ops = self._widget.getPendingOperations()
+            self.assertEqual([op.attr for op in ops], [attr])
+            self._widget.vScrollBar.setValue(0)
+            self._app.processEvents()
+            item = self._widget[0]
+            self.assertTrue(item.hasPendingOperations())
+            self.assertEqual(item.writeWidget(followCompact=True).getValue(),
+                             42)
+            self._widget.reset()
+            self.assertFalse(self._widget.hasPendingOperations())
+        finally:
+            attr.writable = False
+
+
+class TaurusFormLoadingTest(BaseWidgetTestCase, unittest.TestCase):
+
+    '''
+    Tests for the background loading of the models of TaurusForm
+    '''
+    _klass = TaurusForm
+    delay = 0.5
+
+    def setUp(self):
+        BaseWidgetTestCase.setUp(self)
+        self.threads = []
+        self._getDeviceClass = EvaluationAuthority.getDeviceClass
+
+        self.classes = {}
+
+        def getDeviceClass(authority, devname, cache=True):
+            # (a slow authority which caches the classes)
+            if devname not in self.classes:
+                self.threads.append(threading.current_thread())
+                time.sleep(self.delay)
+                self.classes[devname] = None
+            return self.classes[devname]
+
+        EvaluationAuthority.getDeviceClass = getDeviceClass
+        self._widget.setBackgroundLoading(True)
+
+    def tearDown(self):
+        EvaluationAuthority.getDeviceClass = self._getDeviceClass
+        self._widget.setModel([])
+
+    def test_backgroundLoading(self):
+        '''the models are loaded without blocking the GUI thread'''
+        models = ['eval:@DefaultEvaluator', 'eval:1']
+        t0 = time.time()
+        self._widget.setModel(models)
+        self.assertTrue(time.time() - t0 < self.delay)
+        self.assertTrue(self._widget.isLoadingModels())
+        klass = self._widget.getFormWidget()[0]
+        self.assertEqual(self._widget.findChildren(klass), [])
+        while self._widget.isLoadingModels() and time.time() - t0 < 10:
+            self._app.processEvents()
+            time.sleep(0.01)
+        self.assertFalse(self._widget.isLoadingModels())
+        self.assertEqual([item.getModel() for item in self._widget.getItems()],
+                         models)
+        self.assertTrue(len(self.threads) > 0)
+        self.assertFalse(threading.current_thread() in self.threads)
+
+    def test_default(self):
+        '''the models are loaded in background by default'''
+        self.assertTrue(TaurusForm().isBackgroundLoading())
+
+    def test_itemAccess(self):
+        '''the items can be accessed just after setting the model'''
+        models = ['eval:@DefaultEvaluator', 'eval:1']
+        self._widget.setModel(models)
+        self.assertTrue(self._widget.isLoadingModels())
+        self.assertEqual(len(self._widget), 2)
+        self.assertFalse(self._widget.isLoadingModels())
+        items = self._widget.getItems()
+        self.assertEqual(self._widget[1].getModel(), 'eval:1')
+        # the (late) end of the background loading does not recreate them
+        time.sleep(2 * self.delay)
+        self._app.processEvents()
+        self.assertEqual(self._widget.getItems(), items)
+
+
 # if __name__ == "__main__":
 #     unittest.main()
 #    suite = unittest.defaultTestLoader.loadTestsFromTestCase(TaurusFormTest)
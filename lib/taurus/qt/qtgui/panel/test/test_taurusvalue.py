@@ -25,10 +25,14 @@
 
 """Test for taurus.qt.qtgui.panel.taurusvalue"""
 
+import copy
+import taurus
 from taurus.external import unittest
 from taurus.test import insertTest
+from taurus.core.taurusbasetypes import TaurusEventType
 from taurus.qt.qtgui.test import BaseWidgetTestCase
 from taurus.qt.qtgui.panel import TaurusValue
+from taurus.qt.qtgui.container import TaurusWidget
 from taurus.core.tango.test import TangoSchemeTestLauncher
 
 DEV_NAME = TangoSchemeTestLauncher.DEV_NAME
@@ -83,5 +87,104 @@ class TaurusValueTest(TangoSchemeTestLauncher, BaseWidgetTestCase,
         TangoSchemeTestLauncher.tearDown(self)
         unittest.TestCase.tearDown(self)
 
+
+@insertTest(helper_name='listeners', shared=True)
+@insertTest(helper_name='listeners', shared=False)
+class TaurusValueSubscriptionTest(BaseWidgetTestCase, unittest.TestCase):
+    '''
+    Tests for the subscription shared by a TaurusValue and its subwidgets
+    '''
+    _klass = TaurusValue
+    model = 'eval:Quantity(1.5, "mm")'
+
+    def setUp(self):
+        BaseWidgetTestCase.setUp(self)
+        self.attr = taurus.Attribute(self.model)
+        self.added = []
+        self.handled = []
+        self.value = None
+        addListener = self.attr.addListener
+
+        def countedAddListener(listener):
+            self.added.append(listener)
+            return addListener(listener)
+        self.attr.addListener = countedAddListener
+
+    def tearDown(self):
+        self._widget.setModel(None)
+        del self.attr.addListener
+        unittest.TestCase.tearDown(self)
+
+    def _countHandled(self, widget):
+        handleEvent = widget.handleEvent
+
+        def countedHandleEvent(evt_src, evt_type, evt_value):
+            # (the events sent when subscribing may arrive at any moment)
+            if evt_value is self.value:
+                self.handled.append(widget)
+            return handleEvent(evt_src, evt_type, evt_value)
+        widget.handleEvent = countedHandleEvent
+
+    def listeners(self, shared=True):
+        '''Checks the subscriptions of a TaurusValue and its subwidgets'''
+        w = self._widget
+        w.setSharedSubscription(shared)
+        w.setModel(self.model)
+        self._app.processEvents()
+        subwidgets = [sub for sub in (w.labelWidget(), w.readWidget(),
+                                      w.writeWidget(), w.unitsWidget())
+                      if sub is not None]
+        # the TaurusValue (and, if not shared, each subwidget) subscribes
+        if shared:
+            self.assertEqual(self.added, [w])
+        else:
+            self.assertEqual(len(self.added), 1 + len(subwidgets))
+        for sub in subwidgets:
+            self.assertTrue(sub.isAttached())
+            self._countHandled(sub)
+        # each subwidget handles each event once
+        self.value = copy.copy(self.attr.read())
+        self.attr.fireEvent(TaurusEventType.Change, self.value)
+        self._app.processEvents()
+        self.assertEqual(sorted(self.handled), sorted(subwidgets))
+        self.assertTrue('1.5' in str(w.readWidget().text()))
+        # the subwidgets follow the model changes
+        w.setModel('eval:Quantity(2.5, "mm")')
+        self._app.processEvents()
+        self.assertTrue('2.5' in str(w.readWidget().text()))
+        self.assertFalse(self.attr.hasListeners())
+
+    def testDeviceModel(self):
+        '''Checks that subwidgets with a device model subscribe to it'''
+        model = 'eval:@foo'
+        dev = taurus.Device(model)
+        added = []
+        addListener = dev.addListener
+
+        def countedAddListener(listener):
+            added.append(listener)
+            return addListener(listener)
+        dev.addListener = countedAddListener
+        w = self._widget
+        sub = TaurusWidget()
+        handled = []
+
+        def countedHandleEvent(evt_src, evt_type, evt_value):
+            handled.append(evt_type)
+        sub.handleEvent = countedHandleEvent
+        try:
+            sub.setCompositeListener(w)
+            w.setModel(model)
+            sub.setModel(model)
+            self._app.processEvents()
+            self.assertTrue(w.getModelObj() is dev)
+            self.assertTrue(sub.isAttached())
+            self.assertTrue(sub in added)
+            self.assertFalse(TaurusEventType.Error in handled)
+        finally:
+            sub.setModel(None)
+            del dev.addListener
+
+
 if __name__ == '__main__':
     pass
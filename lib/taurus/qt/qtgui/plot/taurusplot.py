@@ -43,6 +43,7 @@ from taurus.core.taurusbasetypes import DataFormat
 # TODO: Tango-centric
 from taurus.core.util.containers import LoopList, CaselessDict, CaselessList
 from taurus.core.util.safeeval import SafeEvaluator
+from taurus.core.util.decimation import MinMaxDecimator
 from taurus.qt.qtcore.util.signal import baseSignal
 from taurus.qt.qtcore.mimetypes import TAURUS_MODEL_LIST_MIME_TYPE, TAURUS_ATTR_MIME_TYPE
 from taurus.qt.qtgui.base import TaurusBaseComponent, TaurusBaseWidget
@@ -235,6 +236,8 @@ class TaurusCurve(Qwt5.QwtPlotCurve, TaurusBaseComponent):
         - They may have an associated :class:`TaurusXValues` object that controls
           the values for its abscissas.
         - It uses a :class:`CurveAppearanceProperties` object to manage how it looks
+        - It may decimate its data (see :meth:`setDecimationEnabled`) so that
+          only a few points per pixel column are passed to Qwt
 
     **Important**:
 
@@ -249,7 +252,8 @@ class TaurusCurve(Qwt5.QwtPlotCurve, TaurusBaseComponent):
 
     dataChanged = baseSignal('dataChanged', 'QString')
 
-    def __init__(self, name, xname=None, parent=None, rawData=None, optimized=False):
+    def __init__(self, name, xname=None, parent=None, rawData=None, optimized=False,
+                 decimated=False):
 
         Qwt5.QwtPlotCurve.__init__(self)
         TaurusBaseComponent.__init__(self, 'TaurusCurve')
@@ -272,6 +276,11 @@ class TaurusCurve(Qwt5.QwtPlotCurve, TaurusBaseComponent):
         if optimized:
             self.setPaintAttribute(self.PaintFiltered, True)
             self.setPaintAttribute(self.ClipPolygons, True)
+        self._decimator = None
+        self._decimationIncremental = False
+        self._decimationWindow = None
+        self._undecimatedData = None
+        self.setDecimationEnabled(decimated)
 
         if xname is not None:
             self.__xFromAttr = TaurusXValues(xname, parent)
@@ -811,9 +820,83 @@ class TaurusCurve(Qwt5.QwtPlotCurve, TaurusBaseComponent):
             self.warning(
                 "setData(x[%d],y[%d]): array sizes don't match!" % (len(x), len(y)))
 
+        if self._decimator is not None:
+            self._undecimatedData = x, y
+            x, y = self._decimate(x, y)
+
         # now proceed as usual
         Qwt5.QwtPlotCurve.setData(self, x, y)
 
+    def setDecimationEnabled(self, enable, incremental=None):
+        '''Enables/disables the decimation of the data of this curve. If
+        enabled, the data passed to :meth:`setData` is reduced to a few points
+        per pixel column of the plot canvas before passing it to Qwt (see
+        :class:`taurus.core.util.decimation.MinMaxDecimator`), so that the cost
+        of replotting does not depend on the size of the data.
+
+        :param enable: (bool) If True, decimation is enabled
+        :param incremental: (bool or None) whether the data of this curve is
+                            only updated by appending points (and discarding
+                            the oldest ones), as in trends. If True, only the
+                            new points are processed on each update. If None,
+                            the current setting is kept
+        '''
+        if incremental is not None:
+            self._decimationIncremental = incremental
+        if enable:
+            self._decimator = MinMaxDecimator(
+                incremental=self._decimationIncremental)
+        else:
+            self._decimator = None
+            if self._undecimatedData is not None:
+                Qwt5.QwtPlotCurve.setData(self, *self._undecimatedData)
+            self._undecimatedData = None
+        self._decimationWindow = None
+
+    def isDecimationEnabled(self):
+        '''Whether the data of this curve is decimated
+
+        :return: (bool)
+
+        .. seealso:: :meth:`setDecimationEnabled`
+        '''
+        return self._decimator is not None
+
+    def getUndecimatedData(self):
+        '''returns the data last passed to :meth:`setData` (after filtering
+        non-positive values in log scales, but before decimating it)
+
+        :return: (tuple<numpy.ndarray,numpy.ndarray> or None) x and y arrays,
+                 or None if decimation is not enabled
+        '''
+        return self._undecimatedData
+
+    def _getDecimationWindow(self):
+        plot = self.plot()
+        if plot is None:
+            return None
+        type_ = plot.getAxisTransformationType(self.xAxis())
+        if type_ == Qwt5.QwtScaleTransformation.Log10:
+            return None
+        sdiv = plot.axisScaleDiv(self.xAxis())
+        return sdiv.lowerBound(), sdiv.upperBound(), plot.canvas().width()
+
+    def _decimate(self, x, y):
+        self._decimationWindow = self._getDecimationWindow()
+        if self._decimationWindow is None:
+            return x, y
+        return self._decimator.decimate(x, y, *self._decimationWindow)
+
+    def updateDecimation(self):
+        '''decimates the data again if the displayed range or the size of the
+        canvas changed since the last decimation. It is called by
+        :meth:`TaurusPlot.replot`'''
+        if self._decimator is None or self._undecimatedData is None:
+            return
+        if self._getDecimationWindow() != self._decimationWindow:
+            x, y = self._decimate(*self._undecimatedData)
+            Qwt5.QwtPlotCurve.setData(self, x, y)
+
     def safeSetData(self):
         '''Calls setData with x= self._xValues and y=self._yValues
 
@@ -897,14 +980,17 @@ class TaurusCurve(Qwt5.QwtPlotCurve, TaurusBaseComponent):
         :return: (dict) A dict containing the stats.
         '''
 
-        data = self.data()
-        if imin is None:
-            imin = 0
-        if imax is None:
-            imax = data.size()
+        if self._undecimatedData is not None:
+            x, y = [numpy.array(a[imin:imax]) for a in self._undecimatedData]
+        else:
+            data = self.data()
+            if imin is None:
+                imin = 0
+            if imax is None:
+                imax = data.size()
 
-        x = numpy.array([data.x(i) for i in xrange(imin, imax)])
-        y = numpy.array([data.y(i) for i in xrange(imin, imax)])
+            x = numpy.array([data.x(i) for i in xrange(imin, imax)])
+            y = numpy.array([data.y(i) for i in xrange(imin, imax)])
 
         if limits is not None:
             xmin, xmax = limits
@@ -1068,6 +1154,8 @@ class TaurusPlot(Qwt5.QwtPlot, TaurusBaseWidget):
         self.curves = CaselessDict()  # TODO: Tango-centric
         #self.curves_lock = threading.RLock()
         self.curves_lock = DummyLock()
+        # decimation of the curves data (needed from here on by replot)
+        self._decimationEnabled = True
 
         # background
         # self.setCanvasBackground(Qt.Qt.white)
@@ -1852,7 +1940,8 @@ class TaurusPlot(Qwt5.QwtPlot, TaurusBaseWidget):
                 self.debug('overwriting curve %s with raw data' % name)
             self.debug('attaching raw data with name %s' % name)
             curve = TaurusCurve(name, rawData=rawdata,
-                                optimized=self.isOptimizationEnabled())
+                                optimized=self.isOptimizationEnabled(),
+                                decimated=self.isDecimationEnabled())
             # curve.fireEvent = lambda arg:None  #!!! reimplementing FireEvent
             # on the fly! (ugly-lazy hack)
             curve.attach(self)
@@ -1923,9 +2012,14 @@ class TaurusPlot(Qwt5.QwtPlot, TaurusBaseWidget):
         self.curves_lock.acquire()
         try:
             if self.curves.has_key(curvename):
-                data = self.curves[curvename].data()
-                x = [data.x(i) for i in xrange(data.size())]
-                y = [data.y(i) for i in xrange(data.size())]
+                curve = self.curves[curvename]
+                undecimated = curve.getUndecimatedData()
+                if undecimated is not None:
+                    x, y = [list(a) for a in undecimated]
+                else:
+                    data = curve.data()
+                    x = [data.x(i) for i in xrange(data.size())]
+                    y = [data.y(i) for i in xrange(data.size())]
             else:
                 self.error("Curve '%s' not found" % curvename)
                 raise KeyError()
@@ -1974,7 +2068,8 @@ class TaurusPlot(Qwt5.QwtPlot, TaurusBaseWidget):
                 self.debug('updating curve %s' % name)
                 if not self.curves.has_key(name):
                     curve = TaurusCurve(name, xname, self,
-                                        optimized=self.isOptimizationEnabled())
+                                        optimized=self.isOptimizationEnabled(),
+                                        decimated=self.isDecimationEnabled())
                     curve.attach(self)
                     self.curves[name] = curve
                     self.showCurve(curve, True)
@@ -2956,15 +3051,14 @@ class TaurusPlot(Qwt5.QwtPlot, TaurusBaseWidget):
                     self.error("Curve '%s' not found" % name)
                 if not curve.isVisible():
                     continue
-                data = curve.data()
-                for i in xrange(data.size()):
-                    point = Qt.QPoint(self.transform(curve.xAxis(), data.x(
-                        i)), self.transform(curve.yAxis(), data.y(i)))
+                for i, x, y in self._iterPointsInRect(curve, scopeRect):
+                    point = Qt.QPoint(self.transform(curve.xAxis(), x),
+                                      self.transform(curve.yAxis(), y))
                     if scopeRect.contains(point):
                         dist = (pos - point).manhattanLength()
                         if dist < mindist:
                             mindist = dist
-                            picked = Qt.QPointF(data.x(i), data.y(i))
+                            picked = Qt.QPointF(x, y)
                             pickedCurveName = name
                             pickedIndex = i
                             pickedAxes = curve.xAxis(), curve.yAxis()
@@ -3007,6 +3101,35 @@ class TaurusPlot(Qwt5.QwtPlot, TaurusBaseWidget):
 
         return picked, pickedCurveName, pickedIndex
 
+    def _iterPointsInRect(self, curve, rect):
+        '''yields the index and the coordinates of the data points of the
+        curve which may be within the given canvas rectangle. If the curve is
+        decimated, the points (and indices) are those of the undecimated data
+        (so that the indices refer to the real curve data)
+
+        :param curve: (TaurusCurve) the curve
+        :param rect: (Qt.QRect) rectangle in pixel units
+
+        :return: (iterator<tuple<int,float,float>>)
+        '''
+        undecimated = curve.getUndecimatedData()
+        if undecimated is None:
+            data = curve.data()
+            for i in xrange(data.size()):
+                yield i, data.x(i), data.y(i)
+            return
+        x, y = [numpy.asarray(a, dtype=float) for a in undecimated]
+        # select (without a python loop) the points around the rectangle
+        rect = rect.adjusted(-1, -1, 1, 1)
+        x1, x2 = sorted([self.invTransform(curve.xAxis(), rect.left()),
+                         self.invTransform(curve.xAxis(), rect.right())])
+        y1, y2 = sorted([self.invTransform(curve.yAxis(), rect.top()),
+                         self.invTransform(curve.yAxis(), rect.bottom())])
+        candidates = numpy.nonzero((x >= x1) & (x <= x2) &
+                                   (y >= y1) & (y <= y2))[0]
+        for i in candidates:
+            yield int(i), float(x[i]), float(y[i])
+
     def toggleDataInspectorMode(self, enable=None):
         ''' Enables/Disables the Inspector Mode. When "Inspector Mode" is
         enabled, the zoomer is disabled and clicking on the canvas triggers a
@@ -3604,6 +3727,50 @@ class TaurusPlot(Qwt5.QwtPlot, TaurusBaseWidget):
         '''
         self.setOptimizationEnabled(True)
 
+    @Qt.pyqtSlot(bool)
+    def setDecimationEnabled(self, enable):
+        '''Specify whether the data of the curves should be decimated to a few
+        points per pixel column before plotting it (see
+        :meth:`TaurusCurve.setDecimationEnabled`)
+
+        :param enable: (bool) If True, decimation is enabled, otherwise, it is disabled
+        '''
+        # set the decimated flag for use with new curves
+        self._decimationEnabled = enable
+        # make sure that already-created curves are also decimated
+        self.curves_lock.acquire()
+        try:
+            for curve in self.curves.itervalues():
+                curve.setDecimationEnabled(enable)
+        finally:
+            self.curves_lock.release()
+        self.replot()
+
+    @Qt.pyqtSlot(result=bool)
+    def isDecimationEnabled(self):
+        '''Whether the data of the curves is decimated before plotting
+
+        :return: (bool)
+        '''
+        return self._decimationEnabled
+
+    @Qt.pyqtSlot()
+    def resetDecimationEnabled(self):
+        '''Equivalent to `setDecimationEnabled(True)`
+        '''
+        self.setDecimationEnabled(True)
+
+    def replot(self):
+        '''Reimplemented from :meth:`Qwt5.QwtPlot.replot` to decimate the data
+        of the curves according to the scales before painting them'''
+        if self._decimationEnabled:
+            # the scales do not change after decimating because the
+            # decimated data keeps the bounding rect of the data
+            self.updateAxes()
+            for curve in self.curves.values():
+                curve.updateDecimation()
+        Qwt5.QwtPlot.replot(self)
+
     @classmethod
     def getQtDesignerPluginInfo(cls):
         """Returns pertinent information in order to be able to build a valid
@@ -3640,6 +3807,8 @@ class TaurusPlot(Qwt5.QwtPlot, TaurusBaseWidget):
         "QString", getDefaultCurvesTitle, setDefaultCurvesTitle, resetDefaultCurvesTitle)
     enableOptimization = Qt.pyqtProperty(
         "bool", isOptimizationEnabled, setOptimizationEnabled, resetOptimizationEnabled)
+    enableDecimation = Qt.pyqtProperty(
+        "bool", isDecimationEnabled, setDecimationEnabled, resetDecimationEnabled)
 
 
 def main():
@@ -36,7 +36,8 @@ import gc
 from taurus.external.qt import Qt, Qwt5
 
 import taurus.core
-from taurus.core.util.containers import CaselessDict, CaselessList, ArrayBuffer
+from taurus.core.util.containers import CaselessDict, CaselessList, RingArrayBuffer
+from taurus.core.util.diskhistory import DiskHistoryBuffer
 from taurus.qt.qtgui.base import TaurusBaseComponent
 from taurus.qt.qtgui.plot import TaurusPlot
 
@@ -89,6 +90,9 @@ class TaurusTrendsSet(Qt.QObject, TaurusBaseComponent):
     # absolute number of dropped events before issuing a warning (-1 for
     # disabling)
     droppedEventsWarning = -1
+    # number of points per pixel of the canvas read from disk histories
+    # (decimated data is read if there are more)
+    HISTORY_POINTS_PER_PIXEL = 4
 
     dataChanged = Qt.pyqtSignal('QString')
 
@@ -97,6 +101,11 @@ class TaurusTrendsSet(Qt.QObject, TaurusBaseComponent):
         self.call__init__(TaurusBaseComponent, self.__class__.__name__)
         self._xBuffer = None
         self._yBuffer = None
+        self._history = None
+        self._historyRange = None
+        self._historyX = None
+        self._historyY = None
+        self._historyAppended = 0
         self.forcedReadingTimer = None
         self.droppedEventsCount = 0
         self.consecutiveDroppedEventsCount = 0
@@ -246,6 +255,9 @@ class TaurusTrendsSet(Qt.QObject, TaurusBaseComponent):
         :param name: (str) the name of the curve
         :param curve: (TaurusCurve) the curve object to be added
         '''
+        # the curve data comes from append-only buffers
+        curve.setDecimationEnabled(curve.isDecimationEnabled(),
+                                   incremental=True)
         self._curves[name] = curve
         self._orderedCurveNames.append(name)
 
@@ -317,11 +329,15 @@ class TaurusTrendsSet(Qt.QObject, TaurusBaseComponent):
         else:
             ntrends = len(self._curves)
 
+        historyDir = self.parent().getDiskHistoryDir()
+        if historyDir is not None:
+            return self._updateDiskHistory(model, value, ntrends, historyDir)
+
         if self._xBuffer is None:
-            self._xBuffer = ArrayBuffer(numpy.zeros(
+            self._xBuffer = RingArrayBuffer(numpy.zeros(
                 min(128, self._maxBufferSize), dtype='d'), maxSize=self._maxBufferSize)
         if self._yBuffer is None:
-            self._yBuffer = ArrayBuffer(numpy.zeros(
+            self._yBuffer = RingArrayBuffer(numpy.zeros(
                 (min(128, self._maxBufferSize), ntrends), dtype='d'), maxSize=self._maxBufferSize)
         if value is not None:
             try:
@@ -354,6 +370,100 @@ class TaurusTrendsSet(Qt.QObject, TaurusBaseComponent):
                 self._xBuffer.append(0)
         return self._xBuffer.contents(), self._yBuffer.contents()
 
+    def _updateDiskHistory(self, model, value, ntrends, historyDir):
+        '''Same as :meth:`_updateHistory`, but storing the data in a
+        :class:`DiskHistoryBuffer` (see :meth:`TaurusTrend.setDiskHistoryDir`).
+        The returned data is limited to the range of the x axis (decimated if
+        needed). Note that archiving is not supported in this mode.
+
+        The range is only read from disk when the scale of the x axis has
+        changed since the last read (or after maxPoints appends, so that the
+        data kept in memory stays bounded). Otherwise, the new point is just
+        appended to the data of the last read.
+        '''
+        if self._history is None:
+            self._history = DiskHistoryBuffer(historyDir, ncols=ntrends,
+                                              prefix='trend')
+        appended = False
+        if value is not None:
+            if self.parent().getXIsTime():
+                x = value.time.totime()
+            else:
+                x = self._history.lastX()
+                x = 0 if x is None else 1. + x
+            try:
+                self._history.append(x, value.rvalue.magnitude)
+                appended = True
+            except Exception, e:
+                self.warning('Problem updating history (%s=%s):%s',
+                             model, value.rvalue.magnitude, e)
+        historyRange = self._getHistoryRange()
+        maxPoints = self.HISTORY_POINTS_PER_PIXEL * \
+            max(self.parent().canvas().width(), 1)
+        if self._historyX is not None and \
+                historyRange == self._historyRange and \
+                self._historyAppended < maxPoints:
+            if appended:
+                self._historyX.append(x)
+                self._historyY.append(value.rvalue.magnitude)
+                self._historyAppended += 1
+            return self._historyX.contents(), self._historyY.contents()
+        self._historyRange = historyRange
+        xmin, xmax = historyRange
+        x, y = self._history.read(xmin, xmax, maxPoints=maxPoints)
+        # keep the read data in buffers with room for maxPoints appends
+        size = len(x) + maxPoints
+        self._historyX = RingArrayBuffer(numpy.zeros(size, dtype='d'))
+        self._historyY = RingArrayBuffer(numpy.zeros((size, y.shape[1]),
+                                                     dtype='d'))
+        self._historyX.extend(x)
+        self._historyY.extend(y)
+        self._historyAppended = 0
+        return self._historyX.contents(), self._historyY.contents()
+
+    def _getHistoryRange(self):
+        '''returns the x range of the disk history that should be read for the
+        current scale of the x axis of the parent ((None, None) if the axis
+        is autoscaled, so that all data is read)'''
+        p = self.parent()
+        xmin = xmax = None
+        if p.getXDynScale():
+            # the scale follows the latest points
+            xmin = p.axisScaleDiv(Qwt5.QwtPlot.xBottom).lowerBound()
+        elif not p.axisAutoScale(Qwt5.QwtPlot.xBottom):
+            sdiv = p.axisScaleDiv(Qwt5.QwtPlot.xBottom)
+            xmin, xmax = sdiv.lowerBound(), sdiv.upperBound()
+        return xmin, xmax
+
+    def refreshDiskHistory(self):
+        '''re-reads the data of the curves from the disk history if the range
+        of the x axis has changed since it was last read. It does nothing if
+        the trend set does not use a disk history.
+
+        .. seealso:: :meth:`TaurusTrend.setDiskHistoryDir`
+        '''
+        if self._history is None or \
+                self._historyRange == self._getHistoryRange():
+            return
+        self._xValues, self._yValues = self._updateDiskHistory(
+            self.getModel(), None, len(self._curves), None)
+        for i, (n, c) in enumerate(self.getCurves()):
+            c._xValues, c._yValues = self._xValues, self._yValues[:, i]
+        self.dataChanged.emit(Qt.QString(self.getModel()))
+
+    def closeDiskHistory(self):
+        '''closes the disk history of the trend set (if any), removing its
+        files. A new one is created if more data arrives.
+
+        .. seealso:: :meth:`TaurusTrend.setDiskHistoryDir`
+        '''
+        if self._history is not None:
+            self._history.close()  # removes its files
+            self._history = None
+            self._historyRange = None
+            self._historyX = None
+            self._historyY = None
+
     def clearTrends(self, replot=True):
         '''clears all stored data (buffers and copies of the curves data)
 
@@ -367,6 +477,7 @@ class TaurusTrendsSet(Qt.QObject, TaurusBaseComponent):
         # clean history Buffers
         self._xBuffer = None
         self._yBuffer = None
+        self.closeDiskHistory()
         # clean x,ydata
         self._xValues = None
         self._yValues = None
@@ -499,10 +610,12 @@ class TaurusTrendsSet(Qt.QObject, TaurusBaseComponent):
         buffers of the trend. Note that this sets the maximum amount of memory
         used by the data in this trend set to:
 
-            ~(1+ntrends)*2*8*maxSize bytes
+            ~(1+ntrends)*3*8*maxSize bytes
 
-        (the data is stored as float64, and two copies of it are kept: one at
-        the x and y buffers and another at the QwtPlotCurve.data)
+        (the data is stored as float64, the x and y buffers allocate up to
+        twice the maximum size to keep appends cheap (see
+        :class:`RingArrayBuffer`), and another copy is kept at the
+        QwtPlotCurve.data)
 
         :param maxSize: (int) the maximum limit
         '''
@@ -785,10 +898,10 @@ class ScanTrendsSet(TaurusTrendsSet):
         if self._autoClear:
             curvenames = self.getCurveNames()
             if self._xBuffer is None:
-                self._xBuffer = ArrayBuffer(numpy.zeros(
+                self._xBuffer = RingArrayBuffer(numpy.zeros(
                     128, dtype='d'), maxSize=self.maxDataBufferSize())
             if self._yBuffer is None:
-                self._yBuffer = ArrayBuffer(numpy.zeros(
+                self._yBuffer = RingArrayBuffer(numpy.zeros(
                     (128, len(curvenames)), dtype='d'), maxSize=self.maxDataBufferSize())
             # x values
             self._xBuffer.append(self._currentpoint)
@@ -880,6 +993,15 @@ class TaurusTrend(TaurusPlot):
 
     DEFAULT_MAX_BUFFER_SIZE = 65536  # (=2**16, i.e., 64K events))
 
+    #: number of points already drawn that are redrawn on an incremental
+    #: replot (the last points of decimated curves may change on updates)
+    INCREMENTAL_REPLOT_OVERLAP = 9
+
+    # (class defaults, since replot may be called before __init__ finishes)
+    _incrementalReplot = False
+    _drawnState = None
+    _replotStats = None
+
     dataChanged = Qt.pyqtSignal('QString')
 
     def __init__(self, parent=None, designMode=False):
@@ -898,6 +1020,16 @@ class TaurusTrend(TaurusPlot):
         self._archivingWarningLocked = False
         self._forcedReadingPeriod = None
         self._replotTimer = None
+        self._replotPending = False
+        self._incrementalReplot = False
+        self._drawnState = None
+        self._replotStats = dict(full=0, incremental=0, drawnPoints=0)
+        from taurus import tauruscustomsettings
+        self._diskHistoryDir = getattr(tauruscustomsettings,
+                                       'T_TREND_HISTORY_DIR', None)
+        self._historyRefreshPending = False
+        self.axisWidget(self.xBottom).scaleDivChanged.connect(
+            self._onXScaleDivChanged)
         self.setXIsTime(True)
         # Use a rotated labels x timescale by default
         rotation = -45
@@ -1368,18 +1500,138 @@ class TaurusTrend(TaurusPlot):
         finally:
             self.curves_lock.release()
         self.dataChanged.emit(Qt.QString(name))
-        if not self.xIsTime:
-            self.replot()
-        else:
-            self._dirtyPlot = True
+        self._dirtyPlot = True
+        if not self.xIsTime and not self._replotPending:
+            # merge the updates of all the curves received before returning
+            # to the event loop into a single replot (in time mode this is
+            # done by the replot timer)
+            self._replotPending = True
+            Qt.QTimer.singleShot(0, self._doPendingReplot)
+
+    def _doPendingReplot(self):
+        self._replotPending = False
+        self.doReplot()
 
     def doReplot(self):
-        '''calls :meth:`replot` only if there is new data to be plotted'''
+        '''calls :meth:`replot` only if there is new data to be plotted. If
+        incremental replot is enabled (see :meth:`setIncrementalReplot`), only
+        the new points are drawn whenever possible'''
         #self.trace('Replotting? %s',self._dirtyPlot)
         if self._dirtyPlot:
-            self.replot()
+            if not (self._incrementalReplot and self._replotIncrementally()):
+                self.replot()
             self._dirtyPlot = False
 
+    def replot(self):
+        '''Reimplemented from :meth:`TaurusPlot.replot` to keep track of what
+        has been drawn (for incremental replots)'''
+        TaurusPlot.replot(self)
+        if self._replotStats is not None:
+            self._replotStats['full'] += 1
+        if self._incrementalReplot:
+            self._drawnState = self._getScalesState(), self._getCurvesState()
+        else:
+            self._drawnState = None
+
+    def _getScalesState(self):
+        '''returns a summary of the scales and the canvas size'''
+        bounds = []
+        for axis in range(Qwt5.QwtPlot.axisCnt):
+            sdiv = self.axisScaleDiv(axis)
+            bounds.append((sdiv.lowerBound(), sdiv.upperBound()))
+        return tuple(bounds), self.canvas().width(), self.canvas().height()
+
+    def _getCurvesState(self):
+        '''returns a dict of curve name to (size, first x) of the curve data'''
+        state = {}
+        for name, curve in self.curves.iteritems():
+            data = curve.data()
+            n = data.size()
+            state[name] = n, (data.x(0) if n else None), curve.isVisible()
+        return state
+
+    def _replotIncrementally(self):
+        '''draws only the points appended to the curves since the last replot
+        on the canvas (and its paint cache).
+
+        This is only possible if the scales and the canvas did not change
+        (e.g., due to scrolling or autoscaling) and if the points already
+        drawn did not change either (e.g. the oldest ones have not been
+        discarded from the buffers).
+
+        :return: (bool) True if the incremental replot was done. If False, a
+                 full replot is needed
+        '''
+        if self._drawnState is None or self._showMaxPeaks or self._showMinPeaks:
+            return False
+        drawnScales, drawnCurves = self._drawnState
+        # calculate the scales that a full replot would use (autoscale)
+        self.updateAxes()
+        if self._getScalesState() != drawnScales:
+            return False
+        curves = self._getCurvesState()
+        if sorted(curves) != sorted(drawnCurves):
+            return False
+        toDraw = []
+        for name, (n, x0, visible) in curves.iteritems():
+            drawnN, drawnX0, drawnVisible = drawnCurves[name]
+            if visible != drawnVisible or x0 != drawnX0 or n < drawnN:
+                return False
+            if visible and n > drawnN:
+                start = max(0, drawnN - self.INCREMENTAL_REPLOT_OVERLAP)
+                toDraw.append((self.curves[name], start, n - 1))
+        for curve, start, end in toDraw:
+            curve.draw(start, end)
+            self._replotStats['drawnPoints'] += end - start + 1
+        self._replotStats['incremental'] += 1
+        self._drawnState = drawnScales, curves
+        return True
+
+    def getReplotStats(self):
+        '''
+        Returns some counters of the replots: the number of full replots
+        ("full"), of incremental replots ("incremental", see
+        :meth:`setIncrementalReplot`) and of points drawn by the incremental
+        replots ("drawnPoints").
+
+        :return: (dict<str, int>)
+        '''
+        return dict(self._replotStats)
+
+    def setIncrementalReplot(self, enable):
+        '''Enables/disables the incremental replot mode. In this mode, when
+        new data arrives and neither the scales nor the already plotted data
+        changed, only the new segments of the curves are drawn on top of the
+        current canvas instead of replotting everything. A full replot is
+        still done whenever the scales change (e.g. when the time axis
+        scrolls).
+
+        .. note:: In incremental mode the min/max peak markers are not
+                  supported (a full replot is always done if they are shown)
+
+        :param enable: (bool) If True, incremental replot is enabled
+        '''
+        self._incrementalReplot = enable
+        self._drawnState = None
+        if enable:
+            # the incremental drawing relies on the canvas paint cache
+            self.canvas().setPaintAttribute(Qwt5.QwtPlotCanvas.PaintCached,
+                                            True)
+        self.replot()
+
+    def getIncrementalReplot(self):
+        '''whether the incremental replot mode is enabled
+
+        :return: (bool)
+
+        .. seealso:: :meth:`setIncrementalReplot`
+        '''
+        return self._incrementalReplot
+
+    def resetIncrementalReplot(self):
+        '''Same as setIncrementalReplot(False)'''
+        self.setIncrementalReplot(False)
+
     def rescheduleReplot(self, axis=Qwt5.QwtPlot.xBottom, width=1080):
         '''calculates the replotting frequency based on the time axis range.
         It assumes that it is unnecessary to replot with a period less than the
@@ -1684,6 +1936,74 @@ class TaurusTrend(TaurusPlot):
         '''Same as setMaxDataBufferSize(self.DEFAULT_MAX_BUFFER_SIZE)'''
         self.setMaxDataBufferSize(self.DEFAULT_MAX_BUFFER_SIZE)
 
+    def setDiskHistoryDir(self, directory):
+        '''sets the directory in which the trend sets store their histories.
+        If a directory is set, the history of each trend set is stored in
+        memory-mapped files in it (see :class:`DiskHistoryBuffer`) instead of
+        in memory-limited buffers (the max data buffer size is then ignored).
+        Only the data in the range of the x axis is read from disk, and
+        decimated data is used when the range contains many more points than
+        pixels. Note that archiving is not supported for trend sets with a
+        disk history.
+
+        Changing the directory clears the buffers.
+
+        :param directory: (str or None) a directory (it is created if it does
+                          not exist) or None for keeping the histories in
+                          memory
+
+        .. seealso:: :meth:`setMaxDataBufferSize`
+        '''
+        directory = str(directory) if directory else None
+        if directory == self._diskHistoryDir:
+            return
+        self._diskHistoryDir = directory
+        self.clearBuffers()
+
+    def getDiskHistoryDir(self):
+        '''returns the directory in which the trend sets store their histories
+
+        :return: (str or None) None if the histories are kept in memory
+
+        .. seealso:: :meth:`setDiskHistoryDir`
+        '''
+        return self._diskHistoryDir
+
+    def resetDiskHistoryDir(self):
+        '''resets the disk history directory to the one set in
+        :mod:`taurus.tauruscustomsettings` (T_TREND_HISTORY_DIR)'''
+        from taurus import tauruscustomsettings
+        self.setDiskHistoryDir(getattr(tauruscustomsettings,
+                                       'T_TREND_HISTORY_DIR', None))
+
+    def closeEvent(self, event):
+        '''reimplemented from :meth:`TaurusPlot.closeEvent` to remove the
+        files of the disk histories of the trend sets'''
+        self.curves_lock.acquire()
+        try:
+            for ts in self.trendSets.itervalues():
+                ts.closeDiskHistory()
+        finally:
+            self.curves_lock.release()
+        TaurusPlot.closeEvent(self, event)
+
+    def _onXScaleDivChanged(self):
+        '''schedules re-reading the disk histories for the new x scale'''
+        if self._diskHistoryDir is not None and \
+                not self._historyRefreshPending:
+            self._historyRefreshPending = True
+            Qt.QTimer.singleShot(0, self._refreshDiskHistories)
+
+    def _refreshDiskHistories(self):
+        self._historyRefreshPending = False
+        self.curves_lock.acquire()
+        try:
+            tsets = self.trendSets.values()
+        finally:
+            self.curves_lock.release()
+        for ts in tsets:
+            ts.refreshDiskHistory()
+
     def _canvasContextMenu(self):
         ''' see :meth:`TaurusPlot._canvasContextMenu` '''
         menu = TaurusPlot._canvasContextMenu(self)
@@ -1821,6 +2141,8 @@ class TaurusTrend(TaurusPlot):
         "bool", getUseArchiving, setUseArchiving, resetUseArchiving)
     usePollingBuffer = Qt.pyqtProperty(
         "bool", getUsePollingBuffer, setUsePollingBuffer, resetUsePollingBuffer)
+    incrementalReplot = Qt.pyqtProperty(
+        "bool", getIncrementalReplot, setIncrementalReplot, resetIncrementalReplot)
     maxDataBufferSize = Qt.pyqtProperty(
         "int", getMaxDataBufferSize, setMaxDataBufferSize, resetMaxDataBufferSize)
     scrollstep = Qt.pyqtProperty(
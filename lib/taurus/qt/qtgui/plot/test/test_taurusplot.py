@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+
+#############################################################################
+##
+# This file is part of Taurus
+##
+# http://taurus-scada.org
+##
+# Copyright 2011 CELLS / ALBA Synchrotron, Bellaterra, Spain
+##
+# Taurus is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+##
+# Taurus is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+##
+# You should have received a copy of the GNU Lesser General Public License
+# along with Taurus.  If not, see <http://www.gnu.org/licenses/>.
+##
+#############################################################################
+
+"""Test for taurus.qt.qtgui.plot.taurusplot"""
+
+#__all__ = []
+
+__docformat__ = 'restructuredtext'
+
+import numpy
+from taurus.external import unittest
+from taurus.external.qt import Qt
+from taurus.qt.qtgui.test import BaseWidgetTestCase
+from taurus.qt.qtgui.plot import TaurusPlot
+
+
+class TaurusPlotPickTestCase(BaseWidgetTestCase, unittest.TestCase):
+    '''Test for the picking of data points of a (decimated) TaurusPlot'''
+
+    _klass = TaurusPlot
+
+    def setUp(self):
+        BaseWidgetTestCase.setUp(self)
+        self._widget.resize(400, 300)
+        self._widget.show()
+        self._app.processEvents()
+        rs = numpy.random.RandomState(0)
+        self.x = numpy.arange(100000, dtype=float)
+        self.y = rs.normal(size=self.x.size).cumsum()
+        self.curve = self._widget.attachRawData(
+            {'x': self.x, 'y': self.y}, id='picktest')
+        self._widget.replot()
+
+    def tearDown(self):
+        self._widget.close()
+        unittest.TestCase.tearDown(self)
+
+    def test_decimated(self):
+        '''the curve is decimated'''
+        self.assertTrue(self.curve.isDecimationEnabled())
+        self.assertTrue(self.curve.data().size() < self.x.size)
+
+    def test_pickedIndex(self):
+        '''the picked index refers to the undecimated data'''
+        plot = self._widget
+        for i in (0, 123, 54321, self.x.size - 1):
+            pos = Qt.QPoint(plot.transform(self.curve.xAxis(), self.x[i]),
+                            plot.transform(self.curve.yAxis(), self.y[i]))
+            picked, name, index = plot.pickDataPoint(pos, showMarker=False)
+            self.assertEqual(name, 'picktest')
+            self.assertEqual(picked.x(), self.x[index])
+            self.assertEqual(picked.y(), self.y[index])
+            # the picked point is the closest one (in pixels)
+            point = Qt.QPoint(plot.transform(self.curve.xAxis(), picked.x()),
+                              plot.transform(self.curve.yAxis(), picked.y()))
+            self.assertEqual((pos - point).manhattanLength(), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
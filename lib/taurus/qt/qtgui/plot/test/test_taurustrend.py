@@ -0,0 +1,234 @@
+#!/usr/bin/env python
+
+#############################################################################
+##
+# This file is part of Taurus
+##
+# http://taurus-scada.org
+##
+# Copyright 2011 CELLS / ALBA Synchrotron, Bellaterra, Spain
+##
+# Taurus is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+##
+# Taurus is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+##
+# You should have received a copy of the GNU Lesser General Public License
+# along with Taurus.  If not, see <http://www.gnu.org/licenses/>.
+##
+#############################################################################
+
+"""Test for taurus.qt.qtgui.plot.taurustrend"""
+
+#__all__ = []
+
+__docformat__ = 'restructuredtext'
+
+import os
+import shutil
+import tempfile
+import taurus
+from taurus.external import unittest
+from taurus.core.util.diskhistory import DiskHistoryBuffer
+from taurus.qt.qtgui.test import BaseWidgetTestCase
+from taurus.qt.qtgui.plot import TaurusTrend
+
+
+class _FakeTrendSet(object):
+    '''stands for a TaurusTrendsSet of a single curve (whose data is set by
+    the test instead of by the events of an attribute)'''
+
+    def __init__(self, name, curve):
+        self._curves = [(name, curve)]
+
+    def getCurves(self):
+        return self._curves
+
+
+class TaurusTrendReplotTestCase(BaseWidgetTestCase, unittest.TestCase):
+    '''Test for the incremental replots of TaurusTrend'''
+
+    _klass = TaurusTrend
+    NAMES = ('c0', 'c1', 'c2')
+
+    def setUp(self):
+        BaseWidgetTestCase.setUp(self)
+        w = self._widget
+        w.setXIsTime(False)
+        w.setXDynScale(False)
+        w.resize(400, 300)
+        w.show()
+        self.curves = {}
+        for name in self.NAMES:
+            curve = w.attachRawData({'x': [0.], 'y': [0.]}, id=name)
+            curve._xValues, curve._yValues = [0.], [0.]
+            w.trendSets[name] = _FakeTrendSet(name, curve)
+            self.curves[name] = curve
+        w.setAxisScale(w.xBottom, 0, 100)
+        w.setAxisScale(w.yLeft, -1, 10)
+        w.setIncrementalReplot(True)
+        self._app.processEvents()
+
+    def tearDown(self):
+        self._widget.trendSets.clear()
+        self._widget.close()
+        unittest.TestCase.tearDown(self)
+
+    def append(self, name, n, y=1.):
+        '''appends n points (at the next x values) to the given curve'''
+        curve = self.curves[name]
+        x0 = curve._xValues[-1]
+        curve._xValues = curve._xValues + [x0 + i + 1 for i in range(n)]
+        curve._yValues = curve._yValues + [y] * n
+        self._widget.curveDataChanged(name)
+
+    def getStatsDelta(self, before):
+        after = self._widget.getReplotStats()
+        return dict((k, after[k] - before[k]) for k in after)
+
+    def expectedDrawn(self, name, n):
+        '''number of points drawn when appending n points to a curve'''
+        drawn = len(self.curves[name]._xValues)
+        overlap = self._widget.INCREMENTAL_REPLOT_OVERLAP
+        return drawn + n - max(0, drawn - overlap)
+
+    def test_appends(self):
+        '''appended points are drawn incrementally'''
+        for n in (1, 5, 20):
+            expected = self.expectedDrawn('c0', n)
+            before = self._widget.getReplotStats()
+            self.append('c0', n)
+            self._app.processEvents()
+            self.assertEqual(self.getStatsDelta(before),
+                             dict(full=0, incremental=1,
+                                  drawnPoints=expected))
+
+    def test_burst(self):
+        '''the updates of several curves are merged into one replot'''
+        expected = sum(self.expectedDrawn(name, 3) for name in self.NAMES)
+        before = self._widget.getReplotStats()
+        for i in range(3):
+            for name in self.NAMES:
+                self.append(name, 1)
+        self._app.processEvents()
+        self.assertEqual(self.getStatsDelta(before),
+                         dict(full=0, incremental=1, drawnPoints=expected))
+
+    def test_rescale(self):
+        '''a full replot is done if the scales change'''
+        w = self._widget
+        w.setAxisAutoScale(w.yLeft)
+        self._app.processEvents()
+        before = w.getReplotStats()
+        self.append('c1', 2, y=1000.)  # (out of the current y scale)
+        self._app.processEvents()
+        delta = self.getStatsDelta(before)
+        self.assertEqual((delta['full'], delta['incremental']), (1, 0))
+        # once replotted, the next appends are incremental again
+        before = w.getReplotStats()
+        self.append('c1', 2, y=1.)
+        self._app.processEvents()
+        delta = self.getStatsDelta(before)
+        self.assertEqual((delta['full'], delta['incremental']), (0, 1))
+
+    def test_scroll(self):
+        '''a full replot is done if the x scale scrolls'''
+        w = self._widget
+        w.setXDynScale(True)
+        self._app.processEvents()
+        before = w.getReplotStats()
+        self.append('c2', 150)  # (beyond the current x scale)
+        self._app.processEvents()
+        delta = self.getStatsDelta(before)
+        self.assertTrue(delta['full'] >= 1)
+        self.assertEqual(delta['drawnPoints'], 0)
+
+    def test_discarded(self):
+        '''a full replot is done if the oldest points are discarded'''
+        self.append('c0', 5)
+        self._app.processEvents()
+        before = self._widget.getReplotStats()
+        curve = self.curves['c0']
+        curve._xValues, curve._yValues = curve._xValues[2:], \
+            curve._yValues[2:]
+        self.append('c0', 1)
+        self._app.processEvents()
+        self.assertEqual(self.getStatsDelta(before),
+                         dict(full=1, incremental=0, drawnPoints=0))
+
+    def test_disabled(self):
+        '''all the replots are full if incremental replot is disabled'''
+        self._widget.setIncrementalReplot(False)
+        self._app.processEvents()
+        before = self._widget.getReplotStats()
+        for name in self.NAMES:
+            self.append(name, 2)
+        self._app.processEvents()
+        self.assertEqual(self.getStatsDelta(before),
+                         dict(full=1, incremental=0, drawnPoints=0))
+
+
+class TaurusTrendDiskHistoryTestCase(BaseWidgetTestCase, unittest.TestCase):
+    '''Test for the lifetime of the disk histories of TaurusTrend'''
+
+    _klass = TaurusTrend
+
+    def setUp(self):
+        BaseWidgetTestCase.setUp(self)
+        self.dir = tempfile.mkdtemp()
+        self._widget.setDiskHistoryDir(self.dir)
+        self._widget.setModel('eval:1')
+        self.tset = self._widget.trendSets.values()[0]
+        value = taurus.Attribute('eval:1').read()
+        self.tset._updateHistory('eval:1', value)
+
+    def tearDown(self):
+        self._widget.close()
+        shutil.rmtree(self.dir, ignore_errors=True)
+        unittest.TestCase.tearDown(self)
+
+    def test_close(self):
+        '''the files are removed when the trend is closed'''
+        self.assertEqual(len(os.listdir(self.dir)), 1)
+        self._widget.close()
+        self.assertEqual(os.listdir(self.dir), [])
+
+    def test_removeModel(self):
+        '''the files are removed when the trend set is removed'''
+        self.assertEqual(len(os.listdir(self.dir)), 1)
+        self._widget.setModel([])
+        self.assertEqual(os.listdir(self.dir), [])
+
+    def test_incrementalRead(self):
+        '''the disk is only read again when the x scale changes'''
+        self._widget.setXIsTime(False)
+        self._widget.setXDynScale(True)
+        self._widget.setAxisScale(self._widget.xBottom, 0, 1000)
+        history = self.tset._history
+        reads = []
+
+        def read(*args, **kwargs):
+            reads.append(args)
+            return DiskHistoryBuffer.read(history, *args, **kwargs)
+        history.read = read
+        value = taurus.Attribute('eval:1').read()
+        x, y = self.tset._updateHistory('eval:1', value)
+        self.assertEqual(len(reads), 1)
+        for i in range(10):
+            x, y = self.tset._updateHistory('eval:1', value)
+        self.assertEqual(len(reads), 1)
+        self.assertEqual(len(x), len(history))
+        self.assertEqual(y.shape, (len(history), 1))
+        self._widget.setAxisScale(self._widget.xBottom, 5, 1005)
+        x, y = self.tset._updateHistory('eval:1', value)
+        self.assertEqual(len(reads), 2)
+        self.assertEqual(reads[-1][0], 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
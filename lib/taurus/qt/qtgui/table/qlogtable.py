@@ -34,11 +34,12 @@ __docformat__ = 'restructuredtext'
 import logging
 import logging.handlers
 import datetime
+import operator
 import threading
 import socket
 
 import taurus
-from taurus.core.util.log import Logger
+from taurus.core.util.log import Logger, LogRecordBuffer
 from taurus.core.util.remotelogmonitor import LogRecordStreamHandler, \
     LogRecordSocketReceiver
 from taurus.core.util.decorator.memoize import memoized
@@ -81,14 +82,17 @@ def getBrushForLevel(level):
     return f, g
 
 
-def _origin_cmp(rec1, rec2):
-    c1 = cmp(rec1.process, rec2.process)
-    if c1 == 0:
-        c2 = cmp(rec1.thread, rec2.thread)
-        if c2 == 0:
-            return cmp(rec1.name, rec2.name)
-        return c2
-    return c1
+def _origin_key(rec):
+    return rec.process, rec.thread, rec.name
+
+#: sort key of the records for each column
+_SORT_KEYS = {
+    LEVEL: operator.attrgetter('levelno'),
+    TIME: operator.attrgetter('created'),
+    MSG: operator.attrgetter('msg'),
+    NAME: operator.attrgetter('name'),
+    ORIGIN: _origin_key,
+}
 
 gethostname = memoized(socket.gethostname)
 
@@ -146,6 +150,12 @@ def _get_record_origin_tooltip(rec):
 
 
 class QLoggingTableModel(Qt.QAbstractTableModel, logging.Handler):
+    """A Qt table model of the taurus logging messages.
+
+    The records are kept in a :class:`LogRecordBuffer` of the given
+    capacity (the oldest ones are discarded when it is full). The records
+    emitted (from any thread) are added to the model in batches, every
+    freq seconds."""
 
     DftFont = Qt.QFont("Mono", 8)
     DftColSize = Qt.QSize(80, 20), Qt.QSize(200, 20), \
@@ -155,7 +165,7 @@ class QLoggingTableModel(Qt.QAbstractTableModel, logging.Handler):
         super(Qt.QAbstractTableModel, self).__init__()
         logging.Handler.__init__(self)
         self._capacity = capacity
-        self._records = []
+        self._records = LogRecordBuffer(capacity)
         self._accumulated_records = []
         Logger.addRootLogHandler(self)
         self.startTimer(freq * 1000)
@@ -165,18 +175,10 @@ class QLoggingTableModel(Qt.QAbstractTableModel, logging.Handler):
     # ---------------------------------
 
     def sort(self, column, order=Qt.Qt.AscendingOrder):
-        if column == LEVEL:
-            f = lambda a, b: cmp(a.levelno, b.levelno)
-        elif column == TIME:
-            f = lambda a, b: cmp(a.created, b.created)
-        elif column == MSG:
-            f = lambda a, b: cmp(a.msg, b.msg)
-        elif column == NAME:
-            f = lambda a, b: cmp(a.name, b.name)
-        elif column == ORIGIN:
-            f = _origin_cmp
-        self._records = sorted(self._records, cmp=f,
-                               reverse=order == Qt.Qt.DescendingOrder)
+        self.layoutAboutToBeChanged.emit()
+        self._records.sort(_SORT_KEYS[column],
+                           reverse=order == Qt.Qt.DescendingOrder)
+        self.layoutChanged.emit()
 
     def rowCount(self, index=Qt.QModelIndex()):
         return len(self._records)
@@ -187,6 +189,13 @@ class QLoggingTableModel(Qt.QAbstractTableModel, logging.Handler):
     def getRecord(self, index):
         return self._records[index.row()]
 
+    def getRecordBuffer(self):
+        """returns the buffer of the records of the model
+
+        :return: (LogRecordBuffer)
+        """
+        return self._records
+
     def data(self, index, role=Qt.Qt.DisplayRole):
         if not index.isValid() or not (0 <= index.row() < len(self._records)):
             return Qt.QVariant()
@@ -288,30 +297,55 @@ class QLoggingTableModel(Qt.QAbstractTableModel, logging.Handler):
     def updatePendingRecords(self):
         if not self._accumulated_records:
             return
-        row_nb = self.rowCount()
-        records = self._accumulated_records
-        self._accumulated_records = []
+        self.acquire()
+        try:
+            records = self._accumulated_records
+            self._accumulated_records = []
+        finally:
+            self.release()
+        # only the newest records fit in the buffer
+        records = records[-self._capacity:]
+        # first make room for them (removing the oldest rows in one batch)
+        # and then insert them (in another batch)
+        discard = len(self._records) + len(records) - self._capacity
+        if discard > 0:
+            self.beginRemoveRows(Qt.QModelIndex(), 0, discard - 1)
+            self._records.removeFirst(discard)
+            self.endRemoveRows()
+        row_nb = len(self._records)
+        self.beginInsertRows(Qt.QModelIndex(), row_nb,
+                             row_nb + len(records) - 1)
         self._records.extend(records)
-        self.insertRows(row_nb, len(records))
-        if len(self._records) > self._capacity:
-            start = len(self._records) - self._capacity
-            self._records = self._records[start:]
-            self.removeRows(0, start)
+        self.endInsertRows()
 
     def emit(self, record):
         self._accumulated_records.append(record)
 
+    def emitRecords(self, records):
+        """adds (from any thread) records to the ones pending to be shown
+
+        :param records: (seq<logging.LogRecord>) the records
+        """
+        self.acquire()
+        try:
+            self._accumulated_records.extend(records)
+        finally:
+            self.release()
+
     def flush(self):
         pass
 
     def close(self):
         self.flush()
-        del self._records[:]
+        self._records.clear()
         logging.Handler.close(self)
 
 
 class _LogRecordStreamHandler(LogRecordStreamHandler):
 
+    def handleLogRecords(self, records):
+        self.server.data.get('model').emitRecords(records)
+
     def handleLogRecord(self, record):
         self.server.data.get('model').emit(record)
 
@@ -417,9 +451,17 @@ class LoggingToolBar(FilterToolBar):
 
 
 class QLoggingFilterProxyModel(Qt.QSortFilterProxyModel):
-    """A filter by log record object name"""
+    """A filter by log record object name (and log level).
+
+    The filter by name is evaluated once per logger name (not once per
+    record) and the records are sorted by their attributes (not by their
+    displayed text). The results of the filter by name are forgotten by the
+    methods that change the filter or invalidate it (note that they are
+    not virtual, so they must be called through this class, not from C++)"""
 
     def __init__(self, parent=None):
+        # dict<str, bool>: whether the filter accepts each logger name
+        self._acceptedNames = {}
         Qt.QSortFilterProxyModel.__init__(self, parent)
         self._logLevel = taurus.Trace
 
@@ -437,20 +479,69 @@ class QLoggingFilterProxyModel(Qt.QSortFilterProxyModel):
     def setFilterLogLevel(self, level):
         self._logLevel = level
 
+    def setFilterRegExp(self, regexp):
+        self._acceptedNames = {}
+        Qt.QSortFilterProxyModel.setFilterRegExp(self, regexp)
+
+    def setFilterFixedString(self, pattern):
+        self._acceptedNames = {}
+        Qt.QSortFilterProxyModel.setFilterFixedString(self, pattern)
+
+    def setFilterWildcard(self, pattern):
+        self._acceptedNames = {}
+        Qt.QSortFilterProxyModel.setFilterWildcard(self, pattern)
+
+    def setFilterCaseSensitivity(self, cs):
+        self._acceptedNames = {}
+        Qt.QSortFilterProxyModel.setFilterCaseSensitivity(self, cs)
+
+    def setFilterKeyColumn(self, column):
+        self._acceptedNames = {}
+        Qt.QSortFilterProxyModel.setFilterKeyColumn(self, column)
+
+    def invalidate(self):
+        self._acceptedNames = {}
+        Qt.QSortFilterProxyModel.invalidate(self)
+
+    def invalidateFilter(self):
+        self._acceptedNames = {}
+        Qt.QSortFilterProxyModel.invalidateFilter(self)
+
+    def filterChanged(self):
+        self._acceptedNames = {}
+        Qt.QSortFilterProxyModel.filterChanged(self)
+
     def __getattr__(self, name):
         return getattr(self.sourceModel(), name)
 
+    def _updateAcceptedNames(self):
+        regexp = self.filterRegExp()
+        accepted = self._acceptedNames
+        for name in self.sourceModel().getRecordBuffer().getLoggerNames():
+            if name not in accepted:
+                accepted[name] = regexp.indexIn(name) != -1
+
     def filterAcceptsRow(self, sourceRow, sourceParent):
-        sourceModel = self.sourceModel()
-        idx = sourceModel.index(sourceRow, NAME, sourceParent)
-        record = self.getRecord(idx)
+        record = self.sourceModel().getRecordBuffer()[sourceRow]
         if record.levelno < self._logLevel:
             return False
-        name = str(sourceModel.data(idx))
-        regexp = self.filterRegExp()
-        if regexp.indexIn(name) != -1:
-            return True
-        return False
+        accepted = self._acceptedNames.get(record.name)
+        if accepted is None:
+            # a new logger: evaluate the filter for all the new loggers
+            self._updateAcceptedNames()
+            accepted = self._acceptedNames[record.name]
+        return accepted
+
+    def lessThan(self, left, right):
+        # (sorting by time or by name gives the same order as sorting by
+        # their text, which is much slower)
+        column = left.column()
+        if column not in (TIME, NAME) or \
+                self.sortRole() != Qt.Qt.DisplayRole:
+            return Qt.QSortFilterProxyModel.lessThan(self, left, right)
+        records = self.sourceModel().getRecordBuffer()
+        key = _SORT_KEYS[column]
+        return key(records[left.row()]) < key(records[right.row()])
 
 
 _W = "Warning: Switching log perspective will erase previous log messages " \
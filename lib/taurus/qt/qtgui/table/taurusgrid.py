@@ -47,7 +47,6 @@ from taurus.external.qt import Qt, QtGui, QtCore
 
 import taurus
 from taurus.qt.qtcore.util.emitter import modelSetter, TaurusEmitterThread, SingletonWorker, MethodModel
-from taurus.core.taurusmanager import TaurusManager
 from taurus.core.util.log import Logger
 from taurus.qt.qtgui.base import TaurusBaseWidget
 from taurus.qt.qtgui.panel import TaurusValue
@@ -66,10 +65,10 @@ def re_match_low(regexp, target):
 def get_all_models(expressions, limit=1000):
     '''
     All devices matching expressions must be obtained.
-    For each device only the good attributes are read.
+    For each device only the good attributes are read (several devices at
+    once, see :class:`taurus.core.tango.search.ModelDiscovery`).
 
     It practically equals to fandango.get_matching_attributes; check which is better!
-    Move this method to taurus.core.tango.search
     '''
     #print( 'In TaurusGrid.get_all_models(%s:"%s") ...' % (type(expressions),expressions))
     if isinstance(expressions, str):
@@ -84,57 +83,8 @@ def get_all_models(expressions, limit=1000):
         #self.debug( 'expressions converted from list ...')
         expressions = list(str(e) for e in expressions)
 
-    #self.debug( 'In TaurusGrid.get_all_models(%s:"%s") ...' % (type(expressions),expressions))
-    taurus_db = taurus.Authority()
-    #taurus_db = taurus.Authority(os.environ['TANGO_HOST'])
-    # WHAAAAAAT????? Someone should get beaten for this line
-    if 'SimulationAuthority' in str(type(taurus_db)):
-        #self.trace( 'Using a simulated database ...')
-        models = expressions
-    else:
-        all_devs = taurus_db.get_device_exported('*')
-        models = []
-        for exp in expressions:
-            #self.trace( 'evaluating exp = "%s"' % exp)
-            exp = str(exp)
-            devs = []
-            targets = []
-            if exp.count('/') == 3:
-                device, attribute = exp.rsplit('/', 1)
-            else:
-                device, attribute = exp, 'State'
-
-            if any(c in device for c in '.*[]()+?'):
-                if '*' in device and '.*' not in device:
-                    device = device.replace('*', '.*')
-                devs = [s for s in all_devs if re_match_low(device, s)]
-            else:
-                devs = [device]
-
-            #self.trace( 'TaurusGrid.get_all_models(): devices matched by %s / %s are %d:' % (device,attribute,len(devs)))
-            #self.debug( '%s' % (devs))
-            for dev in devs:
-                if any(c in attribute for c in '.*[]()+?'):
-                    if '*' in attribute and '.*' not in attribute:
-                        attribute = attribute.replace('*', '.*')
-                    try:
-                        #taurus_dp = taurus.core.taurusdevice.TaurusDevice(dev)
-                        taurus_dp = taurus.core.taurusmanager.TaurusManager().getFactory()().getDevice(dev)
-                        #self.debug( "taurus_dp = %s"%taurus_dp.getFullName())
-                        attrs = [att.name for att in taurus_dp.attribute_list_query(
-                        ) if re_match_low(attribute, att.name)]
-                        targets.extend(dev + '/' + att for att in attrs)
-                    except Exception, e:
-                        #self.warning( 'ERROR! TaurusGrid.get_all_models(): Unable to get attributes for device %s: %s' % (dev,str(e)))
-                        pass
-                else:
-                    targets.append(dev + '/' + attribute)
-            # print 'TaurusGrid.get_all_models(): targets added by %s are: %s'
-            # % (exp,targets)
-            models.extend(targets)
-    models = models[:limit]
-    #print( 'Out of TaurusGrid.get_all_models(...)')
-    return models
+    from taurus.core.tango.search import ModelDiscovery
+    return ModelDiscovery(expressions, limit=limit).run()
 
 
 def get_readwrite_models(expressions, limit=1000):
@@ -154,45 +104,9 @@ def get_readwrite_models(expressions, limit=1000):
     elif any(isinstance(expressions, klass) for klass in (QtCore.QStringList, list, tuple, dict)):
         expressions = list(str(e) for e in expressions)
 
-    taurus_db = taurus.Authority()
-    # WHAAAT???? At least check instances...
-    if 'SimulationAuthority' in str(type(taurus_db)):
-        models = expressions
-    else:
-        all_devs = taurus_db.get_device_exported('*')
-        models = []
-        for exp in expressions:
-            exp = str(exp)
-            devs = []
-            targets = []
-            if exp.count('/') == 3:
-                device, attribute = exp.rsplit('/', 1)
-            else:
-                device, attribute = exp, 'State'
-
-            if any(c in device for c in '.*[]()+?'):
-                if '*' in device and '.*' not in device:
-                    device = device.replace('*', '.*')
-                devs = [s for s in all_devs if re_match_low(device, s)]
-            else:
-                devs = [device]
-
-            for dev in devs:
-                if any(c in attribute for c in '.*[]()+?'):
-                    if '*' in attribute and '.*' not in attribute:
-                        attribute = attribute.replace('*', '.*')
-                    try:
-                        taurus_dp = taurus.core.taurusmanager.TaurusManager().getFactory()().getDevice(dev)
-                        attrs = [att.name for att in taurus_dp.attribute_list_query(
-                        ) if re_match_low(attribute, att.name) and att.isReadOnly()]
-                        targets.extend(dev + '/' + att for att in attrs)
-                    except Exception, e:
-                        pass
-                else:
-                    targets.append(dev + '/' + attribute)
-            models.extend(targets)
-    models = models[:limit]
-    return models
+    from taurus.core.tango.search import ModelDiscovery
+    return ModelDiscovery(expressions, limit=limit,
+                          attrFilter=lambda att: att.isReadOnly()).run()
 
 
 class TaurusGrid(QtGui.QFrame, TaurusBaseWidget):
@@ -215,6 +129,14 @@ class TaurusGrid(QtGui.QFrame, TaurusBaseWidget):
 
     itemSelected = Qt.pyqtSignal('QString')
     itemClicked = Qt.pyqtSignal()
+    #: emitted with the models matching the patterns given to setModel, as
+    #: they are found (the grid is built when all of them are found)
+    modelsDiscovered = Qt.pyqtSignal(object)
+    _modelDiscoveryFinished = Qt.pyqtSignal()
+
+    #: number of devices whose attributes are read at once when searching
+    #: the models matching a pattern
+    DiscoveryWorkers = 8
 
     _TAGS = ['DOMAIN', 'FAMILY', 'HOST',
              'LEVEL', 'CLASS', 'ATTRIBUTE', 'DEVICE']
@@ -247,6 +169,10 @@ class TaurusGrid(QtGui.QFrame, TaurusBaseWidget):
         self._show_attr_units = True
         self.hideLabels = False
 
+        self._discovery = None
+        self._discoveryArgs = None
+        self._modelDiscoveryFinished.connect(self._onModelDiscoveryFinished)
+
         self.defineStyle()
         self.modelsQueue = Queue.Queue()
         self.__modelsThread = None
@@ -411,10 +337,19 @@ class TaurusGrid(QtGui.QFrame, TaurusBaseWidget):
 
             self.delayed = delayed
             self.filter = model
+            self.cancelModelDiscovery()
             if any('*' in m for m in model):
-                model = get_all_models(model)
-                self.debug(
-                    'model was a RegExp, done the query and converted to an attr list')
+                # the matching models are searched in background and then
+                # set (see _onModelDiscoveryFinished)
+                self.debug('model is a RegExp, searching the attributes')
+                from taurus.core.tango.search import ModelDiscovery
+                self._discoveryArgs = model, devsInRows, delayed, append, load
+                self._discovery = ModelDiscovery(
+                    model, workers=self.DiscoveryWorkers)
+                self._discovery.start(
+                    callback=self.modelsDiscovered.emit,
+                    finished=self._modelDiscoveryFinished.emit)
+                return
 
             if not self._modelNames == []:  # clean to start from scratch
                 for widget in self._widgets_list:
@@ -472,6 +407,39 @@ class TaurusGrid(QtGui.QFrame, TaurusBaseWidget):
     def getModel(self):
         return self._modelNames
 
+    def cancelModelDiscovery(self):
+        '''Cancels the search of the models matching the patterns given to
+        :meth:`setModel`, if it is in progress'''
+        discovery, self._discovery = self._discovery, None
+        if discovery is not None:
+            # (cleared before cancelling, since the "finished" notification of
+            # the cancelled search may be delivered synchronously)
+            discovery.cancel()
+
+    def isDiscoveringModels(self):
+        '''Returns True while the models matching the patterns given to
+        :meth:`setModel` are being searched
+
+        :return: (bool)
+        '''
+        return self._discovery is not None
+
+    def _onModelDiscoveryFinished(self):
+        discovery = self._discovery
+        # (the search may have been cancelled and a new one started)
+        if discovery is None or discovery.isCancelled() or \
+                not discovery.isFinished():
+            return
+        self._discovery = None
+        patterns, devsInRows, delayed, append, load = self._discoveryArgs
+        if discovery.getError() is not None:
+            self.warning('Unable to find the models of %s: %s' %
+                         (patterns, discovery.getError()))
+            return
+        self.setModel(discovery.getModels(), devsInRows=devsInRows,
+                      delayed=delayed, append=append, load=load)
+        self.filter = patterns
+
     def resetModel(self):
         self._modelNames = []
         self.updateFromList(self._modelNames)
@@ -0,0 +1,96 @@
+#!/usr/bin/env python
+
+#############################################################################
+##
+# This file is part of Taurus
+##
+# http://taurus-scada.org
+##
+# Copyright 2011 CELLS / ALBA Synchrotron, Bellaterra, Spain
+##
+# Taurus is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+##
+# Taurus is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+##
+# You should have received a copy of the GNU Lesser General Public License
+# along with Taurus.  If not, see <http://www.gnu.org/licenses/>.
+##
+#############################################################################
+
+"""Test for taurus.qt.qtgui.table.qlogtable"""
+
+#__all__ = []
+
+__docformat__ = 'restructuredtext'
+
+import logging
+from taurus.external import unittest
+from taurus.external.qt import Qt
+from taurus.test import insertTest
+from taurus.core.util.log import Logger
+from taurus.qt.qtgui.test import BaseWidgetTestCase
+from taurus.qt.qtgui.table.qlogtable import (QLoggingTableModel,
+                                             QLoggingFilterProxyModel)
+
+
+@insertTest(helper_name='checkFilter', method='setFilterRegExp',
+            pattern='^QLogTableTest_b')
+@insertTest(helper_name='checkFilter', method='setFilterFixedString',
+            pattern='qlogtabletest_b')
+@insertTest(helper_name='checkFilter', method='setFilterWildcard',
+            pattern='QLogTableTest_[b]*')
+class QLoggingFilterProxyModelTestCase(BaseWidgetTestCase, unittest.TestCase):
+    '''Test for the filter by logger name of QLoggingFilterProxyModel'''
+
+    names = ('QLogTableTest_a', 'QLogTableTest_b', 'QLogTableTest_b')
+
+    def setUp(self):
+        BaseWidgetTestCase.setUp(self)
+        self.model = QLoggingTableModel(capacity=100)
+        self.model.emitRecords([
+            logging.LogRecord(name, logging.ERROR, __file__, i, 'msg', (),
+                              None)
+            for i, name in enumerate(self.names)])
+        self.model.updatePendingRecords()
+        self.proxy = QLoggingFilterProxyModel()
+        self.proxy.setSourceModel(self.model)
+        # the accepted names are remembered for this filter
+        self.proxy.setFilterRegExp('^QLogTableTest_a')
+        self.assertEqual(self.proxy.rowCount(), 1)
+
+    def tearDown(self):
+        Logger.removeRootLogHandler(self.model)
+        self.model.close()
+        unittest.TestCase.tearDown(self)
+
+    def checkFilter(self, method=None, pattern=None):
+        '''check that changing the filter with the given method forgets the
+        names accepted by the previous filter'''
+        getattr(self.proxy, method)(pattern)
+        self.assertEqual(self.proxy.rowCount(), 2)
+
+    def test_caseSensitivity(self):
+        '''changing the case sensitivity forgets the accepted names'''
+        self.proxy.setFilterRegExp('^qlogtabletest')
+        self.assertEqual(self.proxy.rowCount(), 3)
+        self.proxy.setFilterCaseSensitivity(Qt.Qt.CaseSensitive)
+        self.assertEqual(self.proxy.rowCount(), 0)
+
+    def test_invalidateFilter(self):
+        '''invalidating the filter forgets the accepted names'''
+        regexp = self.proxy.filterRegExp()
+        regexp.setPattern('^QLogTableTest_b')
+        # (the C++ setter is not seen by the proxy, which is invalidated)
+        Qt.QSortFilterProxyModel.setFilterRegExp(self.proxy, regexp)
+        self.proxy.invalidateFilter()
+        self.assertEqual(self.proxy.rowCount(), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,111 @@
+#!/usr/bin/env python
+
+#############################################################################
+##
+# This file is part of Taurus
+##
+# http://taurus-scada.org
+##
+# Copyright 2011 CELLS / ALBA Synchrotron, Bellaterra, Spain
+##
+# Taurus is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+##
+# Taurus is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+##
+# You should have received a copy of the GNU Lesser General Public License
+# along with Taurus.  If not, see <http://www.gnu.org/licenses/>.
+##
+#############################################################################
+
+"""Test for taurus.qt.qtgui.table.taurusgrid"""
+
+#__all__ = []
+
+__docformat__ = 'restructuredtext'
+
+from taurus.external import unittest
+from taurus.qt.qtgui.test import BaseWidgetTestCase
+from taurus.qt.qtgui.table import TaurusGrid
+
+
+class _FakeDiscovery(object):
+    '''Stands for a :class:`taurus.core.tango.search.ModelDiscovery` that has
+    found some models. Like the real one, it notifies that it has finished
+    from within :meth:`cancel`'''
+
+    def __init__(self, grid, models):
+        self._grid = grid
+        self._models = models
+        self._cancelled = False
+        self._finished = False
+        self._error = None
+
+    def cancel(self):
+        self._cancelled = True
+        self.finish()
+
+    def finish(self, error=None):
+        self._error = error
+        self._finished = True
+        self._grid._modelDiscoveryFinished.emit()
+
+    def isCancelled(self):
+        return self._cancelled
+
+    def isFinished(self):
+        return self._finished
+
+    def getError(self):
+        return self._error
+
+    def getModels(self):
+        return list(self._models)
+
+
+class TaurusGridDiscoveryTestCase(BaseWidgetTestCase, unittest.TestCase):
+    '''Test for the background discovery of the models of TaurusGrid'''
+
+    _klass = TaurusGrid
+    initkwargs = dict(designMode=True)
+
+    def setUp(self):
+        BaseWidgetTestCase.setUp(self)
+        self.models = []
+        self._widget.setModel = lambda models, **kwargs: \
+            self.models.append(models)
+        self._widget.filter = ['eval:1']
+        self.discovery = _FakeDiscovery(self._widget, ['a/b/c/d'])
+        self._widget._discovery = self.discovery
+        self._widget._discoveryArgs = (['a/b/c/*'], False, False, False, True)
+
+    def test_finished(self):
+        '''the models found are set when the search finishes'''
+        self.discovery.finish()
+        self.assertEqual(self.models, [['a/b/c/d']])
+        self.assertEqual(self._widget.filter, ['a/b/c/*'])
+        self.assertFalse(self._widget.isDiscoveringModels())
+
+    def test_cancel(self):
+        '''the partial results of a cancelled search are not set'''
+        self._widget.cancelModelDiscovery()
+        self.assertTrue(self.discovery.isCancelled())
+        self.assertEqual(self.models, [])
+        self.assertEqual(self._widget.filter, ['eval:1'])
+        self.assertFalse(self._widget.isDiscoveringModels())
+
+    def test_error(self):
+        '''the discovery ends (without setting the models) if it fails'''
+        self.discovery.finish(error=RuntimeError('no database'))
+        self.assertEqual(self.models, [])
+        self.assertEqual(self._widget.filter, ['eval:1'])
+        self.assertFalse(self._widget.isDiscoveringModels())
+
+
+if __name__ == '__main__':
+    unittest.main()
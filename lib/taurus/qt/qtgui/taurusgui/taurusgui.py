@@ -1011,6 +1011,27 @@ class TaurusGui(TaurusMainWindow):
                 if result == Qt.QMessageBox.Abort:
                     sys.exit()
 
+        # Synoptics
+        SYNOPTIC = getattr(conf, 'SYNOPTIC', None)
+        if isinstance(SYNOPTIC, basestring):  # old config file style
+            self.warning(
+                'Deprecated usage of SYNOPTIC keyword (now it expects a list of paths). Please update your configuration file to: "SYNOPTIC=[\'%s\']".' % SYNOPTIC)
+            SYNOPTIC = [SYNOPTIC]
+        if SYNOPTIC is None:  # we look in the xml config file if not present in the python config
+            SYNOPTIC = []
+            node = xmlroot.find("SYNOPTIC")
+            if (node is not None) and (node.text is not None):
+                for child in node:
+                    s = child.get("str")
+                    # we do not append empty strings
+                    if s is not None and len(s):
+                        SYNOPTIC.append(s)
+        if SYNOPTIC:
+            # parse them in background while the rest of the GUI is created
+            from taurus.qt.qtgui.graphic.jdraw import jdraw_parser
+            jdraw_parser.preparse([os.path.join(self._confDirectory, s)
+                                   for s in SYNOPTIC])
+
         # General Qt application settings and jorgs bar logos
         APPNAME = getattr(conf, 'GUI_NAME', self.__getVarFromXML(
             xmlroot, "GUI_NAME", confname))
@@ -1100,20 +1121,6 @@ class TaurusGui(TaurusMainWindow):
             ParamEditorManager().browsePaths()
 
         # Synoptics
-        SYNOPTIC = getattr(conf, 'SYNOPTIC', None)
-        if isinstance(SYNOPTIC, basestring):  # old config file style
-            self.warning(
-                'Deprecated usage of SYNOPTIC keyword (now it expects a list of paths). Please update your configuration file to: "SYNOPTIC=[\'%s\']".' % SYNOPTIC)
-            SYNOPTIC = [SYNOPTIC]
-        if SYNOPTIC is None:  # we look in the xml config file if not present in the python config
-            SYNOPTIC = []
-            node = xmlroot.find("SYNOPTIC")
-            if (node is not None) and (node.text is not None):
-                for child in node:
-                    s = child.get("str")
-                    # we do not append empty strings
-                    if s is not None and len(s):
-                        SYNOPTIC.append(s)
         for s in SYNOPTIC:
             self.createMainSynoptic(s)
 
@@ -295,6 +295,11 @@ class QBaseTreeWidget(QBaseModelWidget):
         if not index.isValid():
             return
 
+        # create its children, if they have not been created yet
+        model = index.model()
+        if model.canFetchMore(index):
+            model.fetchMore(index)
+
         # do not enter if the item doesn't have any children
         if base_index.internalPointer().childCount() == 0:
             return
@@ -53,7 +53,7 @@ from taurus.external.qt import Qt
 
 import taurus.core
 from taurus.core.util.colors import DEVICE_STATE_PALETTE, ATTRIBUTE_QUALITY_PALETTE
-from taurus.core.util.containers import CaselessDict
+from taurus.core.util.containers import CaselessDict, MatchIndex
 from taurus.core.tango.search import *  # @TODO: Avoid implicit imports
 from taurus.qt.qtcore.util.emitter import SingletonWorker
 from taurus.qt.qtcore.mimetypes import *  # @TODO: Avoid implicit imports
@@ -114,7 +114,9 @@ class TaurusTreeNodeContainer(object):
                 f.setItalic(True)
             item.setFont(0, f)
         item.parentTree = self  # hook used to call external methods with item as single argument
-        self.item_index[value.strip().split()[0]] = item
+        key = value.strip().split()[0]
+        self.item_index[key] = item
+        self._addToNodeIndex(key, item)
         try:
             icon = self.getNodeIcon(item)
             if icon:
@@ -343,6 +345,13 @@ class TaurusDevTree(TaurusTreeNodeContainer, Qt.QTreeWidget, TaurusBaseWidget):
     deviceSelected = Qt.pyqtSignal('QString')
     addAttrSelected = Qt.pyqtSignal('QStringList')
     removeAttrSelected = Qt.pyqtSignal('QStringList')
+    # device, attribute list and error (emitted from the loader threads)
+    _attributesLoaded = Qt.pyqtSignal(object, object, object)
+
+    #: time (in s) during which the attribute lists of the devices are cached
+    AttrListTTL = 60
+    #: timeout (in ms) of the queries of the attribute lists
+    AttrListTimeout = 1000
 
     def __init__(self, parent=None, designMode=False):
         name = "TaurusDevTree"
@@ -367,6 +376,19 @@ class TaurusDevTree(TaurusTreeNodeContainer, Qt.QTreeWidget, TaurusBaseWidget):
         # NOTE: as several nodes may share the same name this list will be
         # different from item_index.values()!!!
         self.item_list = set()
+        # index of the names (and texts) of the nodes of each parent node,
+        # updated as the nodes are created, for searching them without
+        # matching every node (see getMatchingNodes)
+        self._nodeIndex = MatchIndex(self._getIndexTexts)
+        self._nodeGroups = {}
+        self._dirtyGroups = set()
+        # the attribute lists are read in background (see loadAttributes)
+        self._attrLoader = AttributeListLoader(ttl=self.AttrListTTL,
+                                               timeout=self.AttrListTimeout)
+        # dict<str, list<tuple>>: the nodes waiting for each attribute list
+        self._attrRequests = {}
+        # dict<QTreeWidgetItem, bool>: the nodes queued in the Expander
+        self._expandRequests = {}
         self.setSelectionMode(self.ExtendedSelection)
 
         self.ContextMenu = []
@@ -385,6 +407,7 @@ class TaurusDevTree(TaurusTreeNodeContainer, Qt.QTreeWidget, TaurusBaseWidget):
         self.initConfig()
 
         # Signal
+        self._attributesLoaded.connect(self._onAttributesLoaded)
         self.itemclicked.connect(self.deviceClicked)
         self.nodeFound.connect(self.expandNode)
         self.setDragDropMode(Qt.QAbstractItemView.DragDrop)
@@ -414,12 +437,21 @@ class TaurusDevTree(TaurusTreeNodeContainer, Qt.QTreeWidget, TaurusBaseWidget):
         expander = self.__expander
         if expander is None:
             expander = SingletonWorker(parent=self, name='NodeExpander',
-                                       method=lambda node, expand: node.setExpanded(
-                                           expand),
+                                       method=self._expandQueuedNode,
                                        cursor=True, start=True)
             self.__expander = expander
         return expander
 
+    def _queueExpand(self, node, expand):
+        """ Queues the expansion (or collapse) of a node in the Expander; the
+        repeated requests of a node are merged until it is expanded """
+        if node not in self._expandRequests:
+            self.Expander.getQueue().put((node, expand))
+        self._expandRequests[node] = expand
+
+    def _expandQueuedNode(self, node, expand):
+        node.setExpanded(self._expandRequests.pop(node, expand))
+
     def getConfig(self, name):
         properties.get_property(self, name)
 
@@ -694,7 +726,12 @@ class TaurusDevTree(TaurusTreeNodeContainer, Qt.QTreeWidget, TaurusBaseWidget):
     def clear(self):
         while not self.Expander.getQueue().empty():
             self.Expander.getQueue().get()
+        self._expandRequests.clear()
+        self._attrRequests.clear()
         self.item_index.clear()
+        self._nodeIndex.clear()
+        self._nodeGroups.clear()
+        self._dirtyGroups.clear()
         while self.item_list:
             self.item_list.pop()
         Qt.QTreeWidget.clear(self)
@@ -730,27 +767,11 @@ class TaurusDevTree(TaurusTreeNodeContainer, Qt.QTreeWidget, TaurusBaseWidget):
         @argin expert If False only PyTango.DispLevel.OPERATOR attributes are displayed
         @argin allow_types Only those types included in the list will be displayed (e.g. may be restricted to numeric types only)
         """
-        numeric_types = [PyTango.DevDouble, PyTango.DevFloat, PyTango.DevLong, PyTango.DevLong64,
-                         PyTango.DevULong, PyTango.DevShort, PyTango.DevUShort, PyTango.DevBoolean, PyTango.DevState]
-        allow_types = allow_types or [PyTango.DevString] + numeric_types
         dct = {}
         self.trace('In addAttrToDev(%s)' % my_device)
         try:
-            proxy = PyTango.DeviceProxy(my_device)
-            timeout = proxy.get_timeout_millis()
-            proxy.set_timeout_millis(50)
-            proxy.ping()
-            list_attr = proxy.attribute_list_query()
-            proxy.set_timeout_millis(timeout)
-
-            for aname, my_attr in sorted([(a.name, a) for a in list_attr]):
-                if allow_types and my_attr.data_type not in allow_types:
-                    continue
-                if not expert and my_attr.disp_level == PyTango.DispLevel.EXPERT:
-                    continue
-                label = aname == my_attr.label and aname.lower(
-                ) or "%s (%s)" % (aname.lower(), my_attr.label)
-                dct[str(my_device).lower() + '/' + label] = 0
+            list_attr = self._attrLoader.getAttributes(my_device)
+            dct = self._filterAttrs(my_device, list_attr, expert, allow_types)
         except PyTango.DevFailed, e:
             self.warning('addAttrToDev(%s): %s' % (my_device, str(e)))
             qmsg = Qt.QMessageBox(Qt.QMessageBox.Critical, '%s Error' %
@@ -763,11 +784,67 @@ class TaurusDevTree(TaurusTreeNodeContainer, Qt.QTreeWidget, TaurusBaseWidget):
             qmsg.show()
         return dct
 
+    def _filterAttrs(self, my_device, list_attr, expert=False, allow_types=None):
+        """ Returns the names (with labels) of the given attribute infos of a device, applying display level and type filters (see addAttrToDev) """
+        numeric_types = [PyTango.DevDouble, PyTango.DevFloat, PyTango.DevLong, PyTango.DevLong64,
+                         PyTango.DevULong, PyTango.DevShort, PyTango.DevUShort, PyTango.DevBoolean, PyTango.DevState]
+        allow_types = allow_types or [PyTango.DevString] + numeric_types
+        dct = {}
+        for aname, my_attr in sorted([(a.name, a) for a in list_attr]):
+            if allow_types and my_attr.data_type not in allow_types:
+                continue
+            if not expert and my_attr.disp_level == PyTango.DispLevel.EXPERT:
+                continue
+            label = aname == my_attr.label and aname.lower(
+            ) or "%s (%s)" % (aname.lower(), my_attr.label)
+            dct[str(my_device).lower() + '/' + label] = 0
+        return dct
+
     def addAttrToNode(self, node=None, full=False):
+        """ Shows the attributes of a device node (they are read in background, see loadAttributes) """
         node = node or self.currentItem()
-        dev = self.getNodeDeviceName(node)
-        self.trace('In addAttrToNode(%s)' % dev)
-        attrs = self.addAttrToDev(dev)
+        self.trace('In addAttrToNode(%s)' % self.getNodeDeviceName(node))
+        self.loadAttributes([node], full=full)
+
+    def loadAttributes(self, nodes=None, full=False):
+        """
+        Shows the attributes of the given device nodes (by default, of all the expanded device nodes).
+        The attribute lists of all the devices are requested at once and read in background threads;
+        the nodes which are already waiting for their attributes are ignored and the lists are cached
+        for AttrListTTL seconds.
+        """
+        if nodes is None:
+            nodes = [n for n in self.item_list if n.isExpanded() and not n.isAttribute and
+                     self.getNodeDeviceName(n).count('/') == 2]
+        # (the errors are only notified when requested for a single node)
+        notify = len(nodes) == 1
+        devices = []
+        for node in nodes:
+            dev = self.getNodeDeviceName(node)
+            requests = self._attrRequests.setdefault(dev.lower(), [])
+            if any(n is node for n, f, m in requests):
+                continue
+            if not requests:
+                devices.append(dev)
+            requests.append((node, full, notify))
+        if devices:
+            self.trace('In loadAttributes(%d devices)' % len(devices))
+            self._attrLoader.request(devices, self._attributesLoaded.emit)
+
+    def _onAttributesLoaded(self, dev, list_attr, error):
+        requests = self._attrRequests.pop(str(dev).lower(), [])
+        if error is not None:
+            self.warning('addAttrToNode(%s): %s' % (dev, str(error)))
+            if any(m for n, f, m in requests):
+                msg = isinstance(error, PyTango.DevFailed) and '%s not available' % dev or str(error)
+                qmsg = Qt.QMessageBox(Qt.QMessageBox.Critical, '%s Error' %
+                                      dev, msg, Qt.QMessageBox.Ok, self)
+                qmsg.show()
+            return
+        for node, full, notify in requests:
+            self._addAttrItems(node, dev, self._filterAttrs(dev, list_attr), full)
+
+    def _addAttrItems(self, node, dev, attrs, full=False):
         children = [str(node.child(i).text(0)).lower()
                     for i in range(node.childCount())]
         for aname in sorted(attrs):
@@ -826,8 +903,18 @@ class TaurusDevTree(TaurusTreeNodeContainer, Qt.QTreeWidget, TaurusBaseWidget):
             node = self.item_index.get(regexp, None)
             if node is not None:
                 return [node]
-        regexp = re.compile(extend_regexp(regexp))
-        for k, node in self.item_index.iteritems():
+        regexp = extend_regexp(regexp)
+        # only the nodes containing the text required by the regexp are
+        # matched (if it can be known)
+        literal = get_required_literal(regexp)
+        regexp = re.compile(regexp)
+        if literal:
+            candidates = self._getCandidateNodes(literal)
+        else:
+            candidates = self.item_index.iteritems()
+        for k, node in candidates:
+            if literal and self.item_index.get(k) is not node:
+                continue  # (replaced by another node with the same name)
             nname = self.getNodeText(node, full=True).lower()
             if (regexp.match(k) or regexp.match(nname)) and \
                     (not exclude or not any(re.match(x.lower(), y) for x in exclude for y in (k.lower(), nname))):
@@ -838,6 +925,27 @@ class TaurusDevTree(TaurusTreeNodeContainer, Qt.QTreeWidget, TaurusBaseWidget):
                     break
         return result
 
+    def _getIndexTexts(self, entry):
+        key, node = entry
+        return key, self.getNodeText(node, full=True)
+
+    def _addToNodeIndex(self, key, node):
+        parent = node.parentNode
+        self._nodeGroups.setdefault(parent, []).append((key.lower(), node))
+        self._dirtyGroups.add(parent)
+
+    def _getCandidateNodes(self, text):
+        """ Returns the (name, node) of the nodes whose name or text contains the given (lower-cased) text """
+        index = self._nodeIndex
+        # (the groups of the nodes created since the last search)
+        for parent in self._dirtyGroups:
+            index.setGroup(parent, self._nodeGroups[parent])
+        self._dirtyGroups.clear()
+        result = []
+        for parent in self._nodeGroups:
+            result.extend(index.getMatches(parent, text))
+        return result
+
     def getSelectedNodes(self):
         return self.selectedItems()
 
@@ -973,12 +1081,12 @@ class TaurusDevTree(TaurusTreeNodeContainer, Qt.QTreeWidget, TaurusBaseWidget):
                     matched, expanded = item in parents, item.isExpanded()
                     if (matched and not expanded):
                         if queue:
-                            self.Expander.getQueue().put((item, True))
+                            self._queueExpand(item, True)
                         else:
                             item.setExpanded(True)
                     elif (not matched and expanded and self.collapsing_search):
                         if queue:
-                            self.Expander.getQueue().put((item, False))
+                            self._queueExpand(item, False)
                         else:
                             item.setExpanded(False)
                 if select:
@@ -989,7 +1097,7 @@ class TaurusDevTree(TaurusTreeNodeContainer, Qt.QTreeWidget, TaurusBaseWidget):
             else:
                 if collapseAll:
                     if queue:
-                        [self.Expander.getQueue().put((item, False))
+                        [self._queueExpand(item, False)
                          for item in self.item_list if item.isExpanded()]
                     else:
                         [item.setExpanded(False)
@@ -1263,8 +1371,8 @@ class TaurusDevTree(TaurusTreeNodeContainer, Qt.QTreeWidget, TaurusBaseWidget):
                 #node.ContextMenu.append(("Expand Node", self.expandNode))
                 #node.ContextMenu.append(("Collapse Node", self.collapseNode))
                 if node.isExpanded() and node.childCount() < 10 and all(self.getNodeText(node.child(j)).count('/') == 2 for j in range(node.childCount())):
-                    node.ContextMenu.append(("Show Attributes", lambda n=node, s=self: [
-                                            s.addAttrToNode(n.child(j)) for j in range(n.childCount())]))
+                    node.ContextMenu.append(("Show Attributes", lambda n=node, s=self: s.loadAttributes(
+                                            [n.child(j) for j in range(n.childCount())])))
                 node.ContextMenu.append(("Search ...",
                                          lambda: self.findInTree(str(Qt.QInputDialog.getText(
                                              self, 'Search ...', 'Write a part of the name', Qt.QLineEdit.Normal)[0]))
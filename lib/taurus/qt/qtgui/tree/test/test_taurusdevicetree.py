@@ -0,0 +1,155 @@
+#!/usr/bin/env python
+
+#############################################################################
+##
+# This file is part of Taurus
+##
+# http://taurus-scada.org
+##
+# Copyright 2011 CELLS / ALBA Synchrotron, Bellaterra, Spain
+##
+# Taurus is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+##
+# Taurus is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+##
+# You should have received a copy of the GNU Lesser General Public License
+# along with Taurus.  If not, see <http://www.gnu.org/licenses/>.
+##
+#############################################################################
+
+"""Test for taurus.qt.qtgui.tree.taurusdevicetree"""
+
+#__all__ = []
+
+__docformat__ = 'restructuredtext'
+
+import re
+import time
+import threading
+import PyTango
+from taurus.external import unittest
+from taurus.test import insertTest
+from taurus.qt.qtgui.test import BaseWidgetTestCase
+from taurus.qt.qtgui.tree.taurusdevicetree import TaurusDevTree
+from taurus.core.tango.search import AttributeListLoader, extend_regexp
+
+
+class _AttrInfo(object):
+
+    def __init__(self, name):
+        self.name = self.label = name
+        self.data_type = PyTango.DevDouble
+        self.disp_level = PyTango.DispLevel.OPERATOR
+
+
+class _Proxies(object):
+    '''A factory of (stub) device proxies which count the queries of their
+    attribute lists'''
+
+    def __init__(self, attrs, delay=0.01):
+        self.attrs = attrs
+        self.delay = delay
+        self.queried = []
+        self.lock = threading.Lock()
+
+    def getProxy(self, name):
+        return self
+
+    def attribute_list_query(self):
+        time.sleep(self.delay)
+        with self.lock:
+            self.queried.append(1)
+        return [_AttrInfo(a) for a in self.attrs]
+
+
+@insertTest(helper_name='search', regexp='d07/f03/m042')
+@insertTest(helper_name='search', regexp='m042')
+@insertTest(helper_name='search', regexp='d1*/f0[12]/m00*')
+@insertTest(helper_name='search', regexp='f05')
+@insertTest(helper_name='search', regexp='nosuchnode')
+class TaurusDevTreeTestCase(BaseWidgetTestCase, unittest.TestCase):
+    '''Test for TaurusDevTree with a synthetic tree of 30000 devices'''
+
+    _klass = TaurusDevTree
+
+    def setUp(self):
+        BaseWidgetTestCase.setUp(self)
+        self.proxies = _Proxies(['a1', 'a2', 'a3'])
+        self._widget._attrLoader = AttributeListLoader(
+            getProxy=self.proxies.getProxy, workers=8)
+        dct = {}
+        for d in range(30):
+            for f in range(10):
+                dct.setdefault('d%02d' % d, {})['f%02d' % f] = dict.fromkeys(
+                    'd%02d/f%02d/m%03d' % (d, f, m) for m in range(100))
+        self._widget.setTree(dct, clear=True)
+
+    def _scan(self, regexp):
+        '''matches all the nodes (as getMatchingNodes did without index)'''
+        regexp = re.compile(extend_regexp(str(regexp).lower()))
+        tree = self._widget
+        return [node for k, node in tree.item_index.iteritems()
+                if regexp.match(k) or
+                regexp.match(tree.getNodeText(node, full=True).lower())]
+
+    def _wait(self, n, timeout=10):
+        t0 = time.time()
+        while len(self.proxies.queried) < n and time.time() - t0 < timeout:
+            time.sleep(0.01)
+        time.sleep(0.05)  # (to detect extra queries)
+        self._app.processEvents()
+
+    def search(self, regexp):
+        '''the indexed search finds the same nodes as matching all nodes'''
+        tree = self._widget
+        self.assertEqual(len(tree.item_index), 30330)
+        found = tree.getMatchingNodes(regexp, all=True)
+        self.assertEqual(set(found), set(self._scan(regexp)))
+
+    def test_candidates(self):
+        '''only the nodes which contain the required text are matched'''
+        self.assertEqual(len(self._widget._getCandidateNodes('m042')), 300)
+
+    def test_loadAttributes(self):
+        '''the attributes of the expanded devices are requested at once'''
+        tree = self._widget
+        nodes = tree.getMatchingNodes('d00/f00/m0*', all=True)
+        self.assertEqual(len(nodes), 100)
+        for node in nodes:
+            node.setExpanded(True)
+        tree.loadAttributes()
+        # (repeated requests while loading)
+        tree.loadAttributes()
+        tree.addAttrToNode(nodes[0])
+        tree.loadAttributes(nodes[:10])
+        self._wait(100)
+        self.assertEqual(len(self.proxies.queried), 100)
+        for node in nodes:
+            self.assertEqual([str(node.child(i).text(0))
+                              for i in range(node.childCount())],
+                             ['a1', 'a2', 'a3'])
+        # the attribute lists are cached
+        tree.loadAttributes(nodes)
+        self._app.processEvents()
+        self.assertEqual(len(self.proxies.queried), 100)
+        self.assertEqual(nodes[0].childCount(), 3)
+
+    def test_queueExpand(self):
+        '''the repeated expansions of a node are merged'''
+        tree = self._widget
+        node = tree.getNode('d03/f04/m005')
+        tree.Expander.clear()
+        tree._queueExpand(node.parentNode, True)
+        tree._queueExpand(node.parentNode, False)
+        tree._queueExpand(node.parentNode, True)
+        self.assertEqual(tree.Expander.size(), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
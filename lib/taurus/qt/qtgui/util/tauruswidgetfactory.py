@@ -38,6 +38,8 @@ from taurus.external.qt import Qt
 
 from taurus.core.util.log import Logger
 from taurus.core.util.singleton import Singleton
+from taurus.core.util.registrycache import (getFilesKey, loadRegistry,
+                                            importObject)
 
 import taurus.qt.qtgui.base
 
@@ -78,9 +80,17 @@ class TaurusWidgetFactory(Singleton, Logger):
         from taurus.qt.qtgui.util import TaurusWidgetFactory
 
         wf = TaurusWidgetFactory()
-        print wf.getTaurusWidgetClassNames()"""
+        print wf.getTaurusWidgetClassNames()
+
+    The widgets found in taurus are registered in a cached registry (see the
+    REGISTRY_CACHE option of tauruscustomsettings), so that their modules are
+    only imported when they are used (e.g. by :meth:`getWidgetClass`). The
+    registry is only rebuilt (importing all the modules) when the files of
+    taurus.qt.qtgui change."""
 
     skip_modules = ('widget', 'util', 'qtdesigner', 'uic')
+    #: name of the (cached) registry of the widgets of taurus.qt.qtgui
+    WIDGET_REGISTRY = 'taurus.qt.qtgui.widgets'
 
     def __init__(self):
         """ Initialization. Nothing to be done here for now."""
@@ -91,11 +101,77 @@ class TaurusWidgetFactory(Singleton, Logger):
         self.call__init__(Logger, name)
 
         path = os.path.dirname(os.path.abspath(__file__))
-        path, tail = os.path.split(path)
-        self._taurus_widgets, self._qt_widgets = self._buildWidgets(
-            'taurus.qt.qtgui', path)
+        self._path, tail = os.path.split(path)
+        # imported widgets (dict<str, (str, class)>)
+        self._taurus_widgets, self._qt_widgets = {}, {}
+        # result of the full scan, if done (see _loadRegistry)
+        self._scanned = None
+        self._registry = self._loadRegistry()
         self._addExtraTaurusWidgets(self._taurus_widgets, self._qt_widgets)
 
+    def _loadRegistry(self, rebuild=False):
+        """returns the registry of the widgets of taurus.qt.qtgui, doing a
+        full scan (see :meth:`_buildWidgets`) only if it is not cached
+
+        :param rebuild: (bool) if True, the full scan is done even if the
+                        registry is cached
+
+        :return: (dict<str, (str, bool)>) the package of each widget name and
+                 whether it is a taurus widget
+        """
+        def build():
+            taurus_ret, qt_ret = self._buildWidgets('taurus.qt.qtgui',
+                                                    self._path)
+            self._scanned = taurus_ret, qt_ret
+            self._qt_widgets.update(qt_ret)
+            self._taurus_widgets.update(taurus_ret)
+            return dict([(name, (package, name in taurus_ret))
+                         for name, (package, klass) in qt_ret.items()])
+
+        from taurus import tauruscustomsettings
+        if not getattr(tauruscustomsettings, 'REGISTRY_CACHE', True):
+            return build()
+        key = getFilesKey([self._path], skip=self.skip_modules)
+        return loadRegistry(self.WIDGET_REGISTRY, key, build, rebuild=rebuild)
+
+    def _getWidget(self, name):
+        """returns the package and class of the given widget, importing its
+        module if it was not imported yet
+
+        :param name: (str) the widget (class) name
+        :return: (str, class) the package and the class
+
+        :raises: KeyError if the widget is not found
+        """
+        widget = self._qt_widgets.get(name)
+        if widget is not None:
+            return widget
+        package, is_taurus = self._registry.get(name, (None, False))
+        klass = None
+        if package is not None:
+            try:
+                klass = importObject(package, name)
+            except Exception:
+                self.debug('Failed to import %s from %s', name, package)
+                self.debug('Details:', exc_info=1)
+        if klass is None:
+            if self._scanned is None:
+                # unknown widget (or outdated registry): do a full scan
+                self._registry = self._loadRegistry(rebuild=True)
+            return self._qt_widgets[name]
+        widget = self._qt_widgets[name] = package, klass
+        if is_taurus:
+            self._taurus_widgets[name] = widget
+        return widget
+
+    def _importWidgets(self):
+        """imports the modules of all the registered widgets"""
+        for name in self._registry:
+            try:
+                self._getWidget(name)
+            except KeyError:
+                pass
+
     def _buildWidgets(self, module_name, path, recursive=True):
         import taurus.qt.qtgui.base
 
@@ -190,25 +266,33 @@ class TaurusWidgetFactory(Singleton, Logger):
                     pass
 
     def getWidgets(self):
+        self._importWidgets()
         return self._qt_widgets
 
     def getTaurusWidgets(self):
+        self._importWidgets()
         return self._taurus_widgets
 
     def getWidgetClassNames(self):
-        return self._qt_widgets.keys()
+        names = set(self._registry)
+        names.update(self._qt_widgets)
+        return list(names)
 
     def getWidgetClasses(self):
-        return [klass for mod_name, klass in self._qt_widgets.values()]
+        return [klass for mod_name, klass in self.getWidgets().values()]
 
     def getWidgetClass(self, name):
-        return self._qt_widgets[name][1]
+        return self._getWidget(name)[1]
 
     def getTaurusWidgetClassNames(self):
-        return self._taurus_widgets.keys()
+        names = set([name for name, (package, is_taurus)
+                     in self._registry.items() if is_taurus])
+        names.update(self._taurus_widgets)
+        return list(names)
 
     def getTaurusWidgetClasses(self):
-        return [klass for mod_name, klass in self._taurus_widgets.values()]
+        return [klass for mod_name, klass in self.getTaurusWidgets().values()]
 
     def getTaurusWidgetClass(self, name):
-        return self._taurus_widgets.get(name)[1]
+        self._getWidget(name)
+        return self._taurus_widgets[name][1]
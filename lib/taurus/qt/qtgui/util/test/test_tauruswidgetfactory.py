@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+
+#############################################################################
+##
+# This file is part of Taurus
+##
+# http://taurus-scada.org
+##
+# Copyright 2011 CELLS / ALBA Synchrotron, Bellaterra, Spain
+##
+# Taurus is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+##
+# Taurus is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+##
+# You should have received a copy of the GNU Lesser General Public License
+# along with Taurus.  If not, see <http://www.gnu.org/licenses/>.
+##
+#############################################################################
+
+"""Test for taurus.qt.qtgui.util.tauruswidgetfactory"""
+
+#__all__ = []
+
+__docformat__ = 'restructuredtext'
+
+from taurus.external import unittest
+from taurus.test import skipUnlessGui
+
+
+@skipUnlessGui()
+class TaurusWidgetFactoryTestCase(unittest.TestCase):
+    '''Test for the (cached) registry of TaurusWidgetFactory'''
+
+    def setUp(self):
+        from taurus.qt.qtgui.application import TaurusApplication
+        from taurus.qt.qtgui.util import TaurusWidgetFactory
+        app = TaurusApplication.instance()
+        if app is None:
+            app = TaurusApplication([])
+        self._app = app
+        self.wf = TaurusWidgetFactory()
+        self.taurus_ret, self.qt_ret = self.wf._buildWidgets(
+            'taurus.qt.qtgui', self.wf._path)
+
+    def test_names(self):
+        '''the registered widgets are the widgets found by a full scan'''
+        self.assertEqual(sorted(self.wf.getWidgetClassNames()),
+                         sorted(self.qt_ret))
+        self.assertEqual(sorted(self.wf.getTaurusWidgetClassNames()),
+                         sorted(self.taurus_ret))
+        self.assertEqual(self.wf._loadRegistry(),
+                         self.wf._loadRegistry(rebuild=True))
+
+    def test_classes(self):
+        '''the widget classes are the classes found by a full scan'''
+        from taurus.qt.qtgui.display import TaurusLabel
+        self.assertTrue(self.wf.getWidgetClass('TaurusLabel') is TaurusLabel)
+        self.assertTrue(self.wf.getTaurusWidgetClass('TaurusLabel')
+                        is TaurusLabel)
+        widgets = self.wf.getWidgets()
+        for name, (package, klass) in self.qt_ret.items():
+            self.assertEqual(widgets[name], (package, klass))
+        self.assertRaises(KeyError, self.wf.getWidgetClass, 'NoSuchWidget')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -50,6 +50,12 @@ T_FORM_CUSTOM_WIDGET_MAP = \
 # True sets the preferred mode of TaurusForms to use "compact" widgets
 T_FORM_COMPACT = False
 
+# Background loading of TaurusForms
+# True makes TaurusForms create the taurus objects of their models (and get
+# the classes of their devices) in a background thread, showing a placeholder
+# until the items can be created without blocking
+T_FORM_BACKGROUND_LOADING = True
+
 # Strict RFC3986 URI names in models
 # True makes Taurus only use the strict URI names
 # False enables a backwards-compatibility mode for pre-sep3 model names
@@ -68,6 +74,12 @@ DEFAULT_SCHEME = "tango"
 # providing support to new schemes
 # EXTRA_SCHEME_MODULES = ['myownschememodule']
 
+# Registry cache: 1=Active (default), 0=disabled.
+# The scheme plugins and the widgets found in taurus are registered in the
+# .taurus dir of the user home (so that they are imported only when used),
+# and the registry is only rebuilt when the files of taurus change
+REGISTRY_CACHE = 1
+
 # ----------------------------------------------------------------------------
 # PLY (lex/yacc) optimization: 1=Active (default) , 0=disabled.
 # Set PLY_OPTIMIZE = 0 if you are getting yacc exceptions while loading
@@ -76,6 +88,25 @@ DEFAULT_SCHEME = "tango"
 
 PLY_OPTIMIZE = 1
 
+# ----------------------------------------------------------------------------
+# JDraw cache: 1=Active (default), 0=disabled.
+# The parsed synoptics are cached in the .taurus dir of the user home, so
+# that they are not parsed again unless they change
+# ----------------------------------------------------------------------------
+
+JDRAW_CACHE = 1
+
+# ----------------------------------------------------------------------------
+# Trends
+# ----------------------------------------------------------------------------
+
+# Directory in which TaurusTrends store their histories (in chunks of files
+# that are memory-mapped, keeping only the most recent points in memory).
+# None (or not set) keeps the whole history in memory (limited by the max
+# buffer size of each trend)
+# T_TREND_HISTORY_DIR = '/tmp/taurustrends'
+T_TREND_HISTORY_DIR = None
+
 # ----------------------------------------------------------------------------
 # Taurus namespace
 # ----------------------------------------------------------------------------
@@ -31,10 +31,11 @@ from __future__ import print_function
 __docformat__ = "restructuredtext"
 
 import os.path
+import numpy
 
 from tornado.web import Application, RequestHandler, StaticFileHandler
 from tornado.websocket import WebSocketHandler
-from tornado.escape import json_encode, json_decode
+from tornado.escape import json_decode
 
 from taurus import Authority, Device, Attribute, Configuration, Object
 from taurus.core.taurusauthority import TaurusAuthority
@@ -42,8 +43,9 @@ from taurus.core.taurusdevice import TaurusDevice
 from taurus.core.taurusattribute import TaurusAttribute
 from taurus.core.taurusconfiguration import TaurusConfiguration
 from taurus.core.taurusbasetypes import AttrQuality, TaurusEventType, DataFormat
-from taurus.core.tango.tangovalidator import TangoAttributeNameValidator, TangoConfigurationNameValidator
+from taurus.core.tango.tangovalidator import TangoAttributeNameValidator
 from taurus.core.util.colors import ATTRIBUTE_QUALITY_PALETTE
+from taurus.web.webhub import FRAME_FORMATS, TaurusWebFrame, TaurusWebHub
 
 # ugly import to properly manage Tango exceptions
 import PyTango
@@ -60,12 +62,13 @@ class TaurusWebAttribute(object):
     """This object is a listener for the taurus attribute value.
     When a attribute changes it sends an event. The event
     triggers a call to *eventReceived*. *eventReceived* will transform
-    the change event into a JSON encoded string and sends this
-    string through the web socket to the client"""
+    the change event into a :class:`TaurusWebFrame` and publishes this
+    frame through the hub to all the web sockets subscribed to the model"""
 
-    def __init__(self, ws, name):
+    def __init__(self, hub, name):
         self.name = name
-        self.ws = ws
+        self.hub = hub
+        self.last_frame = None
         self.attribute.addListener(self)
 
     @property
@@ -73,19 +76,24 @@ class TaurusWebAttribute(object):
         return Attribute(self.name)
 
     def eventReceived(self, evt_src, evt_type, evt_value):
-        """Transforms the event into a JSON encoded string and sends this
-        string into the web socket
+        """Transforms the event into a frame and publishes it through the hub
 
-        The JSON encoded string is a JSON object which contains the members:
+        The frame is a JSON object (or the header of a binary frame) which
+        contains the members:
             - model : a string identification of the attribute which changed
             - html : the new attribute value
+            - value : the new attribute value (for binary frames, array values
+                      are sent in the payload instead)
             - css : a hint on the style that should be applied (background color
                     according to the attribute quality)
+            - quality : the name of the attribute quality
+            - time : the timestamp of the value
 
         In case of an error the html member will contain the exception information.
         The stylesheet will be white font with violet background."""
         modelObj = evt_src
         data = {}
+        array = None
         if evt_type == TaurusEventType.Error:
             data['css'] = {'color': 'white', 'background-color': 'violet'}
             html = value = error_str(evt_value)
@@ -99,29 +107,28 @@ class TaurusWebAttribute(object):
             bg, fg = ATTRIBUTE_QUALITY_PALETTE.rgb_pair(quality)
             bg, fg = "rgb{0}".format(bg), "rgb{0}".format(fg)
             data['css'] = {'color': fg, 'background-color': bg}
+            data['quality'] = quality.name
+            if valueObj.time is not None:
+                data['time'] = valueObj.time.totime()
             fmt = valueObj.data_format
             if fmt == DataFormat._0D:
                 html = modelObj.displayValue(value)
                 if isinstance(value, PyTango._PyTango.DevState):
                     value = int(value)
             elif fmt in (DataFormat._1D, DataFormat._2D):
-                # bad, very bad performance! Don't worry for now
-                value = value.tolist()
+                # the array is encoded by the frame (as a list or as binary)
+                array, value = numpy.asarray(value), None
                 html = "[...]"
                 # html = str(value)
-        data['value'] = value
+        if array is None:
+            data['value'] = value
         data['html'] = html
         data['model'] = modelObj.getNormalName()
-        try:
-            json_data = json_encode(data)
-        except TypeError as te:
-            data['css'] = {'color': 'white', 'background-color': 'violet'}
-            data['html'] = data['value'] = str(te)
-            json_data = json_encode(data)
-        self.write_message(json_data)
+        self.last_frame = TaurusWebFrame(data, array, self.last_frame)
+        self.write_message(self.last_frame)
 
     def write_message(self, message):
-        return self.ws.write_message(message)
+        return self.hub.publish(self.name, message)
 
     def clear(self):
         self.attribute.removeListener(self)
@@ -131,22 +138,22 @@ class TaurusWebConfiguration(object):
     """This object is a listener for the taurus attribute configuration.
     When a attribute configuration changes it sends an event. The event
     triggers a call to *eventReceived*. *eventReceived* will transform
-    the configuration event into a JSON encoded string and sends this
-    string through the web socket to the client"""
+    the configuration event into a :class:`TaurusWebFrame` and publishes this
+    frame through the hub to all the web sockets subscribed to the model"""
 
-    def __init__(self, ws, name):
+    def __init__(self, hub, name):
         self.name = name
-        tcValidator = TangoConfigurationNameValidator()
-        self.param = tcValidator.getUriGroups(name)['cfgkey']
-        self.ws = ws
+        groups = TangoAttributeNameValidator().getUriGroups(name)
+        self.param = groups['fragment']
+        self.hub = hub
         self.configuration = Configuration(self.name)
         self.configuration.addListener(self)
 
     def eventReceived(self, evt_src, evt_type, evt_value):
-        """Transforms the event into a JSON encoded string and sends this
-        string into the web socket
+        """Transforms the event into a frame and publishes it through the hub
 
-        The JSON encoded string is a JSON object which contains the members:
+        The frame is a JSON object (or the header of a binary frame) which
+        contains the members:
             - model : a string identification of the attribute configuration
                       which as changed
             - html : the new attribute configuration value
@@ -167,21 +174,68 @@ class TaurusWebConfiguration(object):
 
         # data['css']['font-size'] = "24pt";
         data['model'] = self.name
-        json_data = json_encode(data)
-        self.write_message(json_data)
+        self.write_message(TaurusWebFrame(data))
 
     def write_message(self, message):
-        return self.ws.write_message(message)
+        return self.hub.publish(self.name, message)
 
     def clear(self):
         self.configuration.removeListener(self)
 
 
+def create_listener(hub, model_name):
+    """Returns a new listener for the given model (or None if the model is
+    not supported). It is the listener factory of the hub of the
+    :class:`TaurusSocket` (see :class:`TaurusWebHub`)"""
+    groups = TangoAttributeNameValidator().getUriGroups(model_name)
+    if groups is None:
+        return None
+    if groups.get('fragment'):  # e.g. "a/b/c/d#label"
+        return TaurusWebConfiguration(hub, model_name)
+    return TaurusWebAttribute(hub, model_name)
+
+
 class TaurusSocket(WebSocketHandler):
 
+    #: the hub shared by all the TaurusSockets (created on demand)
+    hub = None
+
+    #: the format of the frames sent to the client (one of FRAME_FORMATS)
+    frame_format = 'json'
+
+    #: whether the binary frames sent to the client may be delta encoded
+    frame_delta = False
+
+    @classmethod
+    def get_hub(cls):
+        if cls.hub is None:
+            cls.hub = TaurusWebHub(listener_factory=create_listener)
+        return cls.hub
+
     def open(self):
         self.models = set()
 
+    def set_frame_format(self, frame_format, delta=False):
+        """Sets the format of the frames sent to the client
+
+        :param frame_format: (str) one of :data:`FRAME_FORMATS`
+        :param delta: (bool) whether binary frames may be delta encoded (the
+                      client must then keep the last array of each model)
+        """
+        if frame_format not in FRAME_FORMATS:
+            raise ValueError('Unknown frame format: %s' % frame_format)
+        self.frame_format = frame_format
+        self.frame_delta = bool(delta)
+        self.get_hub().get_outbox(self).reset_deltas()
+
+    def set_max_rate(self, max_rate):
+        """Sets the maximum number of frames per second sent to the client
+        for each model
+
+        :param max_rate: (float or None) the rate (None for no limit)
+        """
+        self.get_hub().get_outbox(self).max_rate = max_rate or None
+
     def on_message(self, json_data):
         """Executed when a message comes from the client through the websocket.
 
@@ -195,31 +249,34 @@ class TaurusSocket(WebSocketHandler):
             }
             So far, only attributes and configuration parameters are supported.
 
-            A TaurusWebXXX object will be created for each different model.
-            This object subscribes itself to taurus events. The callback usually
-            transforms such an event into a JSON encoded string which is sent
-            back to the client through this same web socket.
+            The object may also have a *format* member to choose the format
+            of the frames sent to the client ("json" by default, or "binary",
+            see :class:`TaurusWebFrame`), a *delta* member to allow
+            delta encoding of binary frames and a *max_rate* member to limit
+            the number of frames per second sent for each model.
+
+            The web socket is subscribed to each model in the shared
+            :class:`TaurusWebHub`, which creates a single TaurusWebXXX object
+            for each different model. This object subscribes itself to taurus
+            events. The callback usually transforms such an event into a JSON
+            encoded string which is sent back to all the clients subscribed to
+            the model.
+            Sending a new *models* list only changes the subscriptions to the
+            models that were added or removed.
         """
         data = json_decode(json_data)
+        if 'format' in data:
+            self.set_frame_format(data['format'], data.get('delta', False))
+        if 'max_rate' in data:
+            self.set_max_rate(data['max_rate'])
         if 'models' in data:
-            self.clear_models()
-            model_names = set(data['models'])
-            for model_name in model_names:
-                model_name = str(model_name)
-                if TangoAttributeNameValidator().isValid(model_name):
-                    web_model = TaurusWebAttribute(self, model_name)
-                elif TangoConfigurationNameValidator().isValid(model_name):
-                    web_model = TaurusWebConfiguration(self, model_name)
-                else:
-                    continue
-                self.models.add(web_model)
+            self.models = self.get_hub().set_models(self, data['models'])
 
     def on_close(self):
         self.clear_models()
 
     def clear_models(self):
-        for model in self.models:
-            model.clear()
+        self.get_hub().clear_models(self)
         self.models.clear()
 
 
@@ -0,0 +1,102 @@
+#!/usr/bin/env python
+
+#############################################################################
+##
+# This file is part of Taurus
+##
+# http://taurus-scada.org
+##
+# Copyright 2011 CELLS / ALBA Synchrotron, Bellaterra, Spain
+##
+# Taurus is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+##
+# Taurus is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+##
+# You should have received a copy of the GNU Lesser General Public License
+# along with Taurus.  If not, see <http://www.gnu.org/licenses/>.
+##
+#############################################################################
+
+"""Test for taurus.web.taurustornado"""
+
+#__all__ = []
+
+__docformat__ = 'restructuredtext'
+
+import numpy
+from tornado import gen
+from tornado.testing import AsyncHTTPTestCase, gen_test
+from tornado.web import Application
+from tornado.escape import json_encode
+from tornado.websocket import websocket_connect
+
+from taurus.external import unittest
+from taurus.web.taurustornado import (TaurusWebHub, TaurusWebAttribute,
+                                      TaurusSocket)
+from taurus.web.webframes import decode_binary_frame
+from taurus.web.test.test_webhub import _FakeAttribute
+
+
+class _FakeWebAttribute(TaurusWebAttribute):
+
+    attributes = {}
+
+    @property
+    def attribute(self):
+        return self.attributes.setdefault(self.name,
+                                          _FakeAttribute(self.name))
+
+
+def _create_listener(hub, model_name):
+    return _FakeWebAttribute(hub, model_name)
+
+
+class TaurusSocketTestCase(AsyncHTTPTestCase):
+    '''Round trip tests for the taurus.web.taurustornado.TaurusSocket class
+    using the tornado websocket client'''
+
+    def setUp(self):
+        _FakeWebAttribute.attributes = {}
+        AsyncHTTPTestCase.setUp(self)
+        TaurusSocket.hub = TaurusWebHub(io_loop=self.io_loop,
+                                        listener_factory=_create_listener)
+
+    def tearDown(self):
+        TaurusSocket.hub = None
+        AsyncHTTPTestCase.tearDown(self)
+
+    def get_app(self):
+        return Application([(r"/taurus", TaurusSocket)])
+
+    @gen_test
+    def testBinaryRoundTrip(self):
+        '''check the binary frames received by a client'''
+        url = "ws://127.0.0.1:%i/taurus" % self.get_http_port()
+        ws = yield websocket_connect(url)
+        ws.write_message(json_encode(
+            {'format': 'binary', 'delta': True, 'models': ['a/b/c/i']}))
+        image = numpy.arange(120, dtype='>i2').reshape(10, 12)
+        values = [image, image * 2, image * 2]
+        values[2][3, 4] = -1
+        while 'a/b/c/i' not in _FakeWebAttribute.attributes:
+            yield gen.sleep(.01)  # wait for the subscription
+        base = None
+        for value in values:
+            _FakeWebAttribute.attributes['a/b/c/i'].fire(value)
+            message = yield ws.read_message()
+            header, base = decode_binary_frame(message, base=base)
+            self.assertEqual(header['model'], 'a/b/c/i')
+            self.assertEqual(header['quality'], 'ATTR_VALID')
+            self.assertTrue(numpy.array_equal(base, value))
+        self.assertEqual(header['encoding'], 'delta')
+        ws.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
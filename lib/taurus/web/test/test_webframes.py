@@ -0,0 +1,98 @@
+#!/usr/bin/env python
+
+#############################################################################
+##
+# This file is part of Taurus
+##
+# http://taurus-scada.org
+##
+# Copyright 2011 CELLS / ALBA Synchrotron, Bellaterra, Spain
+##
+# Taurus is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+##
+# Taurus is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+##
+# You should have received a copy of the GNU Lesser General Public License
+# along with Taurus.  If not, see <http://www.gnu.org/licenses/>.
+##
+#############################################################################
+"""Test for taurus.web.webframes"""
+
+#__all__ = []
+
+__docformat__ = 'restructuredtext'
+
+import struct
+import numpy
+from taurus.external import unittest
+from taurus.test import insertTest
+from taurus.web.webframes import encode_binary_frame, decode_binary_frame
+
+
+@insertTest(helper_name='checkRoundTrip', value=numpy.arange(10.))
+@insertTest(helper_name='checkRoundTrip', value=numpy.zeros(0))
+@insertTest(helper_name='checkRoundTrip',
+            value=numpy.arange(12, dtype='>i4').reshape(3, 4))
+@insertTest(helper_name='checkRoundTrip', value=numpy.ones((5, 7), 'u1'),
+            encoding='rle')
+@insertTest(helper_name='checkRoundTrip',
+            value=numpy.repeat([1., numpy.nan, 2.], 100), encoding='rle')
+@insertTest(helper_name='checkRoundTrip', value=numpy.array([True, False]))
+@insertTest(helper_name='checkRoundTrip', value=numpy.arange(1000.),
+            base=numpy.arange(1000.) + (numpy.arange(1000) == 500),
+            encoding='delta')
+@insertTest(helper_name='checkRoundTrip', value=numpy.arange(1000.),
+            base=-numpy.arange(1000.), encoding='raw')
+@insertTest(helper_name='checkRoundTrip', value=numpy.arange(10.),
+            base=numpy.arange(9.), encoding='raw')
+class BinaryFrameTestCase(unittest.TestCase):
+    '''TestCase for the binary web frames'''
+
+    def checkRoundTrip(self, value=None, base=None, encoding=None):
+        '''check that the decoded frames are equal to the encoded ones'''
+        header = {'model': 'a/b/c/d', 'quality': 'ATTR_VALID', 'time': 1.5}
+        seqbase = None if base is None else (3, base)
+        frame = encode_binary_frame(header, value, base=seqbase,
+                                    encodings=('rle', 'delta'))
+        h, v = decode_binary_frame(frame, base=base)
+        self.assertEqual(h['model'], 'a/b/c/d')
+        self.assertEqual(h['time'], 1.5)
+        if encoding is not None:
+            self.assertEqual(h['encoding'], encoding)
+        # the payload is aligned
+        n, = struct.unpack('<I', frame[:4])
+        self.assertEqual((4 + n) % 8, 0)
+        self.assertEqual(v.shape, value.shape)
+        self.assertEqual(v.dtype, value.dtype.newbyteorder('<'))
+        same = (v == value) | (numpy.isnan(v) & numpy.isnan(value))
+        self.assertTrue(numpy.all(same))
+
+    def testHeaderOnly(self):
+        '''check frames without payload'''
+        frame = encode_binary_frame({'model': 'x', 'value': 1})
+        self.assertEqual(decode_binary_frame(frame), ({'model': 'x',
+                                                       'value': 1}, None))
+
+    def testUnsupportedDtype(self):
+        '''check that non-numeric arrays are rejected'''
+        self.assertRaises(TypeError, encode_binary_frame, {},
+                          numpy.array(['a', 'b']))
+
+    def testDeltaNeedsBase(self):
+        '''check that delta frames cannot be decoded without a base'''
+        base = numpy.zeros(100)
+        value = base.copy()
+        value[3] = 1
+        frame = encode_binary_frame({}, value, base=(0, base),
+                                    encodings=('delta',))
+        self.assertRaises(ValueError, decode_binary_frame, frame)
+
+
+if __name__ == '__main__':
+    unittest.main()
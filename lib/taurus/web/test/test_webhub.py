@@ -0,0 +1,362 @@
+#!/usr/bin/env python
+
+#############################################################################
+##
+# This file is part of Taurus
+##
+# http://taurus-scada.org
+##
+# Copyright 2011 CELLS / ALBA Synchrotron, Bellaterra, Spain
+##
+# Taurus is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+##
+# Taurus is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+##
+# You should have received a copy of the GNU Lesser General Public License
+# along with Taurus.  If not, see <http://www.gnu.org/licenses/>.
+##
+#############################################################################
+
+"""Test for taurus.web.webhub"""
+
+#__all__ = []
+
+__docformat__ = 'restructuredtext'
+
+import numpy
+from tornado.escape import json_decode
+from tornado.websocket import WebSocketClosedError
+
+from taurus.external import unittest
+from taurus.test import insertTest
+from taurus.core.taurusbasetypes import (AttrQuality, TaurusEventType,
+                                         DataFormat, TaurusTimeVal)
+from taurus.web import webhub
+from taurus.web.webhub import TaurusWebHub, TaurusWebFrame
+from taurus.web.webframes import decode_binary_frame
+
+
+class _FakeValue(object):
+
+    def __init__(self, value):
+        self.value = value
+        self.quality = AttrQuality.ATTR_VALID
+        self.time = TaurusTimeVal.now()
+        if numpy.isscalar(value):
+            self.data_format = DataFormat._0D
+        else:
+            self.data_format = [DataFormat._1D, DataFormat._2D][
+                numpy.ndim(value) - 1]
+
+
+class _FakeAttribute(object):
+    '''A minimal attribute that emits the events on demand'''
+
+    def __init__(self, name):
+        self.name = name
+        self.listeners = []
+        self.valueObj = _FakeValue(0.)
+
+    def addListener(self, listener):
+        self.listeners.append(listener)
+
+    def removeListener(self, listener):
+        self.listeners.remove(listener)
+
+    def getValueObj(self):
+        return self.valueObj
+
+    def getNormalName(self):
+        return self.name
+
+    def displayValue(self, value):
+        return str(value)
+
+    def fire(self, value):
+        self.valueObj = _FakeValue(value)
+        for listener in self.listeners:
+            listener.eventReceived(self, TaurusEventType.Change,
+                                   self.valueObj)
+
+
+class _FakeListener(object):
+    '''Publishes the values of a _FakeAttribute through the hub (as
+    taurus.web.taurustornado.TaurusWebAttribute does with taurus attributes)'''
+
+    attributes = {}
+
+    def __init__(self, hub, name):
+        self.name = name
+        self.hub = hub
+        self.last_frame = None
+        self.attribute = self.attributes.setdefault(name,
+                                                    _FakeAttribute(name))
+        self.attribute.addListener(self)
+
+    def eventReceived(self, evt_src, evt_type, evt_value):
+        data = {'model': self.name, 'quality': evt_value.quality.name}
+        array = None
+        if evt_value.data_format == DataFormat._0D:
+            data['value'] = evt_value.value
+        else:
+            array = numpy.asarray(evt_value.value)
+        self.last_frame = TaurusWebFrame(data, array, self.last_frame)
+        self.hub.publish(self.name, self.last_frame)
+
+    def clear(self):
+        self.attribute.removeListener(self)
+
+
+def _create_listener(hub, model_name):
+    if model_name.startswith('bad'):
+        return None
+    return _FakeListener(hub, model_name)
+
+
+class _ImmediateLoop(object):
+    '''runs the callbacks immediately (as if it was in the IOLoop thread),
+    and the timeouts when the (fake) time is advanced'''
+
+    def __init__(self):
+        self.now = 0.
+        self.timeouts = []
+
+    def add_callback(self, callback, *args, **kwargs):
+        callback(*args, **kwargs)
+
+    def time(self):
+        return self.now
+
+    def call_later(self, delay, callback):
+        timeout = [self.now + delay, callback]
+        self.timeouts.append(timeout)
+        return timeout
+
+    def remove_timeout(self, timeout):
+        self.timeouts.remove(timeout)
+
+    def advance(self, dt):
+        self.now += dt
+        for timeout in [t for t in self.timeouts if t[0] <= self.now]:
+            self.timeouts.remove(timeout)
+            timeout[1]()
+
+
+class _MockFuture(object):
+    '''runs its callbacks as soon as it is resolved'''
+
+    def __init__(self):
+        self.callbacks = []
+
+    def add_done_callback(self, callback):
+        self.callbacks.append(callback)
+
+    def set_result(self, result):
+        for callback in self.callbacks:
+            callback(self)
+
+
+class _MockSocket(object):
+
+    def __init__(self, closed=False, frame_format='json', frame_delta=False,
+                 stalled=False):
+        self.messages = []
+        self.closed = closed
+        self.frame_format = frame_format
+        self.frame_delta = frame_delta
+        self.stalled = stalled
+        self.futures = []
+
+    def write_message(self, message, binary=False):
+        if self.closed:
+            raise WebSocketClosedError()
+        self.messages.append(message)
+        if self.stalled:  # the messages are never flushed (until resumed)
+            future = _MockFuture()
+            self.futures.append(future)
+            return future
+
+    def resume(self):
+        self.stalled = False
+        while self.futures:
+            self.futures.pop(0).set_result(None)
+
+
+@insertTest(helper_name='checkFanOut', nsockets=1)
+@insertTest(helper_name='checkFanOut', nsockets=10)
+class TaurusWebHubTestCase(unittest.TestCase):
+    '''TestCase for the taurus.web.webhub.TaurusWebHub class'''
+
+    def setUp(self):
+        _FakeListener.attributes = {}
+        self.encodeCount = 0
+        self._json_encode = webhub.json_encode
+        webhub.json_encode = self._countingEncode
+        self.hub = TaurusWebHub(io_loop=_ImmediateLoop(),
+                                listener_factory=_create_listener)
+
+    def tearDown(self):
+        webhub.json_encode = self._json_encode
+
+    def _countingEncode(self, data):
+        self.encodeCount += 1
+        return self._json_encode(data)
+
+    def checkFanOut(self, nsockets=None):
+        '''check that there is one listener and one encode per event'''
+        sockets = [_MockSocket() for _ in xrange(nsockets)]
+        for ws in sockets:
+            self.hub.set_models(ws, ['a/b/c/d', 'a/b/c/e'])
+        attr = _FakeListener.attributes['a/b/c/d']
+        self.assertEqual(len(attr.listeners), 1)
+        attr.fire(1.)
+        attr.fire(2.)
+        self.assertEqual(self.encodeCount, 2)
+        for ws in sockets:
+            self.assertEqual(len(ws.messages), 2)
+            self.assertTrue(ws.messages[-1] is sockets[0].messages[-1])
+
+    def testDiff(self):
+        '''check that only the changed subscriptions are touched'''
+        ws1, ws2 = _MockSocket(), _MockSocket()
+        models = self.hub.set_models(ws1, ['a/b/c/d', 'a/b/c/e', 'bad'])
+        self.assertEqual(models, set(['a/b/c/d', 'a/b/c/e']))
+        self.hub.set_models(ws2, ['a/b/c/d'])
+        listener = self.hub.get_listener('a/b/c/d')
+        e = _FakeListener.attributes['a/b/c/e']
+        self.hub.set_models(ws1, ['a/b/c/d', 'a/b/c/f'])
+        self.assertTrue(self.hub.get_listener('a/b/c/d') is listener)
+        self.assertEqual(self.hub.get_listener('a/b/c/e'), None)
+        self.assertEqual(e.listeners, [])
+        self.assertEqual(self.hub.get_models(ws1), set(['a/b/c/d', 'a/b/c/f']))
+        self.hub.clear_models(ws1)
+        self.assertTrue(self.hub.get_listener('a/b/c/d') is listener)
+        self.hub.clear_models(ws2)
+        self.assertEqual(self.hub.get_listener('a/b/c/d'), None)
+        self.assertEqual(self.hub.get_models(ws2), set())
+
+    def testLateSubscriber(self):
+        '''check that new subscribers get the last value'''
+        ws1, ws2 = _MockSocket(), _MockSocket()
+        self.hub.set_models(ws1, ['a/b/c/d'])
+        _FakeListener.attributes['a/b/c/d'].fire(3.)
+        self.hub.set_models(ws2, ['a/b/c/d'])
+        self.assertEqual(ws2.messages, ws1.messages)
+        self.assertEqual(self.encodeCount, 1)
+
+    def testClosedSocket(self):
+        '''check that a closed socket does not affect the others'''
+        ws1, ws2 = _MockSocket(closed=True), _MockSocket()
+        self.hub.set_models(ws1, ['a/b/c/d'])
+        self.hub.set_models(ws2, ['a/b/c/d'])
+        _FakeListener.attributes['a/b/c/d'].fire(4.)
+        self.assertEqual(len(ws2.messages), 1)
+
+    def testFrameFormats(self):
+        '''check that each socket gets the frames in its format'''
+        ws1 = _MockSocket()
+        ws2 = _MockSocket(frame_format='binary')
+        ws3 = _MockSocket(frame_format='binary', frame_delta=True)
+        for ws in (ws1, ws2, ws3):
+            self.hub.set_models(ws, ['a/b/c/s'])
+        attr = _FakeListener.attributes['a/b/c/s']
+        a = numpy.arange(1000.)
+        attr.fire(a)
+        b = a.copy()
+        b[100:110] = -1
+        attr.fire(b)
+        self.assertEqual(json_decode(ws1.messages[-1])['value'], b.tolist())
+        header, value = decode_binary_frame(ws2.messages[-1])
+        self.assertEqual(header['encoding'], 'raw')
+        self.assertTrue(numpy.array_equal(value, b))
+        self.assertTrue(ws2.messages[-1] is not ws3.messages[-1])
+        self.assertTrue(len(ws3.messages[-1]) < len(ws2.messages[-1]) / 10)
+        header, base = decode_binary_frame(ws3.messages[0])
+        header, value = decode_binary_frame(ws3.messages[-1], base=base)
+        self.assertEqual((header['encoding'], header['base']), ('delta', 0))
+        self.assertTrue(numpy.array_equal(value, b))
+        # late subscribers get a full frame
+        ws4 = _MockSocket(frame_format='binary', frame_delta=True)
+        self.hub.set_models(ws4, ['a/b/c/s'])
+        header, value = decode_binary_frame(ws4.messages[-1])
+        self.assertEqual(header['encoding'], 'raw')
+        self.assertTrue(numpy.array_equal(value, b))
+
+
+class TaurusWebOutboxTestCase(unittest.TestCase):
+    '''TestCase for the taurus.web.webhub.TaurusWebOutbox class'''
+
+    def setUp(self):
+        _FakeListener.attributes = {}
+        self.loop = _ImmediateLoop()
+        self.hub = TaurusWebHub(io_loop=self.loop,
+                                listener_factory=_create_listener)
+
+    def testStalledSocket(self):
+        '''check that a stalled socket does not get more than the high water
+        mark, that its queue is bounded and that the newest value wins'''
+        slow, fast = _MockSocket(stalled=True), _MockSocket()
+        models = ['a/b/c/%i' % i for i in xrange(5)]
+        outbox = self.hub.get_outbox(slow)
+        outbox.high_water_mark = 10000
+        self.hub.set_models(slow, models)
+        self.hub.set_models(fast, models)
+        for i in xrange(1000):
+            for m in models:
+                _FakeListener.attributes[m].fire(numpy.zeros(100) + i)
+        stats = outbox.get_stats()
+        self.assertEqual(len(fast.messages), 5000)
+        self.assertTrue(stats['bytes_in_flight'] < 2 * 10000)
+        self.assertTrue(stats['pending'] <= len(models))
+        self.assertEqual(stats['sent'], len(slow.messages))
+        self.assertEqual(stats['sent'] + stats['merged'] + stats['pending'],
+                         5000)
+        slow.resume()
+        self.assertEqual(outbox.get_stats()['bytes_in_flight'], 0)
+        self.assertEqual(len(outbox), 0)
+        for m in models:
+            last = [json_decode(msg) for msg in slow.messages
+                    if json_decode(msg)['model'] == m][-1]
+            self.assertEqual(last['value'], [999.] * 100)
+
+    def testMaxRate(self):
+        '''check that the frames of each model are rate limited'''
+        ws = _MockSocket()
+        outbox = self.hub.get_outbox(ws)
+        outbox.max_rate = 10
+        self.hub.set_models(ws, ['a/b/c/d', 'a/b/c/e'])
+        d = _FakeListener.attributes['a/b/c/d']
+        e = _FakeListener.attributes['a/b/c/e']
+        for i in xrange(100):  # 1 second at 100 Hz
+            d.fire(float(i))
+            if i == 50:
+                e.fire(float(i))
+            self.loop.advance(.01)
+        self.assertTrue(len(ws.messages) <= 12)
+        self.loop.advance(1)
+        self.assertEqual(json_decode(ws.messages[-1])['value'], 99.)
+        self.assertEqual(outbox.get_stats()['pending'], 0)
+
+    def testDiscard(self):
+        '''check that unsubscribing drops the pending frames'''
+        ws = _MockSocket(stalled=True)
+        outbox = self.hub.get_outbox(ws)
+        outbox.high_water_mark = 1
+        self.hub.set_models(ws, ['a/b/c/d'])
+        for i in xrange(3):
+            _FakeListener.attributes['a/b/c/d'].fire(float(i))
+        self.hub.set_models(ws, [])
+        self.assertEqual(outbox.get_stats()['dropped'], 1)
+        self.assertEqual(len(outbox), 0)
+        self.hub.clear_models(ws)
+        self.assertTrue(self.hub.get_outbox(ws) is not outbox)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,201 @@
+#!/usr/bin/env python
+
+#############################################################################
+##
+# This file is part of Taurus
+##
+# http://taurus-scada.org
+##
+# Copyright 2011 CELLS / ALBA Synchrotron, Bellaterra, Spain
+##
+# Taurus is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+##
+# Taurus is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+##
+# You should have received a copy of the GNU Lesser General Public License
+# along with Taurus.  If not, see <http://www.gnu.org/licenses/>.
+##
+#############################################################################
+
+"""
+Binary web socket frames for array values.
+
+A binary frame is made of:
+
+    - the length (N) of the header, as a little-endian uint32
+    - the header: N bytes of a UTF-8 JSON object (padded with spaces so that
+      the payload starts at a multiple of 8 bytes)
+    - the payload (if the header has a *dtype* member): the array data,
+      little-endian, in one of the following encodings (given by the
+      *encoding* member of the header):
+
+        - raw: the array elements (C order)
+        - rle: *runs* uint32 run lengths (plus a zero if *runs* is odd, to keep
+          the alignment) followed by *runs* elements (the value of each run)
+        - delta: *runs* pairs of uint32 (start, length) followed by the
+          elements that changed with respect to a base array (the array of
+          the frame whose *seq* is the *base* member of the header). The
+          elements not in the runs keep the value of the base array
+
+The *shape* member of the header contains the shape of the array.
+"""
+
+__all__ = ["encode_binary_frame", "decode_binary_frame"]
+
+__docformat__ = "restructuredtext"
+
+import json
+import struct
+import numpy
+
+_HEADER_LEN = struct.Struct('<I')
+_ALIGNMENT = 8
+_RUN_DTYPE = numpy.dtype('<u4')
+
+
+def _to_little_endian(array):
+    array = numpy.ascontiguousarray(array)
+    if array.dtype.kind not in 'biuf':
+        raise TypeError('unsupported dtype for binary frames: %s' %
+                        array.dtype)
+    return array.astype(array.dtype.newbyteorder('<'), copy=False)
+
+
+def _same(a, b):
+    '''element-wise equality (NaNs are considered equal)'''
+    eq = a == b
+    if a.dtype.kind == 'f':
+        eq |= numpy.isnan(a) & numpy.isnan(b)
+    return eq
+
+
+def _runs(mask):
+    '''returns the starts and the lengths of the runs of True in mask'''
+    edges = numpy.flatnonzero(numpy.diff(numpy.concatenate(
+        ([False], mask, [False])).astype(numpy.int8)))
+    starts = edges[::2]
+    return starts, edges[1::2] - starts
+
+
+def _rle(flat):
+    '''returns the (lengths, values) run-length encoding of flat'''
+    if not len(flat):
+        return numpy.zeros(0, dtype=_RUN_DTYPE), flat
+    starts = numpy.concatenate(
+        ([0], numpy.flatnonzero(~_same(flat[1:], flat[:-1])) + 1))
+    lengths = numpy.diff(numpy.append(starts, len(flat)))
+    return lengths.astype(_RUN_DTYPE), flat[starts]
+
+
+def _delta(flat, base):
+    '''returns the (runs, values) delta encoding of flat with respect to
+    base'''
+    changed = ~_same(flat, base)
+    starts, lengths = _runs(changed)
+    runs = numpy.column_stack((starts, lengths)).astype(_RUN_DTYPE)
+    return runs.ravel(), flat[changed]
+
+
+def encode_binary_frame(header, array=None, base=None, encodings=('rle',)):
+    '''Returns a binary frame.
+
+    :param header: (dict) the JSON-serializable members of the header. It is
+                   not modified
+    :param array: (numpy.ndarray or None) the array to be sent as payload
+    :param base: (tuple<int, numpy.ndarray> or None) the sequence number and
+                 the array of a frame previously received by the client. If
+                 given (and the array has the same dtype and shape), the
+                 payload may be delta encoded
+    :param encodings: (sequence<str>) the encodings (besides "raw") that may
+                      be used. The smallest resulting payload is sent
+
+    :return: (bytes) the frame
+    '''
+    header = dict(header)
+    payload = []
+    if array is not None:
+        array = _to_little_endian(array)
+        flat = array.ravel()
+        header['dtype'] = array.dtype.str
+        header['shape'] = list(array.shape)
+        header['encoding'] = 'raw'
+        payload = [flat]
+        size = flat.nbytes
+        if 'rle' in encodings:
+            lengths, values = _rle(flat)
+            if lengths.nbytes + values.nbytes < size:
+                header['encoding'] = 'rle'
+                header['runs'] = len(lengths)
+                if len(lengths) % 2:
+                    lengths = numpy.append(lengths, _RUN_DTYPE.type(0))
+                payload = [lengths, values]
+                size = lengths.nbytes + values.nbytes
+        if base is not None and 'delta' in encodings:
+            seq, base_array = base
+            if base_array.dtype == array.dtype and \
+                    base_array.shape == array.shape:
+                runs, values = _delta(flat, base_array.ravel())
+                if runs.nbytes + values.nbytes < size:
+                    header['encoding'] = 'delta'
+                    header['runs'] = len(runs) // 2
+                    header['base'] = seq
+                    payload = [runs, values]
+    header_bytes = json.dumps(header).encode('utf-8')
+    padding = -(_HEADER_LEN.size + len(header_bytes)) % _ALIGNMENT
+    header_bytes += b' ' * padding
+    chunks = [_HEADER_LEN.pack(len(header_bytes)), header_bytes]
+    chunks.extend(p.tobytes() for p in payload)
+    return b''.join(chunks)
+
+
+def decode_binary_frame(frame, base=None):
+    '''Decodes a binary frame (see :func:`encode_binary_frame`).
+
+    :param frame: (bytes) the frame
+    :param base: (numpy.ndarray or None) the array of the frame given by the
+                 *base* member of the header (needed for delta encoded frames)
+
+    :return: (tuple<dict, numpy.ndarray>) the header and the array (None if
+             the frame has no payload)
+    '''
+    n, = _HEADER_LEN.unpack_from(frame, 0)
+    offset = _HEADER_LEN.size + n
+    header = json.loads(frame[_HEADER_LEN.size:offset].decode('utf-8'))
+    if 'dtype' not in header:
+        return header, None
+    dtype = numpy.dtype(str(header['dtype']))
+    shape = tuple(header['shape'])
+    encoding = header['encoding']
+    if encoding == 'raw':
+        array = numpy.frombuffer(frame, dtype=dtype, offset=offset)
+    elif encoding == 'rle':
+        runs = header['runs']
+        lengths = numpy.frombuffer(frame, dtype=_RUN_DTYPE, count=runs,
+                                   offset=offset)
+        values = numpy.frombuffer(frame, dtype=dtype, count=runs,
+                                  offset=offset + 4 * (runs + runs % 2))
+        array = numpy.repeat(values, lengths)
+    elif encoding == 'delta':
+        if base is None:
+            raise ValueError('a base array is needed for delta frames')
+        runs = numpy.frombuffer(frame, dtype=_RUN_DTYPE,
+                                count=2 * header['runs'], offset=offset)
+        values = numpy.frombuffer(frame, dtype=dtype,
+                                  offset=offset + runs.nbytes)
+        array = numpy.array(base, dtype=dtype).ravel()
+        starts = runs[::2].astype(numpy.int64)
+        lengths = runs[1::2].astype(numpy.int64)
+        if len(starts):
+            # indices of all the elements in the runs
+            idx = numpy.repeat(starts - numpy.cumsum(lengths) + lengths,
+                               lengths) + numpy.arange(lengths.sum())
+            array[idx] = values
+    else:
+        raise ValueError('unknown encoding: %s' % encoding)
+    return header, array.reshape(shape)
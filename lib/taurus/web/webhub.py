@@ -0,0 +1,416 @@
+#!/usr/bin/env python
+
+#############################################################################
+##
+# This file is part of Taurus
+##
+# http://taurus-scada.org
+##
+# Copyright 2011 CELLS / ALBA Synchrotron, Bellaterra, Spain
+##
+# Taurus is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+##
+# Taurus is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+##
+# You should have received a copy of the GNU Lesser General Public License
+# along with Taurus.  If not, see <http://www.gnu.org/licenses/>.
+##
+#############################################################################
+
+"""
+The parts of the tornado web server that do not depend on the taurus
+schemes: the frames sent to the web sockets (:class:`TaurusWebFrame`), the
+queue of the frames of each web socket (:class:`TaurusWebOutbox`) and the hub
+that shares the listeners of the models among the web sockets
+(:class:`TaurusWebHub`). The listeners themselves are created by
+:mod:`taurus.web.taurustornado`.
+"""
+
+__all__ = ["FRAME_FORMATS", "TaurusWebFrame", "TaurusWebOutbox",
+           "TaurusWebHub"]
+
+__docformat__ = "restructuredtext"
+
+from collections import OrderedDict
+
+from tornado.ioloop import IOLoop
+from tornado.websocket import WebSocketClosedError
+from tornado.escape import json_encode
+
+from taurus.web.webframes import encode_binary_frame
+
+
+#: the frame formats supported by the web sockets (see :class:`TaurusWebFrame`)
+FRAME_FORMATS = ('json', 'binary')
+
+
+class TaurusWebFrame(object):
+    """An event of a model, ready to be sent to the web sockets. It is
+    encoded on demand in the frame format of each web socket (only once per
+    format, no matter how many web sockets it is sent to):
+
+        - json: a JSON encoded string with the event data. Array values are
+                sent as (nested) lists in the *value* member
+        - binary: a binary frame whose header contains the event data, and
+                  whose payload is the raw array value, if any (see
+                  :mod:`taurus.web.webframes`). If delta encoding is used,
+                  the frame may contain only the differences with the
+                  previous frame of the model
+
+    Each frame of a model gets a sequence number (the *seq* member of the
+    binary frames)."""
+
+    def __init__(self, data, array=None, previous=None):
+        """
+        :param data: (dict) the event data
+        :param array: (numpy.ndarray or None) the array value of the event
+        :param previous: (TaurusWebFrame or None) the previous frame of the
+                         same model
+        """
+        self.data = data
+        self.array = array
+        self.seq = 0 if previous is None else previous.seq + 1
+        if previous is None or previous.array is None:
+            self.base = None
+        else:
+            self.base = previous.seq, previous.array
+        self._encoded = {}
+
+    def encode(self, frame_format='json', delta=False):
+        """Returns the frame encoded in the given format
+
+        :param frame_format: (str) one of :data:`FRAME_FORMATS`
+        :param delta: (bool) if True, the binary frame may be delta encoded
+                      with respect to the previous frame
+
+        :return: (str) the encoded frame"""
+        key = frame_format, delta and self.base is not None
+        try:
+            return self._encoded[key]
+        except KeyError:
+            pass
+        if frame_format == 'json':
+            message = self._encode_json()
+        elif frame_format == 'binary':
+            message = self._encode_binary(delta)
+        else:
+            raise ValueError('Unknown frame format: %s' % frame_format)
+        self._encoded[key] = message
+        return message
+
+    def _encode_json(self):
+        data = dict(self.data)
+        if self.array is not None:
+            # bad performance for big arrays (use binary frames for those)
+            data['value'] = self.array.tolist()
+        try:
+            return json_encode(data)
+        except TypeError as te:
+            data['css'] = {'color': 'white', 'background-color': 'violet'}
+            data['html'] = data['value'] = str(te)
+            return json_encode(data)
+
+    def _encode_binary(self, delta):
+        header = dict(self.data, seq=self.seq)
+        base = self.base if delta else None
+        try:
+            return encode_binary_frame(header, self.array, base=base,
+                                       encodings=('rle', 'delta'))
+        except TypeError:
+            if self.array is not None:
+                # not a numeric array: send it in the header
+                header['value'] = self.array.tolist()
+            try:
+                return encode_binary_frame(header)
+            except TypeError as te:
+                header['css'] = {'color': 'white',
+                                 'background-color': 'violet'}
+                header['html'] = header['value'] = str(te)
+                return encode_binary_frame(header)
+
+
+class TaurusWebOutbox(object):
+    """The queue of the frames to be sent to a web socket.
+
+    Only the latest pending frame of each model is kept: a new frame of a
+    model replaces the pending one (the frames are merged), so a slow client
+    gets the newest values and the memory used by the queue is bounded by
+    the number of models.
+
+    The frames are written as long as the bytes written to the web socket
+    that have not been flushed yet (the bytes in flight) are below the high
+    water mark. Writing is resumed when they are flushed. Optionally, the
+    frames of each model are sent at most *max_rate* times per second.
+
+    The outbox must be used from the IOLoop thread."""
+
+    #: default maximum number of bytes in flight
+    HIGH_WATER_MARK = 1024 * 1024
+
+    def __init__(self, ws, io_loop, high_water_mark=None, max_rate=None):
+        """
+        :param ws: (WebSocketHandler) the web socket
+        :param io_loop: (IOLoop) the IOLoop of the web socket
+        :param high_water_mark: (int) maximum number of bytes in flight
+                                (HIGH_WATER_MARK by default)
+        :param max_rate: (float) maximum number of frames per second of each
+                         model (None for no limit)
+        """
+        if high_water_mark is None:
+            high_water_mark = self.HIGH_WATER_MARK
+        self.ws = ws
+        self.io_loop = io_loop
+        self.high_water_mark = high_water_mark
+        self.max_rate = max_rate
+        self.bytes_in_flight = 0
+        self.sent_count = 0  # frames written
+        self.merged_count = 0  # pending frames replaced by newer ones
+        self.dropped_count = 0  # pending frames discarded (and failed writes)
+        self._pending = OrderedDict()  # model name -> frame
+        self._sent_seqs = {}  # model name -> seq of the last binary frame
+        self._last_sent = {}  # model name -> time of the last frame
+        self._timeout = None
+
+    def __len__(self):
+        return len(self._pending)
+
+    def get_stats(self):
+        """Returns the counters of the outbox
+
+        :return: (dict) with the sent, merged and dropped frame counts, the
+                 number of pending frames and the number of bytes in flight
+        """
+        return dict(sent=self.sent_count, merged=self.merged_count,
+                    dropped=self.dropped_count, pending=len(self._pending),
+                    bytes_in_flight=self.bytes_in_flight)
+
+    def put(self, model_name, frame):
+        """Queues the given frame of the given model (replacing its pending
+        frame, if any) and writes as many pending frames as possible"""
+        if model_name in self._pending:
+            self.merged_count += 1
+        self._pending[model_name] = frame
+        self.flush()
+
+    def discard(self, model_name):
+        """Forgets the given model (its pending frame is dropped)"""
+        if self._pending.pop(model_name, None) is not None:
+            self.dropped_count += 1
+        self._sent_seqs.pop(model_name, None)
+        self._last_sent.pop(model_name, None)
+
+    def clear(self):
+        """Drops all the pending frames"""
+        for model_name in list(self._pending):
+            self.discard(model_name)
+        if self._timeout is not None:
+            self.io_loop.remove_timeout(self._timeout)
+            self._timeout = None
+
+    def reset_deltas(self):
+        """Forgets the frames sent, so that the next frames are not delta
+        encoded"""
+        self._sent_seqs.clear()
+
+    def flush(self):
+        """Writes the pending frames while the bytes in flight are below the
+        high water mark (and the maximum rate allows it)"""
+        if self.max_rate:
+            now = self.io_loop.time()
+            min_period = 1. / self.max_rate
+        wait = None
+        for model_name in list(self._pending):
+            if model_name not in self._pending:
+                continue  # already written (by a nested flush)
+            if self.bytes_in_flight >= self.high_water_mark:
+                return  # resumed when the bytes in flight are flushed
+            if self.max_rate:
+                last = self._last_sent.get(model_name)
+                if last is not None and now - last < min_period:
+                    remaining = last + min_period - now
+                    wait = remaining if wait is None else min(wait, remaining)
+                    continue
+                self._last_sent[model_name] = now
+            self._write(model_name, self._pending.pop(model_name))
+        if wait is not None and self._timeout is None:
+            self._timeout = self.io_loop.call_later(wait, self._on_timeout)
+
+    def _on_timeout(self):
+        self._timeout = None
+        self.flush()
+
+    def _write(self, model_name, frame):
+        frame_format = getattr(self.ws, 'frame_format', 'json')
+        if frame_format == 'binary':
+            # delta encode only if the client has got the previous frame
+            delta = getattr(self.ws, 'frame_delta', False) and \
+                self._sent_seqs.get(model_name) == frame.seq - 1
+            self._sent_seqs[model_name] = frame.seq
+        else:
+            delta = False
+            self._sent_seqs.pop(model_name, None)
+        message = frame.encode(frame_format, delta)
+        try:
+            future = self.ws.write_message(message,
+                                           binary=frame_format == 'binary')
+        except WebSocketClosedError:
+            # it will be unsubscribed in its on_close
+            self.dropped_count += 1
+            return
+        self.sent_count += 1
+        if future is not None:  # resolved when the message is flushed
+            size = len(message)
+            self.bytes_in_flight += size
+            future.add_done_callback(lambda f: self._on_flushed(size))
+
+    def _on_flushed(self, size):
+        self.bytes_in_flight -= size
+        if self._pending:
+            self.flush()
+
+
+class TaurusWebHub(object):
+    """Shares the taurus listeners among all the web sockets.
+
+    Only one listener (a TaurusWebXXX object) is created for each model, no
+    matter how many web sockets are subscribed to it, so each event is
+    encoded only once. The listener publishes the encoded string (the frame)
+    through the hub, which hands the same frame to all the web sockets
+    subscribed to the model from the IOLoop thread (events are received in
+    taurus threads, and tornado is not thread safe). The frames are queued
+    in a :class:`TaurusWebOutbox` for each web socket (so slow clients do not
+    delay the others), and encoded in the format requested by each web
+    socket (its *frame_format* and *frame_delta* members, see
+    :meth:`taurus.web.taurustornado.TaurusSocket.set_frame_format`).
+
+    The listeners are created by the *listener_factory* given to the hub: a
+    callable that receives the hub and a model name and returns a listener
+    for the model (or None if the model is not supported). The listeners
+    must publish their frames with :meth:`publish` and must have a *clear*
+    method, which is called when no web socket is subscribed to the model
+    anymore.
+
+    Except :meth:`publish`, the methods of the hub must be called from the
+    IOLoop thread."""
+
+    def __init__(self, io_loop=None, listener_factory=None):
+        """
+        :param io_loop: (IOLoop) the IOLoop of the web sockets (the current
+                        one by default)
+        :param listener_factory: (callable) creates the listener of a model
+                                 (see above). If None, no model is supported
+        """
+        self._io_loop = io_loop
+        self._listener_factory = listener_factory
+        self._listeners = {}  # model name -> listener
+        self._subscribers = {}  # model name -> set of web sockets
+        self._socket_models = {}  # web socket -> set of model names
+        self._last_frames = {}  # model name -> last published frame
+        self._outboxes = {}  # web socket -> outbox
+
+    @property
+    def io_loop(self):
+        if self._io_loop is None:
+            self._io_loop = IOLoop.current()
+        return self._io_loop
+
+    def create_listener(self, model_name):
+        """Returns a new listener for the given model (or None if the model
+        is not supported)"""
+        if self._listener_factory is None:
+            return None
+        return self._listener_factory(self, model_name)
+
+    def get_listener(self, model_name):
+        """Returns the listener of the given model (or None if no web socket
+        is subscribed to it)"""
+        return self._listeners.get(model_name)
+
+    def get_models(self, ws):
+        """Returns the set of model names the given web socket is subscribed
+        to"""
+        return set(self._socket_models.get(ws, ()))
+
+    def set_models(self, ws, model_names):
+        """Subscribes the given web socket to the given models (and
+        unsubscribes it from any other model). Only the differences with the
+        current subscriptions of the web socket are applied: the listeners of
+        the models that are kept are not touched.
+
+        :return: (set<str>) the names of the models the web socket is
+                 subscribed to (unsupported models are ignored)"""
+        self.io_loop  # the hub is bound to the loop of its web sockets
+        new = set(str(model_name) for model_name in model_names)
+        models = self._socket_models.pop(ws, set())
+        for model_name in models - new:
+            self._unsubscribe(ws, model_name)
+        models &= new
+        for model_name in new - models:
+            if self._subscribe(ws, model_name):
+                models.add(model_name)
+        if models:
+            self._socket_models[ws] = models
+        return set(models)
+
+    def clear_models(self, ws):
+        """Unsubscribes the given web socket from all its models and drops
+        its outbox"""
+        self.set_models(ws, ())
+        outbox = self._outboxes.pop(ws, None)
+        if outbox is not None:
+            outbox.clear()
+
+    def get_outbox(self, ws):
+        """Returns the outbox of the given web socket (it is created if
+        needed)"""
+        outbox = self._outboxes.get(ws)
+        if outbox is None:
+            outbox = TaurusWebOutbox(ws, self.io_loop)
+            self._outboxes[ws] = outbox
+        return outbox
+
+    def _subscribe(self, ws, model_name):
+        subscribers = self._subscribers.get(model_name)
+        if subscribers is None:
+            listener = self.create_listener(model_name)
+            if listener is None:
+                return False
+            self._listeners[model_name] = listener
+            self._subscribers[model_name] = subscribers = set()
+        elif model_name in self._last_frames:
+            # the listener is already there: send the current value
+            self._send(ws, model_name, self._last_frames[model_name])
+        subscribers.add(ws)
+        return True
+
+    def _unsubscribe(self, ws, model_name):
+        subscribers = self._subscribers[model_name]
+        subscribers.discard(ws)
+        self.get_outbox(ws).discard(model_name)
+        if not subscribers:
+            del self._subscribers[model_name]
+            self._last_frames.pop(model_name, None)
+            self._listeners.pop(model_name).clear()
+
+    def publish(self, model_name, frame):
+        """Hands the given frame (a :class:`TaurusWebFrame`) to all the web
+        sockets subscribed to the given model. It can be called from any
+        thread."""
+        self.io_loop.add_callback(self._dispatch, model_name, frame)
+
+    def _dispatch(self, model_name, frame):
+        subscribers = self._subscribers.get(model_name)
+        if subscribers is None:  # unsubscribed in the meantime
+            return
+        self._last_frames[model_name] = frame
+        for ws in list(subscribers):
+            self._send(ws, model_name, frame)
+
+    def _send(self, ws, model_name, frame):
+        self.get_outbox(ws).put(model_name, frame)